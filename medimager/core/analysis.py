@@ -1,18 +1,35 @@
 # 处理统计计算 (HU 值统计等) 
 
+import csv
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional, Dict, List, Tuple, Union
+
 import numpy as np
-from typing import Optional, Dict, Union
+
+from medimager.core.histogram import IntensityHistogram
+from medimager.utils.logger import get_logger
+from medimager.utils.settings import get_performance_manager
 
 # These imports will be conditionally available due to the project structure.
 # We expect them to be available when run from the main application.
 try:
     from medimager.core.image_data_model import ImageDataModel
     from medimager.core.roi import BaseROI
+    from medimager.core.volume_roi import VolumeROI
 except ImportError:
     # This allows the module to be imported in contexts where sibling modules aren't available,
     # though the functions will not be usable.
     ImageDataModel = None
     BaseROI = None
+    VolumeROI = None
+
+if TYPE_CHECKING:
+    from medimager.core.roi_table import ROITable
+
+logger = get_logger(__name__)
 
 
 def calculate_roi_statistics(model: 'ImageDataModel', roi: 'BaseROI') -> Optional[Dict[str, float]]:
@@ -35,19 +52,908 @@ def calculate_roi_statistics(model: 'ImageDataModel', roi: 'BaseROI') -> Optiona
         return None
 
     height, width = slice_data.shape
-    mask = roi.get_mask(height, width)
-
-    # Check if the mask covers any pixels
-    if not np.any(mask):
+    # Only the ROI's bounding box is rasterized; pixels are read through a view of it
+    local = roi.get_local_mask(height, width)
+    if local is None:
         return None
+    bbox, mask = local
 
-    pixels_in_roi = slice_data[mask]
+    pixels_in_roi = slice_data[bbox][mask]
+    if pixels_in_roi.size == 0:
+        return None
 
     stats = {
         "max": float(np.max(pixels_in_roi)),
         "min": float(np.min(pixels_in_roi)),
         "mean": float(np.mean(pixels_in_roi)),
         "std": float(np.std(pixels_in_roi)),
-        "count": int(np.sum(mask))
+        "count": int(pixels_in_roi.size)
     }
-    return stats 
\ No newline at end of file
+    return stats
+
+
+def _span_pixel_indices(spans: tuple, width: int) -> np.ndarray:
+    """Flat pixel indices covered by a set of row spans (row-major order)."""
+    row0, starts, stops = spans
+    lengths = stops - starts
+    total = int(lengths.sum())
+    begins = (np.arange(len(starts)) + row0) * width + starts
+    # Each run continues from its begin: repeat (begin - run offset) and add a running counter
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(begins - offsets, lengths) + np.arange(total)
+
+
+def _batch_slice_statistics(slice_data: np.ndarray, rois: List['BaseROI']) -> List[Optional[Dict[str, float]]]:
+    """
+    Statistics of several ROIs on the same slice in one pass over their pixels.
+
+    The ROIs are rasterized into one flat pixel-index array grouped by ROI
+    (overlapping ROIs simply contribute the shared pixels to each group), the
+    pixels are gathered once, and every ROI's reductions come from
+    np.bincount / ufunc.reduceat over that array.
+    """
+    height, width = slice_data.shape
+    results: List[Optional[Dict[str, float]]] = [None] * len(rois)
+    members, index_parts, counts = [], [], []
+    for i, roi in enumerate(rois):
+        spans = roi.get_row_spans(height, width)
+        if spans is None:
+            continue
+        indices = _span_pixel_indices(spans, width)
+        if indices.size:
+            members.append(i)
+            index_parts.append(indices)
+            counts.append(indices.size)
+    if not members:
+        return results
+
+    counts = np.asarray(counts)
+    starts = np.cumsum(counts) - counts
+    labels = np.repeat(np.arange(len(members)), counts)
+    values = np.take(slice_data.ravel(), np.concatenate(index_parts))
+
+    means = np.bincount(labels, weights=values, minlength=len(members)) / counts
+    deviations = values - means[labels]
+    variances = np.bincount(labels, weights=deviations * deviations, minlength=len(members)) / counts
+    minima = np.minimum.reduceat(values, starts)
+    maxima = np.maximum.reduceat(values, starts)
+
+    for k, i in enumerate(members):
+        results[i] = {
+            "max": float(maxima[k]),
+            "min": float(minima[k]),
+            "mean": float(means[k]),
+            "std": float(np.sqrt(variances[k])),
+            "count": int(counts[k])
+        }
+    return results
+
+
+def calculate_batch_roi_statistics(model: 'ImageDataModel',
+                                   rois: List['BaseROI']) -> Dict[str, Optional[Dict[str, float]]]:
+    """
+    Calculates statistics for many ROIs, one vectorized pass per slice.
+
+    Equivalent to calling calculate_roi_statistics for each ROI, but much
+    cheaper when a slice carries many ROIs (e.g. all inserts of a phantom).
+
+    Returns:
+        A dictionary mapping ROI id to its statistics (None if the ROI covers no pixels).
+    """
+    results: Dict[str, Optional[Dict[str, float]]] = {roi.id: None for roi in rois}
+    if not ImageDataModel or not model or model.pixel_array is None:
+        return results
+
+    by_slice: Dict[int, List['BaseROI']] = {}
+    for roi in rois:
+        by_slice.setdefault(roi.slice_index, []).append(roi)
+    for slice_index, slice_rois in by_slice.items():
+        slice_data = model.get_slice_data(slice_index)
+        if slice_data is None:
+            continue
+        for roi, stats in zip(slice_rois, _batch_slice_statistics(slice_data, slice_rois)):
+            results[roi.id] = stats
+    return results
+
+
+def calculate_table_statistics(model: 'ImageDataModel', table: 'ROITable',
+                               max_pixels: int = 1 << 22) -> Dict[str, np.ndarray]:
+    """
+    Calculates statistics for every row of an ROITable as whole columns.
+
+    Row spans of all ROIs on a slice come from one vectorized pass over the
+    geometry columns, so no per-ROI Python work is done. ROIs are processed
+    in chunks of roughly ``max_pixels`` bounding-box pixels to bound memory.
+
+    Returns:
+        A dictionary of arrays aligned with the table rows: count (int64) and
+        mean/std/min/max (float64, NaN for ROIs that cover no pixels).
+    """
+    from medimager.core.roi_table import RECTANGLE, table_row_spans
+
+    size = len(table)
+    results = {"count": np.zeros(size, dtype=np.int64)}
+    for key in ("mean", "std", "min", "max"):
+        results[key] = np.full(size, np.nan)
+    if not ImageDataModel or not model or model.pixel_array is None or size == 0:
+        return results
+
+    shapes, slices, geometry = table.shapes, table.slices, table.geometry
+    # 外接矩形面积，用于划分批次
+    sides = np.where((shapes == RECTANGLE)[:, np.newaxis],
+                     geometry[:, 2:4] - geometry[:, 0:2], 2 * np.abs(geometry[:, 2:4])) + 1
+    area = np.maximum(sides, 1).prod(axis=1)
+
+    for slice_index in np.unique(slices):
+        slice_data = model.get_slice_data(int(slice_index))
+        if slice_data is None:
+            continue
+        height, width = slice_data.shape
+        flat = slice_data.ravel()
+        members = np.flatnonzero(slices == slice_index)
+        chunk_ids = (np.cumsum(area[members]) // max_pixels).astype(np.int64)
+        for chunk in np.split(members, np.flatnonzero(np.diff(chunk_ids)) + 1):
+            owners, rows, starts, stops = table_row_spans(shapes[chunk], geometry[chunk], height, width)
+            lengths = stops - starts
+            nonempty = lengths > 0
+            owners, rows, starts, lengths = owners[nonempty], rows[nonempty], starts[nonempty], lengths[nonempty]
+            if not len(lengths):
+                continue
+            total = int(lengths.sum())
+            offsets = np.cumsum(lengths) - lengths
+            indices = np.repeat(rows * width + starts - offsets, lengths) + np.arange(total)
+            labels = np.repeat(owners, lengths)
+            values = np.take(flat, indices)
+
+            counts = np.bincount(labels, minlength=len(chunk))
+            present = np.flatnonzero(counts)
+            means = np.bincount(labels, weights=values, minlength=len(chunk))[present] / counts[present]
+            mean_of = np.zeros(len(chunk))
+            mean_of[present] = means
+            deviations = values - mean_of[labels]
+            variances = np.bincount(labels, weights=deviations * deviations,
+                                    minlength=len(chunk))[present] / counts[present]
+            # 像素按所属 ROI 连续排列，每组起点即该 ROI 第一个像素
+            group_starts = np.cumsum(counts) - counts
+            rows_out = chunk[present]
+            results["count"][rows_out] = counts[present]
+            results["mean"][rows_out] = means
+            results["std"][rows_out] = np.sqrt(variances)
+            results["min"][rows_out] = np.minimum.reduceat(values, group_starts[present])
+            results["max"][rows_out] = np.maximum.reduceat(values, group_starts[present])
+    return results
+
+
+@dataclass
+class LineProfile:
+    """
+    Intensity profile sampled along a line segment.
+
+    Attributes:
+        positions: Distance of each sample from the start point (in ``unit``).
+        values: Sampled intensities (NaN where the line leaves the image).
+        unit: "mm" when the image has pixel spacing, otherwise "px".
+        width: Width of the averaging band (in ``unit``, 0 for a thin line).
+        start: Start point (row, col) in image coordinates.
+        end: End point (row, col) in image coordinates.
+        spacing: Row/column spacing used to convert ``unit`` to pixels.
+    """
+    positions: np.ndarray
+    values: np.ndarray
+    unit: str
+    width: float
+    start: Tuple[float, float]
+    end: Tuple[float, float]
+    spacing: Tuple[float, float] = (1.0, 1.0)
+
+    @property
+    def length(self) -> float:
+        return float(self.positions[-1]) if len(self.positions) else 0.0
+
+    def to_csv(self, path: str) -> None:
+        """Writes the profile as two columns (distance, value)."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([f"distance_{self.unit}", "value"])
+            for position, value in zip(self.positions.tolist(), self.values.tolist()):
+                writer.writerow([f"{position:.4f}", "" if value != value else f"{value:.4f}"])
+
+
+def sample_bilinear(slice_data: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Samples a 2D array at fractional (row, col) positions with bilinear interpolation.
+
+    Positions are in pixel-centre coordinates (pixel (r, c) is sampled exactly
+    at (r, c)). Samples outside the image are NaN.
+    """
+    height, width = slice_data.shape
+    rows = np.asarray(rows, dtype=np.float64)
+    cols = np.asarray(cols, dtype=np.float64)
+    inside = (rows >= 0) & (rows <= height - 1) & (cols >= 0) & (cols <= width - 1)
+    r0 = np.clip(np.floor(rows), 0, max(height - 2, 0)).astype(np.int64)
+    c0 = np.clip(np.floor(cols), 0, max(width - 2, 0)).astype(np.int64)
+    fr = np.clip(rows - r0, 0.0, 1.0)
+    fc = np.clip(cols - c0, 0.0, 1.0)
+    r1 = np.minimum(r0 + 1, height - 1)
+    c1 = np.minimum(c0 + 1, width - 1)
+    flat = slice_data.ravel()
+    top = np.take(flat, r0 * width + c0) * (1 - fc) + np.take(flat, r0 * width + c1) * fc
+    bottom = np.take(flat, r1 * width + c0) * (1 - fc) + np.take(flat, r1 * width + c1) * fc
+    values = top * (1 - fr) + bottom * fr
+    return np.where(inside, values, np.nan)
+
+
+def calculate_line_profile(model: 'ImageDataModel', slice_index: int,
+                           start: Tuple[float, float], end: Tuple[float, float],
+                           width: float = 0.0) -> Optional[LineProfile]:
+    """
+    Samples raw pixel values along a line with bilinear interpolation.
+
+    Samples are spaced at the finest pixel spacing (one pixel for images
+    without spacing), so the profile has the image's native resolution in
+    physical units. With ``width`` > 0 the profile is averaged across a band
+    of parallel lines spaced the same way (a thick profile). All samples are
+    interpolated in one vectorized pass.
+
+    Args:
+        model: The ImageDataModel containing the pixel data.
+        slice_index: Slice to sample.
+        start: Start point (row, col) in pixel-centre coordinates.
+        end: End point (row, col) in pixel-centre coordinates.
+        width: Width of the averaging band in mm (px for images without spacing).
+
+    Returns:
+        The LineProfile, or None if the slice is unavailable.
+    """
+    if not ImageDataModel or not model or model.pixel_array is None:
+        return None
+    slice_data = model.get_slice_data(slice_index)
+    if slice_data is None:
+        return None
+
+    # 与体素间距同源；头信息没有像素间距时按像素计
+    has_spacing = model.get_pixel_spacing() is not None
+    unit = "mm" if has_spacing else "px"
+    _, row_spacing, col_spacing = model.get_voxel_spacing()
+    step = min(row_spacing, col_spacing)
+
+    d_row = (end[0] - start[0]) * row_spacing
+    d_col = (end[1] - start[1]) * col_spacing
+    length = float(np.hypot(d_row, d_col))
+    count = int(length / step) + 1
+    positions = np.arange(count) * step
+    fraction = positions / length if length > 0 else np.zeros(1)
+    rows = start[0] + fraction * (end[0] - start[0])
+    cols = start[1] + fraction * (end[1] - start[1])
+
+    lines = int(width / step) + 1 if width > 0 and length > 0 else 1
+    if lines > 1:
+        # 单位法向量（物理坐标），换算回像素偏移
+        offsets = (np.arange(lines) - (lines - 1) / 2) * step
+        normal_row, normal_col = -d_col / length, d_row / length
+        rows = rows + (offsets * normal_row / row_spacing)[:, np.newaxis]
+        cols = cols + (offsets * normal_col / col_spacing)[:, np.newaxis]
+
+    samples = sample_bilinear(slice_data, rows, cols).reshape(lines, count)
+    valid = ~np.isnan(samples)
+    counts = valid.sum(axis=0)
+    sums = np.where(valid, samples, 0.0).sum(axis=0)
+    values = np.full(count, np.nan)
+    np.divide(sums, counts, out=values, where=counts > 0)
+    return LineProfile(positions, values, unit, float(width) if lines > 1 else 0.0,
+                       (float(start[0]), float(start[1])), (float(end[0]), float(end[1])),
+                       (row_spacing, col_spacing))
+
+
+class SliceStatisticsTable:
+    """
+    Summed-row tables for fast statistics of span-shaped regions on one slice.
+
+    Per-row cumulative sums of the values and of their squares give the sum
+    and sum of squares of any row span in O(1), so count/mean/std of a
+    rectangle, circle or ellipse ROI cost O(rows) instead of O(area). Values
+    are shifted by the slice mean before accumulating to keep the variance
+    well conditioned.
+
+    Min/max use per-row blocks of ``BLOCK`` columns: a sparse table over the
+    block minima/maxima answers the whole blocks of a span in O(1), and the
+    partial blocks at both ends are read directly (fewer than 2 * BLOCK
+    pixels per row).
+    """
+
+    BLOCK = 16
+
+    def __init__(self, slice_data: np.ndarray) -> None:
+        data = np.asarray(slice_data)
+        self.height, self.width = data.shape
+        self._flat_data = data.ravel()
+        self._offset = float(data.mean()) if data.size else 0.0
+
+        shifted = data.astype(np.float64) - self._offset
+        self._row_sums = np.zeros((self.height, self.width + 1), dtype=np.float64)
+        np.cumsum(shifted, axis=1, out=self._row_sums[:, 1:])
+        np.square(shifted, out=shifted)
+        self._row_sq_sums = np.zeros((self.height, self.width + 1), dtype=np.float64)
+        np.cumsum(shifted, axis=1, out=self._row_sq_sums[:, 1:])
+
+        # 稀疏表第 k 层：从每个块开始的 2**k 个块的最小/最大值
+        block_starts = np.arange(0, self.width, self.BLOCK)
+        self._min_levels: List[np.ndarray] = [np.minimum.reduceat(data, block_starts, axis=1)]
+        self._max_levels: List[np.ndarray] = [np.maximum.reduceat(data, block_starts, axis=1)]
+        while (1 << len(self._min_levels)) <= len(block_starts):
+            half = 1 << (len(self._min_levels) - 1)
+            prev_min, prev_max = self._min_levels[-1], self._max_levels[-1]
+            self._min_levels.append(np.minimum(prev_min[:, :-half], prev_min[:, half:]))
+            self._max_levels.append(np.maximum(prev_max[:, :-half], prev_max[:, half:]))
+
+    def _span_extrema(self, rows: np.ndarray, starts: np.ndarray,
+                      stops: np.ndarray) -> Tuple[float, float]:
+        block = self.BLOCK
+        first_block = -(-starts // block)  # 第一个完整块
+        end_block = stops // block         # 最后一个完整块之后
+        has_blocks = end_block > first_block
+
+        # 两端不足一块的部分直接读取（没有完整块时整段长度小于 2 * BLOCK）
+        head_stop = np.where(has_blocks, first_block * block, stops)
+        tail_start = np.where(has_blocks, end_block * block, stops)
+        head_cols = starts[:, np.newaxis] + np.arange(2 * block)
+        tail_cols = tail_start[:, np.newaxis] + np.arange(block)
+        valid = np.concatenate([head_cols < head_stop[:, np.newaxis],
+                                tail_cols < stops[:, np.newaxis]], axis=1)
+        cols = np.minimum(np.concatenate([head_cols, tail_cols], axis=1), self.width - 1)
+        flat_index = (rows * self.width)[:, np.newaxis] + cols
+        edge_values = np.take(self._flat_data, flat_index)[valid]
+        minimum = edge_values.min() if edge_values.size else None
+        maximum = edge_values.max() if edge_values.size else None
+
+        # 完整块：按块数所在层级用两个重叠区间覆盖
+        rows, first_block, end_block = rows[has_blocks], first_block[has_blocks], end_block[has_blocks]
+        levels = np.frexp(end_block - first_block)[1] - 1  # floor(log2(n)) for positive integers
+        for level in np.flatnonzero(np.bincount(levels)):
+            selected = levels == level
+            r, lo = rows[selected], first_block[selected]
+            hi = end_block[selected] - (1 << int(level))
+            min_table, max_table = self._min_levels[level], self._max_levels[level]
+            level_min = min(min_table[r, lo].min(), min_table[r, hi].min())
+            level_max = max(max_table[r, lo].max(), max_table[r, hi].max())
+            minimum = level_min if minimum is None else min(minimum, level_min)
+            maximum = level_max if maximum is None else max(maximum, level_max)
+        return float(minimum), float(maximum)
+
+    def roi_statistics(self, roi: 'BaseROI') -> Optional[Dict[str, float]]:
+        """Returns the same statistics as calculate_roi_statistics for the ROI on this slice."""
+        spans = roi.get_row_spans(self.height, self.width)
+        if spans is None:
+            return None
+        row0, starts, stops = spans
+        nonempty = stops > starts
+        rows = np.flatnonzero(nonempty) + row0
+        starts, stops = starts[nonempty], stops[nonempty]
+        count = int((stops - starts).sum())
+        if count == 0:
+            return None
+
+        total = float((self._row_sums[rows, stops] - self._row_sums[rows, starts]).sum())
+        total_sq = float((self._row_sq_sums[rows, stops] - self._row_sq_sums[rows, starts]).sum())
+        shifted_mean = total / count
+        variance = max(total_sq / count - shifted_mean * shifted_mean, 0.0)
+        minimum, maximum = self._span_extrema(rows, starts, stops)
+
+        return {
+            "max": maximum,
+            "min": minimum,
+            "mean": shifted_mean + self._offset,
+            "std": float(np.sqrt(variance)),
+            "count": count
+        }
+
+
+class ROIStatisticsCache:
+    """
+    Caches ROI statistics keyed by ROI id.
+
+    An entry is valid while the ROI's geometry version, its slice index and
+    the model's data version are unchanged. Stale entries are kept so that a
+    painter can keep showing the last known numbers until they are refreshed.
+
+    An entry that went stale only because its geometry changed means the ROI
+    is being moved or resized, so those updates go through a SliceStatisticsTable of the ROI's slice
+    and cost O(rows). The table is built on the thread pool on first use;
+    until it is ready such updates are computed exactly from the pixels.
+    At most ``MAX_TABLES`` tables and ``MAX_TABLE_PIXELS`` table pixels are
+    kept (the newest table always), as a table takes about 16 bytes per pixel.
+    """
+
+    MAX_TABLES = 2
+    MAX_TABLE_PIXELS = 2048 * 2048
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[tuple, Optional[Dict[str, float]]]] = {}
+        # Incremented whenever an entry is stored or dropped, so that painters
+        # can tell that the numbers they show may have changed.
+        self.generation = 0
+        self._stores: Dict[str, int] = {}
+        self._tables: 'OrderedDict[tuple, SliceStatisticsTable]' = OrderedDict()
+        self._pending_tables: Dict[tuple, Future] = {}
+
+    @staticmethod
+    def _make_key(model: 'ImageDataModel', roi: 'BaseROI') -> tuple:
+        return (roi.geometry_version, roi.slice_index, model.data_version)
+
+    def peek(self, model: 'ImageDataModel', roi: 'BaseROI') -> Tuple[Optional[Dict[str, float]], bool]:
+        """
+        Returns the cached statistics without computing anything.
+
+        Returns:
+            A tuple (stats, is_fresh). stats may be stale or None.
+        """
+        entry = self._entries.get(roi.id)
+        if entry is None:
+            return None, False
+        key, stats = entry
+        return stats, key == self._make_key(model, roi)
+
+    def get(self, model: 'ImageDataModel', roi: 'BaseROI') -> Optional[Dict[str, float]]:
+        """Returns up-to-date statistics, recomputing them only if the ROI or data changed."""
+        stats, fresh = self.peek(model, roi)
+        if fresh:
+            return stats
+        key = self._make_key(model, roi)
+        entry = self._entries.get(roi.id)
+        if entry is not None and entry[0][1:] == key[1:]:
+            # Same slice and data, only the geometry changed: the ROI is being edited
+            stats = self._calculate_live(model, roi)
+        else:
+            stats = calculate_roi_statistics(model, roi)
+        self._store(roi.id, key, stats)
+        return stats
+
+    def get_many(self, model: 'ImageDataModel', rois: List['BaseROI']) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Returns up-to-date statistics for several ROIs.
+
+        ROIs being edited go through the slice tables like get(); all other
+        stale ROIs are recomputed together with calculate_batch_roi_statistics.
+        """
+        results: Dict[str, Optional[Dict[str, float]]] = {}
+        batch = []
+        for roi in rois:
+            fresh = self.peek(model, roi)[1]
+            entry = self._entries.get(roi.id)
+            if fresh or (entry is not None and entry[0][1:] == self._make_key(model, roi)[1:]):
+                results[roi.id] = self.get(model, roi)
+            else:
+                batch.append(roi)
+        if batch:
+            batch_stats = calculate_batch_roi_statistics(model, batch)
+            for roi in batch:
+                stats = batch_stats[roi.id]
+                self._store(roi.id, self._make_key(model, roi), stats)
+                results[roi.id] = stats
+        return results
+
+    def _store(self, roi_id: str, key: tuple, stats: Optional[Dict[str, float]]) -> None:
+        self._entries[roi_id] = (key, stats)
+        self._stores[roi_id] = self._stores.get(roi_id, 0) + 1
+        self.generation += 1
+
+    def generation_excluding(self, roi_id: Optional[str]) -> int:
+        """Returns the generation without the updates of one ROI (e.g. the one being dragged)."""
+        return self.generation - self._stores.get(roi_id, 0)
+
+    def get_table(self, model: 'ImageDataModel', slice_index: int,
+                  wait: bool = False) -> Optional[SliceStatisticsTable]:
+        """
+        Returns the summed-row table of a slice.
+
+        The first request schedules the build on the thread pool. Returns None
+        while the table is still being built, unless ``wait`` is True.
+        """
+        key = (model.data_version, slice_index)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+
+        future = self._pending_tables.get(key)
+        if future is None:
+            slice_data = model.get_slice_data(slice_index)
+            if slice_data is None:
+                return None
+            future = self._submit_table_build(slice_data)
+            self._pending_tables[key] = future
+        if not wait and not future.done():
+            return None
+
+        del self._pending_tables[key]
+        try:
+            table = future.result()
+        except Exception as e:
+            logger.error(f"[ROIStatisticsCache.get_table] Failed to build table: {e}", exc_info=True)
+            return None
+        self._tables[key] = table
+        pixels = sum(t.height * t.width for t in self._tables.values())
+        while len(self._tables) > 1 and (len(self._tables) > self.MAX_TABLES or pixels > self.MAX_TABLE_PIXELS):
+            _, dropped = self._tables.popitem(last=False)
+            pixels -= dropped.height * dropped.width
+        return table
+
+    def _submit_table_build(self, slice_data: np.ndarray) -> Future:
+        try:
+            return get_performance_manager().get_thread_pool().submit(SliceStatisticsTable, slice_data)
+        except Exception as e:
+            logger.error(f"[ROIStatisticsCache._submit_table_build] Failed to schedule build: {e}", exc_info=True)
+            future = Future()
+            future.set_result(SliceStatisticsTable(slice_data))
+            return future
+
+    def _calculate_live(self, model: 'ImageDataModel', roi: 'BaseROI') -> Optional[Dict[str, float]]:
+        if model is None or model.pixel_array is None:
+            return None
+        table = self.get_table(model, roi.slice_index)
+        if table is None:
+            # 统计表尚在后台构建：直接按像素精确计算
+            return calculate_roi_statistics(model, roi)
+        return table.roi_statistics(roi)
+
+    def discard(self, roi_id: str) -> None:
+        self._entries.pop(roi_id, None)
+        self._stores.pop(roi_id, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tables.clear()
+        self._pending_tables.clear()
+        self._stores.clear()
+        self.generation += 1
+
+
+def calculate_volume_roi_statistics(model: 'ImageDataModel', roi: 'VolumeROI',
+                                    histogram_layout: Optional[IntensityHistogram] = None,
+                                    progress: Optional[Callable[[int, int], None]] = None,
+                                    is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[Dict]:
+    """
+    Calculates statistics of a volume ROI by streaming over its slices.
+
+    Only one slice is read at a time (model.get_slice_data), so memory stays
+    bounded for lazily loaded or memory-mapped volumes. Sums are accumulated
+    around the first slice's mean to keep the variance well conditioned.
+
+    Args:
+        model: The ImageDataModel containing the pixel data.
+        roi: The volume ROI.
+        histogram_layout: Histogram whose bins are used for the ROI histogram
+            (normally the model's volume histogram). No histogram if None.
+        progress: Called with (slices_done, slices_total) after each slice.
+        is_cancelled: Polled before each slice; returning True aborts with None.
+
+    Returns:
+        A dictionary with max/min/mean/std/count, volume_ml (physical volume)
+        and histogram (an IntensityHistogram for percentiles, or None),
+        or None if the ROI covers no voxels or the computation was cancelled.
+    """
+    if not ImageDataModel or not model or model.pixel_array is None:
+        return None
+
+    spacing = model.get_voxel_spacing()
+    slice_count, height, width = model.pixel_array.shape
+    slices = roi.slice_range(spacing, slice_count)
+
+    count = 0
+    offset = None
+    total = total_sq = 0.0
+    minimum = maximum = None
+    counts = np.zeros(histogram_layout.bin_count, dtype=np.int64) if histogram_layout is not None else None
+
+    for done, slice_index in enumerate(slices, start=1):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        spans = roi.get_slice_spans(slice_index, spacing, height, width)
+        if spans is not None:
+            indices = _span_pixel_indices(spans, width)
+            if indices.size:
+                values = np.take(model.get_slice_data(slice_index).ravel(), indices)
+                if offset is None:
+                    offset = float(values.mean())
+                shifted = values.astype(np.float64) - offset
+                count += values.size
+                total += float(shifted.sum())
+                total_sq += float(np.dot(shifted, shifted))
+                slice_min, slice_max = values.min(), values.max()
+                minimum = slice_min if minimum is None else min(minimum, slice_min)
+                maximum = slice_max if maximum is None else max(maximum, slice_max)
+                if counts is not None:
+                    counts += histogram_layout.count_values(values)
+        if progress is not None:
+            progress(done, len(slices))
+
+    if count == 0:
+        return None
+    shifted_mean = total / count
+    variance = max(total_sq / count - shifted_mean * shifted_mean, 0.0)
+    histogram = None
+    if counts is not None:
+        histogram = IntensityHistogram(histogram_layout.lower, histogram_layout.bin_width, counts)
+    return {
+        "max": float(maximum),
+        "min": float(minimum),
+        "mean": shifted_mean + offset,
+        "std": float(np.sqrt(variance)),
+        "count": count,
+        "volume_ml": count * spacing[0] * spacing[1] * spacing[2] / 1000.0,
+        "histogram": histogram
+    }
+
+
+class VolumeROIStatisticsCache:
+    """
+    Computes volume ROI statistics on the worker pool and caches them by ROI id.
+
+    An entry is valid while the ROI's geometry version, the model's data
+    version and the voxel spacing are unchanged. A running computation stops
+    early once its ROI changes, and its result is dropped if the ROI was
+    discarded meanwhile. Progress and completion are reported through
+    the model's volume_roi_progress / volume_roi_statistics_ready signals.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[tuple, Optional[Dict]]] = {}
+        self._pending: Dict[str, tuple] = {}  # roi id -> (key, future)
+        # 两个字典由工作线程写入、主线程读取
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(model: 'ImageDataModel', roi: 'VolumeROI') -> tuple:
+        return (roi.geometry_version, model.data_version, model.get_voxel_spacing())
+
+    def peek(self, model: 'ImageDataModel', roi: 'VolumeROI') -> Tuple[Optional[Dict], bool]:
+        """Returns (stats, is_fresh) without computing anything."""
+        with self._lock:
+            entry = self._entries.get(roi.id)
+        if entry is None:
+            return None, False
+        key, stats = entry
+        return stats, key == self._make_key(model, roi)
+
+    def request(self, model: 'ImageDataModel', roi: 'VolumeROI'):
+        """
+        Returns a future for up-to-date statistics, scheduling a background
+        computation unless a fresh result or a matching one in flight exists.
+        """
+        key = self._make_key(model, roi)
+        stats, fresh = self.peek(model, roi)
+        if fresh:
+            future = Future()
+            future.set_result(stats)
+            return future
+
+        def task():
+            histogram = model.get_histogram(wait=True)
+            stats = calculate_volume_roi_statistics(
+                model, roi, histogram,
+                progress=lambda done, total: model.volume_roi_progress.emit(roi.id, done, total),
+                is_cancelled=lambda: self._make_key(model, roi) != key)
+            if self._make_key(model, roi) != key:
+                return None  # ROI 或数据在计算期间发生变化
+            with self._lock:
+                # ROI 在计算期间被移除（discard/clear）时不再写回结果
+                pending = self._pending.get(roi.id)
+                if pending is None or pending[0] != key:
+                    return None
+                self._entries[roi.id] = (key, stats)
+            model.volume_roi_statistics_ready.emit(roi.id)
+            return stats
+
+        with self._lock:
+            pending = self._pending.get(roi.id)
+            if pending is not None and pending[0] == key:
+                return pending[1]
+            try:
+                future = get_performance_manager().get_thread_pool().submit(task)
+            except Exception as e:
+                logger.error(f"[VolumeROIStatisticsCache.request] Failed to schedule computation: {e}", exc_info=True)
+                future = Future()
+                future.set_result(None)
+                return future
+            self._pending[roi.id] = (key, future)
+        future.add_done_callback(lambda done: self._finish(roi.id, done))
+        return future
+
+    def _finish(self, roi_id: str, future: Future) -> None:
+        """计算结束后移除仍指向该 future 的等待项，释放其对模型与 ROI 的引用"""
+        with self._lock:
+            pending = self._pending.get(roi_id)
+            if pending is not None and pending[1] is future:
+                del self._pending[roi_id]
+
+    def get(self, model: 'ImageDataModel', roi: 'VolumeROI') -> Optional[Dict]:
+        """Returns up-to-date statistics, blocking until they are computed."""
+        try:
+            return self.request(model, roi).result()
+        except Exception as e:
+            logger.error(f"[VolumeROIStatisticsCache.get] Computation failed: {e}", exc_info=True)
+            return None
+
+    def discard(self, roi_id: str) -> None:
+        with self._lock:
+            self._entries.pop(roi_id, None)
+            self._pending.pop(roi_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+def _curve_reductions(volume: np.ndarray, slice_indices: Optional[np.ndarray], bbox: tuple,
+                      mask: np.ndarray, max_pixels: int) -> Tuple[np.ndarray, ...]:
+    """Per-slice sum, sum of squares, min and max of ``volume[:, bbox][:, mask]``."""
+    rows, cols = bbox
+    box_pixels = max(1, (rows.stop - rows.start) * (cols.stop - cols.start))
+    step = max(1, max_pixels // box_pixels)
+    total = len(slice_indices) if slice_indices is not None else volume.shape[0]
+    sums, sumsq = np.empty(total), np.empty(total)
+    minimum, maximum = np.empty(total), np.empty(total)
+    flat_mask = np.flatnonzero(mask)
+    for start in range(0, total, step):
+        stop = min(total, start + step)
+        if slice_indices is None:
+            block = volume[start:stop, rows, cols]
+        else:
+            block = volume[slice_indices[start:stop], rows, cols]
+        # 只读取包围盒子体积（惰性加载/内存映射的体数据也只读这一部分），
+        # 复制为连续数组后按扁平下标取像素比三维布尔索引快
+        block = np.ascontiguousarray(block).reshape(stop - start, -1)
+        values = np.take(block, flat_mask, axis=1).astype(np.float64)
+        sums[start:stop] = values.sum(axis=1)
+        sumsq[start:stop] = np.einsum('ij,ij->i', values, values)
+        minimum[start:stop] = values.min(axis=1)
+        maximum[start:stop] = values.max(axis=1)
+    return sums, sumsq, minimum, maximum
+
+
+def calculate_time_intensity_curve(model: 'ImageDataModel', roi: 'BaseROI',
+                                   max_pixels: int = 1 << 24) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Calculates the ROI's statistics on every slice (or temporal phase) of the volume.
+
+    The ROI's bounding-box mask is built once and applied to the (N, h, w)
+    sub-volume under the bounding box with one vectorized reduction per
+    chunk of roughly ``max_pixels`` voxels, so only that sub-volume is read.
+
+    Returns:
+        A dictionary with per-slice arrays mean/std/min/max and the pixel
+        count per slice, or None if the ROI does not intersect the image.
+    """
+    if not ImageDataModel or not model or model.pixel_array is None:
+        return None
+    volume = model.pixel_array
+    local = roi.get_local_mask(volume.shape[1], volume.shape[2])
+    if local is None or not local[1].any():
+        return None
+    bbox, mask = local
+    sums, sumsq, minimum, maximum = _curve_reductions(volume, None, bbox, mask, max_pixels)
+    return _curve_from_sums(sums, sumsq, minimum, maximum, int(mask.sum()))
+
+
+def _curve_from_sums(sums: np.ndarray, sumsq: np.ndarray, minimum: np.ndarray,
+                     maximum: np.ndarray, count: int) -> Dict[str, np.ndarray]:
+    mean = sums / count
+    return {
+        "mean": mean,
+        "std": np.sqrt(np.maximum(sumsq / count - mean * mean, 0.0)),
+        "min": minimum.copy(),
+        "max": maximum.copy(),
+        "count": count
+    }
+
+
+class _CurveState:
+    """Running per-slice sums of one ROI's time-intensity curve."""
+    __slots__ = ('key', 'geometry_version', 'origin', 'mask', 'count',
+                 'sums', 'sumsq', 'minimum', 'maximum', 'curve')
+
+    def __init__(self, key: tuple, geometry_version: int, origin: Tuple[int, int], mask: np.ndarray,
+                 sums: np.ndarray, sumsq: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> None:
+        self.key = key
+        self.geometry_version = geometry_version
+        self.origin = origin
+        self.mask = mask
+        self.count = int(mask.sum())
+        self.sums, self.sumsq, self.minimum, self.maximum = sums, sumsq, minimum, maximum
+        self.curve = _curve_from_sums(sums, sumsq, minimum, maximum, self.count)
+
+
+class TimeIntensityCache:
+    """
+    Caches time-intensity curves by ROI id and updates them incrementally.
+
+    A curve is valid while the model's data version and volume shape are
+    unchanged. When only the ROI's geometry changed (it was moved or
+    resized), the pixels that left or entered the ROI are read instead of the
+    whole mask whenever that is smaller: sums and sums of squares are updated
+    exactly, and min/max are recomputed only on slices whose extreme value
+    may have left the ROI.
+    """
+
+    def __init__(self, max_pixels: int = 1 << 24) -> None:
+        self._states: Dict[str, _CurveState] = {}
+        self._max_pixels = max_pixels
+
+    def get(self, model: 'ImageDataModel', roi: 'BaseROI') -> Optional[Dict[str, np.ndarray]]:
+        """Returns the up-to-date curve (see calculate_time_intensity_curve)."""
+        if not ImageDataModel or not model or model.pixel_array is None:
+            return None
+        volume = model.pixel_array
+        key = (model.data_version, volume.shape)
+        state = self._states.get(roi.id)
+        if state is not None and state.key == key and state.geometry_version == roi.geometry_version:
+            return state.curve
+
+        local = roi.get_local_mask(volume.shape[1], volume.shape[2])
+        if local is None or not local[1].any():
+            self._states.pop(roi.id, None)
+            return None
+        bbox, mask = local
+        origin = (bbox[0].start, bbox[1].start)
+        try:
+            if state is not None and state.key == key:
+                state = self._update(volume, state, roi.geometry_version, bbox, mask)
+            else:
+                state = None
+            if state is None:
+                state = _CurveState(key, roi.geometry_version, origin, mask,
+                                    *_curve_reductions(volume, None, bbox, mask, self._max_pixels))
+        except Exception as e:
+            logger.error(f"[TimeIntensityCache.get] Curve computation failed: {e}", exc_info=True)
+            return None
+        self._states[roi.id] = state
+        return state.curve
+
+    def _update(self, volume: np.ndarray, state: _CurveState, geometry_version: int,
+                bbox: tuple, mask: np.ndarray) -> Optional[_CurveState]:
+        """Moves ``state`` to the new mask using only the changed pixels; None if not worthwhile."""
+        origin = (bbox[0].start, bbox[1].start)
+        old_y, old_x = state.origin
+        old_h, old_w = state.mask.shape
+        new_h, new_w = mask.shape
+        top, left = min(old_y, origin[0]), min(old_x, origin[1])
+        bottom = max(old_y + old_h, origin[0] + new_h)
+        right = max(old_x + old_w, origin[1] + new_w)
+        delta = np.zeros((bottom - top, right - left), dtype=np.int8)
+        delta[old_y - top:old_y - top + old_h, old_x - left:old_x - left + old_w] -= state.mask
+        delta[origin[0] - top:origin[0] - top + new_h, origin[1] - left:origin[1] - left + new_w] += mask
+        entering = np.nonzero(delta > 0)
+        leaving = np.nonzero(delta < 0)
+        changed = len(entering[0]) + len(leaving[0])
+        if changed >= int(mask.sum()):
+            return None
+
+        sums, sumsq = state.sums.copy(), state.sumsq.copy()
+        minimum, maximum = state.minimum.copy(), state.maximum.copy()
+        stale = np.zeros(len(sums), dtype=bool)
+        if len(leaving[0]):
+            values = np.asarray(volume[:, leaving[0] + top, leaving[1] + left], dtype=np.float64)
+            sums -= values.sum(axis=1)
+            sumsq -= np.einsum('ij,ij->i', values, values)
+            # 离开的像素中含有原最值时，该切片的最值需要重新计算
+            stale |= (values.min(axis=1) <= minimum) | (values.max(axis=1) >= maximum)
+        if len(entering[0]):
+            values = np.asarray(volume[:, entering[0] + top, entering[1] + left], dtype=np.float64)
+            sums += values.sum(axis=1)
+            sumsq += np.einsum('ij,ij->i', values, values)
+            np.minimum(minimum, values.min(axis=1), out=minimum)
+            np.maximum(maximum, values.max(axis=1), out=maximum)
+        stale_slices = np.flatnonzero(stale)
+        if len(stale_slices):
+            _, _, stale_min, stale_max = _curve_reductions(volume, stale_slices, bbox, mask, self._max_pixels)
+            minimum[stale_slices] = stale_min
+            maximum[stale_slices] = stale_max
+        return _CurveState(state.key, geometry_version, origin, mask, sums, sumsq, minimum, maximum)
+
+    def discard(self, roi_id: str) -> None:
+        self._states.pop(roi_id, None)
+
+    def clear(self) -> None:
+        self._states.clear()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标注空间索引模块
+
+按 ID 和切片组织 ROI / 测量等标注，并为每个切片维护一个均匀网格，
+点击、悬停等命中测试只检查鼠标附近网格中的标注，与标注总数无关。
+
+标注几何变化时通过 ``_geometry_observer`` 回调通知索引，
+索引只记录失效的 ID，在下一次查询该切片时重新放入网格。
+增删标注及几何变化都会递增版本号 ``version``，另按标注记录几何变化次数，
+``version_excluding`` 可得到不计某个标注（如正在拖动的标注）变化的版本号。
+"""
+
+import math
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+# 包围盒：(y0, x0, y1, x1)，闭区间，图像坐标
+Bounds = Tuple[float, float, float, float]
+
+
+class _Entry:
+    """索引中的一条标注记录"""
+    __slots__ = ('item', 'seq', 'slice_index', 'cells')
+
+    def __init__(self, item: Any, seq: int, slice_index: int, cells: Optional[List[Tuple[int, int]]]):
+        self.item = item
+        self.seq = seq
+        self.slice_index = slice_index
+        # 所在网格单元；None 表示包围盒过大，放在切片的大标注列表中
+        self.cells = cells
+
+
+class AnnotationIndex:
+    """
+    按 ID、切片和均匀网格索引的标注集合.
+
+    标注需要具有 ``id`` 与 ``slice_index`` 属性，包围盒由 ``bounds`` 函数给出.
+    迭代顺序与插入顺序一致，``index_of`` 返回标注在该顺序中的位置
+    （与模型中对应列表的下标一致）.
+
+    Args:
+        bounds: 计算标注包围盒 (y0, x0, y1, x1) 的函数.
+        cell_size: 网格单元边长（图像像素）.
+    """
+
+    CELL_SIZE = 64
+    # 覆盖网格单元数超过该值的标注不放入网格，查询该切片时总是参与检查
+    MAX_CELLS = 256
+
+    def __init__(self, bounds: Callable[[Any], Bounds], cell_size: int = CELL_SIZE) -> None:
+        self._bounds = bounds
+        self._cell_size = cell_size
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._slices: Dict[int, Dict[Hashable, None]] = {}  # 切片 -> 按插入顺序的 ID
+        self._grids: Dict[int, Dict[Tuple[int, int], Set[Hashable]]] = {}
+        self._large: Dict[int, Set[Hashable]] = {}
+        self._dirty: Set[Hashable] = set()
+        self._positions: Optional[Dict[Hashable, int]] = None
+        self._next_seq = 0
+        self.version = 0
+        self._geometry_changes: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._entries
+
+    def __iter__(self) -> Iterator[Any]:
+        return (entry.item for entry in self._entries.values())
+
+    def get(self, item_id: Hashable) -> Optional[Any]:
+        """按 ID 获取标注"""
+        entry = self._entries.get(item_id)
+        return entry.item if entry is not None else None
+
+    def index_of(self, item_id: Hashable) -> Optional[int]:
+        """标注在插入顺序中的位置"""
+        if self._positions is None:
+            self._positions = {key: i for i, key in enumerate(self._entries)}
+        return self._positions.get(item_id)
+
+    def add(self, item: Any) -> None:
+        """添加标注（已存在同 ID 时先移除旧记录）"""
+        if item.id in self._entries:
+            self.remove(item.id)
+        entry = _Entry(item, self._next_seq, item.slice_index, None)
+        self._next_seq += 1
+        self._entries[item.id] = entry
+        self._slices.setdefault(entry.slice_index, {})[item.id] = None
+        self._place(item.id, entry)
+        self._positions = None
+        item._geometry_observer = self._on_geometry_changed
+        self.version += 1
+
+    def remove(self, item_id: Hashable) -> Optional[Any]:
+        """移除标注并返回它"""
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return None
+        self._unplace(item_id, entry)
+        slice_ids = self._slices.get(entry.slice_index)
+        if slice_ids is not None:
+            slice_ids.pop(item_id, None)
+            if not slice_ids:
+                del self._slices[entry.slice_index]
+        self._dirty.discard(item_id)
+        self._positions = None
+        entry.item._geometry_observer = None
+        self._geometry_changes.pop(item_id, None)
+        self.version += 1
+        return entry.item
+
+    def clear(self) -> None:
+        for entry in self._entries.values():
+            entry.item._geometry_observer = None
+        self._entries.clear()
+        self._slices.clear()
+        self._grids.clear()
+        self._large.clear()
+        self._dirty.clear()
+        self._positions = None
+        self._geometry_changes.clear()
+        self.version += 1
+
+    def version_excluding(self, item_id: Optional[Hashable]) -> int:
+        """不计指定标注几何变化的版本号（其余标注变化或增删时仍会递增）"""
+        return self.version - self._geometry_changes.get(item_id, 0)
+
+    def count_on_slice(self, slice_index: int) -> int:
+        """指定切片上的标注数"""
+        self._flush()
+        return len(self._slices.get(slice_index, ()))
+
+    def items_on_slice(self, slice_index: int) -> List[Any]:
+        """指定切片上的标注（按插入顺序）"""
+        self._flush()
+        ids = self._slices.get(slice_index)
+        if not ids:
+            return []
+        return [self._entries[item_id].item for item_id in ids]
+
+    def query_point(self, slice_index: int, y: float, x: float, tolerance: float = 0.0) -> List[Any]:
+        """
+        返回包围盒（按容差外扩后）包含给定点的标注，最后添加的在前.
+
+        结果只是候选，调用方仍需做精确的命中测试.
+        """
+        self._flush()
+        candidates = set(self._large.get(slice_index, ()))
+        grid = self._grids.get(slice_index)
+        if grid:
+            size = self._cell_size
+            for cy in range(math.floor((y - tolerance) / size), math.floor((y + tolerance) / size) + 1):
+                for cx in range(math.floor((x - tolerance) / size), math.floor((x + tolerance) / size) + 1):
+                    cell = grid.get((cy, cx))
+                    if cell:
+                        candidates.update(cell)
+        hits = []
+        for item_id in candidates:
+            entry = self._entries[item_id]
+            y0, x0, y1, x1 = self._bounds(entry.item)
+            if y0 - tolerance <= y <= y1 + tolerance and x0 - tolerance <= x <= x1 + tolerance:
+                hits.append(entry)
+        hits.sort(key=lambda entry: entry.seq, reverse=True)
+        return [entry.item for entry in hits]
+
+    def _on_geometry_changed(self, item: Any) -> None:
+        self._dirty.add(item.id)
+        self._geometry_changes[item.id] = self._geometry_changes.get(item.id, 0) + 1
+        self.version += 1
+
+    def _flush(self) -> None:
+        """重新放置几何发生变化的标注"""
+        if not self._dirty:
+            return
+        for item_id in self._dirty:
+            entry = self._entries.get(item_id)
+            if entry is None:
+                continue
+            self._unplace(item_id, entry)
+            slice_index = entry.item.slice_index
+            if slice_index != entry.slice_index:
+                old_ids = self._slices.get(entry.slice_index)
+                if old_ids is not None:
+                    old_ids.pop(item_id, None)
+                    if not old_ids:
+                        del self._slices[entry.slice_index]
+                # 保持切片内按插入顺序排列
+                ids = self._slices.setdefault(slice_index, {})
+                ids[item_id] = None
+                if len(ids) > 1:
+                    ordered = sorted(ids, key=lambda key: self._entries[key].seq)
+                    self._slices[slice_index] = dict.fromkeys(ordered)
+                entry.slice_index = slice_index
+            self._place(item_id, entry)
+        self._dirty.clear()
+
+    def _place(self, item_id: Hashable, entry: _Entry) -> None:
+        y0, x0, y1, x1 = self._bounds(entry.item)
+        size = self._cell_size
+        row0, row1 = math.floor(y0 / size), math.floor(y1 / size)
+        col0, col1 = math.floor(x0 / size), math.floor(x1 / size)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > self.MAX_CELLS:
+            entry.cells = None
+            self._large.setdefault(entry.slice_index, set()).add(item_id)
+            return
+        grid = self._grids.setdefault(entry.slice_index, {})
+        entry.cells = [(r, c) for r in range(row0, row1 + 1) for c in range(col0, col1 + 1)]
+        for cell in entry.cells:
+            grid.setdefault(cell, set()).add(item_id)
+
+    def _unplace(self, item_id: Hashable, entry: _Entry) -> None:
+        if entry.cells is None:
+            large = self._large.get(entry.slice_index)
+            if large is not None:
+                large.discard(item_id)
+            return
+        grid = self._grids.get(entry.slice_index, {})
+        for cell in entry.cells:
+            ids = grid.get(cell)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del grid[cell]
+        entry.cells = []
+
+
+def roi_bounds(roi: Any) -> Bounds:
+    """ROI 的包围盒（由四个角点锚点得到）"""
+    anchors = roi.get_anchor_points()
+    ys = [a[0] for a in anchors]
+    xs = [a[1] for a in anchors]
+    return min(ys), min(xs), max(ys), max(xs)
+
+
+def line_bounds(measurement: Any) -> Bounds:
+    """直线测量的包围盒"""
+    p1, p2 = measurement.start_point, measurement.end_point
+    return (min(p1.y(), p2.y()), min(p1.x(), p2.x()), max(p1.y(), p2.y()), max(p1.x(), p2.x()))
+
+
+def angle_bounds(measurement: Any) -> Bounds:
+    """角度测量的包围盒"""
+    points = (measurement.point1, measurement.vertex, measurement.point3)
+    ys = [p.y() for p in points]
+    xs = [p.x() for p in points]
+    return min(ys), min(xs), max(ys), max(xs)
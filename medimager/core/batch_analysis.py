@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面批量 ROI 分析模块
+
+对大量序列套用同一个 ROI 模板（如水模均匀性 ROI、Gammex 插件 ROI），
+在进程池中逐序列加载并统计，结果以流式写入 CSV / JSON，内存占用只与并行的序列数有关。
+
+模板为 JSON 文件，例如::
+
+    {
+        "name": "water_uniformity",
+        "units": "mm",
+        "slices": "all",
+        "rois": [
+            {"name": "center", "shape": "circle", "center": [0, 0], "radius": 10},
+            {"name": "top", "shape": "circle", "center": [-60, 0], "radius": 10},
+            {"name": "band", "shape": "rectangle", "top_left": [-5, -40], "bottom_right": [5, 40]}
+        ]
+    }
+
+units 为 "px" 时坐标为像素 (row, col)；为 "mm" 时坐标为相对图像中心的物理偏移 (row, col)，
+尺寸按像素间距换算（行列间距不同时圆形换算为椭圆）。slices 可为 "all"、"middle"、
+切片索引或索引列表（负数从末尾计），单个 ROI 可用 "slice" 覆盖。
+
+命令行用法::
+
+    python -m medimager.core.batch_analysis template.json /data/qa/2024-* -o results.csv --workers 4
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from medimager.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 结果文件的列
+RESULT_FIELDS = [
+    "series_uid", "series_description", "roi", "shape", "slice",
+    "count", "mean", "std", "min", "max", "area_mm2", "error"
+]
+
+_SHAPES = ("circle", "ellipse", "rectangle")
+
+
+class ROITemplate:
+    """
+    ROI 模板：一组按名称标识、以像素或物理坐标描述的 ROI.
+
+    Args:
+        rois: ROI 描述列表（字段见模块说明）.
+        units: "px" 或 "mm".
+        slices: 默认放置的切片（"all"、"middle"、索引或索引列表）.
+        name: 模板名称.
+    """
+
+    def __init__(self, rois: List[Dict[str, Any]], units: str = "px",
+                 slices: Union[str, int, List[int]] = "all", name: str = "") -> None:
+        if units not in ("px", "mm"):
+            raise ValueError(f"Unknown template units: {units!r}")
+        for roi in rois:
+            shape = roi.get("shape")
+            if shape not in _SHAPES:
+                raise ValueError(f"ROI {roi.get('name')!r}: unknown shape {shape!r}")
+            required = ("top_left", "bottom_right") if shape == "rectangle" else (
+                ("center", "radius") if shape == "circle" else ("center", "radius_x", "radius_y"))
+            missing = [key for key in required if key not in roi]
+            if missing:
+                raise ValueError(f"ROI {roi.get('name')!r}: missing {', '.join(missing)}")
+        self.rois = rois
+        self.units = units
+        self.slices = slices
+        self.name = name
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ROITemplate':
+        return cls(data.get("rois", []), data.get("units", "px"), data.get("slices", "all"),
+                   data.get("name", ""))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'ROITemplate':
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "units": self.units, "slices": self.slices, "rois": self.rois}
+
+    @staticmethod
+    def _resolve_slices(spec: Union[str, int, List[int]], slice_count: int) -> List[int]:
+        if spec == "all":
+            return list(range(slice_count))
+        if spec == "middle":
+            return [slice_count // 2]
+        indices = spec if isinstance(spec, list) else [spec]
+        resolved = []
+        for index in indices:
+            index = int(index)
+            if index < 0:
+                index += slice_count
+            if 0 <= index < slice_count:
+                resolved.append(index)
+        return resolved
+
+    def place(self, model) -> Tuple['ROITable', List[str]]:
+        """
+        将模板放置到模型图像上.
+
+        Returns:
+            (ROITable, 每行对应的 ROI 名称)
+        """
+        from medimager.core.roi_table import ROITable
+
+        slice_count, height, width = model.pixel_array.shape
+        _, row_spacing, col_spacing = model.get_voxel_spacing()
+        origin = ((height - 1) / 2, (width - 1) / 2)
+
+        def to_pixel(point) -> Tuple[int, int]:
+            if self.units == "px":
+                return int(round(point[0])), int(round(point[1]))
+            return (int(round(origin[0] + point[0] / row_spacing)),
+                    int(round(origin[1] + point[1] / col_spacing)))
+
+        def to_radii(radius_x: float, radius_y: float) -> Tuple[int, int]:
+            if self.units == "px":
+                return int(round(radius_x)), int(round(radius_y))
+            return int(round(radius_x / col_spacing)), int(round(radius_y / row_spacing))
+
+        table = ROITable()
+        names: List[str] = []
+        for roi in self.rois:
+            slices = self._resolve_slices(roi.get("slice", self.slices), slice_count)
+            if not slices:
+                continue
+            shape = roi["shape"]
+            if shape == "rectangle":
+                table.add_rectangles([to_pixel(roi["top_left"])] * len(slices),
+                                     [to_pixel(roi["bottom_right"])] * len(slices), slices)
+            else:
+                if shape == "circle":
+                    radius_x, radius_y = to_radii(roi["radius"], roi["radius"])
+                else:
+                    radius_x, radius_y = to_radii(roi["radius_x"], roi["radius_y"])
+                centers = [to_pixel(roi["center"])] * len(slices)
+                if radius_x == radius_y:
+                    table.add_circles(centers, radius_x, slices)
+                else:
+                    table.add_ellipses(centers, radius_x, radius_y, slices)
+            names.extend([roi.get("name", f"roi{len(names)}")] * len(slices))
+        return table, names
+
+
+@dataclass
+class BatchSummary:
+    """批处理结果摘要"""
+    series: int = 0
+    failed: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def series_per_minute(self) -> float:
+        return self.series * 60.0 / self.seconds if self.seconds > 0 else 0.0
+
+
+def discover_series(inputs: Iterable[Union[str, Path]]) -> List[List[str]]:
+    """
+    在文件和目录（递归）中查找 DICOM 文件，并按 SeriesInstanceUID 分组.
+
+    Returns:
+        每个序列的文件路径列表
+    """
+    from medimager.core.dicom_parser import DicomParser
+
+    files: List[str] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.rglob("*")) if p.is_file())
+        elif path.is_file():
+            files.append(str(path))
+    groups = DicomParser().group_files_by_series(files)
+    return [group for _, group in sorted(groups.items(), key=lambda item: item[1][0])]
+
+
+def analyze_series(files: List[str], template: Union[ROITemplate, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    加载一个序列并计算模板中所有 ROI 的统计.
+
+    可在工作进程中调用（参数与返回值均可序列化）。加载失败时返回一行带 error 字段的结果.
+    """
+    from medimager.core.analysis import calculate_table_statistics
+    from medimager.core.image_data_model import ImageDataModel
+
+    if isinstance(template, dict):
+        template = ROITemplate.from_dict(template)
+    model = ImageDataModel(auto_histogram=False)
+    base = {"series_uid": "", "series_description": ""}
+    try:
+        if not model.load_dicom_series(files) or model.pixel_array is None:
+            return [dict(base, series_uid=files[0] if files else "", error="failed to load series")]
+        header = model.dicom_header
+        base = {"series_uid": str(header.get("SeriesInstanceUID", "")),
+                "series_description": str(header.get("SeriesDescription", ""))}
+        table, names = template.place(model)
+        stats = calculate_table_statistics(model, table)
+        _, row_spacing, col_spacing = model.get_voxel_spacing()
+        shape_names = {0: "ellipse", 1: "circle", 2: "rectangle"}
+
+        rows = []
+        for i, name in enumerate(names):
+            count = int(stats["count"][i])
+            row = dict(base, roi=name, shape=shape_names[int(table.shapes[i])],
+                       slice=int(table.slices[i]), count=count,
+                       area_mm2=count * row_spacing * col_spacing, error="")
+            for key in ("mean", "std", "min", "max"):
+                row[key] = float(stats[key][i]) if count else None
+            rows.append(row)
+        return rows
+    except Exception as e:
+        logger.error(f"[analyze_series] 分析序列失败: {e}", exc_info=True)
+        return [dict(base, series_uid=base["series_uid"] or (files[0] if files else ""), error=str(e))]
+    finally:
+        model.clear_all_data()
+
+
+class _ResultWriter:
+    """按扩展名以 CSV、JSON 数组或 JSON Lines 流式写出结果行"""
+
+    def __init__(self, output: Union[str, Path], fields: List[str] = RESULT_FIELDS) -> None:
+        self.path = Path(output)
+        self._fields = fields
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._format = {".json": "json", ".jsonl": "jsonl"}.get(self.path.suffix.lower(), "csv")
+        self._first = True
+        if self._format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+            self._csv.writeheader()
+        elif self._format == "json":
+            self._file.write("[")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if self._format == "csv":
+                self._csv.writerow(row)
+            else:
+                text = json.dumps({key: row.get(key) for key in self._fields}, ensure_ascii=False)
+                if self._format == "json":
+                    text = ("\n" if self._first else ",\n") + text
+                else:
+                    text += "\n"
+                self._file.write(text)
+            self._first = False
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._format == "json":
+            self._file.write("\n]\n")
+        self._file.close()
+
+
+def run_batch(series: List[List[str]], template: ROITemplate, output: Union[str, Path],
+              workers: Optional[int] = None,
+              progress: Optional[Callable[[int, int, BatchSummary], None]] = None) -> BatchSummary:
+    """
+    对多个序列运行模板分析并流式写出结果.
+
+    Args:
+        series: 每个序列的文件列表（见 discover_series）.
+        template: ROI 模板.
+        output: 输出文件（.csv / .json / .jsonl）.
+        workers: 工作进程数，None 为 CPU 核数，0 表示在当前进程中依次处理.
+        progress: 每完成一个序列调用一次 (已完成, 总数, 摘要).
+
+    Returns:
+        批处理摘要（含每分钟处理的序列数）.
+    """
+    return run_series_tasks(series, analyze_series, (template.to_dict(),), output,
+                            RESULT_FIELDS, workers, progress)
+
+
+def run_series_tasks(series: List[List[str]], task: Callable[..., List[Dict[str, Any]]],
+                     task_args: tuple, output: Union[str, Path], fields: List[str],
+                     workers: Optional[int] = None,
+                     progress: Optional[Callable[[int, int, BatchSummary], None]] = None) -> BatchSummary:
+    """
+    在进程池中对每个序列调用 ``task(files, *task_args)``，并按完成顺序流式写出返回的结果行.
+
+    task 必须是模块级函数，参数与返回值均可序列化；返回的行中带 error 字段即计为失败.
+    其余参数含义同 run_batch，fields 为输出文件的列.
+    """
+    summary = BatchSummary()
+    writer = _ResultWriter(output, fields)
+    start = time.perf_counter()
+
+    def record(rows: List[Dict[str, Any]]) -> None:
+        summary.series += 1
+        summary.failed += any(row.get("error") for row in rows)
+        summary.rows += len(rows)
+        summary.seconds = time.perf_counter() - start
+        writer.write(rows)
+        if progress is not None:
+            progress(summary.series, len(series), summary)
+
+    try:
+        if workers == 0:
+            for files in series:
+                record(task(files, *task_args))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # 同时在途的任务数有上限，结果按完成顺序写出
+                pending = set()
+                for files in series:
+                    pending.add(executor.submit(task, files, *task_args))
+                    if len(pending) >= 2 * workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record(future.result())
+                for future in pending:
+                    record(future.result())
+    finally:
+        writer.close()
+    summary.seconds = time.perf_counter() - start
+    logger.info(f"[run_series_tasks] 完成 {summary.series} 个序列（失败 {summary.failed}），"
+                f"{summary.seconds:.1f} s，{summary.series_per_minute:.1f} 序列/分钟")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    from medimager.utils.logger import setup_logger
+
+    parser = argparse.ArgumentParser(
+        prog="python -m medimager.core.batch_analysis",
+        description="Apply an ROI template to DICOM series and stream the statistics to CSV/JSON.")
+    parser.add_argument("template", help="ROI template JSON file")
+    parser.add_argument("inputs", nargs="+", help="DICOM files or directories (searched recursively)")
+    parser.add_argument("-o", "--output", default="roi_results.csv",
+                        help="output file (.csv, .json or .jsonl)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 0: run in-process)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    args = parser.parse_args(argv)
+
+    setup_logger(level="WARNING", console_output=True)
+    try:
+        template = ROITemplate.from_file(args.template)
+    except (OSError, ValueError) as e:
+        print(f"Invalid template: {e}", file=sys.stderr)
+        return 2
+    series = discover_series(args.inputs)
+    if not series:
+        print("No DICOM series found.", file=sys.stderr)
+        return 1
+
+    def report(done: int, total: int, summary: BatchSummary) -> None:
+        if not args.quiet:
+            print(f"\r{done}/{total} series, {summary.series_per_minute:.1f} series/min",
+                  end="", file=sys.stderr, flush=True)
+
+    summary = run_batch(series, template, args.output, args.workers, report)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"{summary.series} series ({summary.failed} failed), {summary.rows} rows in "
+          f"{summary.seconds:.1f} s ({summary.series_per_minute:.1f} series/min) -> {args.output}")
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Cine 播放引擎模块
+
+在工作线程中预先渲染后续帧并放入有界环形缓冲区，
+由主线程按照墙钟时间进行带时间校正的播放，并统计实际帧率与丢帧数。
+支持多个视图同步播放（共享同一个播放时钟）。
+
+帧经模型的显示管线渲染（窗宽窗位、伪彩色、HU 高亮、显示滤波、CLAHE 与标签叠加），
+与静止显示一致；缓冲帧按渲染时的显示标识保存，显示选项或标签变化后旧帧自然失效。
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal, QTimer, QElapsedTimer, Qt
+
+from medimager.core.image_data_model import ImageDataModel
+from medimager.utils.logger import get_logger
+from medimager.utils.settings import get_performance_manager
+
+logger = get_logger(__name__)
+
+
+class CineFrameBuffer:
+    """有界帧环形缓冲区（线程安全）
+
+    以切片索引为键保存已渲染的帧及其显示标识，超出容量时淘汰最早写入的帧。
+    """
+
+    def __init__(self, capacity: int = 32) -> None:
+        self._capacity = max(2, capacity)
+        self._frames: "OrderedDict[int, Tuple[Hashable, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def put(self, index: int, frame: np.ndarray, key: Hashable = None) -> None:
+        """写入一帧（key 为渲染时的显示标识），超出容量时淘汰最旧的帧"""
+        with self._lock:
+            self._frames[index] = (key, frame)
+            self._frames.move_to_end(index)
+            while len(self._frames) > self._capacity:
+                self._frames.popitem(last=False)
+
+    def get(self, index: int, key: Hashable = None) -> Optional[np.ndarray]:
+        """获取一帧，不存在或显示标识与 key 不同时返回 None"""
+        with self._lock:
+            entry = self._frames.get(index)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    def discard_before(self, keep: set) -> None:
+        """丢弃不在 keep 集合中的帧（播放窗口外的帧）"""
+        with self._lock:
+            for index in [i for i in self._frames if i not in keep]:
+                del self._frames[index]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frames)
+
+
+@dataclass
+class CineTrack:
+    """单个视图的播放轨道"""
+    view_id: str
+    model: ImageDataModel
+    buffer: CineFrameBuffer
+
+
+@dataclass
+class CineStats:
+    """播放统计"""
+    target_fps: float = 0.0
+    achieved_fps: float = 0.0
+    presented_frames: int = 0
+    dropped_frames: int = 0
+
+
+def cine_frame_key(model: ImageDataModel, slice_index: int) -> tuple:
+    """切片显示帧的标识：数据版本、显示选项与切片标签版本"""
+    labels = model.label_volume
+    return (model.data_version, model.window_width, model.window_level, model.highlight_band,
+            model.colormap, model.display_filter, model.clahe,
+            labels.render_key(slice_index) if labels is not None else None)
+
+
+def render_cine_frame(model: ImageDataModel, slice_index: int) -> Optional[np.ndarray]:
+    """
+    经模型的显示管线渲染一帧全分辨率显示帧（可在工作线程中调用）
+
+    Returns:
+        uint8 灰度帧，或有伪彩色/HU 高亮/标签时的 uint32 ARGB32 帧；切片不存在时返回 None
+    """
+    frame = model.render_display_frame(slice_index)
+    if frame is not None and model.label_volume is not None:
+        frame = model.label_volume.blend(frame, slice_index)
+    return frame
+
+
+class CineEngine(QObject):
+    """Cine 播放引擎
+
+    - 预取：在性能管理器的线程池中渲染当前位置之后的若干帧
+    - 播放：以 QElapsedTimer 为时钟计算应显示的帧，落后时跳帧（计为丢帧），
+      帧未就绪或显示标识已过期时保持上一帧（同样计为丢帧）
+    - 多视图：所有轨道共享同一帧序号，按各自切片数取模
+
+    Signals:
+        frame_ready (str, int, object): 帧可显示，参数为 (view_id, slice_index, 显示帧数组)
+        stats_updated (object): 播放统计更新，参数为 CineStats
+        playback_state_changed (bool): 播放状态变化
+    """
+
+    frame_ready = Signal(str, int, object)
+    stats_updated = Signal(object)
+    playback_state_changed = Signal(bool)
+
+    def __init__(self, buffer_size: int = 32, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._buffer_size = max(2, buffer_size)
+        self._tracks: Dict[str, CineTrack] = {}
+        self._pending: Dict[Tuple[str, int], Future] = {}
+        self._pending_lock = threading.Lock()
+
+        self._fps = 10.0
+        self._playing = False
+        self._start_frame = 0
+        self._frame_position = 0  # 最后显示的全局帧序号
+        self._clock = QElapsedTimer()
+
+        self._stats = CineStats()
+        self._present_times: deque = deque(maxlen=120)
+
+        # 时钟精度需高于帧间隔，采用较短的轮询间隔并按墙钟决定帧号
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_tick)
+
+    # ------------------------------------------------------------------
+    # 轨道管理
+    # ------------------------------------------------------------------
+    def set_tracks(self, tracks: List[Tuple[str, ImageDataModel]]) -> None:
+        """设置参与播放的视图（第一个为主轨道，决定起始帧）"""
+        self._tracks.clear()
+        self._cancel_pending()
+
+        for view_id, model in tracks:
+            if model is None or model.get_slice_count() <= 1:
+                continue
+            self._tracks[view_id] = CineTrack(view_id, model, CineFrameBuffer(self._buffer_size))
+
+        logger.debug(f"[CineEngine.set_tracks] 播放轨道: {list(self._tracks.keys())}")
+
+    def get_track_ids(self) -> List[str]:
+        return list(self._tracks.keys())
+
+    # ------------------------------------------------------------------
+    # 播放控制
+    # ------------------------------------------------------------------
+    def is_playing(self) -> bool:
+        return self._playing
+
+    def set_fps(self, fps: float) -> None:
+        """设置目标帧率，播放中修改时从当前帧重新计时"""
+        self._fps = max(1.0, min(60.0, float(fps)))
+        self._stats.target_fps = self._fps
+        if self._playing:
+            self._timer.setInterval(max(1, int(1000 / self._fps / 4)))
+            self._restart_clock(self._frame_position)
+
+    def get_fps(self) -> float:
+        return self._fps
+
+    def get_stats(self) -> CineStats:
+        return self._stats
+
+    def start(self) -> bool:
+        """开始播放，没有可播放的轨道时返回 False"""
+        if not self._tracks:
+            return False
+        primary = next(iter(self._tracks.values()))
+        self._stats = CineStats(target_fps=self._fps)
+        self._present_times.clear()
+        self._playing = True
+        self._restart_clock(primary.model.current_slice_index)
+        self._schedule_prefetch()
+        self._timer.start(max(1, int(1000 / self._fps / 4)))
+        self.playback_state_changed.emit(True)
+        logger.info(f"[CineEngine.start] 开始播放: {len(self._tracks)} 个视图, {self._fps:.0f} fps")
+        return True
+
+    def stop(self) -> None:
+        """停止播放并释放缓冲"""
+        if not self._playing:
+            return
+        self._playing = False
+        self._timer.stop()
+        self._cancel_pending()
+        for track in self._tracks.values():
+            track.buffer.clear()
+        self.playback_state_changed.emit(False)
+        logger.info(f"[CineEngine.stop] 停止播放: 实际 {self._stats.achieved_fps:.1f} fps, "
+                    f"丢帧 {self._stats.dropped_frames}")
+
+    def _restart_clock(self, frame_position: int) -> None:
+        self._start_frame = frame_position
+        self._frame_position = frame_position
+        self._clock.restart()
+
+    # ------------------------------------------------------------------
+    # 预取
+    # ------------------------------------------------------------------
+    def _frame_window(self) -> range:
+        """需要驻留在缓冲区中的全局帧序号范围"""
+        return range(self._frame_position, self._frame_position + self._buffer_size)
+
+    def _schedule_prefetch(self) -> None:
+        pool = get_performance_manager().get_thread_pool()
+        window = self._frame_window()
+        for track in self._tracks.values():
+            count = track.model.get_slice_count()
+            if count <= 0:
+                continue
+            wanted = [pos % count for pos in window]
+            track.buffer.discard_before(set(wanted))
+            for slice_index in dict.fromkeys(wanted):
+                frame_key = cine_frame_key(track.model, slice_index)
+                if track.buffer.get(slice_index, frame_key) is not None:
+                    continue
+                key = (track.view_id, slice_index)
+                with self._pending_lock:
+                    if key in self._pending:
+                        continue
+                    future = pool.submit(self._render_task, track, slice_index, frame_key)
+                    self._pending[key] = future
+                future.add_done_callback(lambda _f, k=key: self._on_task_done(k))
+
+    def _render_task(self, track: CineTrack, slice_index: int, frame_key: tuple) -> None:
+        """工作线程：渲染一帧并按提交时的显示标识写入缓冲区
+
+        渲染期间显示选项发生变化时，帧可能混用新旧设置，但其标识已过期，不会被显示。
+        """
+        frame = render_cine_frame(track.model, slice_index)
+        if frame is not None:
+            track.buffer.put(slice_index, frame, frame_key)
+
+    def _on_task_done(self, key: Tuple[str, int]) -> None:
+        with self._pending_lock:
+            self._pending.pop(key, None)
+
+    def _cancel_pending(self) -> None:
+        with self._pending_lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+    # ------------------------------------------------------------------
+    # 播放时钟
+    # ------------------------------------------------------------------
+    def _on_tick(self) -> None:
+        if not self._playing:
+            return
+        target_position = self._start_frame + int(self._clock.elapsed() * self._fps / 1000.0)
+        if target_position <= self._frame_position and self._stats.presented_frames > 0:
+            return
+
+        # 所有轨道的目标帧都就绪才同步显示，避免多视图之间出现撕裂
+        frames = []
+        for track in self._tracks.values():
+            slice_index = target_position % track.model.get_slice_count()
+            frame = track.buffer.get(slice_index, cine_frame_key(track.model, slice_index))
+            if frame is None:
+                break
+            frames.append((track.view_id, slice_index, frame))
+        else:
+            skipped = max(0, target_position - self._frame_position - 1)
+            self._stats.dropped_frames += skipped
+            self._frame_position = target_position
+            for view_id, slice_index, frame in frames:
+                self.frame_ready.emit(view_id, slice_index, frame)
+            self._record_presented()
+            self._schedule_prefetch()
+            return
+
+        # 目标帧尚未渲染完成：保持当前帧并确保预取在进行。
+        # 首帧显示之前只是等待预取，不计丢帧；之后时钟每走过一个帧间隔才会到达这里，
+        # 每个帧间隔至多计一次
+        if self._stats.presented_frames > 0:
+            self._stats.dropped_frames += 1
+        self._restart_clock(self._frame_position)
+        self._schedule_prefetch()
+
+    def _record_presented(self) -> None:
+        now = time.perf_counter() * 1000.0
+        self._present_times.append(now)
+        self._stats.presented_frames += 1
+        if len(self._present_times) >= 2:
+            span = self._present_times[-1] - self._present_times[0]
+            if span > 0:
+                self._stats.achieved_fps = (len(self._present_times) - 1) * 1000.0 / span
+        if self._stats.presented_frames % max(1, int(self._fps)) == 0:
+            self.stats_updated.emit(self._stats)
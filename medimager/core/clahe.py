@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应直方图均衡（CLAHE）显示模块
+
+- 切片划分为网格图块，每个图块的直方图按量化后的像素值（见 display_lut）统计，
+  与窗宽窗位无关，每个切片只用一次 bincount 计算并缓存；
+- 窗宽窗位变化时把原始分箱按窗口映射合并为 256 级灰度直方图（分箱到灰度的映射单调，
+  一次 reduceat 完成），再做限幅、重分配和累加得到每个图块的灰度映射表；
+- 每个像素在相邻 4 个图块中心的映射之间双线性插值，插值通过对
+  (图块 x 256) 映射表的 4 次查表完成，没有逐像素或逐图块的 Python 循环。
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from medimager.core.display_lut import QuantizedSlice
+
+# 每个图块直方图的分箱上限
+MAX_HISTOGRAM_BINS = 4096
+
+
+@dataclass(frozen=True)
+class ClaheParams:
+    """
+    CLAHE 参数.
+
+    Attributes:
+        clip_limit: 限幅系数，直方图分箱超过平均高度的该倍数时截断并均匀重分配.
+        grid: 图块网格 (行数, 列数).
+    """
+    clip_limit: float = 2.0
+    grid: Tuple[int, int] = (8, 8)
+
+
+@dataclass
+class TileHistograms:
+    """
+    切片的图块直方图.
+
+    Attributes:
+        counts: (图块数, 分箱数) 的计数，图块按行优先编号.
+        grid: 实际使用的图块网格 (行数, 列数).
+        tile_shape: 图块尺寸 (高, 宽)，最后一行/列图块可能更小.
+        shift: 量化灰度级右移该位数得到分箱号.
+        levels: 量化灰度级数.
+    """
+    counts: np.ndarray
+    grid: Tuple[int, int]
+    tile_shape: Tuple[int, int]
+    shift: int
+    levels: int
+
+    def bin_levels(self) -> np.ndarray:
+        """每个分箱中心对应的量化灰度级"""
+        bins = self.counts.shape[1]
+        center = (np.arange(bins, dtype=np.int64) << self.shift) + ((1 << self.shift) >> 1)
+        return np.minimum(center, self.levels - 1)
+
+
+def compute_tile_histograms(quantized: QuantizedSlice, grid: Tuple[int, int] = (8, 8)) -> TileHistograms:
+    """统计量化切片的图块直方图（一次 bincount）"""
+    height, width = quantized.index.shape
+    rows = max(1, min(int(grid[0]), height))
+    cols = max(1, min(int(grid[1]), width))
+    tile_h, tile_w = -(-height // rows), -(-width // cols)
+    rows, cols = -(-height // tile_h), -(-width // tile_w)
+
+    shift = 0
+    while (quantized.levels - 1) >> shift >= MAX_HISTOGRAM_BINS:
+        shift += 1
+    bins = ((quantized.levels - 1) >> shift) + 1
+
+    tile_ids = (np.arange(height) // tile_h)[:, None] * cols + (np.arange(width) // tile_w)[None, :]
+    keys = tile_ids.astype(np.int64) * bins + (quantized.index >> shift)
+    counts = np.bincount(keys.ravel(), minlength=rows * cols * bins).reshape(rows * cols, bins)
+    return TileHistograms(counts.astype(np.int32), (rows, cols), (tile_h, tile_w), shift, quantized.levels)
+
+
+def clahe_mappings(histograms: TileHistograms, window: np.ndarray, clip_limit: float) -> np.ndarray:
+    """
+    计算每个图块的灰度映射表
+
+    Args:
+        histograms: 图块直方图
+        window: 窗宽窗位查找表（量化灰度级 -> uint8 灰度）
+        clip_limit: 限幅系数
+
+    Returns:
+        (图块数, 256) 的 float32 映射表，把窗宽窗位后的灰度映射为均衡后的灰度
+    """
+    counts = histograms.counts
+    bin_gray = window[histograms.bin_levels()].astype(np.int64)
+    # 窗口映射单调不减，同一灰度的分箱相邻，reduceat 一次合并
+    starts = np.flatnonzero(np.diff(bin_gray, prepend=-1))
+    gray = np.zeros((counts.shape[0], 256), dtype=np.float32)
+    gray[:, bin_gray[starts]] = np.add.reduceat(counts, starts, axis=1)
+
+    totals = gray.sum(axis=1, keepdims=True)
+    if clip_limit > 0:
+        limit = np.maximum(clip_limit * totals / 256, 1.0)
+        excess = np.maximum(gray - limit, 0).sum(axis=1, keepdims=True)
+        gray = np.minimum(gray, limit) + excess / 256
+    cdf = np.cumsum(gray, axis=1)
+    return cdf / np.maximum(cdf[:, -1:], 1) * 255
+
+
+def _interpolation_axis(length: int, tile: int, count: int):
+    """一个方向上每个像素的两侧图块下标与后一个图块的权重"""
+    position = (np.arange(length) + 0.5) / tile - 0.5
+    first = np.clip(np.floor(position), 0, count - 1).astype(np.int64)
+    second = np.minimum(first + 1, count - 1)
+    weight = np.clip(position - first, 0, 1).astype(np.float32)
+    return first, second, weight
+
+
+def apply_clahe(gray: np.ndarray, histograms: TileHistograms, mappings: np.ndarray) -> np.ndarray:
+    """
+    把窗宽窗位后的灰度帧按图块映射表做双线性插值均衡
+
+    Args:
+        gray: uint8 灰度帧（与直方图统计的切片同尺寸）
+        histograms: 图块直方图（提供网格几何）
+        mappings: clahe_mappings 的结果
+
+    Returns:
+        uint8 均衡灰度帧
+    """
+    height, width = gray.shape
+    rows, cols = histograms.grid
+    y0, y1, wy = _interpolation_axis(height, histograms.tile_shape[0], rows)
+    x0, x1, wx = _interpolation_axis(width, histograms.tile_shape[1], cols)
+    flat = mappings.astype(np.float32).ravel()
+    g = gray.astype(np.int32)
+
+    def lookup(ys, xs):
+        index = ((ys[:, None] * cols + xs[None, :]) << 8).astype(np.int32)
+        index += g
+        return np.take(flat, index)
+
+    wy, wx = wy[:, None], wx[None, :]
+    top = lookup(y0, x0) * (1 - wx) + lookup(y0, x1) * wx
+    bottom = lookup(y1, x0) * (1 - wx) + lookup(y1, x1) * wx
+    result = top * (1 - wy) + bottom * wy
+    return np.clip(np.rint(result), 0, 255).astype(np.uint8)
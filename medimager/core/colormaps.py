@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+伪彩色调色板模块
+
+每个调色板为 256 x 3 的 uint8 数组，以窗宽窗位后的灰度为下标。显示时调色板
+与窗宽窗位查找表合并为一张 ARGB32 查找表（见 medimager.core.display_lut），
+伪彩色显示与灰度显示一样每帧只做一次查表。
+
+- hot / jet / rainbow：常用的解析定义色图；
+- Hot Iron / PET / Hot Metal Blue / PET 20 Step：DICOM 标准调色板（PS3.6 附录 B），
+  数据取自 pydicom 随附的标准调色板文件；
+- DICOM 文件自带的调色板颜色查找表 (0028,1101-1203) 重采样为 256 项。
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pydicom
+from pydicom.pixels import apply_color_lut
+
+from medimager.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 文件自带调色板的名称
+DICOM_PALETTE = "dicom"
+
+# DICOM 标准调色板的 SOP Instance UID
+_STANDARD_PALETTES = {
+    "hot_iron": "1.2.840.10008.1.5.1",
+    "pet": "1.2.840.10008.1.5.2",
+    "hot_metal_blue": "1.2.840.10008.1.5.3",
+    "pet_20_step": "1.2.840.10008.1.5.4",
+}
+
+# 菜单显示的调色板：(名称, 显示名)
+COLORMAP_NAMES = [
+    ("hot", "Hot"),
+    ("jet", "Jet"),
+    ("rainbow", "Rainbow"),
+    ("hot_iron", "Hot Iron"),
+    ("pet", "PET"),
+    ("hot_metal_blue", "Hot Metal Blue"),
+    ("pet_20_step", "PET 20 Step"),
+]
+
+_palette_cache: Dict[str, np.ndarray] = {}
+
+
+def _to_uint8(channels: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(channels * 255), 0, 255).astype(np.uint8)
+
+
+def _hot(x: np.ndarray) -> np.ndarray:
+    return _to_uint8(np.stack([3 * x, 3 * x - 1, 3 * x - 2], axis=1))
+
+
+def _jet(x: np.ndarray) -> np.ndarray:
+    return _to_uint8(np.stack([1.5 - np.abs(4 * x - 3), 1.5 - np.abs(4 * x - 2),
+                               1.5 - np.abs(4 * x - 1)], axis=1))
+
+
+def _rainbow(x: np.ndarray) -> np.ndarray:
+    # 色相从蓝 (240°) 到红 (0°)，饱和度与亮度为 1
+    hue = (1 - x) * 4
+    rgb = np.stack([np.abs(hue - 3) - 1, 2 - np.abs(hue - 2), 2 - np.abs(hue - 4)], axis=1)
+    return _to_uint8(rgb)
+
+
+_ANALYTIC_PALETTES = {"hot": _hot, "jet": _jet, "rainbow": _rainbow}
+
+
+def get_colormap(name: str) -> np.ndarray:
+    """按名称获取 256 x 3 的 uint8 调色板（结果被缓存，不应修改）"""
+    palette = _palette_cache.get(name)
+    if palette is not None:
+        return palette
+    if name in _ANALYTIC_PALETTES:
+        palette = _ANALYTIC_PALETTES[name](np.linspace(0.0, 1.0, 256))
+    elif name in _STANDARD_PALETTES:
+        palette = _resample(apply_color_lut(np.arange(256, dtype=np.uint8),
+                                            palette=_STANDARD_PALETTES[name]))
+    else:
+        raise ValueError(f"未知的调色板: {name}")
+    palette.flags.writeable = False
+    _palette_cache[name] = palette
+    return palette
+
+
+def _resample(rgb: np.ndarray) -> np.ndarray:
+    """把任意长度、8 或 16 位的 RGB(A) 查找表重采样为 256 x 3 的 uint8 调色板"""
+    rgb = np.asarray(rgb)[:, :3]
+    if rgb.dtype.itemsize > 1:
+        rgb = rgb >> 8
+    index = np.rint(np.linspace(0, len(rgb) - 1, 256)).astype(np.int64)
+    return np.ascontiguousarray(rgb[index], dtype=np.uint8)
+
+
+def dicom_palette(ds: pydicom.Dataset) -> Optional[np.ndarray]:
+    """
+    DICOM 数据集自带的调色板颜色查找表（重采样为 256 x 3），没有时返回 None
+
+    查找表按描述符中的首个映射值和项数展开后，线性映射到窗宽窗位后的灰度范围。
+    """
+    descriptor = ds.get("RedPaletteColorLookupTableDescriptor")
+    if descriptor is None:
+        return None
+    try:
+        count = int(descriptor[0]) or 65536
+        first = int(descriptor[1])
+        rgb = apply_color_lut(np.arange(first, first + count, dtype=np.int64), ds)
+        return _resample(rgb)
+    except Exception as e:
+        logger.warning(f"[dicom_palette] 解析调色板颜色查找表失败: {e}")
+        return None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+等值线提取模块
+
+向量化的 marching squares：
+- 所有网格单元的情形编号、线段与交点一次性按数组计算；
+- 线段按统一方向（区域内侧在左）生成，每条线段的终点恰为下一条线段的起点，
+  用指针倍增（O(log n) 轮数组运算）把线段串成闭合轮廓，没有逐线段的 Python 循环；
+- 图像外圈按背景处理，接触图像边界的区域同样得到闭合轮廓；
+- 简化时先去掉共线顶点，再按容差删除偏离相邻顶点连线很小的顶点。
+
+轮廓坐标为像素索引坐标 (列, 行)，像素中心位于整数坐标。
+"""
+
+from typing import List
+
+import numpy as np
+
+# 单元的边：上 (左上-右上)、右 (右上-右下)、下 (左下-右下)、左 (左上-左下)
+_TOP, _RIGHT, _BOTTOM, _LEFT = range(4)
+# 边中点与角点在单元内的位置 (x, y)，y 向下
+_EDGE_MIDPOINTS = np.array([(0.5, 0.0), (1.0, 0.5), (0.5, 1.0), (0.0, 0.5)])
+_CORNERS = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+
+# 每种情形的线段（未定向）。情形编号 = 左上*1 + 右上*2 + 右下*4 + 左下*8（值 >= level 为 1），
+# 16/17 为中心在区域内的鞍点情形 5/10
+_CASE_SEGMENTS = {
+    1: [(_LEFT, _TOP)], 2: [(_TOP, _RIGHT)], 3: [(_LEFT, _RIGHT)], 4: [(_RIGHT, _BOTTOM)],
+    5: [(_LEFT, _TOP), (_RIGHT, _BOTTOM)], 6: [(_TOP, _BOTTOM)], 7: [(_LEFT, _BOTTOM)],
+    8: [(_BOTTOM, _LEFT)], 9: [(_TOP, _BOTTOM)], 10: [(_TOP, _RIGHT), (_BOTTOM, _LEFT)],
+    11: [(_RIGHT, _BOTTOM)], 12: [(_LEFT, _RIGHT)], 13: [(_TOP, _RIGHT)], 14: [(_LEFT, _TOP)],
+    16: [(_LEFT, _BOTTOM), (_RIGHT, _TOP)], 17: [(_TOP, _LEFT), (_BOTTOM, _RIGHT)],
+}
+
+
+def _build_case_table():
+    """按"区域内侧在线段左侧"为每种情形的线段定向，返回 (线段数, 起始边, 终止边) 表"""
+    counts = np.zeros(18, dtype=np.int64)
+    starts = np.zeros((18, 2), dtype=np.int64)
+    ends = np.zeros((18, 2), dtype=np.int64)
+    for case, segments in _CASE_SEGMENTS.items():
+        inside = [bool((5 if case == 16 else 10 if case == 17 else case) >> k & 1) for k in range(4)]
+        counts[case] = len(segments)
+        for i, (a, b) in enumerate(segments):
+            p, q = _EDGE_MIDPOINTS[a], _EDGE_MIDPOINTS[b]
+            d = q - p
+            sides = [d[0] * (c[1] - p[1]) - d[1] * (c[0] - p[0]) for c in _CORNERS]
+            positive = [k for k in range(4) if sides[k] > 0]
+            negative = [k for k in range(4) if sides[k] < 0]
+            # 被线段切下的一侧角点较少，且同侧角点的内外状态一致
+            if positive and (not negative or len(positive) <= len(negative)):
+                left_inside = inside[positive[0]]
+            else:
+                left_inside = not inside[negative[0]]
+            # y 向下时叉积为负的一侧在行进方向左边
+            if left_inside:
+                a, b = b, a
+            starts[case, i], ends[case, i] = a, b
+    return counts, starts, ends
+
+
+_CASE_COUNTS, _CASE_STARTS, _CASE_ENDS = _build_case_table()
+
+
+def find_contours(field: np.ndarray, level: float) -> List[np.ndarray]:
+    """
+    提取二维标量场在 level 处的等值线
+
+    Args:
+        field: 二维数组（如切片像素值，或掩码转换的 0/1 数组）
+        level: 等值线的值，>= level 视为区域内
+
+    Returns:
+        闭合轮廓列表，每个为 (N, 2) 的 (x, y) 顶点数组（首尾不重复）
+    """
+    field = np.asarray(field, dtype=np.float32)
+    if field.ndim != 2 or not field.size:
+        return []
+    # 外圈补背景值使所有轮廓闭合；取关于 level 与最大值对称的值，掩码边界正好落在像素边缘
+    high = float(np.nanmax(field))
+    padded = np.pad(field, 1, constant_values=2 * level - high if high > level else level - 1.0)
+    inside = padded >= level
+    height, width = padded.shape
+    cases = (inside[:-1, :-1] * 1 | inside[:-1, 1:] * 2 | inside[1:, 1:] * 4 | inside[1:, :-1] * 8).ravel()
+    cells = np.flatnonzero((cases != 0) & (cases != 15))
+    if not len(cells):
+        return []
+    cases = cases[cells]
+    rows, cols = np.divmod(cells, width - 1)
+
+    # 鞍点按单元中心值区分
+    saddle = (cases == 5) | (cases == 10)
+    if saddle.any():
+        r, c = rows[saddle], cols[saddle]
+        center = (padded[r, c] + padded[r, c + 1] + padded[r + 1, c] + padded[r + 1, c + 1]) / 4
+        cases[saddle] = np.where(center >= level, np.where(cases[saddle] == 5, 16, 17), cases[saddle])
+
+    # 展开为线段（鞍点单元两条）
+    counts = _CASE_COUNTS[cases]
+    cell_of_segment = np.repeat(np.arange(len(cases)), counts)
+    second = np.zeros(len(cell_of_segment), dtype=np.int64)
+    second[1:] = cell_of_segment[1:] == cell_of_segment[:-1]
+    seg_cases = cases[cell_of_segment]
+    seg_rows, seg_cols = rows[cell_of_segment], cols[cell_of_segment]
+    start_edges = _CASE_STARTS[seg_cases, second]
+    end_edges = _CASE_ENDS[seg_cases, second]
+
+    # 全局边编号：水平边 (r, c)-(r, c+1) 为 r * width + c，竖直边 (r, c)-(r+1, c) 为 height * width + r * width + c
+    def edge_ids(edges):
+        r = seg_rows + (edges == _BOTTOM)
+        c = seg_cols + (edges == _RIGHT)
+        vertical = (edges == _LEFT) | (edges == _RIGHT)
+        return vertical * (height * width) + r * width + c
+
+    start_ids = edge_ids(start_edges)
+    end_ids = edge_ids(end_edges)
+
+    # 下一条线段：起点边等于本线段终点边的那一条
+    order = np.argsort(start_ids, kind='stable')
+    following = order[np.searchsorted(start_ids[order], end_ids)]
+
+    # 指针倍增求每个环的最小线段下标作为环标识
+    count = len(following)
+    ring = np.arange(count)
+    jump = following.copy()
+    steps = 1
+    while steps < count:
+        ring = np.minimum(ring, ring[jump])
+        jump = jump[jump]
+        steps *= 2
+    # 在环标识处断开，求每条线段到断点的距离，即环内的顺序
+    heads = ring == np.arange(count)
+    tails = heads[following]
+    jump = np.where(tails, np.arange(count), following)
+    distance = (~tails).astype(np.int64)
+    steps = 1
+    while steps < count:
+        distance = distance + distance[jump]
+        jump = jump[jump]
+        steps *= 2
+    sequence = np.lexsort((-distance, ring))
+
+    # 线段起点的插值坐标
+    vertical = start_ids >= height * width
+    flat = start_ids - vertical * (height * width)
+    r0, c0 = np.divmod(flat, width)
+    r1, c1 = r0 + vertical, c0 + ~vertical
+    v0, v1 = padded[r0, c0], padded[r1, c1]
+    t = (level - v0) / (v1 - v0)
+    xs = c0 + t * (c1 - c0) - 1.0
+    ys = r0 + t * (r1 - r0) - 1.0
+
+    points = np.stack([xs[sequence], ys[sequence]], axis=1)
+    boundaries = np.flatnonzero(np.diff(ring[sequence])) + 1
+    return np.split(points, boundaries)
+
+
+def _group_neighbours(lengths: np.ndarray):
+    """按轮廓分组的环形前驱/后继下标"""
+    total = int(lengths.sum())
+    group_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    position = np.arange(total) - group_start
+    previous = group_start + (position - 1) % np.repeat(lengths, lengths)
+    following = group_start + (position + 1) % np.repeat(lengths, lengths)
+    return previous, following, position
+
+
+def simplify_contours(contours: List[np.ndarray], tolerance: float = 0.3) -> List[np.ndarray]:
+    """
+    简化轮廓：去掉共线顶点，并删除到相邻顶点连线距离小于 tolerance 的顶点
+
+    每轮只删除互不相邻的顶点（偶数位置、奇数位置交替），轮廓至少保留 3 个顶点。
+    """
+    contours = [c for c in contours if len(c)]
+    if not contours:
+        return []
+    lengths = np.array([len(c) for c in contours])
+    points = np.concatenate(contours)
+    group = np.repeat(np.arange(len(contours)), lengths)
+
+    passes = [(0.0, None), (tolerance, 0), (tolerance, 1)] if tolerance > 0 else [(0.0, None)]
+    for limit, parity in passes:
+        previous, following, position = _group_neighbours(lengths)
+        a, b, c = points[previous], points, points[following]
+        chord = c - a
+        cross = chord[:, 0] * (b[:, 1] - a[:, 1]) - chord[:, 1] * (b[:, 0] - a[:, 0])
+        if parity is None:
+            remove = np.abs(cross) < 1e-9
+        else:
+            length = np.hypot(chord[:, 0], chord[:, 1])
+            remove = (np.abs(cross) <= limit * length) & (position % 2 == parity) & (position < lengths[group] - 1)
+        # 保证每个轮廓至少保留 3 个顶点
+        removed = np.bincount(group, weights=remove, minlength=len(lengths))
+        remove &= (lengths - removed >= 3)[group]
+        keep = ~remove
+        points, group = points[keep], group[keep]
+        lengths = np.bincount(group, minlength=len(lengths))
+        present = lengths > 0
+        if not present.all():
+            group = np.cumsum(present)[group] - 1
+            lengths = lengths[present]
+
+    return np.split(points, np.cumsum(lengths)[:-1])
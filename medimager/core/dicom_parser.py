@@ -204,7 +204,7 @@ class DicomParser(QObject):
             
         return float(center), float(width) 
     
-    def _group_files_by_series(self, file_paths: List[str]) -> Dict[str, List[str]]:
+    def group_files_by_series(self, file_paths: List[str]) -> Dict[str, List[str]]:
         """将DICOM文件按序列分组
         
         Args:
@@ -213,7 +213,7 @@ class DicomParser(QObject):
         Returns:
             Dict[str, List[str]]: 序列UID到文件路径列表的映射
         """
-        self.logger.debug(f"[DicomParser._group_files_by_series] 开始分组 {len(file_paths)} 个文件")
+        self.logger.debug(f"[DicomParser.group_files_by_series] 开始分组 {len(file_paths)} 个文件")
         
         series_groups = {}
         
@@ -230,13 +230,13 @@ class DicomParser(QObject):
                     
                 series_groups[series_uid].append(file_path)
                 
-                self.logger.debug(f"[DicomParser._group_files_by_series] 文件 {os.path.basename(file_path)} 分组到序列 {series_uid}")
+                self.logger.debug(f"[DicomParser.group_files_by_series] 文件 {os.path.basename(file_path)} 分组到序列 {series_uid}")
                 
             except Exception as e:
-                self.logger.warning(f"[DicomParser._group_files_by_series] 无法读取文件 {file_path}: {e}")
+                self.logger.warning(f"[DicomParser.group_files_by_series] 无法读取文件 {file_path}: {e}")
                 continue
         
-        self.logger.info(f"[DicomParser._group_files_by_series] 分组完成: 发现 {len(series_groups)} 个序列，包含 {sum(len(files) for files in series_groups.values())} 个文件")
+        self.logger.info(f"[DicomParser.group_files_by_series] 分组完成: 发现 {len(series_groups)} 个序列，包含 {sum(len(files) for files in series_groups.values())} 个文件")
         
         return series_groups
     
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+显示查找表模块
+
+切片在首次显示时量化为 uint16 的灰度级下标（每个切片只做一次），之后窗宽窗位、
+HU 高亮等显示参数只改变一张以灰度级为下标的查找表，显示帧由一次 np.take 得到：
+- 整数值数据（CT 的 HU 等）每个整数值一个灰度级，结果与逐像素计算完全一致；
+- 其他数据把取值范围均分为 65536 级。
+
+伪彩色调色板以窗宽窗位后的灰度为下标，HU 高亮把区间内的颜色与高亮色按不透明度
+混合，二者都合并进同一张 ARGB32 查找表：区间内外、灰度与彩色只是查找表的不同条目，
+切换色图或拖动高亮区间与调整窗宽窗位的开销相同。
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 灰度级数上限（下标为 uint16）
+LUT_SIZE = 1 << 16
+
+
+@dataclass(frozen=True)
+class QuantizedSlice:
+    """
+    量化后的切片.
+
+    Attributes:
+        index: 每个像素的灰度级下标 (uint16).
+        offset: 第 0 级对应的像素值.
+        step: 相邻灰度级的像素值间隔.
+        levels: 使用的灰度级数（查找表长度）.
+        dtype: 原始数据类型（计算查找表时按该类型取值，保证与逐像素计算一致）.
+    """
+    index: np.ndarray
+    offset: float
+    step: float
+    levels: int
+    dtype: np.dtype
+
+    def level_values(self) -> np.ndarray:
+        """每个灰度级对应的像素值"""
+        values = self.offset + np.arange(self.levels, dtype=np.float64) * self.step
+        if np.issubdtype(self.dtype, np.floating):
+            return values.astype(self.dtype)
+        return values
+
+
+@dataclass(frozen=True)
+class HighlightBand:
+    """
+    HU 高亮区间.
+
+    Attributes:
+        lower: 区间下限（含）.
+        upper: 区间上限（含）.
+        color: 高亮色 (R, G, B).
+        opacity: 高亮色的不透明度 (0~1).
+    """
+    lower: float
+    upper: float
+    color: Tuple[int, int, int] = (255, 0, 0)
+    opacity: float = 0.5
+
+
+# 常用组织的 HU 高亮预设：(名称, 下限, 上限, 颜色)
+HIGHLIGHT_PRESETS = [
+    ("骨", 300.0, 3000.0, (255, 230, 120)),
+    ("脂肪", -190.0, -30.0, (255, 200, 0)),
+    ("软组织", 20.0, 80.0, (255, 80, 80)),
+    ("肺", -950.0, -500.0, (80, 160, 255)),
+]
+
+
+def quantize_slice(slice_data: np.ndarray) -> QuantizedSlice:
+    """把切片量化为灰度级下标"""
+    low = float(slice_data.min()) if slice_data.size else 0.0
+    high = float(slice_data.max()) if slice_data.size else 0.0
+    span = high - low
+    integral = np.issubdtype(slice_data.dtype, np.integer)
+    if not integral and span < LUT_SIZE:
+        shifted = slice_data - np.asarray(low, dtype=slice_data.dtype)
+        integral = bool(np.array_equal(np.rint(shifted), shifted))
+    if integral and span < LUT_SIZE:
+        step = 1.0
+        if np.issubdtype(slice_data.dtype, np.integer):
+            work = np.int64 if slice_data.dtype.itemsize >= 4 else np.int32
+            index = (slice_data.astype(work) - int(low)).astype(np.uint16)
+        else:
+            index = (slice_data - low).astype(np.uint16)
+    else:
+        step = span / (LUT_SIZE - 1) if span > 0 else 1.0
+        index = np.rint((slice_data - low) / step).astype(np.uint16)
+    return QuantizedSlice(index, low, step, int(round(span / step)) + 1, slice_data.dtype)
+
+
+def window_lut(quantized: QuantizedSlice, width: float, level: float) -> np.ndarray:
+    """窗宽窗位查找表 (uint8)，与 ImageDataModel.apply_window_level 的映射相同"""
+    values = quantized.level_values()
+    min_val = level - width / 2
+    max_val = level + width / 2
+    if not max_val > min_val:
+        return np.zeros(quantized.levels, dtype=np.uint8)
+    windowed = np.clip(values, min_val, max_val)
+    return ((windowed - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+
+
+def pack_argb32(rgb: np.ndarray) -> np.ndarray:
+    """(N, 3) 的 RGB 数组打包为不透明 ARGB32 (uint32)"""
+    rgb = rgb.astype(np.uint32)
+    return (0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]).astype(np.uint32)
+
+
+def highlight_lut(quantized: QuantizedSlice, rgb: np.ndarray, band: HighlightBand) -> np.ndarray:
+    """在 (N, 3) 的 RGB 查找表上叠加 HU 高亮，返回混合后的 uint8 RGB 查找表"""
+    values = quantized.level_values()
+    inside = (values >= band.lower) & (values <= band.upper)
+    channels = rgb.astype(np.float32)
+    color = np.asarray(band.color, dtype=np.float32)
+    channels[inside] = channels[inside] * (1 - band.opacity) + color * band.opacity
+    return np.clip(np.rint(channels), 0, 255).astype(np.uint8)
+
+
+def display_lut(quantized: QuantizedSlice, width: float, level: float,
+                band: Optional[HighlightBand] = None,
+                palette: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    显示查找表
+
+    Args:
+        quantized: 量化切片
+        width, level: 窗宽窗位
+        band: HU 高亮区间
+        palette: 256 x 3 的伪彩色调色板，以窗宽窗位后的灰度为下标
+
+    Returns:
+        无高亮、无调色板时为 uint8 灰度查找表，否则为 uint32 ARGB32 查找表
+    """
+    gray = window_lut(quantized, width, level)
+    if band is None and palette is None:
+        return gray
+    rgb = palette[gray] if palette is not None else np.repeat(gray[:, None], 3, axis=1)
+    if band is not None:
+        rgb = highlight_lut(quantized, rgb, band)
+    return pack_argb32(rgb)
+
+
+def colorize(gray: np.ndarray, quantized: QuantizedSlice, band: Optional[HighlightBand] = None,
+             palette: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    对不经查找表得到的 uint8 灰度帧（如 CLAHE 均衡结果）应用调色板与 HU 高亮
+
+    高亮区间仍按量化切片的原始像素值判断。无高亮、无调色板时原样返回 gray。
+    """
+    if band is None and palette is None:
+        return gray
+    base = palette if palette is not None else np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    frame = np.take(pack_argb32(base), gray)
+    if band is not None:
+        values = quantized.level_values()
+        inside = np.take((values >= band.lower) & (values <= band.upper), quantized.index)
+        rgb = base[gray[inside]].astype(np.float32)
+        rgb = rgb * (1 - band.opacity) + np.asarray(band.color, dtype=np.float32) * band.opacity
+        frame[inside] = pack_argb32(np.clip(np.rint(rgb), 0, 255))
+    return frame
+
+
+def apply_lut(quantized: QuantizedSlice, lut: np.ndarray) -> np.ndarray:
+    """一次查表得到显示帧"""
+    return np.take(lut, quantized.index)
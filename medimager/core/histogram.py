@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+灰度直方图模块
+
+为图像体数据提供一次性计算、可重复查询的灰度直方图：
+- 整体直方图与逐切片直方图共用同一组等宽分箱
+- 整数数据且取值范围不超过分箱上限时按单位宽度分箱，百分位结果精确
+- 百分位查询只需对分箱做累加和查找，复杂度 O(bins)，与体素数量无关
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 默认分箱上限：浮点数据或取值范围很大的整数数据按此数量等宽分箱
+DEFAULT_MAX_BINS = 4096
+
+
+class IntensityHistogram:
+    """灰度直方图
+
+    Args:
+        lower: 第一个分箱的下边界
+        bin_width: 分箱宽度
+        counts: 整体直方图计数，形状为 (bins,)
+        slice_counts: 逐切片直方图计数，形状为 (slices, bins)，可为 None
+    """
+
+    def __init__(self, lower: float, bin_width: float, counts: np.ndarray,
+                 slice_counts: Optional[np.ndarray] = None) -> None:
+        self.lower = float(lower)
+        self.bin_width = float(bin_width)
+        self.counts = counts
+        self.slice_counts = slice_counts
+
+    @property
+    def bin_count(self) -> int:
+        return len(self.counts)
+
+    @property
+    def upper(self) -> float:
+        return self.lower + self.bin_width * self.bin_count
+
+    @property
+    def slice_total(self) -> int:
+        return 0 if self.slice_counts is None else len(self.slice_counts)
+
+    def bin_edges(self) -> np.ndarray:
+        return self.lower + self.bin_width * np.arange(self.bin_count + 1)
+
+    def count_values(self, values: np.ndarray) -> np.ndarray:
+        """按本直方图的分箱对一组像素计数（超出范围的值计入两端分箱）"""
+        return _bin_counts(values, self.lower, self.bin_width, self.bin_count)
+
+    def get_counts(self, slice_index: Optional[int] = None) -> np.ndarray:
+        """获取整体或某一切片的直方图计数"""
+        if slice_index is None:
+            return self.counts
+        if self.slice_counts is None or not (0 <= slice_index < len(self.slice_counts)):
+            raise IndexError(f"切片直方图不存在: {slice_index}")
+        return self.slice_counts[slice_index]
+
+    def percentile(self, q: float, slice_index: Optional[int] = None) -> float:
+        """按直方图查找百分位值（分箱内线性插值）"""
+        counts = self.get_counts(slice_index)
+        cdf = np.cumsum(counts)
+        total = cdf[-1] if len(cdf) else 0
+        if total == 0:
+            return self.lower
+        target = min(max(q, 0.0), 100.0) / 100.0 * total
+        index = int(np.searchsorted(cdf, target, side='left'))
+        index = min(index, len(counts) - 1)
+        below = cdf[index - 1] if index > 0 else 0
+        fraction = (target - below) / counts[index] if counts[index] else 0.0
+        return self.lower + (index + min(max(fraction, 0.0), 1.0)) * self.bin_width
+
+    def auto_window(self, low: float = 2.0, high: float = 98.0,
+                    slice_index: Optional[int] = None) -> Tuple[int, int]:
+        """按百分位范围计算窗宽窗位
+
+        Returns:
+            (window_width, window_level)
+        """
+        p_low = self.percentile(low, slice_index)
+        p_high = self.percentile(high, slice_index)
+        width = max(1, int(p_high - p_low))
+        level = int(p_low + width / 2)
+        return width, level
+
+
+def _histogram_layout(lower: float, upper: float, integer: bool,
+                      max_bins: int) -> Tuple[float, float, int]:
+    """确定分箱下界、宽度和数量"""
+    if integer and upper - lower + 1 <= max_bins:
+        return lower, 1.0, int(upper - lower) + 1
+    span = upper - lower
+    if span <= 0:
+        return lower, 1.0, 1
+    return lower, span / max_bins, max_bins
+
+
+def _bin_counts(values: np.ndarray, lower: float, bin_width: float, bins: int) -> np.ndarray:
+    """对一组像素做分箱计数"""
+    if bin_width == 1.0 and np.issubdtype(values.dtype, np.integer):
+        indices = values.astype(np.int64, copy=False).ravel() - int(lower)
+    else:
+        indices = ((values.astype(np.float64, copy=False).ravel() - lower) / bin_width).astype(np.int64)
+    np.clip(indices, 0, bins - 1, out=indices)
+    return np.bincount(indices, minlength=bins)
+
+
+def compute_histogram(values: np.ndarray, max_bins: int = DEFAULT_MAX_BINS) -> IntensityHistogram:
+    """计算任意数组的整体直方图（不含逐切片直方图）"""
+    if values.size == 0:
+        return IntensityHistogram(0.0, 1.0, np.zeros(1, dtype=np.int64))
+    integer = np.issubdtype(values.dtype, np.integer)
+    lower, bin_width, bins = _histogram_layout(float(values.min()), float(values.max()),
+                                               integer, max_bins)
+    return IntensityHistogram(lower, bin_width, _bin_counts(values, lower, bin_width, bins))
+
+
+def compute_volume_histogram(volume: np.ndarray, max_bins: int = DEFAULT_MAX_BINS) -> IntensityHistogram:
+    """计算三维体数据的整体直方图和逐切片直方图
+
+    逐切片计数后求和得到整体直方图，只需遍历一次像素（外加一次最值统计）。
+    """
+    if volume.ndim == 2:
+        volume = volume[np.newaxis, ...]
+    if volume.size == 0:
+        return IntensityHistogram(0.0, 1.0, np.zeros(1, dtype=np.int64),
+                                  np.zeros((len(volume), 1), dtype=np.int64))
+
+    integer = np.issubdtype(volume.dtype, np.integer)
+    lower, bin_width, bins = _histogram_layout(float(volume.min()), float(volume.max()),
+                                               integer, max_bins)
+    slice_counts = np.empty((len(volume), bins), dtype=np.int64)
+    for index in range(len(volume)):
+        slice_counts[index] = _bin_counts(volume[index], lower, bin_width, bins)
+    return IntensityHistogram(lower, bin_width, slice_counts.sum(axis=0), slice_counts)
+
+
+def sample_volume(volume: np.ndarray, max_samples: int = 1 << 21) -> np.ndarray:
+    """按固定步长抽取体数据的像素样本（不复制整个体数据）"""
+    flat = volume.reshape(-1)
+    step = max(1, flat.size // max_samples)
+    return flat[::step]
@@ -10,16 +10,35 @@
 - 提供数据访问和处理的标准接口
 """
 
+import math
+import threading
 import numpy as np
 import pydicom
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 from PySide6.QtCore import QObject, Signal, QRect, QPointF
 
 from medimager.utils.logger import get_logger
 from medimager.utils.settings import get_performance_manager
 from medimager.core.dicom_parser import DicomParser
 from medimager.core.roi import BaseROI
+from medimager.core.annotation_index import AnnotationIndex, roi_bounds, line_bounds, angle_bounds
+from medimager.core.volume_roi import VolumeROI, VoxelSpacing
+from medimager.core.label_mask import LabelMask
+from medimager.core.label_volume import LabelVolume
+from medimager.core.tile_pyramid import TilePyramid
+from medimager.core.clahe import (
+    ClaheParams, TileHistograms, compute_tile_histograms, clahe_mappings, apply_clahe
+)
+from medimager.core.display_filters import DisplayFilter, apply_display_filter, filter_region, scaled_display_filter
+from medimager.core.colormaps import DICOM_PALETTE, get_colormap, dicom_palette
+from medimager.core.display_lut import (
+    QuantizedSlice, HighlightBand, quantize_slice, window_lut, display_lut, apply_lut, colorize
+)
+from medimager.core.histogram import (
+    IntensityHistogram, compute_histogram, compute_volume_histogram, sample_volume
+)
 from dataclasses import dataclass
 
 
@@ -33,10 +52,18 @@ class MeasurementData:
     distance: float
     unit: str = "mm"
 
+    # 几何变化回调，由所在的 AnnotationIndex 设置
+    _geometry_observer = None
+
     def __post_init__(self):
         """初始化后处理"""
         pass
 
+    def __setattr__(self, name, value) -> None:
+        object.__setattr__(self, name, value)
+        if name in ('slice_index', 'start_point', 'end_point') and self._geometry_observer is not None:
+            self._geometry_observer(self)
+
 
 @dataclass
 class AngleMeasurementData:
@@ -48,6 +75,14 @@ class AngleMeasurementData:
     point3: QPointF      # 第二条射线端点
     angle_degrees: float
 
+    # 几何变化回调，由所在的 AnnotationIndex 设置
+    _geometry_observer = None
+
+    def __setattr__(self, name, value) -> None:
+        object.__setattr__(self, name, value)
+        if name in ('slice_index', 'point1', 'vertex', 'point3') and self._geometry_observer is not None:
+            self._geometry_observer(self)
+
 class ImageDataModel(QObject):
     """
     Manages the data and state for a single image series.
@@ -57,6 +92,20 @@ class ImageDataModel(QObject):
     and ROIs. It is designed to be independent of the UI.
     """
     
+    # 交互式预览的目标边长（像素）及缓存的降采样切片数
+    PREVIEW_TARGET_SIZE = 768
+    PREVIEW_CACHE_SLICES = 4
+
+    # 边长达到该值的图像使用分块多分辨率显示，以及图块边长（像素）
+    TILED_MIN_SIZE = 4096
+    TILE_SIZE = 512
+
+    # 缓存的量化切片数（显示查找表的下标，每个切片量化一次）
+    QUANTIZED_CACHE_SLICES = 8
+
+    # 显示滤波开启时在后台预取的相邻切片数（每侧）
+    FILTER_PREFETCH_RADIUS = 2
+
     # Signals
     image_loaded = Signal()
     data_changed = Signal()
@@ -64,16 +113,25 @@ class ImageDataModel(QObject):
     window_level_changed = Signal(int, int)
     roi_added = Signal(BaseROI)
     measurement_added = Signal(object)  # MeasurementData
+    histogram_ready = Signal()  # 后台直方图计算完成
+    volume_roi_progress = Signal(str, int, int)  # ROI id, 已完成切片数, 总切片数
+    volume_roi_statistics_ready = Signal(str)  # ROI id
+    label_mask_added = Signal(object)  # LabelMask
     
-    def __init__(self, parent: Optional[QObject] = None) -> None:
+    def __init__(self, parent: Optional[QObject] = None, auto_histogram: bool = True) -> None:
         super().__init__(parent)
         self.logger = get_logger(__name__)
+
+        # 加载后是否在后台计算直方图（无界面的批处理不需要）
+        self.auto_histogram = auto_histogram
         
         # DICOM parser
         self.parser = DicomParser(self)
         self.parser.data_loaded.connect(self._on_dicom_data_loaded)
         
-        self.pixel_array: Optional[np.ndarray] = None
+        # 像素数据版本号：每次替换像素数据时递增，供统计等缓存判断失效
+        self.data_version: int = 0
+        self._pixel_array: Optional[np.ndarray] = None
         self.dicom_header: Dict[str, Any] = {}
         self.dicom_files: List[pydicom.FileDataset] = []
         
@@ -85,12 +143,66 @@ class ImageDataModel(QObject):
         # ROI data
         self.rois: List[BaseROI] = []
         self.selected_indices: set[int] = set()  # 新增：多选ROI索引集合
+        self.volume_rois: List[VolumeROI] = []  # 跨切片的三维ROI
+        self.label_masks: List[LabelMask] = []  # 区域生长等分割结果
+        # 标签掩码的显示图层（游程编码，首次加入掩码时创建）
+        self.label_volume: Optional[LabelVolume] = None
         
         # Measurement data
         self.measurements: List[MeasurementData] = []
         self.selected_measurement_indices: set[int] = set()  # 选中的测量索引集合
         self.angle_measurements: List[AngleMeasurementData] = []
+
+        # 标注的 ID/切片/网格索引，与上面三个列表同步维护（列表只应通过模型方法修改）
+        self._roi_index = AnnotationIndex(roi_bounds)
+        self._measurement_index = AnnotationIndex(line_bounds)
+        self._angle_index = AnnotationIndex(angle_bounds)
+        # 选中状态版本号，与索引的增删/几何版本号共同组成标注版本号（见 get_annotation_version）
+        self._selection_version = 0
+
+        # 交互式降分辨率预览（拖动窗宽窗位时使用）
+        self.interactive_preview: bool = False
+        self._preview_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+        # 显示查找表：量化切片缓存、最近使用的查找表，以及 HU 高亮区间和伪彩色调色板名称
+        self.highlight_band: Optional[HighlightBand] = None
+        self.colormap: Optional[str] = None
+        self._dicom_palette: Optional[tuple] = None  # (数据版本, 文件自带调色板)
+        # 窗宽窗位之前的显示滤波，以及正在后台预取的滤波切片缓存键
+        self.display_filter: Optional[DisplayFilter] = None
+        self._filter_prefetching: set[str] = set()
+        self._filter_prefetch_lock = threading.Lock()
+        # 自适应直方图均衡显示模式及各切片的图块直方图（与窗宽窗位无关）
+        self.clahe: Optional[ClaheParams] = None
+        self._tile_histogram_cache: "OrderedDict[tuple, TileHistograms]" = OrderedDict()
+        self._quantized_cache: "OrderedDict[tuple, QuantizedSlice]" = OrderedDict()
+        self._lut_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        # 多视图批量渲染在线程池中调用显示管线，上述 LRU 缓存的读写都需持有此锁
+        self._display_cache_lock = threading.Lock()
+
+        # ROI 统计结果缓存（按 ROI 几何版本、切片和数据版本失效）
+        from medimager.core.analysis import ROIStatisticsCache
+        self.roi_statistics = ROIStatisticsCache()
+        from medimager.core.analysis import VolumeROIStatisticsCache
+        self.volume_roi_statistics = VolumeROIStatisticsCache()
+        # ROI 跨切片/时相的时间-强度曲线（ROI 移动时增量更新）
+        from medimager.core.analysis import TimeIntensityCache
+        self.time_intensity_curves = TimeIntensityCache()
+
+        # 整体及逐切片灰度直方图（加载后在后台计算一次）
+        self._histogram: Optional[IntensityHistogram] = None
+        self._histogram_future = None
+        self._histogram_generation = 0
         
+    @property
+    def pixel_array(self) -> Optional[np.ndarray]:
+        return self._pixel_array
+
+    @pixel_array.setter
+    def pixel_array(self, value: Optional[np.ndarray]) -> None:
+        self._pixel_array = value
+        self.data_version += 1
+
     def clear_all_data(self) -> None:
         """Clears all data and resets the model to its initial state."""
         self.logger.info("Clearing all image data.")
@@ -101,10 +213,33 @@ class ImageDataModel(QObject):
         self.window_width = 400
         self.window_level = 40
         self.rois.clear()
+        self._roi_index.clear()
+        self.roi_statistics.clear()
+        self.time_intensity_curves.clear()
+        self.volume_rois.clear()
+        self.volume_roi_statistics.clear()
+        self.label_masks.clear()
+        self.label_volume = None
         self.selected_indices.clear()  # 确保清除ROI选择状态
         self.measurements.clear()  # 清除测量数据
+        self._measurement_index.clear()
         self.selected_measurement_indices.clear()  # 清除测量选择状态
         self.angle_measurements.clear()  # 清除角度测量数据
+        self._angle_index.clear()
+        self.interactive_preview = False
+        self.highlight_band = None
+        self.colormap = None
+        self._dicom_palette = None
+        self.display_filter = None
+        self.clahe = None
+        with self._display_cache_lock:
+            self._preview_cache.clear()
+            self._tile_histogram_cache.clear()
+            self._quantized_cache.clear()
+            self._lut_cache.clear()
+        self._histogram = None
+        self._histogram_future = None
+        self._histogram_generation += 1
         
         self.data_changed.emit()
         
@@ -137,6 +272,7 @@ class ImageDataModel(QObject):
 
         self._set_default_window_level()
         self.current_slice_index = 0
+        self._start_histogram_computation()
             
         self.logger.info(f"ImageDataModel updated. Shape: {self.pixel_array.shape}, Slices: {len(self.dicom_files)}")
         self.image_loaded.emit()
@@ -160,6 +296,7 @@ class ImageDataModel(QObject):
             
             self._set_default_window_level()
             self.current_slice_index = 0
+            self._start_histogram_computation()
             
             self.logger.info("Single image loaded successfully.")
             self.image_loaded.emit()
@@ -188,11 +325,8 @@ class ImageDataModel(QObject):
 
         # Fallback to calculating from pixel data if available
         if self.pixel_array is not None and self.pixel_array.size > 0:
-            # 使用2%到98%的像素值范围来计算一个合理的默认窗位
-            p2 = np.percentile(self.pixel_array, 2)
-            p98 = np.percentile(self.pixel_array, 98)
-            width = int(p98 - p2)
-            level = int(p2 + width / 2)
+            # 使用2%到98%的像素值范围来计算一个合理的默认窗位（直方图查找，无需排序）
+            width, level = self.auto_window_level()
             self.logger.info(f"Calculated W/L from pixel data: W={width}, L={level}")
             self.set_window(width, level)
             return
@@ -201,6 +335,89 @@ class ImageDataModel(QObject):
         self.set_window(400, 40)
         self.logger.info("Using hardcoded default W/L: W=400, L=40")
 
+    def _start_histogram_computation(self) -> None:
+        """在后台线程中计算整体及逐切片直方图"""
+        if self.pixel_array is None or not self.auto_histogram:
+            return
+        generation = self._histogram_generation
+        volume = self.pixel_array
+
+        def task():
+            histogram = compute_volume_histogram(volume)
+            if generation != self._histogram_generation:
+                return  # 计算期间数据已被替换
+            self._histogram = histogram
+            self.logger.debug(f"Volume histogram ready: {histogram.bin_count} bins, "
+                              f"{histogram.slice_total} slices")
+            self.histogram_ready.emit()
+
+        try:
+            self._histogram_future = get_performance_manager().get_thread_pool().submit(task)
+        except Exception as e:
+            self.logger.error(f"Failed to schedule histogram computation: {e}", exc_info=True)
+
+    def get_histogram(self, wait: bool = False) -> Optional[IntensityHistogram]:
+        """
+        Returns the cached volume histogram (with per-slice histograms).
+
+        Args:
+            wait: If True, blocks until the background computation finishes.
+
+        Returns:
+            The histogram, or None if it is not available (yet).
+        """
+        if self._histogram is None and wait and self._histogram_future is not None:
+            try:
+                self._histogram_future.result()
+            except Exception as e:
+                self.logger.error(f"Histogram computation failed: {e}", exc_info=True)
+        return self._histogram
+
+    def get_slice_histogram(self, slice_index: Optional[int] = None) -> Optional[IntensityHistogram]:
+        """
+        Returns a histogram for a single slice.
+
+        Uses the cached per-slice histogram when available, otherwise computes
+        one for this slice only.
+        """
+        if slice_index is None:
+            slice_index = self.current_slice_index
+        histogram = self._histogram
+        if histogram is not None and slice_index < histogram.slice_total:
+            return IntensityHistogram(histogram.lower, histogram.bin_width,
+                                      histogram.get_counts(slice_index))
+        slice_data = self.get_slice_data(slice_index)
+        if slice_data is None:
+            return None
+        return compute_histogram(slice_data)
+
+    def auto_window_level(self, slice_index: Optional[int] = None,
+                          low: float = 2.0, high: float = 98.0) -> tuple[int, int]:
+        """
+        Computes a percentile-based window/level from histograms.
+
+        Args:
+            slice_index: Slice to use, or None for the whole volume.
+            low: Lower percentile mapped to black.
+            high: Upper percentile mapped to white.
+
+        Returns:
+            (window_width, window_level)
+        """
+        if self.pixel_array is None or self.pixel_array.size == 0:
+            return self.window_width, self.window_level
+
+        if slice_index is not None:
+            histogram = self.get_slice_histogram(slice_index)
+        else:
+            histogram = self._histogram
+            if histogram is None:
+                # 后台直方图尚未就绪：用等步长抽样的直方图估计
+                histogram = compute_histogram(sample_volume(self.pixel_array))
+        if histogram is None:
+            return self.window_width, self.window_level
+        return histogram.auto_window(low, high)
+
     def set_window(self, width: int, level: int) -> None:
         """Set the window width and level for display."""
         if width != self.window_width or level != self.window_level:
@@ -212,6 +429,110 @@ class ImageDataModel(QObject):
             self.data_changed.emit()
             
             self.logger.debug(f"Window/Level set to: {width}/{level}")
+
+    def set_highlight_band(self, band: Optional[HighlightBand]) -> None:
+        """Sets (or clears with None) the HU band tinted on top of the windowed image."""
+        if band != self.highlight_band:
+            self.highlight_band = band
+            self.data_changed.emit()
+            self.logger.debug(f"Highlight band set to: {band}")
+
+    def set_colormap(self, name: Optional[str]) -> None:
+        """
+        Sets the pseudo-color palette applied after window/level.
+
+        Args:
+            name: A name from medimager.core.colormaps.COLORMAP_NAMES, DICOM_PALETTE
+                for the palette color LUT stored in the file, or None for grayscale.
+        """
+        if name != self.colormap:
+            if name is not None and name != DICOM_PALETTE:
+                get_colormap(name)  # 未知名称时抛出 ValueError
+            self.colormap = name
+            self.data_changed.emit()
+            self.logger.debug(f"Colormap set to: {name}")
+
+    def set_display_filter(self, display_filter: Optional[DisplayFilter]) -> None:
+        """Sets (or clears with None) the display-only filter applied before window/level."""
+        if display_filter != self.display_filter:
+            self.display_filter = display_filter
+            self.data_changed.emit()
+            self.logger.debug(f"Display filter set to: {display_filter}")
+
+    def set_clahe(self, params: Optional[ClaheParams]) -> None:
+        """Enables (or disables with None) adaptive histogram equalization of the windowed image."""
+        if params != self.clahe:
+            self.clahe = params
+            self.data_changed.emit()
+            self.logger.debug(f"CLAHE set to: {params}")
+
+    def _filtered_cache_key(self, slice_index: int, display_filter: DisplayFilter) -> str:
+        return f"filtered_{id(self)}_{self.data_version}_{slice_index}_{display_filter}"
+
+    def get_filtered_slice(self, slice_index: int) -> Optional[np.ndarray]:
+        """
+        Gets slice data with the current display filter applied.
+
+        Filtered slices are cached per (slice, filter) in the PerformanceManager
+        cache, and the neighbouring slices are filtered in the background so
+        that scrolling with a filter enabled hits the cache.
+        """
+        display_filter = self.display_filter
+        if display_filter is None:
+            return self.get_slice_data(slice_index)
+        slice_data = self.get_slice_data(slice_index)
+        if slice_data is None:
+            return None
+
+        perf = get_performance_manager()
+        cache_key = self._filtered_cache_key(slice_index, display_filter)
+        filtered = perf.get_from_cache(cache_key)
+        if filtered is None:
+            filtered = apply_display_filter(slice_data, display_filter)
+            perf.add_to_cache(cache_key, filtered)
+        self._prefetch_filtered_slices(slice_index, display_filter)
+        return filtered
+
+    def _prefetch_filtered_slices(self, slice_index: int, display_filter: DisplayFilter) -> None:
+        """在线程池中滤波尚未缓存的相邻切片"""
+        perf = get_performance_manager()
+        count = self.get_slice_count()
+        for offset in range(1, self.FILTER_PREFETCH_RADIUS + 1):
+            for neighbour in (slice_index + offset, slice_index - offset):
+                if not 0 <= neighbour < count:
+                    continue
+                cache_key = self._filtered_cache_key(neighbour, display_filter)
+                with self._filter_prefetch_lock:
+                    if cache_key in self._filter_prefetching or perf.get_from_cache(cache_key) is not None:
+                        continue
+                    self._filter_prefetching.add(cache_key)
+
+                def task(data=self.get_slice_data(neighbour), key=cache_key):
+                    try:
+                        perf.add_to_cache(key, apply_display_filter(data, display_filter))
+                    except Exception as e:
+                        self.logger.error(f"[ImageDataModel._prefetch_filtered_slices] 预取滤波切片失败: {e}",
+                                          exc_info=True)
+                    finally:
+                        with self._filter_prefetch_lock:
+                            self._filter_prefetching.discard(key)
+
+                perf.get_thread_pool().submit(task)
+
+    def get_dicom_palette(self) -> Optional[np.ndarray]:
+        """Gets the palette color LUT of the series (resampled to 256 x 3), if any."""
+        if self._dicom_palette is None or self._dicom_palette[0] != self.data_version:
+            palette = dicom_palette(self.dicom_files[0]) if self.dicom_files else None
+            self._dicom_palette = (self.data_version, palette)
+        return self._dicom_palette[1]
+
+    def get_colormap_palette(self) -> Optional[np.ndarray]:
+        """Gets the 256 x 3 palette of the current colormap, or None for grayscale."""
+        if self.colormap is None:
+            return None
+        if self.colormap == DICOM_PALETTE:
+            return self.get_dicom_palette()
+        return get_colormap(self.colormap)
         
     def set_current_slice(self, slice_index: int) -> bool:
         """Sets the currently active slice index."""
@@ -260,9 +581,141 @@ class ImageDataModel(QObject):
     def add_roi(self, roi: BaseROI) -> None:
         """Adds an ROI to the model."""
         self.rois.append(roi)
+        self._roi_index.add(roi)
         self.roi_added.emit(roi)
         self.data_changed.emit()
 
+    def add_volume_roi(self, roi: VolumeROI) -> None:
+        """Adds a volume ROI and starts computing its statistics in the background."""
+        self.volume_rois.append(roi)
+        self.volume_roi_statistics.request(self, roi)
+        self.data_changed.emit()
+
+    def remove_volume_roi(self, roi_id: str) -> bool:
+        """Removes a volume ROI by id."""
+        for i, roi in enumerate(self.volume_rois):
+            if roi.id == roi_id:
+                self.volume_rois.pop(i)
+                self.volume_roi_statistics.discard(roi_id)
+                self.data_changed.emit()
+                return True
+        return False
+
+    def get_label_volume(self) -> Optional[LabelVolume]:
+        """Returns the label layer, creating it for the current image shape if needed."""
+        if self.pixel_array is None or self.pixel_array.ndim != 3:
+            return None
+        if self.label_volume is None or self.label_volume.shape != self.pixel_array.shape:
+            self.label_volume = LabelVolume(self.pixel_array.shape)
+        return self.label_volume
+
+    def add_label_mask(self, mask: LabelMask) -> None:
+        """Adds a label mask (e.g. a region-growing result) to the model and paints it into the label layer."""
+        self.label_masks.append(mask)
+        volume = self.get_label_volume()
+        used = {m.label for m in self.label_masks}
+        free = [label for label in range(1, 256) if label not in used]
+        if volume is not None and free and tuple(volume.shape) == mask.shape:
+            mask.label = free[0]
+            volume.set_label_color(mask.label, mask.color)
+            for slice_index in mask.slice_indices().tolist():
+                volume.paint_runs(slice_index, *mask.get_slice_runs(slice_index), mask.label)
+        else:
+            self.logger.warning(f"[ImageDataModel.add_label_mask] 标签掩码未加入显示图层: {mask.name}")
+        self.label_mask_added.emit(mask)
+        self.data_changed.emit()
+
+    def remove_label_mask(self, mask_id: str) -> bool:
+        """Removes a label mask by id."""
+        for i, mask in enumerate(self.label_masks):
+            if mask.id == mask_id:
+                self.label_masks.pop(i)
+                self._erase_label_mask(mask)
+                self.data_changed.emit()
+                return True
+        return False
+
+    def _erase_label_mask(self, mask: LabelMask) -> None:
+        """从标签图层擦除掩码，并恢复被它覆盖的其他掩码"""
+        volume = self.label_volume
+        if volume is None or not mask.label:
+            return
+        slices = mask.slice_indices().tolist()
+        volume.erase_label(mask.label, slices)
+        # 后加入的掩码优先，只填回擦除后变为背景的像素
+        for other in reversed(self.label_masks):
+            if not other.label:
+                continue
+            for slice_index in slices:
+                if other.has_slice(slice_index):
+                    volume.paint_runs(slice_index, *other.get_slice_runs(slice_index), other.label,
+                                      only_background=True)
+        mask.label = 0
+
+    def get_label_masks_for_slice(self, slice_index: int) -> List[LabelMask]:
+        """Returns the label masks that have voxels on the given slice."""
+        return [mask for mask in self.label_masks if mask.has_slice(slice_index)]
+
+    def get_label_mask_volume_ml(self, mask: LabelMask) -> float:
+        """Volume of a label mask in mL, from the pixel and slice spacing."""
+        return mask.volume_ml(self.get_voxel_spacing())
+
+    def _header_value(self, keyword: str, name: str) -> Any:
+        """头信息取值：键可能是 DICOM 关键字（DicomParser 载入的序列）或元素名称（load_single_image 的元数据）"""
+        value = self.dicom_header.get(keyword)
+        return value if value is not None else self.dicom_header.get(name)
+
+    def get_pixel_spacing(self) -> Optional[Tuple[float, float]]:
+        """
+        Returns the (row, column) pixel spacing in mm from Pixel Spacing or
+        Imager Pixel Spacing, or None if the header has no valid spacing.
+        """
+        for keyword, name in (('PixelSpacing', 'Pixel Spacing'), ('ImagerPixelSpacing', 'Imager Pixel Spacing')):
+            value = self._header_value(keyword, name)
+            try:
+                if value is not None and len(value) >= 2:
+                    row_spacing, col_spacing = float(value[0]), float(value[1])
+                    if row_spacing > 0 and col_spacing > 0:
+                        return row_spacing, col_spacing
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    def get_voxel_spacing(self) -> VoxelSpacing:
+        """
+        Returns the voxel spacing (slice, row, column) in mm.
+
+        Row/column spacing comes from get_pixel_spacing().
+        Slice spacing is taken from the distance between the first two slice
+        positions, falling back to Spacing Between Slices, then Slice Thickness.
+        Header keys may be DICOM keywords (series loaded by DicomParser) or
+        element names (metadata passed to load_single_image). Missing values
+        default to 1.0 mm.
+        """
+        row_spacing, col_spacing = self.get_pixel_spacing() or (1.0, 1.0)
+
+        slice_spacing = None
+        if len(self.dicom_files) >= 2:
+            try:
+                first = np.asarray(self.dicom_files[0].ImagePositionPatient, dtype=np.float64)
+                second = np.asarray(self.dicom_files[1].ImagePositionPatient, dtype=np.float64)
+                distance = float(np.linalg.norm(second - first))
+                if distance > 0:
+                    slice_spacing = distance
+            except (AttributeError, TypeError, ValueError):
+                pass
+        if slice_spacing is None:
+            for keyword, name in (('SpacingBetweenSlices', 'Spacing Between Slices'),
+                                  ('SliceThickness', 'Slice Thickness')):
+                try:
+                    value = float(self._header_value(keyword, name) or 0)
+                except (TypeError, ValueError):
+                    value = 0
+                if value > 0:
+                    slice_spacing = value
+                    break
+        return (slice_spacing or 1.0, row_spacing, col_spacing)
+
     def is_dicom(self) -> bool:
         """Checks if the current data is from a DICOM series."""
         return bool(self.dicom_files)
@@ -313,21 +766,29 @@ class ImageDataModel(QObject):
         Gets slice data, applies window/level, and returns it for display.
         Uses PerformanceManager cache to avoid redundant window/level computations.
 
+        Windowing is a single lookup into a table indexed by the quantized
+        slice (see get_quantized_slice), so a window/level or highlight change
+        costs one gather per frame.
+
         Args:
             slice_index: The index of the slice to get. If None, uses the current slice.
 
         Returns:
-            A 2D numpy array of uint8, ready for QImage conversion.
+            A 2D numpy array ready for QImage conversion: uint8 grayscale, or
+            uint32 ARGB32 while a highlight band or colormap is active.
         """
         if slice_index is None:
             slice_index = self.current_slice_index
 
-        slice_data = self.get_slice_data(slice_index)
-        if slice_data is None:
+        if self.get_slice_data(slice_index) is None:
             return None
 
-        # 构建缓存键：模型ID + 切片索引 + 窗宽窗位
-        cache_key = f"display_{id(self)}_{slice_index}_{self.window_width}_{self.window_level}"
+        # 构建缓存键：模型ID + 数据版本 + 切片索引 + 窗宽窗位 + 高亮区间、调色板、显示滤波与 CLAHE
+        cache_key = (f"display_{id(self)}_{self.data_version}_{slice_index}"
+                     f"_{self.window_width}_{self.window_level}")
+        display_options = (self.highlight_band, self.colormap, self.display_filter, self.clahe)
+        if any(option is not None for option in display_options):
+            cache_key += "_" + "_".join(str(option) for option in display_options)
 
         try:
             perf = get_performance_manager()
@@ -337,7 +798,7 @@ class ImageDataModel(QObject):
         except Exception:
             pass  # 缓存不可用时回退到直接计算
 
-        result = self.apply_window_level(slice_data)
+        result = self.render_display_frame(slice_index)
 
         try:
             perf = get_performance_manager()
@@ -347,16 +808,275 @@ class ImageDataModel(QObject):
 
         return result
 
+    def _cache_get(self, cache: OrderedDict, key: tuple):
+        """在锁内读取显示 LRU 缓存并标记为最近使用，未命中返回 None"""
+        with self._display_cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key: tuple, value, capacity: int) -> None:
+        """在锁内写入显示 LRU 缓存并淘汰最久未用的项；计算本身在锁外进行，
+        并发计算同一项时后写入者覆盖，结果相同"""
+        with self._display_cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > capacity:
+                cache.popitem(last=False)
+
+    def get_quantized_slice(self, slice_index: int, factor: int = 1) -> Optional[QuantizedSlice]:
+        """
+        Gets (and caches) the quantized lookup indices of a slice, after the
+        display filter if one is active.
+
+        Args:
+            slice_index: The slice to quantize.
+            factor: Downsampling factor; values > 1 quantize the preview source.
+        """
+        key = (self.data_version, slice_index, factor, self.display_filter)
+        cached = self._cache_get(self._quantized_cache, key)
+        if cached is not None:
+            if factor == 1 and self.display_filter is not None:
+                self._prefetch_filtered_slices(slice_index, self.display_filter)
+            return cached
+
+        if factor == 1:
+            source = self.get_filtered_slice(slice_index)
+        else:
+            source = self.get_preview_source(slice_index)
+            if source is not None and self.display_filter is not None:
+                source = apply_display_filter(source, scaled_display_filter(self.display_filter, factor))
+        if source is None:
+            return None
+        quantized = quantize_slice(source)
+        self._cache_put(self._quantized_cache, key, quantized, self.QUANTIZED_CACHE_SLICES)
+        return quantized
+
+    def get_tile_histograms(self, slice_index: int, factor: int = 1) -> Optional[TileHistograms]:
+        """
+        Gets (and caches) the CLAHE tile histograms of a slice.
+
+        The histograms count quantized pixel values rather than windowed gray
+        levels, so they are reused across window/level changes.
+        """
+        params = self.clahe or ClaheParams()
+        key = (self.data_version, slice_index, factor, self.display_filter, params.grid)
+        cached = self._cache_get(self._tile_histogram_cache, key)
+        if cached is not None:
+            return cached
+        quantized = self.get_quantized_slice(slice_index, factor)
+        if quantized is None:
+            return None
+        histograms = compute_tile_histograms(quantized, params.grid)
+        self._cache_put(self._tile_histogram_cache, key, histograms, self.QUANTIZED_CACHE_SLICES)
+        return histograms
+
+    def render_display_frame(self, slice_index: int, factor: int = 1) -> Optional[np.ndarray]:
+        """
+        Renders the display frame of a slice with the current display settings.
+
+        Unlike get_display_slice(), the result is not stored in the shared
+        PerformanceManager cache. Only the lock-guarded quantization, histogram
+        and LUT caches are used, so the method may be called from worker threads.
+
+        Args:
+            slice_index: The slice to render.
+            factor: Downsampling factor; values > 1 render the preview source.
+
+        Returns:
+            uint8 grayscale, or uint32 ARGB32 while a highlight band or colormap
+            is active; None if the slice does not exist.
+        """
+        # 由量化切片渲染：查表，CLAHE 模式下再按图块映射插值均衡后着色
+        quantized = self.get_quantized_slice(slice_index, factor)
+        if quantized is None:
+            return None
+        if self.clahe is None:
+            return apply_lut(quantized, self.get_display_lut(quantized))
+        window = window_lut(quantized, self.window_width, self.window_level)
+        histograms = self.get_tile_histograms(slice_index, factor)
+        mappings = clahe_mappings(histograms, window, self.clahe.clip_limit)
+        gray = apply_clahe(apply_lut(quantized, window), histograms, mappings)
+        return colorize(gray, quantized, self.highlight_band, self.get_colormap_palette())
+
+    def get_display_lut(self, quantized: QuantizedSlice) -> np.ndarray:
+        """Gets the display lookup table of a quantized slice for the current display settings."""
+        # 文件自带的调色板随载入的序列变化
+        palette_source = self.data_version if self.colormap == DICOM_PALETTE else None
+        key = (quantized.offset, quantized.step, quantized.levels, quantized.dtype.str,
+               self.window_width, self.window_level, self.highlight_band, self.colormap, palette_source)
+        lut = self._cache_get(self._lut_cache, key)
+        if lut is None:
+            lut = display_lut(quantized, self.window_width, self.window_level, self.highlight_band,
+                              self.get_colormap_palette())
+            self._cache_put(self._lut_cache, key, lut, self.QUANTIZED_CACHE_SLICES)
+        return lut
+
+    def apply_display_lut(self, data: np.ndarray, level: int = 0, x: int = 0, y: int = 0,
+                          slice_index: Optional[int] = None) -> np.ndarray:
+        """
+        Maps arbitrary raw data (e.g. a pyramid tile) to display pixels.
+
+        Equivalent to apply_window_level() for plain grayscale display; with a
+        highlight band or colormap, returns the uint32 ARGB32 frame.
+
+        Args:
+            data: Raw pixels, sampled every 2**level full-resolution pixels.
+            level: Pyramid level of the data.
+            x, y: Full-resolution position of the top-left pixel of data.
+            slice_index: If given, the labels of this slice covering the data
+                are blended on top (see LabelVolume.blend), and the display
+                filter reads the neighbouring pixels of the slice so adjacent
+                tiles join without seams. Without it, the filter mirrors the
+                edges of data.
+        """
+        if self.display_filter is not None:
+            step = 1 << level
+            display_filter = scaled_display_filter(self.display_filter, step)
+            slice_data = self.get_slice_data(slice_index) if slice_index is not None else None
+            if slice_data is not None:
+                level_data = slice_data[::step, ::step] if step > 1 else slice_data
+                data = filter_region(level_data, y // step, x // step, data.shape[0], data.shape[1],
+                                     display_filter)
+            else:
+                data = apply_display_filter(data, display_filter)
+        if self.highlight_band is None and self.colormap is None:
+            frame = self.apply_window_level(data)
+        else:
+            quantized = quantize_slice(data)
+            frame = apply_lut(quantized, display_lut(quantized, self.window_width, self.window_level,
+                                                     self.highlight_band, self.get_colormap_palette()))
+        if slice_index is not None and self.label_volume is not None:
+            frame = self.label_volume.blend(frame, slice_index, 1 << level, (y, x))
+        return frame
+
+    def get_preview_factor(self) -> int:
+        """
+        Returns the downsampling factor used for interactive previews.
+
+        The factor is chosen so that the preview is at most PREVIEW_TARGET_SIZE
+        pixels on its longer side; small images are never downsampled (factor 1).
+        """
+        shape = self.get_image_shape()
+        if shape is None:
+            return 1
+        return max(1, math.ceil(max(shape[1], shape[2]) / self.PREVIEW_TARGET_SIZE))
+
+    def set_interactive_preview(self, enabled: bool) -> None:
+        """
+        Enables or disables the reduced-resolution interactive preview.
+
+        While enabled, get_display_slice_for_view() windows a cached
+        downsampled copy of the slice. Disabling it triggers a full-resolution
+        re-render through data_changed.
+        """
+        if self.interactive_preview == enabled:
+            return
+        self.interactive_preview = enabled
+        if not enabled:
+            self.data_changed.emit()
+
+    def get_preview_source(self, slice_index: int) -> Optional[np.ndarray]:
+        """Gets (and caches) the downsampled raw data for a slice."""
+        factor = self.get_preview_factor()
+        key = (slice_index, factor)
+        cached = self._cache_get(self._preview_cache, key)
+        if cached is not None:
+            return cached
+
+        slice_data = self.get_slice_data(slice_index)
+        if slice_data is None:
+            return None
+        # 步长采样即可满足预览需求，复制为连续内存以加速后续窗宽窗位计算
+        preview = np.ascontiguousarray(slice_data[::factor, ::factor])
+        self._cache_put(self._preview_cache, key, preview, self.PREVIEW_CACHE_SLICES)
+        return preview
+
+    def get_display_slice_for_view(self, slice_index: Optional[int] = None) -> tuple[Optional[np.ndarray], int]:
+        """
+        Gets the display slice honouring the interactive preview mode.
+
+        Returns:
+            A tuple (display_array, scale) where scale is the factor by which
+            the array must be enlarged to cover the full-resolution image.
+        """
+        if slice_index is None:
+            slice_index = self.current_slice_index
+
+        factor = self.get_preview_factor()
+        # CLAHE 依赖整幅切片的图块直方图，不能逐个金字塔图块计算，因此不使用分块显示
+        tiled = self.use_tiled_display() and self.clahe is None
+        if factor > 1 and (self.interactive_preview or tiled):
+            # 分块显示时整幅图像只提供降采样概览，细节由可见图块补充
+            preview = self.render_display_frame(slice_index, factor)
+            if preview is not None:
+                # 预览帧不写入显示缓存，避免拖动时的大量窗宽窗位组合挤占缓存
+                return preview, factor
+
+        return self.get_display_slice(slice_index), 1
+
+    def use_tiled_display(self) -> bool:
+        """Whether the image is large enough to be displayed as pyramid tiles."""
+        shape = self.get_image_shape()
+        return shape is not None and max(shape[1], shape[2]) >= self.TILED_MIN_SIZE
+
+    def get_tile_pyramid(self, slice_index: Optional[int] = None) -> Optional[TilePyramid]:
+        """
+        Gets a tile pyramid over the raw data of a slice.
+
+        The pyramid levels are strided views, so creating one is free and no
+        caching is needed here; windowed tiles are cached by the viewer.
+        """
+        if slice_index is None:
+            slice_index = self.current_slice_index
+        slice_data = self.get_slice_data(slice_index)
+        if slice_data is None:
+            return None
+        return TilePyramid(slice_data, self.TILE_SIZE)
+
     def has_image(self) -> bool:
         """Check if any image data is loaded."""
         return self.pixel_array is not None
 
     def get_roi_by_id(self, roi_id: str) -> Optional[BaseROI]:
         """Finds and returns an ROI by its unique ID."""
-        for roi in self.rois:
-            if roi.id == roi_id:
-                return roi
-        return None
+        return self._roi_index.get(roi_id)
+
+    def get_annotation_version(self, exclude_id: Optional[str] = None) -> int:
+        """
+        Returns a counter that changes whenever an ROI, line or angle
+        measurement is added, removed, moved or (de)selected.
+
+        Args:
+            exclude_id: Geometry changes of this annotation are not counted
+                (used for the annotation being dragged, which is drawn live).
+        """
+        return (self._selection_version
+                + self._roi_index.version_excluding(exclude_id)
+                + self._measurement_index.version_excluding(exclude_id)
+                + self._angle_index.version_excluding(exclude_id))
+
+    def has_annotations_on_slice(self, slice_index: int) -> bool:
+        """Returns True if any ROI, line or angle measurement lies on the slice."""
+        return bool(self._roi_index.count_on_slice(slice_index)
+                    or self._measurement_index.count_on_slice(slice_index)
+                    or self._angle_index.count_on_slice(slice_index))
+
+    def get_rois_for_slice(self, slice_index: int) -> List[BaseROI]:
+        """Returns the ROIs on a slice in drawing order (topmost last)."""
+        return self._roi_index.items_on_slice(slice_index)
+
+    def find_rois_at(self, slice_index: int, y: float, x: float, tolerance: float = 0.0) -> List[BaseROI]:
+        """
+        Returns ROIs whose bounding box (grown by tolerance) contains (y, x),
+        topmost first. Callers still run roi.hit_test on the candidates.
+        """
+        return self._roi_index.query_point(slice_index, y, x, tolerance)
+
+    def get_roi_index(self, roi_id: str) -> Optional[int]:
+        """Returns the position of an ROI in self.rois."""
+        return self._roi_index.index_of(roi_id)
 
     def select_roi(self, roi_id: str, multi: bool = False) -> None:
         """
@@ -373,13 +1093,14 @@ class ImageDataModel(QObject):
             self.clear_selection()
         
         # We store indices in selected_indices, so we need to find it
-        try:
-            idx = self.rois.index(roi_to_select)
-            self.selected_indices.add(idx)
-            roi_to_select.selected = True
-            self.data_changed.emit()
-        except ValueError:
+        idx = self._roi_index.index_of(roi_id)
+        if idx is None:
             self.logger.warning(f"ROI with id {roi_id} found but not in list?")
+            return
+        self.selected_indices.add(idx)
+        roi_to_select.selected = True
+        self._selection_version += 1
+        self.data_changed.emit()
 
     def deselect_roi(self, roi_id: str) -> None:
         """Deselects an ROI by its unique ID."""
@@ -387,14 +1108,12 @@ class ImageDataModel(QObject):
         if not roi_to_deselect:
             return
 
-        try:
-            idx = self.rois.index(roi_to_deselect)
-            if idx in self.selected_indices:
-                self.selected_indices.remove(idx)
-                roi_to_deselect.selected = False
-                self.data_changed.emit()
-        except ValueError:
-            pass
+        idx = self._roi_index.index_of(roi_id)
+        if idx in self.selected_indices:
+            self.selected_indices.remove(idx)
+            roi_to_deselect.selected = False
+            self._selection_version += 1
+            self.data_changed.emit()
             
     def clear_selection(self) -> None:
         """Clears the current ROI selection."""
@@ -402,6 +1121,7 @@ class ImageDataModel(QObject):
             if 0 <= idx < len(self.rois):
                 self.rois[idx].selected = False
         self.selected_indices.clear()
+        self._selection_version += 1
         self.data_changed.emit()
 
     def delete_selected_rois(self) -> List[str]:
@@ -417,7 +1137,10 @@ class ImageDataModel(QObject):
         for idx in indices_to_delete:
             if 0 <= idx < len(self.rois):
                 deleted_roi = self.rois.pop(idx)
+                self._roi_index.remove(deleted_roi.id)
                 deleted_roi_ids.append(deleted_roi.id)
+                self.roi_statistics.discard(deleted_roi.id)
+                self.time_intensity_curves.discard(deleted_roi.id)
         
         self.clear_selection() # This also emits data_changed
         return deleted_roi_ids
@@ -439,6 +1162,9 @@ class ImageDataModel(QObject):
         """清除所有ROI数据"""
         self.logger.debug("清除所有ROI数据")
         self.rois.clear()
+        self._roi_index.clear()
+        self.roi_statistics.clear()
+        self.time_intensity_curves.clear()
         self.selected_indices.clear()
         self.data_changed.emit()
 
@@ -561,40 +1287,50 @@ class ImageDataModel(QObject):
     def add_measurement(self, measurement: MeasurementData) -> None:
         """添加测量数据到模型"""
         self.measurements.append(measurement)
+        self._measurement_index.add(measurement)
         self.measurement_added.emit(measurement)
         self.data_changed.emit()
 
     def remove_measurement(self, measurement_id: str) -> bool:
         """根据ID移除测量数据"""
-        for i, measurement in enumerate(self.measurements):
-            if measurement.id == measurement_id:
-                self.measurements.pop(i)
-                # 更新选中索引
-                if i in self.selected_measurement_indices:
-                    self.selected_measurement_indices.remove(i)
-                # 调整其他选中索引
-                new_selected = set()
-                for idx in self.selected_measurement_indices:
-                    if idx > i:
-                        new_selected.add(idx - 1)
-                    elif idx < i:
-                        new_selected.add(idx)
-                self.selected_measurement_indices = new_selected
-                self.data_changed.emit()
-                return True
-        return False
+        i = self._measurement_index.index_of(measurement_id)
+        if i is None:
+            return False
+        self.measurements.pop(i)
+        self._measurement_index.remove(measurement_id)
+        # 更新选中索引
+        if i in self.selected_measurement_indices:
+            self.selected_measurement_indices.remove(i)
+        # 调整其他选中索引
+        new_selected = set()
+        for idx in self.selected_measurement_indices:
+            if idx > i:
+                new_selected.add(idx - 1)
+            elif idx < i:
+                new_selected.add(idx)
+        self.selected_measurement_indices = new_selected
+        self._selection_version += 1
+        self.data_changed.emit()
+        return True
 
     def get_measurement_by_id(self, measurement_id: str) -> Optional[MeasurementData]:
         """根据ID获取测量数据"""
-        for measurement in self.measurements:
-            if measurement.id == measurement_id:
-                return measurement
-        return None
+        return self._measurement_index.get(measurement_id)
+
+    def get_measurement_index(self, measurement_id: str) -> Optional[int]:
+        """获取测量在 measurements 列表中的全局索引"""
+        return self._measurement_index.index_of(measurement_id)
+
+    def find_measurements_at(self, slice_index: int, y: float, x: float,
+                             tolerance: float = 0.0) -> List[MeasurementData]:
+        """包围盒（按容差外扩）包含给定点的测量，最后添加的在前；调用方仍需精确判断"""
+        return self._measurement_index.query_point(slice_index, y, x, tolerance)
 
     def select_measurement(self, index: int) -> bool:
         """选中指定索引的测量"""
         if 0 <= index < len(self.measurements):
             self.selected_measurement_indices.add(index)
+            self._selection_version += 1
             self.data_changed.emit()
             return True
         return False
@@ -603,6 +1339,7 @@ class ImageDataModel(QObject):
         """取消选中指定索引的测量"""
         if index in self.selected_measurement_indices:
             self.selected_measurement_indices.remove(index)
+            self._selection_version += 1
             self.data_changed.emit()
             return True
         return False
@@ -611,6 +1348,7 @@ class ImageDataModel(QObject):
         """清除所有测量选择状态"""
         if self.selected_measurement_indices:
             self.selected_measurement_indices.clear()
+            self._selection_version += 1
             self.data_changed.emit()
 
     def delete_selected_measurements(self) -> List[str]:
@@ -622,6 +1360,7 @@ class ImageDataModel(QObject):
         for idx in indices_to_delete:
             if 0 <= idx < len(self.measurements):
                 deleted_measurement = self.measurements.pop(idx)
+                self._measurement_index.remove(deleted_measurement.id)
                 deleted_measurement_ids.append(deleted_measurement.id)
         
         self.clear_measurement_selection()  # 这也会发出data_changed信号
@@ -629,20 +1368,33 @@ class ImageDataModel(QObject):
 
     def get_measurements_for_slice(self, slice_index: int) -> List[MeasurementData]:
         """获取指定切片的所有测量数据"""
-        return [m for m in self.measurements if m.slice_index == slice_index]
+        return self._measurement_index.items_on_slice(slice_index)
 
     def clear_all_measurements(self) -> None:
         """清除所有测量数据"""
         self.measurements.clear()
+        self._measurement_index.clear()
         self.selected_measurement_indices.clear()
         self.angle_measurements.clear()
+        self._angle_index.clear()
         self.data_changed.emit()
 
     def add_angle_measurement(self, data: AngleMeasurementData) -> None:
         """添加角度测量数据"""
         self.angle_measurements.append(data)
+        self._angle_index.add(data)
+        self.data_changed.emit()
+
+    def remove_angle_measurement(self, measurement_id: str) -> bool:
+        """根据ID移除角度测量数据"""
+        i = self._angle_index.index_of(measurement_id)
+        if i is None:
+            return False
+        self.angle_measurements.pop(i)
+        self._angle_index.remove(measurement_id)
         self.data_changed.emit()
+        return True
 
     def get_angle_measurements_for_slice(self, slice_index: int) -> List[AngleMeasurementData]:
         """获取指定切片的所有角度测量数据"""
-        return [m for m in self.angle_measurements if m.slice_index == slice_index]
\ No newline at end of file
+        return self._angle_index.items_on_slice(slice_index)
\ No newline at end of file
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签掩码模块
+
+区域生长等分割工具的结果以 LabelMask 标注保存。掩码按 (切片, 行) 上的列区间
+（游程）存储：内存与区域表面积相关而与体积无关，逐切片解码只需一次 searchsorted。
+"""
+
+import uuid
+from typing import Optional, Tuple
+
+import numpy as np
+
+from medimager.core.volume_roi import VoxelSpacing
+
+# 单个切片上的游程：(行, 起始列, 结束列（不含）)
+SliceRuns = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class LabelMask:
+    """
+    以游程编码存储的三维二值掩码标注.
+
+    游程按 (切片, 行, 起始列) 排序，同一行上的游程互不相交.
+
+    Attributes:
+        id (str): 唯一标识符.
+        name (str): 显示名称.
+        shape (tuple[int, int, int]): 所属图像的形状 (切片数, 高, 宽).
+        slices, rows, starts, stops (np.ndarray): 每个游程的切片、行、起始列和结束列（不含）.
+        color (tuple[int, int, int]): 显示颜色 (R, G, B).
+        label (int): 在模型标签体数据中的标签值（0 表示未加入模型）.
+        seed (tuple | None): 生成该掩码的种子体素 (slice, row, col).
+        interval (tuple | None): 生长使用的灰度区间 (下限, 上限).
+    """
+
+    def __init__(self, shape: Tuple[int, int, int], slices: np.ndarray, rows: np.ndarray,
+                 starts: np.ndarray, stops: np.ndarray, name: str = "",
+                 color: Tuple[int, int, int] = (255, 64, 64)):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.shape = tuple(int(s) for s in shape)
+        self.slices = np.asarray(slices, dtype=np.int32)
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.int32)
+        self.stops = np.asarray(stops, dtype=np.int32)
+        self.color = color
+        self.label = 0
+        self.seed: Optional[Tuple[int, int, int]] = None
+        self.interval: Optional[Tuple[float, float]] = None
+        self.voxel_count = int((self.stops - self.starts).sum(dtype=np.int64))
+
+    @property
+    def run_count(self) -> int:
+        return len(self.starts)
+
+    def volume_ml(self, spacing: VoxelSpacing) -> float:
+        """掩码体积（mL），spacing 为 (切片, 行, 列) 间距，单位 mm"""
+        return self.voxel_count * float(spacing[0]) * float(spacing[1]) * float(spacing[2]) / 1000.0
+
+    def slice_indices(self) -> np.ndarray:
+        """掩码覆盖的切片索引"""
+        return np.unique(self.slices)
+
+    def slice_range(self) -> Optional[Tuple[int, int]]:
+        """覆盖的首末切片 (first, last)，掩码为空时为 None"""
+        if not self.run_count:
+            return None
+        return int(self.slices[0]), int(self.slices[-1])
+
+    def get_slice_runs(self, slice_index: int) -> SliceRuns:
+        """指定切片上的游程 (行, 起始列, 结束列)，返回视图"""
+        first, last = np.searchsorted(self.slices, (slice_index, slice_index + 1))
+        return self.rows[first:last], self.starts[first:last], self.stops[first:last]
+
+    def has_slice(self, slice_index: int) -> bool:
+        first, last = np.searchsorted(self.slices, (slice_index, slice_index + 1))
+        return bool(last > first)
+
+    def get_slice_mask(self, slice_index: int) -> np.ndarray:
+        """将指定切片解码为 (高, 宽) 布尔掩码"""
+        height, width = self.shape[1:]
+        rows, starts, stops = self.get_slice_runs(slice_index)
+        # 游程起点 +1、终点 -1 后按行展开的累加和即为掩码
+        delta = np.zeros(height * width + 1, dtype=np.int8)
+        base = rows.astype(np.int64) * width
+        delta[base + starts] = 1
+        delta[base + stops] -= 1
+        return np.cumsum(delta[:-1], dtype=np.int8).reshape(height, width).astype(bool)
+
+    def contains(self, slice_index: int, row: int, col: int) -> bool:
+        """体素是否在掩码内"""
+        rows, starts, stops = self.get_slice_runs(slice_index)
+        return bool(((rows == row) & (starts <= col) & (stops > col)).any())
+
+    def bounds(self) -> Optional[Tuple[int, int, int, int, int, int]]:
+        """包围盒 (首切片, 末切片, 首行, 末行, 首列, 末列)，均含端点"""
+        if not self.run_count:
+            return None
+        return (int(self.slices[0]), int(self.slices[-1]), int(self.rows.min()), int(self.rows.max()),
+                int(self.starts.min()), int(self.stops.max()) - 1)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签体数据模块
+
+LabelVolume 保存一个序列的分割标签（每体素 0~255，0 表示背景）：
+- 每个切片按展平后的游程编码存储 (起点, 长度, 标签)，空切片不占内存，
+  稀疏掩码在大体数据上只占很少内存；
+- 只解码显示或编辑中的切片，解码结果放在一个小的 LRU 缓存中；
+- 编辑直接修改缓存中的解码切片并记为脏切片，切片被换出缓存或 flush 时才重新编码；
+- 显示时用 (标签, 灰度) 二维调色板查找表一次索引得到 ARGB32 帧，
+  没有标签的切片直接返回灰度帧，不产生额外开销。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+# 单个切片的游程编码：(展平起点, 长度, 标签)
+EncodedSlice = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def encode_slice(labels: np.ndarray) -> Optional[EncodedSlice]:
+    """把二维标签切片编码为游程，全为背景时返回 None"""
+    flat = labels.ravel()
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [flat.size])))
+    values = flat[starts]
+    keep = values != 0
+    if not keep.any():
+        return None
+    return starts[keep].astype(np.int32), lengths[keep].astype(np.int32), values[keep].astype(np.uint8)
+
+
+def decode_slice(encoded: Optional[EncodedSlice], shape: Tuple[int, int]) -> np.ndarray:
+    """把游程解码为 uint8 标签切片"""
+    size = shape[0] * shape[1]
+    if encoded is None:
+        return np.zeros(shape, dtype=np.uint8)
+    starts, lengths, values = encoded
+    # 起点处 +标签、终点处 -标签，累加和即为各像素的标签
+    delta = np.zeros(size + 1, dtype=np.int16)
+    delta[starts] = values
+    delta[starts + lengths] -= values
+    return np.cumsum(delta[:-1], dtype=np.int16).astype(np.uint8).reshape(shape)
+
+
+class LabelVolume:
+    """
+    游程编码的标签体数据及其调色板.
+
+    Attributes:
+        shape (tuple[int, int, int]): (切片数, 高, 宽).
+        palette (np.ndarray): 256 个标签的颜色 (R, G, B)，uint8.
+        opacity (np.ndarray): 256 个标签的不透明度 (0~1)，标签 0 恒为 0.
+    """
+
+    DEFAULT_OPACITY = 0.4
+
+    def __init__(self, shape: Tuple[int, int, int], cache_slices: int = 4):
+        self.shape = tuple(int(s) for s in shape)
+        self.cache_slices = max(1, cache_slices)
+        self._encoded: Dict[int, EncodedSlice] = {}
+        self._decoded: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        # 缓存中已编辑、尚未重新编码的切片
+        self._unencoded: Set[int] = set()
+        # 自上次 take_dirty_slices 以来被修改的切片，以及每个切片的版本号
+        self._dirty: Set[int] = set()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+        self.palette = np.zeros((256, 3), dtype=np.uint8)
+        self.opacity = np.zeros(256, dtype=np.float32)
+        self.palette_version = 0
+        self._blend_table: Optional[np.ndarray] = None
+        self._blend_table_version = -1
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def _cached_slice(self, slice_index: int) -> np.ndarray:
+        """返回缓存中的解码切片（必要时解码并换出最久未用的切片），调用方需持有锁"""
+        labels = self._decoded.get(slice_index)
+        if labels is not None:
+            self._decoded.move_to_end(slice_index)
+            return labels
+        labels = decode_slice(self._encoded.get(slice_index), self.shape[1:])
+        self._decoded[slice_index] = labels
+        while len(self._decoded) > self.cache_slices:
+            evicted, evicted_labels = self._decoded.popitem(last=False)
+            if evicted in self._unencoded:
+                self._store(evicted, evicted_labels)
+        return labels
+
+    def _store(self, slice_index: int, labels: np.ndarray) -> None:
+        encoded = encode_slice(labels)
+        if encoded is None:
+            self._encoded.pop(slice_index, None)
+        else:
+            self._encoded[slice_index] = encoded
+        self._unencoded.discard(slice_index)
+
+    def get_slice(self, slice_index: int) -> np.ndarray:
+        """只读的解码标签切片 (高, 宽)"""
+        with self._lock:
+            view = self._cached_slice(slice_index).view()
+        view.flags.writeable = False
+        return view
+
+    def has_labels(self, slice_index: int) -> bool:
+        """切片上是否有非背景标签"""
+        with self._lock:
+            if slice_index in self._unencoded:
+                return bool(self._decoded[slice_index].any())
+            return slice_index in self._encoded
+
+    def labeled_slices(self) -> list:
+        """有标签的切片索引（升序）"""
+        self.flush()
+        return sorted(self._encoded)
+
+    def slice_version(self, slice_index: int) -> int:
+        """切片的版本号，每次编辑递增（供显示缓存判断失效）"""
+        return self._versions.get(slice_index, 0)
+
+    def take_dirty_slices(self) -> Set[int]:
+        """返回并清空自上次调用以来被修改的切片"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def flush(self) -> None:
+        """重新编码所有已编辑的缓存切片"""
+        with self._lock:
+            for slice_index in list(self._unencoded):
+                self._store(slice_index, self._decoded[slice_index])
+
+    def memory_bytes(self) -> int:
+        """编码数据与解码缓存占用的内存（字节）"""
+        with self._lock:
+            encoded = sum(a.nbytes + b.nbytes + c.nbytes for a, b, c in self._encoded.values())
+            return encoded + sum(labels.nbytes for labels in self._decoded.values())
+
+    # ------------------------------------------------------------------
+    # 编辑
+    # ------------------------------------------------------------------
+    def _edit(self, slice_index: int) -> np.ndarray:
+        labels = self._cached_slice(slice_index)
+        self._unencoded.add(slice_index)
+        self._dirty.add(slice_index)
+        self._versions[slice_index] = self._versions.get(slice_index, 0) + 1
+        return labels
+
+    def set_slice(self, slice_index: int, labels: np.ndarray) -> None:
+        """整体替换一个切片的标签"""
+        with self._lock:
+            self._edit(slice_index)[...] = labels
+
+    def paint_mask(self, slice_index: int, mask: np.ndarray, label: int,
+                   offset: Tuple[int, int] = (0, 0)) -> None:
+        """
+        用布尔掩码绘制标签（label 为 0 时擦除）
+
+        Args:
+            slice_index: 切片索引
+            mask: 布尔掩码，左上角位于 offset
+            label: 标签值
+            offset: 掩码左上角的 (行, 列)
+        """
+        row, col = offset
+        with self._lock:
+            target = self._edit(slice_index)[row:row + mask.shape[0], col:col + mask.shape[1]]
+            target[mask[:target.shape[0], :target.shape[1]]] = label
+
+    def paint_runs(self, slice_index: int, rows: np.ndarray, starts: np.ndarray, stops: np.ndarray,
+                   label: int, only_background: bool = False) -> None:
+        """
+        按列方向游程绘制标签（如 LabelMask.get_slice_runs 的结果）
+
+        Args:
+            only_background: True 时只覆盖当前为背景的像素
+        """
+        if not len(rows):
+            return
+        width = self.shape[2]
+        lengths = (stops - starts).astype(np.int64)
+        ends = np.cumsum(lengths)
+        flat_starts = rows.astype(np.int64) * width + starts
+        index = np.repeat(flat_starts - ends + lengths, lengths) + np.arange(ends[-1])
+        with self._lock:
+            flat = self._edit(slice_index).reshape(-1)
+            if only_background:
+                index = index[flat[index] == 0]
+            flat[index] = label
+
+    def erase_label(self, label: int, slices: Optional[Iterable[int]] = None) -> None:
+        """把指定切片（默认所有切片）上的某个标签擦除为背景"""
+        with self._lock:
+            if slices is None:
+                self.flush()
+                slices = [z for z, (_, _, values) in self._encoded.items() if (values == label).any()]
+            for slice_index in slices:
+                if not self.has_labels(slice_index):
+                    continue
+                labels = self._edit(slice_index)
+                labels[labels == label] = 0
+
+    # ------------------------------------------------------------------
+    # 显示
+    # ------------------------------------------------------------------
+    def set_label_color(self, label: int, color: Tuple[int, int, int],
+                        opacity: Optional[float] = None) -> None:
+        """设置标签的颜色与不透明度"""
+        if not 0 < label < 256:
+            return
+        self.palette[label] = color
+        self.opacity[label] = self.DEFAULT_OPACITY if opacity is None else opacity
+        self.palette_version += 1
+
+    def render_key(self, slice_index: int) -> tuple:
+        """切片叠加显示的标识（切片版本与调色板版本）"""
+        return self.slice_version(slice_index), self.palette_version
+
+    def _get_blend_table(self) -> np.ndarray:
+        """(标签 * 256 + 灰度) -> 不透明 ARGB32 的查找表，调色板变化后重建"""
+        if self._blend_table_version != self.palette_version:
+            gray = np.arange(256, dtype=np.float32)
+            alpha = self.opacity[:, None, None]
+            rgb = gray[None, :, None] * (1 - alpha) + self.palette[:, None, :].astype(np.float32) * alpha
+            rgb = np.clip(np.rint(rgb), 0, 255).astype(np.uint32)
+            table = (0xFF000000 | (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]).astype(np.uint32)
+            self._blend_table = table.reshape(-1)
+            self._blend_table_version = self.palette_version
+        return self._blend_table
+
+    def blend(self, gray: np.ndarray, slice_index: int, scale: int = 1,
+              origin: Tuple[int, int] = (0, 0)) -> np.ndarray:
+        """
+        把切片标签叠加到显示帧上
+
+        Args:
+            gray: 窗宽窗位后的 uint8 灰度帧，或已着色（如 HU 高亮）的 uint32 ARGB32 帧
+            slice_index: 切片索引
+            scale: 灰度帧相对原图的降采样倍数
+            origin: 灰度帧左上角在原图中的位置 (行, 列)，如金字塔图块的起点
+
+        Returns:
+            切片没有标签时原样返回 gray，否则返回同尺寸的 uint32 ARGB32 帧
+        """
+        if not self.has_labels(slice_index):
+            return gray
+        labels = self.get_slice(slice_index)
+        row, col = origin
+        if scale > 1 or row or col:
+            labels = labels[row::scale, col::scale]
+        labels = labels[:gray.shape[0], :gray.shape[1]]
+        if gray.dtype == np.uint32:
+            return self._blend_color(gray, labels)
+        with self._lock:
+            table = self._get_blend_table()
+        index = labels.astype(np.uint16) << 8
+        index |= gray
+        return np.take(table, index)
+
+    def _blend_color(self, frame: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """在 ARGB32 帧上混合标签颜色（只处理有标签的像素）"""
+        result = frame.copy()
+        labeled = labels != 0
+        values = labels[labeled]
+        pixels = frame[labeled]
+        channels = ((pixels[:, None] >> np.array([16, 8, 0], dtype=np.uint32)) & 0xFF).astype(np.float32)
+        alpha = self.opacity[values][:, None]
+        rgb = channels * (1 - alpha) + self.palette[values].astype(np.float32) * alpha
+        rgb = np.clip(np.rint(rgb), 0, 255).astype(np.uint32)
+        result[labeled] = 0xFF000000 | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        return result
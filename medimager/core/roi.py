@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Tuple, TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 import uuid
 
 import numpy as np
@@ -18,30 +18,52 @@ def _get_settings():
     return get_settings_manager()
 
 
-def _create_circle_mask(center_y: int, center_x: int, radius: int, height: int, width: int) -> tuple[np.ndarray, np.ndarray]:
+# 行区间表示：(起始行, 各行起始列数组, 各行终止列数组)，列区间左闭右开，
+# 起止相同的行不含像素。所有坐标均已裁剪到图像范围内。
+RowSpans = Tuple[int, np.ndarray, np.ndarray]
+# 局部掩码：(包围盒切片 (行切片, 列切片), 包围盒内的布尔掩码)
+LocalMask = Tuple[Tuple[slice, slice], np.ndarray]
+
+
+def _clip_spans(row0: int, center_x: int, half: np.ndarray, width: int) -> RowSpans:
+    """由每行半宽生成裁剪到图像宽度内的行区间（半宽为负的行为空）"""
+    starts = np.minimum(np.maximum(center_x - half, 0), width)
+    stops = np.maximum(np.minimum(center_x + half + 1, width), starts)
+    return row0, starts, stops
+
+
+def _circle_row_spans(center_y: int, center_x: int, radius: int, height: int, width: int) -> Optional[RowSpans]:
     """
-    创建圆形掩码的坐标数组，替代skimage.draw.disk
-    
+    计算圆形区域 (x - cx)^2 + (y - cy)^2 <= r^2 的行区间，只遍历外接矩形的行
+
     Args:
         center_y: 圆心Y坐标
-        center_x: 圆心X坐标  
+        center_x: 圆心X坐标
         radius: 半径
         height: 图像高度
         width: 图像宽度
-        
+
     Returns:
-        (rr, cc): 圆形区域内的行列坐标数组
+        行区间，圆与图像不相交时返回 None
     """
-    y, x = np.ogrid[:height, :width]
-    mask = (x - center_x) ** 2 + (y - center_y) ** 2 <= radius ** 2
-    rr, cc = np.where(mask)
-    return rr, cc
-
-
-def _create_ellipse_mask(center_y: int, center_x: int, radius_y: int, radius_x: int, height: int, width: int) -> tuple[np.ndarray, np.ndarray]:
+    r = abs(radius)
+    y0 = max(0, center_y - r)
+    y1 = min(height - 1, center_y + r)
+    if y0 > y1:
+        return None
+    remaining = r * r - (np.arange(y0, y1 + 1, dtype=np.int64) - center_y) ** 2
+    half = np.floor(np.sqrt(remaining)).astype(np.int64)
+    # 浮点开方可能偏差一位，按整数判定修正为精确的 floor(sqrt)
+    half += (half + 1) ** 2 <= remaining
+    half -= half ** 2 > remaining
+    return _clip_spans(y0, center_x, half, width)
+
+
+def _ellipse_row_spans(center_y: int, center_x: int, radius_y: int, radius_x: int,
+                       height: int, width: int) -> Optional[RowSpans]:
     """
-    创建椭圆掩码的坐标数组，替代skimage.draw.ellipse
-    
+    计算椭圆区域 ((x - cx) / rx)^2 + ((y - cy) / ry)^2 <= 1 的行区间，只遍历外接矩形的行
+
     Args:
         center_y: 椭圆中心Y坐标
         center_x: 椭圆中心X坐标
@@ -49,14 +71,41 @@ def _create_ellipse_mask(center_y: int, center_x: int, radius_y: int, radius_x:
         radius_x: X轴半径
         height: 图像高度
         width: 图像宽度
-        
+
     Returns:
-        (rr, cc): 椭圆区域内的行列坐标数组
+        行区间，椭圆退化或与图像不相交时返回 None
     """
-    y, x = np.ogrid[:height, :width]
-    mask = ((x - center_x) / radius_x) ** 2 + ((y - center_y) / radius_y) ** 2 <= 1
-    rr, cc = np.where(mask)
-    return rr, cc
+    ry, rx = abs(radius_y), abs(radius_x)
+    if ry == 0 or rx == 0:
+        return None
+    y0 = max(0, center_y - ry)
+    y1 = min(height - 1, center_y + ry)
+    if y0 > y1:
+        return None
+    row_term = ((np.arange(y0, y1 + 1, dtype=np.int64) - center_y) / ry) ** 2
+    half = np.floor(rx * np.sqrt(np.maximum(0.0, 1.0 - row_term))).astype(np.int64)
+    # 用与逐像素判定相同的表达式修正边界，保证与整幅掩码的结果一致
+    half += ((half + 1) / rx) ** 2 + row_term <= 1
+    half -= (half / rx) ** 2 + row_term > 1
+    return _clip_spans(y0, center_x, half, width)
+
+
+def _spans_to_local_mask(spans: Optional[RowSpans]) -> Optional[LocalMask]:
+    """将行区间转换为包围盒及其内部的局部掩码"""
+    if spans is None:
+        return None
+    row0, starts, stops = spans
+    nonempty = stops > starts
+    if not nonempty.any():
+        return None
+    rows = np.flatnonzero(nonempty)
+    first, last = int(rows[0]), int(rows[-1]) + 1
+    starts, stops = starts[first:last], stops[first:last]
+    col0 = int(starts[nonempty[first:last]].min())
+    col1 = int(stops.max())
+    cols = np.arange(col0, col1)
+    mask = (cols >= starts[:, np.newaxis]) & (cols < stops[:, np.newaxis])
+    return (slice(row0 + first, row0 + last), slice(col0, col1)), mask
 
 
 class ROIShape(Enum):
@@ -75,15 +124,57 @@ class BaseROI(ABC):
         slice_index (int): ROI所在的切片索引.
         selected (bool): 是否被选中.
         id (str): 每个ROI实例的唯一标识符.
+        geometry_version (int): 几何版本号，位置/大小/切片变化时递增.
     """
+    # 修改这些属性会使 geometry_version 递增（统计缓存据此判断失效）
+    _GEOMETRY_ATTRS = frozenset({
+        'slice_index', 'center', 'radius', 'radius_x', 'radius_y', 'top_left', 'bottom_right'
+    })
+    # 几何变化回调，由所在的 AnnotationIndex 设置
+    _geometry_observer = None
+
     def __init__(self, shape: ROIShape, slice_index: int):
+        self.geometry_version = 0
         self.id = str(uuid.uuid4()) # 分配一个唯一的ID
         self.shape = shape
         self.slice_index = slice_index
         self.selected = False  # 新增：选中状态
         self.show_stats = True # 控制统计信息框的显示
 
+    def __setattr__(self, name, value) -> None:
+        if name in self._GEOMETRY_ATTRS:
+            object.__setattr__(self, 'geometry_version', getattr(self, 'geometry_version', 0) + 1)
+            object.__setattr__(self, name, value)
+            if self._geometry_observer is not None:
+                self._geometry_observer(self)
+            return
+        object.__setattr__(self, name, value)
+
     @abstractmethod
+    def get_row_spans(self, height: int, width: int) -> Optional[RowSpans]:
+        """
+        计算ROI在给定尺寸图像上的行区间（已裁剪到图像范围内）.
+
+        Args:
+            height: 图像的高度.
+            width: 图像的宽度.
+
+        Returns:
+            (起始行, 各行起始列, 各行终止列)，列区间左闭右开；ROI与图像不相交时为None.
+        """
+        pass
+
+    def get_local_mask(self, height: int, width: int) -> Optional[LocalMask]:
+        """
+        生成只覆盖ROI包围盒的局部布尔掩码.
+
+        分配量与ROI大小成正比而与图像大小无关，统计时用 ``data[bbox][mask]`` 取像素.
+
+        Returns:
+            (bbox, mask)，bbox 为 (行切片, 列切片)；ROI与图像不相交时为None.
+        """
+        return _spans_to_local_mask(self.get_row_spans(height, width))
+
     def get_mask(self, height: int, width: int) -> np.ndarray:
         """
         为给定尺寸的图像生成一个布尔掩码.
@@ -95,7 +186,12 @@ class BaseROI(ABC):
         Returns:
             一个布尔值的numpy数组，ROI区域为True，其余为False.
         """
-        pass
+        mask = np.zeros((height, width), dtype=bool)
+        local = self.get_local_mask(height, width)
+        if local is not None:
+            bbox, local_mask = local
+            mask[bbox] = local_mask
+        return mask
 
     @abstractmethod
     def get_anchor_points(self) -> list[tuple[int, int]]:
@@ -149,6 +245,17 @@ class BaseROI(ABC):
         """
         pass
 
+    def _get_draw_style(self) -> Tuple['QPen', 'QColor', int]:
+        """获取绘制用的缓存画笔、锚点颜色和锚点大小"""
+        from medimager.utils.theme_manager import get_theme_resources
+
+        resources = get_theme_resources('roi')
+        if self.selected:
+            pen = resources.pen('selected_color', 'border_width', "#FF0000", 2)
+        else:
+            pen = resources.pen('border_color', 'border_width', "#FFFF00", 2)
+        return pen, resources.color('anchor_color', "#FF0000"), resources.get('anchor_size', 8)
+
     def _get_style_from_settings(self) -> Tuple[str, str, str, int, int]:
         """从设置中获取ROI的样式"""
         try:
@@ -196,12 +303,10 @@ class EllipseROI(BaseROI):
         from PySide6.QtGui import QColor, QPen, QBrush
         from PySide6.QtCore import QPointF, Qt
 
-        border_color_str, selected_color_str, anchor_color_str, border_width, anchor_size = self._get_style_from_settings()
+        pen, anchor_color, anchor_size = self._get_draw_style()
 
         painter.save()
         
-        pen_color = QColor(selected_color_str) if self.selected else QColor(border_color_str)
-        pen = QPen(pen_color, border_width)
         painter.setPen(pen)
         painter.setBrush(Qt.BrushStyle.NoBrush)
 
@@ -213,23 +318,19 @@ class EllipseROI(BaseROI):
             pixel_size = 1.0 / view_transform.m11()
             scaled_anchor_size = anchor_size * pixel_size
             
-            painter.setBrush(QColor(anchor_color_str))
+            painter.setBrush(anchor_color)
             painter.setPen(Qt.PenStyle.NoPen)
             for ay, ax in self.get_anchor_points():
                 painter.drawEllipse(QPointF(ax, ay), scaled_anchor_size / 2, scaled_anchor_size / 2)
         
         painter.restore()
 
-    def get_mask(self, height: int, width: int) -> np.ndarray:
-        """根据椭圆几何形状生成布尔掩码"""
-        mask = np.zeros((height, width), dtype=bool)
+    def get_row_spans(self, height: int, width: int) -> Optional[RowSpans]:
+        """根据椭圆几何形状计算行区间"""
         # 确保所有参数都是整数
         cy, cx = int(self.center[0]), int(self.center[1])
         ry, rx = int(self.radius_y), int(self.radius_x)
-        # 使用自定义函数替代skimage.draw.ellipse
-        rr, cc = _create_ellipse_mask(cy, cx, ry, rx, height, width)
-        mask[rr, cc] = True
-        return mask
+        return _ellipse_row_spans(cy, cx, ry, rx, height, width)
 
     def get_anchor_points(self) -> list[tuple[int, int]]:
         # 四个角点（外接矩形）
@@ -318,12 +419,10 @@ class CircleROI(EllipseROI):
         from PySide6.QtGui import QColor, QPen, QBrush
         from PySide6.QtCore import QPointF, Qt
 
-        border_color_str, selected_color_str, anchor_color_str, border_width, anchor_size = self._get_style_from_settings()
+        pen, anchor_color, anchor_size = self._get_draw_style()
         
         painter.save()
 
-        pen_color = QColor(selected_color_str) if self.selected else QColor(border_color_str)
-        pen = QPen(pen_color, border_width)
         painter.setPen(pen)
         painter.setBrush(Qt.BrushStyle.NoBrush)
 
@@ -334,32 +433,28 @@ class CircleROI(EllipseROI):
             pixel_size = 1.0 / view_transform.m11()
             scaled_anchor_size = anchor_size * pixel_size
             
-            painter.setBrush(QColor(anchor_color_str))
+            painter.setBrush(anchor_color)
             painter.setPen(Qt.PenStyle.NoPen)
             for ay, ax in self.get_anchor_points():
                 painter.drawEllipse(QPointF(ax, ay), scaled_anchor_size / 2, scaled_anchor_size / 2)
         
         painter.restore()
 
-    def get_mask(self, height: int, width: int) -> np.ndarray:
+    def get_row_spans(self, height: int, width: int) -> Optional[RowSpans]:
         """
-        生成一个圆形的布尔掩码.
+        计算圆形ROI的行区间.
 
         Args:
             height: 图像的高度.
             width: 图像的宽度.
 
         Returns:
-            一个布尔值的numpy数组，圆形ROI区域为True.
+            圆形ROI区域的行区间.
         """
-        mask = np.zeros((height, width), dtype=bool)
         # 确保参数都是整数
         cy, cx = int(self.center[0]), int(self.center[1])
         r = int(self.radius)
-        # 使用自定义函数替代skimage.draw.disk
-        rr, cc = _create_circle_mask(cy, cx, r, height, width)
-        mask[rr, cc] = True
-        return mask 
+        return _circle_row_spans(cy, cx, r, height, width)
 
     def get_anchor_points(self) -> list[tuple[int, int]]:
         """获取圆形的外接矩形的四个角点作为锚点"""
@@ -454,12 +549,10 @@ class RectangleROI(BaseROI):
         from PySide6.QtGui import QColor, QPen, QBrush
         from PySide6.QtCore import QPointF, QRectF, Qt
 
-        border_color_str, selected_color_str, anchor_color_str, border_width, anchor_size = self._get_style_from_settings()
+        pen, anchor_color, anchor_size = self._get_draw_style()
         
         painter.save()
 
-        pen_color = QColor(selected_color_str) if self.selected else QColor(border_color_str)
-        pen = QPen(pen_color, border_width)
         painter.setPen(pen)
         painter.setBrush(Qt.BrushStyle.NoBrush)
 
@@ -472,7 +565,7 @@ class RectangleROI(BaseROI):
             pixel_size = 1.0 / view_transform.m11()
             scaled_anchor_size = anchor_size * pixel_size
             
-            painter.setBrush(QColor(anchor_color_str))
+            painter.setBrush(anchor_color)
             painter.setPen(Qt.PenStyle.NoPen)
             for ay, ax in self.get_anchor_points():
                 painter.drawEllipse(QPointF(ax, ay), scaled_anchor_size / 2, scaled_anchor_size / 2)
@@ -496,9 +589,8 @@ class RectangleROI(BaseROI):
         cx = (self.top_left[1] + self.bottom_right[1]) // 2
         return (cy, cx)
 
-    def get_mask(self, height: int, width: int) -> np.ndarray:
-        """生成矩形的布尔掩码"""
-        mask = np.zeros((height, width), dtype=bool)
+    def get_row_spans(self, height: int, width: int) -> Optional[RowSpans]:
+        """计算矩形的行区间"""
         y1, x1 = self.top_left
         y2, x2 = self.bottom_right
         
@@ -508,10 +600,10 @@ class RectangleROI(BaseROI):
         x1 = max(0, min(int(x1), width - 1))
         x2 = max(0, min(int(x2), width - 1))
         
-        if y1 <= y2 and x1 <= x2:
-            mask[y1:y2+1, x1:x2+1] = True
-        
-        return mask
+        if y1 > y2 or x1 > x2:
+            return None
+        rows = y2 - y1 + 1
+        return y1, np.full(rows, x1, dtype=np.int64), np.full(rows, x2 + 1, dtype=np.int64)
 
     def get_anchor_points(self) -> list[tuple[int, int]]:
         """获取矩形的四个角点作为锚点"""
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式 ROI 存储模块
+
+自动质控等场景一次会生成上万个 ROI。ROITable 以 NumPy 列（形状、切片、几何、
+版本号、选中状态）保存全部 ROI，不为每个 ROI 创建带 ``__dict__`` 的对象；
+需要逐个访问时通过 ``ROIView`` 轻量视图使用与 BaseROI 相同的接口。
+``table_row_spans`` 对整列几何一次性计算行区间，供 analysis 模块向量化统计。
+
+几何列的含义（坐标按整数像素存储）:
+- 圆形 / 椭圆：(中心行, 中心列, 行方向半径, 列方向半径)
+- 矩形：(左上行, 左上列, 右下行, 右下列)
+"""
+
+import uuid
+import weakref
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from medimager.core.roi import (
+    BaseROI, CircleROI, EllipseROI, RectangleROI, ROIShape, RowSpans, _spans_to_local_mask
+)
+
+# 形状编码（shapes 列的取值）
+ELLIPSE, CIRCLE, RECTANGLE = 0, 1, 2
+
+_SHAPE_CODES = {ROIShape.ELLIPSE: ELLIPSE, ROIShape.CIRCLE: CIRCLE, ROIShape.RECTANGLE: RECTANGLE}
+_SHAPES = {code: shape for shape, code in _SHAPE_CODES.items()}
+_SHAPE_CLASSES = {ELLIPSE: EllipseROI, CIRCLE: CircleROI, RECTANGLE: RectangleROI}
+
+
+class ROITable:
+    """
+    以结构化数组（struct of arrays）保存的 ROI 集合.
+
+    行号随删除而变化；每行另有只增不减的序号，视图与 ID 都以序号标识，
+    因此删除其他行后视图仍指向同一个 ROI.
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY) -> None:
+        self._uid = uuid.uuid4().hex[:8]
+        self._size = 0
+        self._next_serial = 0
+        self._shapes = np.zeros(capacity, dtype=np.uint8)
+        self._slices = np.zeros(capacity, dtype=np.int32)
+        self._geometry = np.zeros((capacity, 4), dtype=np.int64)
+        self._versions = np.zeros(capacity, dtype=np.int64)
+        self._serials = np.zeros(capacity, dtype=np.int64)
+        self._selected = np.zeros(capacity, dtype=bool)
+        self._show_stats = np.ones(capacity, dtype=bool)
+        self._views: "weakref.WeakValueDictionary[int, ROIView]" = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator['ROIView']:
+        return iter(self.views())
+
+    # ------------------------------------------------------------------
+    # 列访问（返回只含有效行的视图数组）
+    # ------------------------------------------------------------------
+    @property
+    def shapes(self) -> np.ndarray:
+        return self._shapes[:self._size]
+
+    @property
+    def slices(self) -> np.ndarray:
+        return self._slices[:self._size]
+
+    @property
+    def geometry(self) -> np.ndarray:
+        return self._geometry[:self._size]
+
+    @property
+    def versions(self) -> np.ndarray:
+        return self._versions[:self._size]
+
+    @property
+    def serials(self) -> np.ndarray:
+        return self._serials[:self._size]
+
+    @property
+    def selected(self) -> np.ndarray:
+        return self._selected[:self._size]
+
+    # ------------------------------------------------------------------
+    # 批量添加 / 删除
+    # ------------------------------------------------------------------
+    def _append(self, shape: int, slices, geometry: np.ndarray) -> np.ndarray:
+        count = len(geometry)
+        needed = self._size + count
+        if needed > len(self._shapes):
+            capacity = max(needed, 2 * len(self._shapes))
+            for name in ('_shapes', '_slices', '_geometry', '_versions', '_serials', '_selected'):
+                old = getattr(self, name)
+                new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self._size] = old[:self._size]
+                setattr(self, name, new)
+            show_stats = np.ones(capacity, dtype=bool)
+            show_stats[:self._size] = self._show_stats[:self._size]
+            self._show_stats = show_stats
+        rows = np.arange(self._size, needed)
+        self._shapes[rows] = shape
+        self._slices[rows] = slices
+        self._geometry[rows] = geometry
+        self._versions[rows] = 0
+        self._serials[rows] = np.arange(self._next_serial, self._next_serial + count)
+        self._selected[rows] = False
+        self._show_stats[rows] = True
+        self._size = needed
+        self._next_serial += count
+        return rows
+
+    def add_circles(self, centers, radii, slices) -> np.ndarray:
+        """
+        批量添加圆形ROI
+
+        Args:
+            centers: 圆心 (row, col)，形状 (n, 2)
+            radii: 半径，形状 (n,) 或标量
+            slices: 切片索引，形状 (n,) 或标量
+
+        Returns:
+            新增行的行号
+        """
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), len(centers))
+        geometry = np.column_stack([centers, radii, radii])
+        return self._append(CIRCLE, slices, geometry)
+
+    def add_ellipses(self, centers, radii_x, radii_y, slices) -> np.ndarray:
+        """批量添加椭圆ROI（参数顺序与 EllipseROI 相同），返回新增行的行号"""
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        radii_x = np.broadcast_to(np.asarray(radii_x, dtype=np.int64), len(centers))
+        radii_y = np.broadcast_to(np.asarray(radii_y, dtype=np.int64), len(centers))
+        geometry = np.column_stack([centers, radii_y, radii_x])
+        return self._append(ELLIPSE, slices, geometry)
+
+    def add_rectangles(self, top_lefts, bottom_rights, slices) -> np.ndarray:
+        """批量添加矩形ROI（角点顺序与 RectangleROI 一样自动规范化），返回新增行的行号"""
+        top_lefts = np.asarray(top_lefts, dtype=np.int64).reshape(-1, 2)
+        bottom_rights = np.asarray(bottom_rights, dtype=np.int64).reshape(-1, 2)
+        geometry = np.column_stack([np.minimum(top_lefts, bottom_rights),
+                                    np.maximum(top_lefts, bottom_rights)])
+        return self._append(RECTANGLE, slices, geometry)
+
+    def add_roi(self, roi: BaseROI) -> 'ROIView':
+        """复制一个 ROI 对象到表中，返回其视图"""
+        if roi.shape == ROIShape.RECTANGLE:
+            rows = self.add_rectangles([roi.top_left], [roi.bottom_right], roi.slice_index)
+        elif roi.shape == ROIShape.CIRCLE:
+            rows = self.add_circles([roi.center], roi.radius, roi.slice_index)
+        else:
+            rows = self.add_ellipses([roi.center], roi.radius_x, roi.radius_y, roi.slice_index)
+        return self.view(int(rows[0]))
+
+    @classmethod
+    def from_rois(cls, rois: Iterable[BaseROI]) -> 'ROITable':
+        """由 ROI 对象创建表"""
+        rois = list(rois)
+        table = cls(max(cls.INITIAL_CAPACITY, len(rois)))
+        for roi in rois:
+            table.add_roi(roi)
+        return table
+
+    def remove(self, rows) -> None:
+        """删除指定行（行号或布尔掩码），其余行保持原有顺序"""
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        size = int(keep.sum())
+        for name in ('_shapes', '_slices', '_geometry', '_versions', '_serials', '_selected', '_show_stats'):
+            column = getattr(self, name)
+            column[:size] = column[:self._size][keep]
+        self._size = size
+
+    # ------------------------------------------------------------------
+    # 批量编辑与查询
+    # ------------------------------------------------------------------
+    def move(self, rows, dr: int, dc: int) -> None:
+        """整体平移指定行的 ROI"""
+        rows = np.arange(self._size)[rows]
+        self._geometry[rows, 0] += dr
+        self._geometry[rows, 1] += dc
+        rects = rows[self._shapes[rows] == RECTANGLE]
+        self._geometry[rects, 2] += dr
+        self._geometry[rects, 3] += dc
+        self._touch(rows)
+
+    def rows_on_slice(self, slice_index: int) -> np.ndarray:
+        """指定切片上的行号"""
+        return np.flatnonzero(self.slices == slice_index)
+
+    def find_row(self, serial: int) -> Optional[int]:
+        """序号对应的当前行号（已删除时为 None）"""
+        row = int(np.searchsorted(self.serials, serial))
+        if row < self._size and self._serials[row] == serial:
+            return row
+        return None
+
+    def view(self, row: int) -> 'ROIView':
+        """获取某一行的视图（同一 ROI 存活期间返回同一个视图对象）"""
+        serial = int(self._serials[row])
+        view = self._views.get(serial)
+        if view is None:
+            view = ROIView(self, serial)
+            self._views[serial] = view
+        return view
+
+    def views(self, rows: Optional[Sequence[int]] = None) -> List['ROIView']:
+        """获取多行（默认全部）的视图"""
+        if rows is None:
+            rows = range(self._size)
+        return [self.view(int(row)) for row in rows]
+
+    def _touch(self, rows: np.ndarray) -> None:
+        """递增几何版本号，并通知已被索引的视图"""
+        self._versions[rows] += 1
+        if not self._views:
+            return
+        # 只按变化行的序号查找视图，开销与变化行数成正比，与已创建的视图总数无关
+        for serial in np.unique(self._serials[rows]).tolist():
+            view = self._views.get(serial)
+            if view is not None and view._geometry_observer is not None:
+                view._geometry_observer(view)
+
+
+class ROIView:
+    """
+    ROITable 中一行的轻量视图.
+
+    提供与 BaseROI 相同的属性与方法（绘制、命中测试、缩放等直接复用对应 ROI 类的实现），
+    可以放入 ImageDataModel 或交给 analysis 模块的统计函数.
+    """
+    # __dict__ 只在缩放过程中保存临时的 _resize_* 状态时才会创建
+    __slots__ = ('_table', '_serial', '_geometry_observer', '__weakref__', '__dict__')
+
+    def __init__(self, table: ROITable, serial: int) -> None:
+        self._table = table
+        self._serial = serial
+        self._geometry_observer = None
+
+    @property
+    def _row(self) -> int:
+        row = self._table.find_row(self._serial)
+        if row is None:
+            raise KeyError(f"ROI {self.id} has been removed from its table")
+        return row
+
+    @property
+    def _cls(self):
+        return _SHAPE_CLASSES[int(self._table._shapes[self._row])]
+
+    def _set_geometry(self, columns: slice, values) -> None:
+        row = self._row
+        self._table._geometry[row, columns] = values
+        self._table._touch(np.array([row]))
+
+    # --- BaseROI 属性 ---
+    @property
+    def id(self) -> str:
+        return f"{self._table._uid}-{self._serial}"
+
+    @property
+    def shape(self) -> ROIShape:
+        return _SHAPES[int(self._table._shapes[self._row])]
+
+    @property
+    def geometry_version(self) -> int:
+        return int(self._table._versions[self._row])
+
+    @property
+    def slice_index(self) -> int:
+        return int(self._table._slices[self._row])
+
+    @slice_index.setter
+    def slice_index(self, value: int) -> None:
+        row = self._row
+        self._table._slices[row] = value
+        self._table._touch(np.array([row]))
+
+    @property
+    def selected(self) -> bool:
+        return bool(self._table._selected[self._row])
+
+    @selected.setter
+    def selected(self, value: bool) -> None:
+        self._table._selected[self._row] = value
+
+    @property
+    def show_stats(self) -> bool:
+        return bool(self._table._show_stats[self._row])
+
+    @show_stats.setter
+    def show_stats(self, value: bool) -> None:
+        self._table._show_stats[self._row] = value
+
+    # --- 几何属性 ---
+    @property
+    def center(self) -> Tuple[int, int]:
+        g = self._table._geometry[self._row]
+        if self._cls is RectangleROI:
+            return (int(g[0] + g[2]) // 2, int(g[1] + g[3]) // 2)
+        return int(g[0]), int(g[1])
+
+    @center.setter
+    def center(self, value: Tuple[int, int]) -> None:
+        if self._cls is RectangleROI:
+            raise AttributeError("RectangleROI.center is read-only")
+        self._set_geometry(slice(0, 2), value)
+
+    @property
+    def radius(self) -> int:
+        return int(self._table._geometry[self._row, 2])
+
+    @radius.setter
+    def radius(self, value: int) -> None:
+        self._set_geometry(slice(2, 4), (value, value))
+
+    @property
+    def radius_y(self) -> int:
+        return int(self._table._geometry[self._row, 2])
+
+    @radius_y.setter
+    def radius_y(self, value: int) -> None:
+        self._set_geometry(slice(2, 3), value)
+
+    @property
+    def radius_x(self) -> int:
+        return int(self._table._geometry[self._row, 3])
+
+    @radius_x.setter
+    def radius_x(self, value: int) -> None:
+        self._set_geometry(slice(3, 4), value)
+
+    @property
+    def top_left(self) -> Tuple[int, int]:
+        g = self._table._geometry[self._row]
+        return int(g[0]), int(g[1])
+
+    @top_left.setter
+    def top_left(self, value: Tuple[int, int]) -> None:
+        self._set_geometry(slice(0, 2), value)
+
+    @property
+    def bottom_right(self) -> Tuple[int, int]:
+        g = self._table._geometry[self._row]
+        return int(g[2]), int(g[3])
+
+    @bottom_right.setter
+    def bottom_right(self, value: Tuple[int, int]) -> None:
+        self._set_geometry(slice(2, 4), value)
+
+    @property
+    def width(self) -> int:
+        return RectangleROI.width.fget(self)
+
+    @property
+    def height(self) -> int:
+        return RectangleROI.height.fget(self)
+
+    # --- BaseROI 方法（复用对应形状类的实现） ---
+    def get_row_spans(self, height: int, width: int) -> Optional[RowSpans]:
+        return self._cls.get_row_spans(self, height, width)
+
+    def get_local_mask(self, height: int, width: int):
+        return _spans_to_local_mask(self.get_row_spans(height, width))
+
+    def get_mask(self, height: int, width: int) -> np.ndarray:
+        return BaseROI.get_mask(self, height, width)
+
+    def get_anchor_points(self) -> list:
+        return self._cls.get_anchor_points(self)
+
+    def hit_test(self, pos: Tuple[int, int], tol: int = 5) -> str:
+        return self._cls.hit_test(self, pos, tol)
+
+    def move(self, dr: int, dc: int) -> None:
+        self._table.move(np.array([self._row]), dr, dc)
+
+    def start_resize(self, anchor_idx: int) -> None:
+        self._cls.start_resize(self, anchor_idx)
+
+    def resize(self, anchor_idx: int, new_pos: Tuple[int, int]) -> None:
+        self._cls.resize(self, anchor_idx, new_pos)
+
+    def end_resize(self) -> None:
+        self._cls.end_resize(self)
+
+    def draw(self, painter, view_transform) -> None:
+        self._cls.draw(self, painter, view_transform)
+
+    def _get_draw_style(self):
+        return BaseROI._get_draw_style(self)
+
+    def to_roi(self) -> BaseROI:
+        """转换为独立的 ROI 对象"""
+        if self._cls is RectangleROI:
+            roi = RectangleROI(self.top_left, self.bottom_right, self.slice_index)
+        elif self._cls is CircleROI:
+            roi = CircleROI(self.center, self.radius, self.slice_index)
+        else:
+            roi = EllipseROI(self.center, self.radius_x, self.radius_y, self.slice_index)
+        roi.selected = self.selected
+        roi.show_stats = self.show_stats
+        return roi
+
+
+def table_row_spans(shapes: np.ndarray, geometry: np.ndarray,
+                    height: int, width: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    一次计算多行 ROI 的行区间，结果与逐个调用 get_row_spans 完全一致.
+
+    Args:
+        shapes: 形状编码列
+        geometry: 几何列，形状 (n, 4)
+        height: 图像高度
+        width: 图像宽度
+
+    Returns:
+        (owners, rows, starts, stops)：每个区间所属的 ROI（按升序排列）、
+        所在行、起始列与终止列（左闭右开）
+    """
+    g = np.asarray(geometry, dtype=np.int64)
+    a, b, c, d = g[:, 0], g[:, 1], g[:, 2], g[:, 3]
+    rect = shapes == RECTANGLE
+    circle = shapes == CIRCLE
+    ry, rx = np.abs(c), np.abs(d)
+
+    # 行范围：圆/椭圆为外接矩形与图像的交集，矩形沿用 RectangleROI 把角点夹到图像内的行为
+    y0 = np.where(rect, np.clip(a, 0, height - 1), np.maximum(0, a - ry))
+    y1 = np.where(rect, np.clip(c, 0, height - 1), np.minimum(height - 1, a + ry))
+    x0 = np.clip(b, 0, width - 1)
+    x1 = np.clip(d, 0, width - 1)
+    valid = y0 <= y1
+    valid &= ~rect | (x0 <= x1)
+    valid &= rect | circle | ((ry > 0) & (rx > 0))
+
+    counts = np.where(valid, y1 - y0 + 1, 0)
+    total = int(counts.sum())
+    owners = np.repeat(np.arange(len(g)), counts)
+    rows = np.repeat(y0 - (np.cumsum(counts) - counts), counts) + np.arange(total)
+
+    starts = np.empty(total, dtype=np.int64)
+    stops = np.empty(total, dtype=np.int64)
+
+    is_rect = rect[owners]
+    starts[is_rect] = x0[owners[is_rect]]
+    stops[is_rect] = x1[owners[is_rect]] + 1
+
+    # 圆形：与 _circle_row_spans 相同的精确整数开方
+    is_circle = circle[owners]
+    own = owners[is_circle]
+    remaining = ry[own] ** 2 - (rows[is_circle] - a[own]) ** 2
+    half = np.floor(np.sqrt(remaining)).astype(np.int64)
+    half += (half + 1) ** 2 <= remaining
+    half -= half ** 2 > remaining
+    starts[is_circle] = np.minimum(np.maximum(b[own] - half, 0), width)
+    stops[is_circle] = np.maximum(np.minimum(b[own] + half + 1, width), starts[is_circle])
+
+    # 椭圆：与 _ellipse_row_spans 相同的边界修正
+    is_ellipse = ~(is_rect | is_circle)
+    own = owners[is_ellipse]
+    row_term = ((rows[is_ellipse] - a[own]) / ry[own]) ** 2
+    rx_own = rx[own]
+    half = np.floor(rx_own * np.sqrt(np.maximum(0.0, 1.0 - row_term))).astype(np.int64)
+    half += ((half + 1) / rx_own) ** 2 + row_term <= 1
+    half -= (half / rx_own) ** 2 + row_term > 1
+    starts[is_ellipse] = np.minimum(np.maximum(b[own] - half, 0), width)
+    stops[is_ellipse] = np.maximum(np.minimum(b[own] + half + 1, width), starts[is_ellipse])
+
+    return owners, rows, starts, stops
@@ -5,6 +5,7 @@
 缩放/平移同步、交叉参考线同步等高级功能。
 """
 
+from contextlib import nullcontext
 from typing import Dict, List, Optional, Set, Tuple
 from enum import Enum, Flag
 from dataclasses import dataclass
@@ -175,6 +176,12 @@ class SyncManager(QObject):
         self._viewer_grid = viewer_grid
         logger.debug("[SyncManager.set_viewer_grid] 视图网格引用已设置")
 
+    def _batch_render(self, view_ids: Set[str]):
+        """获取批量渲染上下文，未设置视图网格时退化为逐个渲染"""
+        if self._viewer_grid is not None and hasattr(self._viewer_grid, 'batch_render'):
+            return self._viewer_grid.batch_render(view_ids)
+        return nullcontext()
+
     def _get_image_viewer(self, view_id: str):
         """获取指定视图的 ImageViewer 实例"""
         if self._viewer_grid:
@@ -263,26 +270,50 @@ class SyncManager(QObject):
             # 获取目标视图
             target_views = self._get_sync_targets(source_view_id)
             
-            for target_view_id in target_views:
-                # 更新视图状态
-                if target_view_id not in self._view_states:
-                    self._view_states[target_view_id] = ViewSyncState(target_view_id)
-                
-                self._view_states[target_view_id].window_width = window_width
-                self._view_states[target_view_id].window_level = window_level
-                
-                # 应用到图像模型
-                self._apply_window_level_to_view(target_view_id, window_width, window_level)
-                
-                logger.debug(f"[SyncManager.sync_window_level] 窗宽窗位同步完成: "
-                           f"{source_view_id} -> {target_view_id}")
-                self.view_synced.emit(source_view_id, target_view_id)
+            # 所有目标视图的重绘合并为一次并行批量渲染
+            with self._batch_render(target_views):
+                for target_view_id in target_views:
+                    # 更新视图状态
+                    if target_view_id not in self._view_states:
+                        self._view_states[target_view_id] = ViewSyncState(target_view_id)
+                    
+                    self._view_states[target_view_id].window_width = window_width
+                    self._view_states[target_view_id].window_level = window_level
+                    
+                    # 应用到图像模型
+                    self._apply_window_level_to_view(target_view_id, window_width, window_level)
+                    
+                    logger.debug(f"[SyncManager.sync_window_level] 窗宽窗位同步完成: "
+                               f"{source_view_id} -> {target_view_id}")
+                    self.view_synced.emit(source_view_id, target_view_id)
             
         except Exception as e:
             logger.error(f"[SyncManager.sync_window_level] 窗宽窗位同步失败: {e}", exc_info=True)
         finally:
             self._sync_lock = False
     
+    def sync_interactive_preview(self, source_view_id: str, enabled: bool) -> None:
+        """同步交互式降分辨率预览状态（拖动窗宽窗位时使用）
+
+        仅在启用窗宽窗位同步时传播，使同步视图在拖动期间同样渲染降采样预览。
+
+        Args:
+            source_view_id: 源视图ID
+            enabled: 是否启用预览
+        """
+        if SyncMode.WINDOW_LEVEL not in self._sync_mode:
+            return
+
+        try:
+            target_views = self._get_sync_targets(source_view_id)
+            with self._batch_render(target_views):
+                for target_view_id in target_views:
+                    image_model = self._get_view_model(target_view_id)
+                    if image_model:
+                        image_model.set_interactive_preview(enabled)
+        except Exception as e:
+            logger.error(f"[SyncManager.sync_interactive_preview] 同步预览状态失败: {e}", exc_info=True)
+
     def sync_slice(self, source_view_id: str, slice_index: int) -> None:
         """同步切片位置
         
@@ -302,19 +333,21 @@ class SyncManager(QObject):
             # 获取目标视图
             target_views = self._get_sync_targets(source_view_id)
             
-            for target_view_id in target_views:
-                # 更新视图状态
-                if target_view_id not in self._view_states:
-                    self._view_states[target_view_id] = ViewSyncState(target_view_id)
-                
-                self._view_states[target_view_id].slice_index = slice_index
-                
-                # 应用到图像模型
-                self._apply_slice_to_view(target_view_id, slice_index)
-                
-                logger.debug(f"[SyncManager.sync_slice] 切片同步完成: "
-                           f"{source_view_id} -> {target_view_id}")
-                self.view_synced.emit(source_view_id, target_view_id)
+            # 所有目标视图的重绘合并为一次并行批量渲染
+            with self._batch_render(target_views):
+                for target_view_id in target_views:
+                    # 更新视图状态
+                    if target_view_id not in self._view_states:
+                        self._view_states[target_view_id] = ViewSyncState(target_view_id)
+                    
+                    self._view_states[target_view_id].slice_index = slice_index
+                    
+                    # 应用到图像模型
+                    self._apply_slice_to_view(target_view_id, slice_index)
+                    
+                    logger.debug(f"[SyncManager.sync_slice] 切片同步完成: "
+                               f"{source_view_id} -> {target_view_id}")
+                    self.view_synced.emit(source_view_id, target_view_id)
             
         except Exception as e:
             logger.error(f"[SyncManager.sync_slice] 切片同步失败: {e}", exc_info=True)
@@ -587,6 +620,13 @@ class SyncManager(QObject):
             logger.error(f"[SyncManager._get_views_by_criteria] 获取视图失败: {e}", exc_info=True)
             return set()
     
+    def _get_view_model(self, view_id: str) -> Optional[ImageDataModel]:
+        """获取视图绑定的图像模型"""
+        binding = self._series_manager.get_view_binding(view_id)
+        if binding and binding.series_id:
+            return self._series_manager.get_series_model(binding.series_id)
+        return None
+
     def _apply_window_level_to_view(self, view_id: str, window_width: int, window_level: int) -> None:
         """应用窗宽窗位到视图"""
         try:
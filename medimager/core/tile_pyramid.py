@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图像金字塔分块模块
+
+为超大图像（DR、乳腺摄影、拼接图像等）提供多分辨率分块访问：
+- 第 L 层为原图按 2^L 步长采样的视图，不复制数据，构建开销为零
+- 每层按固定像素大小切分为图块，只有可见图块需要窗宽窗位映射和上传
+- 坐标统一使用全分辨率像素坐标，与场景坐标一致
+"""
+
+import math
+from typing import Iterator, Tuple
+
+import numpy as np
+
+
+class TilePyramid:
+    """单张切片的多分辨率分块视图
+
+    Args:
+        data: 二维原始像素数组（不会被复制）
+        tile_size: 每层图块的边长（该层像素）
+    """
+
+    def __init__(self, data: np.ndarray, tile_size: int = 512) -> None:
+        if data.ndim != 2:
+            raise ValueError(f"TilePyramid 只支持二维数据, 实际维度: {data.ndim}")
+        self._data = data
+        self._tile_size = max(16, int(tile_size))
+        self._height, self._width = data.shape
+        # 最高层至少缩小到单个图块
+        longest = max(self._height, self._width)
+        self._level_count = max(1, math.ceil(math.log2(max(1.0, longest / self._tile_size))) + 1)
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile_size
+
+    @property
+    def level_count(self) -> int:
+        return self._level_count
+
+    def level_data(self, level: int) -> np.ndarray:
+        """获取某一层的像素视图（步长采样）"""
+        step = 1 << level
+        return self._data[::step, ::step] if step > 1 else self._data
+
+    def level_for_scale(self, screen_scale: float) -> int:
+        """根据屏幕缩放（每个全分辨率像素对应的屏幕像素数）选择层级
+
+        选择分辨率不低于屏幕所需的最粗层级。
+        """
+        if screen_scale <= 0:
+            return self._level_count - 1
+        level = int(math.floor(math.log2(1.0 / screen_scale))) if screen_scale < 1 else 0
+        return min(max(0, level), self._level_count - 1)
+
+    def tile_span(self, level: int) -> int:
+        """某一层单个图块覆盖的全分辨率像素边长"""
+        return self._tile_size << level
+
+    def tiles_in_rect(self, level: int, x0: float, y0: float,
+                      x1: float, y1: float) -> Iterator[Tuple[int, int]]:
+        """枚举与全分辨率矩形 [x0, x1) x [y0, y1) 相交的图块 (tx, ty)"""
+        span = self.tile_span(level)
+        x0 = max(0.0, x0)
+        y0 = max(0.0, y0)
+        x1 = min(float(self._width), x1)
+        y1 = min(float(self._height), y1)
+        if x1 <= x0 or y1 <= y0:
+            return
+        for ty in range(int(y0 // span), int(math.ceil(y1 / span))):
+            for tx in range(int(x0 // span), int(math.ceil(x1 / span))):
+                yield tx, ty
+
+    def tile_rect(self, level: int, tx: int, ty: int) -> Tuple[int, int, int, int]:
+        """图块在全分辨率坐标下的矩形 (x, y, w, h)，已裁剪到图像范围"""
+        span = self.tile_span(level)
+        x = tx * span
+        y = ty * span
+        return x, y, min(span, self._width - x), min(span, self._height - y)
+
+    def tile_data(self, level: int, tx: int, ty: int) -> np.ndarray:
+        """获取某一图块的原始像素（该层分辨率）"""
+        size = self._tile_size
+        data = self.level_data(level)
+        return data[ty * size:(ty + 1) * size, tx * size:(tx + 1) * size]
+
+    def region_data(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """获取全分辨率区域的原始像素（已裁剪到图像范围）"""
+        x0, y0 = max(0, x), max(0, y)
+        return self._data[y0:max(y0, y + height), x0:max(x0, x + width)]
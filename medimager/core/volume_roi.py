@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+三维（跨切片）ROI 模块
+
+以物理单位（mm）定义跨越多个切片的 ROI：
+- CylinderROI：轴线沿切片方向的圆柱
+- EllipsoidROI：各轴与体素轴对齐的椭球
+
+几何只描述每个切片上的截面（行区间），统计由 analysis 模块逐切片流式计算，
+内存占用与切片数无关。
+"""
+
+import math
+import uuid
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Optional, Tuple
+
+import numpy as np
+
+from medimager.core.roi import RowSpans
+
+# 体素间距：(切片间距, 行间距, 列间距)，单位 mm
+VoxelSpacing = Tuple[float, float, float]
+
+
+class VolumeROIShape(Enum):
+    """三维ROI形状类型"""
+    CYLINDER = "Cylinder"
+    ELLIPSOID = "Ellipsoid"
+
+
+def _float_ellipse_row_spans(center_y: float, center_x: float, radius_y: float, radius_x: float,
+                             height: int, width: int) -> Optional[RowSpans]:
+    """
+    计算中心与半径均可为小数的椭圆截面的行区间（像素中心落在椭圆内即计入）
+
+    Args:
+        center_y: 椭圆中心行坐标（像素）
+        center_x: 椭圆中心列坐标（像素）
+        radius_y: 行方向半径（像素）
+        radius_x: 列方向半径（像素）
+        height: 图像高度
+        width: 图像宽度
+
+    Returns:
+        行区间，截面为空或与图像不相交时返回 None
+    """
+    if radius_y < 0 or radius_x < 0:
+        return None
+    y0 = max(0, math.ceil(center_y - radius_y))
+    y1 = min(height - 1, math.floor(center_y + radius_y))
+    if y0 > y1:
+        return None
+    rows = np.arange(y0, y1 + 1, dtype=np.float64)
+    if radius_y > 0:
+        remaining = np.maximum(0.0, 1.0 - ((rows - center_y) / radius_y) ** 2)
+    else:
+        remaining = np.ones_like(rows)
+    half = radius_x * np.sqrt(remaining)
+    starts = np.ceil(center_x - half).astype(np.int64)
+    stops = np.floor(center_x + half).astype(np.int64) + 1
+    starts = np.minimum(np.maximum(starts, 0), width)
+    stops = np.maximum(np.minimum(stops, width), starts)
+    return y0, starts, stops
+
+
+class VolumeROI(ABC):
+    """
+    三维ROI的抽象基类.
+
+    中心以体素坐标 (slice, row, col) 表示（可为小数），尺寸以 mm 表示，
+    体素间距在计算时由图像提供，因此同一 ROI 在不同间距的序列上保持物理大小.
+
+    Attributes:
+        shape (VolumeROIShape): ROI的形状类型.
+        center (tuple[float, float, float]): 中心体素坐标 (slice, row, col).
+        id (str): 唯一标识符.
+        geometry_version (int): 几何版本号，中心或尺寸变化时递增.
+    """
+    # 修改这些属性会使 geometry_version 递增（统计缓存据此判断失效）
+    _GEOMETRY_ATTRS = frozenset({'center', 'radius_mm', 'height_mm', 'radii_mm'})
+
+    def __init__(self, shape: VolumeROIShape, center: Tuple[float, float, float]):
+        self.geometry_version = 0
+        self.id = str(uuid.uuid4())
+        self.shape = shape
+        self.center = tuple(float(c) for c in center)
+
+    def __setattr__(self, name, value) -> None:
+        if name in self._GEOMETRY_ATTRS:
+            object.__setattr__(self, 'geometry_version', getattr(self, 'geometry_version', 0) + 1)
+        object.__setattr__(self, name, value)
+
+    @abstractmethod
+    def half_extent_mm(self) -> float:
+        """沿切片方向的半长度（mm）"""
+        pass
+
+    @abstractmethod
+    def cross_section_mm(self, dz_mm: float) -> Optional[Tuple[float, float]]:
+        """
+        距中心 dz_mm 处截面的 (行方向半径, 列方向半径)，单位 mm.
+
+        Returns:
+            截面半径，该位置不在ROI内时为None.
+        """
+        pass
+
+    def slice_range(self, spacing: VoxelSpacing, slice_count: int) -> range:
+        """ROI覆盖的切片索引范围（已裁剪到序列内）"""
+        extent = self.half_extent_mm() / spacing[0]
+        first = max(0, math.ceil(self.center[0] - extent))
+        last = min(slice_count - 1, math.floor(self.center[0] + extent))
+        return range(first, last + 1)
+
+    def get_slice_spans(self, slice_index: int, spacing: VoxelSpacing,
+                        height: int, width: int) -> Optional[RowSpans]:
+        """
+        计算ROI在指定切片上截面的行区间.
+
+        Args:
+            slice_index: 切片索引.
+            spacing: 体素间距 (切片, 行, 列)，单位 mm.
+            height: 切片高度.
+            width: 切片宽度.
+
+        Returns:
+            行区间，截面为空时为None.
+        """
+        section = self.cross_section_mm((slice_index - self.center[0]) * spacing[0])
+        if section is None:
+            return None
+        radius_y, radius_x = section
+        return _float_ellipse_row_spans(self.center[1], self.center[2],
+                                        radius_y / spacing[1], radius_x / spacing[2],
+                                        height, width)
+
+    def move(self, dz: float, dr: float, dc: float) -> None:
+        """整体平移（体素坐标）"""
+        cz, cy, cx = self.center
+        self.center = (cz + dz, cy + dr, cx + dc)
+
+
+class CylinderROI(VolumeROI):
+    """轴线沿切片方向的圆柱ROI"""
+
+    def __init__(self, center: Tuple[float, float, float], radius_mm: float, height_mm: float):
+        """
+        初始化圆柱ROI
+
+        Args:
+            center: 中心体素坐标 (slice, row, col)
+            radius_mm: 截面半径（mm）
+            height_mm: 沿切片方向的总长度（mm）
+        """
+        super().__init__(VolumeROIShape.CYLINDER, center)
+        self.radius_mm = float(radius_mm)
+        self.height_mm = float(height_mm)
+
+    def half_extent_mm(self) -> float:
+        return self.height_mm / 2
+
+    def cross_section_mm(self, dz_mm: float) -> Optional[Tuple[float, float]]:
+        if abs(dz_mm) > self.height_mm / 2:
+            return None
+        return self.radius_mm, self.radius_mm
+
+
+class EllipsoidROI(VolumeROI):
+    """各轴与体素轴对齐的椭球ROI"""
+
+    def __init__(self, center: Tuple[float, float, float], radii_mm: Tuple[float, float, float]):
+        """
+        初始化椭球ROI
+
+        Args:
+            center: 中心体素坐标 (slice, row, col)
+            radii_mm: 三个半轴长度 (切片方向, 行方向, 列方向)，单位 mm
+        """
+        super().__init__(VolumeROIShape.ELLIPSOID, center)
+        self.radii_mm = tuple(float(r) for r in radii_mm)
+
+    def half_extent_mm(self) -> float:
+        return self.radii_mm[0]
+
+    def cross_section_mm(self, dz_mm: float) -> Optional[Tuple[float, float]]:
+        radius_z, radius_y, radius_x = self.radii_mm
+        if radius_z <= 0:
+            return None
+        remaining = 1.0 - (dz_mm / radius_z) ** 2
+        if remaining < 0:
+            return None
+        scale = math.sqrt(remaining)
+        return radius_y * scale, radius_x * scale
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+水模自动质控模块
+
+对均匀水模序列（如 tests/scripts/generate_water_phantom.py 生成的水模）自动完成日常 CT 质控：
+
+1. 沿多条射线采样径向剖面，找到每个切片上水模的外边缘，最小二乘拟合圆心与半径；
+2. 按标准布局放置中心 ROI 与 12/3/6/9 点钟方向的 4 个外周 ROI
+   （ROI 直径为水模直径的 10%，外周 ROI 距水模边缘 1 cm）；
+3. 计算水 CT 值（中心 ROI 平均值）、噪声（中心 ROI 标准差）、
+   均匀性（外周与中心平均值之差的最大绝对值）；
+4. 在中心区域取方块做 FFT，估计噪声功率谱（NPS）并做径向平均。
+
+所有步骤都对全部切片整体向量化，不逐切片循环 Python 代码。
+
+命令行用法::
+
+    python -m medimager.core.water_phantom_qa /data/qa/2024-* -o qa.csv --workers 4
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from medimager.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from medimager.core.image_data_model import ImageDataModel
+
+logger = get_logger(__name__)
+
+# 判定水模内部的阈值（高于空气、低于水）
+AIR_THRESHOLD_HU = -500.0
+# 验收标准（ACR CT 体模：水 0±7 HU，外周与中心之差不超过 5 HU）
+WATER_TOLERANCE_HU = 7.0
+UNIFORMITY_TOLERANCE_HU = 5.0
+
+ROI_NAMES = ("center", "top", "right", "bottom", "left")
+# 外周 ROI 相对中心的方向 (row, col)
+_ROI_DIRECTIONS = np.array([(0, 0), (-1, 0), (0, 1), (1, 0), (0, -1)], dtype=np.float64)
+
+# 结果文件的列
+QA_FIELDS = [
+    "series_uid", "series_description", "slice", "center_row", "center_col", "radius_mm",
+    "mean_hu", "noise", "uniformity",
+    "mean_top", "mean_right", "mean_bottom", "mean_left",
+    "nps_peak_frequency", "nps_mean_frequency", "passed", "error"
+]
+
+
+def find_phantom(volume: np.ndarray, threshold: float = AIR_THRESHOLD_HU, rays: int = 90,
+                 chunk_size: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    用径向剖面定位每个切片上的圆形水模.
+
+    先以阈值掩码的质心作为初始中心，沿 ``rays`` 条射线采样，每条射线上第一次离开水模的位置
+    即为边缘点；对边缘点做代数圆拟合，剔除偏离过大的边缘点（如连着检查床）后再拟合一次.
+
+    Args:
+        volume: 图像数据，形状 (slices, rows, cols)，单位 HU.
+        threshold: 水模内部的最低 HU.
+        rays: 射线数.
+        chunk_size: 每批处理的切片数（限制临时数组大小）.
+
+    Returns:
+        (centers, radii)：每个切片的圆心 (row, col) 与半径（像素），未找到水模的切片为 NaN.
+    """
+    slice_count = volume.shape[0]
+    centers = np.full((slice_count, 2), np.nan)
+    radii = np.full(slice_count, np.nan)
+    for start in range(0, slice_count, chunk_size):
+        block = volume[start:start + chunk_size]
+        centers[start:start + len(block)], radii[start:start + len(block)] = \
+            _find_phantom_block(block, threshold, rays)
+    return centers, radii
+
+
+def _find_phantom_block(block: np.ndarray, threshold: float, rays: int) -> Tuple[np.ndarray, np.ndarray]:
+    count, height, width = block.shape
+    inside = block > threshold
+    area = inside.sum(axis=(1, 2), dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        center_row = inside.sum(axis=2, dtype=np.float64) @ np.arange(height) / area
+        center_col = inside.sum(axis=1, dtype=np.float64) @ np.arange(width) / area
+    centers = np.column_stack([center_row, center_col])
+    found = area > 0
+
+    angles = np.linspace(0.0, 2 * np.pi, rays, endpoint=False)
+    directions = np.column_stack([np.sin(angles), np.cos(angles)])  # (rays, 2)
+
+    radii = np.full(count, np.nan)
+    for _ in range(2):
+        if not found.any():
+            break
+        # 射线长度取到最远的图像角点为止，步长 1 像素（边缘位置由阈值穿越插值得到）
+        corners = np.array([(0, 0), (0, width - 1), (height - 1, 0), (height - 1, width - 1)])
+        reach = np.hypot(*(centers[found, np.newaxis, :] - corners).transpose(2, 0, 1)).max()
+        distances = np.arange(0.0, reach + 2.0)
+        edges, valid = _ray_edges(block, centers, found, directions, distances, threshold)
+        # 边缘点 (row, col)
+        points = centers[:, np.newaxis, :] + edges[..., np.newaxis] * directions
+        weights = valid.astype(np.float64)
+        fit_centers, fit_radii = _fit_circles(points, weights)
+        # 剔除离拟合圆过远的边缘点后重新拟合
+        residual = np.abs(np.hypot(points[..., 0] - fit_centers[:, 0:1],
+                                   points[..., 1] - fit_centers[:, 1:2]) - fit_radii[:, np.newaxis])
+        tolerance = np.maximum(2.0, 0.05 * np.nan_to_num(fit_radii))[:, np.newaxis]
+        weights *= residual <= tolerance
+        fit_centers, fit_radii = _fit_circles(points, weights)
+        usable = found & (weights.sum(axis=1) >= max(3, rays // 2)) & np.isfinite(fit_radii)
+        centers = np.where(usable[:, np.newaxis], fit_centers, centers)
+        radii = np.where(usable, fit_radii, np.nan)
+        found = usable
+    centers[~found] = np.nan
+    return centers, radii
+
+
+def _ray_edges(block: np.ndarray, centers: np.ndarray, found: np.ndarray, directions: np.ndarray,
+               distances: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """沿射线按 1 像素步长最近邻采样，返回每条射线的边缘距离（阈值穿越处线性插值）及其有效性"""
+    count, height, width = block.shape
+    origin = np.where(found[:, np.newaxis], centers, 0.0)
+    rows = np.rint(origin[:, 0, None, None] + directions[:, 0, None] * distances).astype(np.int32)
+    cols = np.rint(origin[:, 1, None, None] + directions[:, 1, None] * distances).astype(np.int32)
+    in_image = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    index = np.where(in_image, rows * width + cols, 0)
+    index += (np.arange(count, dtype=np.int32) * (height * width))[:, None, None]
+    profiles = np.take(block, index)
+    profiles[~in_image] = -np.inf
+
+    outside = profiles <= threshold
+    first_out = outside.argmax(axis=2)
+    valid = found[:, np.newaxis] & ~outside[..., 0] & outside.any(axis=2)
+    last_in = np.maximum(first_out - 1, 0)
+    inner = np.take_along_axis(profiles, last_in[..., np.newaxis], axis=2)[..., 0]
+    outer = np.take_along_axis(profiles, first_out[..., np.newaxis], axis=2)[..., 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(np.isfinite(outer) & (inner > outer), (inner - threshold) / (inner - outer), 0.5)
+    edges = distances[last_in] + np.clip(fraction, 0.0, 1.0)
+    return edges, valid
+
+
+def _fit_circles(points: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    批量加权代数圆拟合：最小化 Σw(r² + c² - a·r - b·c - d)².
+
+    Args:
+        points: 边缘点 (n, k, 2)，(row, col).
+        weights: 权重 (n, k)，0 表示忽略该点.
+
+    Returns:
+        (centers, radii)，有效点不足 3 个的切片为 NaN.
+    """
+    points = np.nan_to_num(points)
+    design = np.concatenate([points, np.ones(points.shape[:2] + (1,))], axis=2)
+    target = (points ** 2).sum(axis=2)
+    normal = np.einsum('nk,nki,nkj->nij', weights, design, design)
+    rhs = np.einsum('nk,nki,nk->ni', weights, design, target)
+    enough = weights.astype(bool).sum(axis=1) >= 3
+    normal[~enough] = np.eye(3)
+    with np.errstate(invalid='ignore'):
+        try:
+            solution = np.linalg.solve(normal, rhs[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            solution = np.array([np.linalg.lstsq(m, v, rcond=None)[0] for m, v in zip(normal, rhs)])
+        centers = solution[:, 0:2] / 2
+        radii = np.sqrt(solution[:, 2] + (centers ** 2).sum(axis=1))
+    centers[~enough] = np.nan
+    radii[~enough] = np.nan
+    return centers, radii
+
+
+def qa_roi_layout(centers: np.ndarray, radii: np.ndarray,
+                  pixel_spacing: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算标准质控 ROI 的位置与半径（像素）.
+
+    Args:
+        centers: 每个切片的水模圆心 (n, 2).
+        radii: 每个切片的水模半径 (n,).
+        pixel_spacing: (行间距, 列间距)，mm.
+
+    Returns:
+        (roi_centers, roi_radii)：形状 (n, 5, 2) 与 (n,)，ROI 顺序同 ROI_NAMES.
+    """
+    margin = 10.0 / min(pixel_spacing)  # 外周 ROI 距边缘 1 cm
+    roi_radii = np.maximum(1.0, np.floor(0.1 * radii))
+    offsets = np.maximum(radii - roi_radii - margin, 0.0)
+    roi_centers = centers[:, np.newaxis, :] + offsets[:, np.newaxis, np.newaxis] * _ROI_DIRECTIONS
+    return roi_centers, roi_radii
+
+
+def noise_power_spectrum(patches: np.ndarray,
+                         pixel_spacing: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    由一组均匀区域方块估计噪声功率谱.
+
+    每个方块减去自身平均值后做二维 FFT，NPS(u, v) = Δx·Δy / (Nx·Ny) · ⟨|F(u, v)|²⟩，
+    二维谱在全频域上的积分等于像素方差.
+
+    Args:
+        patches: 方块 (m, N, N)，单位 HU.
+        pixel_spacing: (行间距, 列间距)，mm.
+
+    Returns:
+        (frequencies, nps_1d, nps_2d)：径向频率（mm⁻¹，按 1/(N·Δ) 分档，截止于奈奎斯特频率）、
+        径向平均的 NPS（HU²·mm²）以及未移位的二维 NPS.
+    """
+    patches = np.asarray(patches, dtype=np.float64)
+    _, size_y, size_x = patches.shape
+    row_spacing, col_spacing = pixel_spacing
+    detrended = patches - patches.mean(axis=(1, 2), keepdims=True)
+    spectra = np.abs(np.fft.fft2(detrended)) ** 2
+    nps_2d = spectra.mean(axis=0) * row_spacing * col_spacing / (size_y * size_x)
+
+    freq_y = np.fft.fftfreq(size_y, row_spacing)
+    freq_x = np.fft.fftfreq(size_x, col_spacing)
+    radial = np.hypot(freq_y[:, np.newaxis], freq_x[np.newaxis, :])
+    bin_width = max(1.0 / (size_y * row_spacing), 1.0 / (size_x * col_spacing))
+    bins = np.rint(radial / bin_width).astype(np.int64).ravel()
+    counts = np.bincount(bins)
+    sums = np.bincount(bins, weights=nps_2d.ravel())
+    # 只保留奈奎斯特频率以内的完整环
+    nyquist = 0.5 / max(row_spacing, col_spacing)
+    present = (counts > 0) & (np.arange(len(counts)) * bin_width <= nyquist + 1e-9)
+    frequencies = np.arange(len(counts))[present] * bin_width
+    return frequencies, sums[present] / counts[present], nps_2d
+
+
+def _extract_patches(volume: np.ndarray, slices: np.ndarray, centers: np.ndarray,
+                     size: int) -> np.ndarray:
+    """在每个切片的水模中心取 2×2 个相邻方块，形状 (4·n, size, size)"""
+    corners = np.rint(centers).astype(np.int64)[:, np.newaxis, :] + \
+        np.array([(-size, -size), (-size, 0), (0, -size), (0, 0)])
+    corners = corners.reshape(-1, 2)
+    corners[:, 0] = np.clip(corners[:, 0], 0, volume.shape[1] - size)
+    corners[:, 1] = np.clip(corners[:, 1], 0, volume.shape[2] - size)
+    offsets = np.arange(size)
+    rows = corners[:, 0, None, None] + offsets[:, None]
+    cols = corners[:, 1, None, None] + offsets[None, :]
+    return volume[np.repeat(slices, 4)[:, None, None], rows, cols]
+
+
+@dataclass
+class WaterPhantomQAResult:
+    """
+    水模质控结果.
+
+    逐切片数组按 ``slices`` 对齐；``roi_means``/``roi_stds`` 的列顺序同 ROI_NAMES.
+    未找到水模的切片在各数组中为 NaN.
+    """
+    slices: np.ndarray
+    centers: np.ndarray
+    radii_mm: np.ndarray
+    roi_centers: np.ndarray
+    roi_radius_px: np.ndarray
+    roi_means: np.ndarray
+    roi_stds: np.ndarray
+    nps_frequencies: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    nps: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    @property
+    def mean_hu(self) -> np.ndarray:
+        """每个切片的水 CT 值（中心 ROI 平均值）"""
+        return self.roi_means[:, 0]
+
+    @property
+    def noise(self) -> np.ndarray:
+        """每个切片的噪声（中心 ROI 标准差）"""
+        return self.roi_stds[:, 0]
+
+    @property
+    def uniformity(self) -> np.ndarray:
+        """每个切片外周 ROI 与中心 ROI 平均值之差的最大绝对值"""
+        return np.abs(self.roi_means[:, 1:] - self.roi_means[:, 0:1]).max(axis=1)
+
+    @property
+    def found(self) -> np.ndarray:
+        return np.isfinite(self.roi_means).all(axis=1)
+
+    def nps_peak_frequency(self) -> float:
+        """NPS 峰值所在频率（mm⁻¹）"""
+        if not len(self.nps):
+            return float('nan')
+        return float(self.nps_frequencies[int(np.argmax(self.nps))])
+
+    def nps_mean_frequency(self) -> float:
+        """NPS 的平均频率（按功率加权，mm⁻¹）"""
+        total = float(self.nps.sum()) if len(self.nps) else 0.0
+        if total <= 0:
+            return float('nan')
+        return float((self.nps_frequencies * self.nps).sum() / total)
+
+    def passed(self) -> bool:
+        """所有找到水模的切片是否都满足水 CT 值与均匀性标准"""
+        found = self.found
+        if not found.any():
+            return False
+        return bool((np.abs(self.mean_hu[found]) <= WATER_TOLERANCE_HU).all()
+                    and (self.uniformity[found] <= UNIFORMITY_TOLERANCE_HU).all())
+
+    def summary(self) -> Dict[str, Any]:
+        """序列级汇总：各指标在找到水模的切片上取平均（均匀性取最大）"""
+        found = self.found
+        if not found.any():
+            return {"slices": 0, "passed": False}
+        return {
+            "slices": int(found.sum()),
+            "radius_mm": float(self.radii_mm[found].mean()),
+            "mean_hu": float(self.mean_hu[found].mean()),
+            "noise": float(self.noise[found].mean()),
+            "uniformity": float(self.uniformity[found].max()),
+            "nps_peak_frequency": self.nps_peak_frequency(),
+            "nps_mean_frequency": self.nps_mean_frequency(),
+            "passed": self.passed(),
+        }
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        逐切片结果行，最后附一行 slice 为 "all" 的序列汇总（字段见 QA_FIELDS）.
+
+        未找到水模的切片各指标为 None；所有切片都未找到时汇总行带 error.
+        """
+
+        def number(value) -> Optional[float]:
+            return float(value) if np.isfinite(value) else None
+
+        rows = []
+        uniformity = self.uniformity
+        for i, slice_index in enumerate(self.slices):
+            found = bool(self.found[i])
+            row = {
+                "slice": int(slice_index),
+                "center_row": number(self.centers[i, 0]),
+                "center_col": number(self.centers[i, 1]),
+                "radius_mm": number(self.radii_mm[i]),
+                "mean_hu": number(self.mean_hu[i]),
+                "noise": number(self.noise[i]),
+                "uniformity": number(uniformity[i]),
+                "passed": bool(found and abs(self.mean_hu[i]) <= WATER_TOLERANCE_HU
+                               and uniformity[i] <= UNIFORMITY_TOLERANCE_HU),
+                "error": "",
+            }
+            for j, name in enumerate(ROI_NAMES[1:], start=1):
+                row[f"mean_{name}"] = number(self.roi_means[i, j])
+            rows.append(row)
+        summary = self.summary()
+        rows.append({key: summary.get(key) for key in
+                     ("radius_mm", "mean_hu", "noise", "uniformity",
+                      "nps_peak_frequency", "nps_mean_frequency", "passed")})
+        rows[-1].update(slice="all", error="" if summary["slices"] else "phantom not found")
+        return rows
+
+
+def analyze_water_phantom(model: 'ImageDataModel', slices: Optional[Sequence[int]] = None,
+                          threshold: float = AIR_THRESHOLD_HU,
+                          nps_patch_size: int = 64) -> Optional[WaterPhantomQAResult]:
+    """
+    对模型中的水模序列做自动质控.
+
+    Args:
+        model: 已加载水模序列的图像模型.
+        slices: 要分析的切片，None 为全部切片.
+        threshold: 水模内部的最低 HU.
+        nps_patch_size: NPS 方块边长（像素），水模较小时自动缩小为能放入中心区域的 2 的幂.
+
+    Returns:
+        质控结果，模型没有图像时返回 None.
+    """
+    from medimager.core.analysis import calculate_table_statistics
+    from medimager.core.roi_table import ROITable
+
+    if model is None or model.pixel_array is None:
+        return None
+    volume = model.pixel_array
+    slice_count = volume.shape[0]
+    slices = np.arange(slice_count) if slices is None else np.asarray(slices, dtype=np.int64)
+    slices = slices[(slices >= 0) & (slices < slice_count)]
+    _, row_spacing, col_spacing = model.get_voxel_spacing()
+    pixel_spacing = (row_spacing, col_spacing)
+
+    data = volume if len(slices) == slice_count else volume[slices]
+    centers, radii = find_phantom(data, threshold)
+    found = np.isfinite(radii)
+    roi_centers, roi_radii = qa_roi_layout(centers, radii, pixel_spacing)
+
+    roi_means = np.full((len(slices), len(ROI_NAMES)), np.nan)
+    roi_stds = np.full_like(roi_means, np.nan)
+    if found.any():
+        table = ROITable()
+        placed = np.flatnonzero(found)
+        table.add_circles(np.rint(roi_centers[placed]).reshape(-1, 2),
+                          np.repeat(roi_radii[placed], len(ROI_NAMES)),
+                          np.repeat(slices[placed], len(ROI_NAMES)))
+        stats = calculate_table_statistics(model, table)
+        roi_means[placed] = stats["mean"].reshape(-1, len(ROI_NAMES))
+        roi_stds[placed] = stats["std"].reshape(-1, len(ROI_NAMES))
+
+    result = WaterPhantomQAResult(slices=slices, centers=centers,
+                                  radii_mm=radii * (row_spacing + col_spacing) / 2,
+                                  roi_centers=roi_centers, roi_radius_px=roi_radii,
+                                  roi_means=roi_means, roi_stds=roi_stds)
+
+    # NPS：中心区域 2×2 个方块需完全落在水模内（留出一个外周 ROI 半径的余量）
+    if found.any():
+        smallest = float(np.min(radii[found] - roi_radii[found]))
+        size = nps_patch_size
+        while size >= 8 and size * np.sqrt(2) > smallest:
+            size //= 2
+        if size >= 8:
+            placed = np.flatnonzero(found)
+            patches = _extract_patches(data, placed, centers[placed], size)
+            result.nps_frequencies, result.nps, _ = noise_power_spectrum(patches, pixel_spacing)
+
+    logger.info(f"[analyze_water_phantom] 分析 {len(slices)} 个切片，找到水模 {int(found.sum())} 个")
+    return result
+
+
+def analyze_water_phantom_series(files: List[str]) -> List[Dict[str, Any]]:
+    """
+    加载一个水模序列并返回质控结果行（可在工作进程中调用）.
+
+    加载失败时返回一行带 error 字段的结果.
+    """
+    from medimager.core.image_data_model import ImageDataModel
+
+    model = ImageDataModel(auto_histogram=False)
+    base = {"series_uid": files[0] if files else "", "series_description": ""}
+    try:
+        if not model.load_dicom_series(files) or model.pixel_array is None:
+            return [dict(base, error="failed to load series")]
+        header = model.dicom_header
+        base = {"series_uid": str(header.get("SeriesInstanceUID", "")),
+                "series_description": str(header.get("SeriesDescription", ""))}
+        return [dict(base, **row) for row in analyze_water_phantom(model).rows()]
+    except Exception as e:
+        logger.error(f"[analyze_water_phantom_series] 水模质控失败: {e}", exc_info=True)
+        return [dict(base, error=str(e))]
+    finally:
+        model.clear_all_data()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    from medimager.core.batch_analysis import discover_series, run_series_tasks
+    from medimager.utils.logger import setup_logger
+
+    parser = argparse.ArgumentParser(
+        prog="python -m medimager.core.water_phantom_qa",
+        description="Run automated water-phantom QA on DICOM series and stream the results to CSV/JSON.")
+    parser.add_argument("inputs", nargs="+", help="DICOM files or directories (searched recursively)")
+    parser.add_argument("-o", "--output", default="water_phantom_qa.csv",
+                        help="output file (.csv, .json or .jsonl)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 0: run in-process)")
+    args = parser.parse_args(argv)
+
+    setup_logger(level="WARNING", console_output=True)
+    series = discover_series(args.inputs)
+    if not series:
+        print("No DICOM series found.", file=sys.stderr)
+        return 1
+    summary = run_series_tasks(series, analyze_water_phantom_series, (), args.output,
+                               QA_FIELDS, args.workers)
+    print(f"{summary.series} series ({summary.failed} failed) in {summary.seconds:.1f} s -> {args.output}")
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
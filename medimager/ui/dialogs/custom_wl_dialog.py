@@ -4,19 +4,25 @@
 自定义窗宽窗位设置对话框。
 """
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QFormLayout, QSpinBox, 
-    QDialogButtonBox, QWidget
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QSpinBox, 
+    QDialogButtonBox, QWidget, QPushButton
 )
 from typing import Optional, Tuple
 from PySide6.QtCore import QCoreApplication
 
+from medimager.ui.widgets.wl_histogram import WindowLevelHistogram
+
 class CustomWLDialog(QDialog):
     """
     一个用于手动输入窗宽(Window Width)和窗位(Window Level)的对话框。
+
+    传入图像模型时额外显示灰度直方图，并提供基于直方图的自动窗宽窗位按钮。
     """
-    def __init__(self, current_width: int, current_level: int, parent: Optional[QWidget] = None):
+    def __init__(self, current_width: int, current_level: int, parent: Optional[QWidget] = None,
+                 image_model=None):
         super().__init__(parent)
         self.setWindowTitle(self.tr("自定义窗宽窗位"))
+        self._image_model = image_model
 
         # 创建控件
         self.width_spinbox = QSpinBox()
@@ -38,10 +44,61 @@ class CustomWLDialog(QDialog):
         form_layout.addRow(self.tr("窗位:"), self.level_spinbox)
 
         main_layout = QVBoxLayout()
+        if image_model is not None and image_model.has_image():
+            main_layout.addWidget(self._create_histogram_section())
         main_layout.addLayout(form_layout)
         main_layout.addWidget(self.button_box)
         self.setLayout(main_layout)
 
+    def _create_histogram_section(self) -> QWidget:
+        """创建直方图及自动窗宽窗位按钮"""
+        section = QWidget(self)
+        layout = QVBoxLayout(section)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.histogram_widget = WindowLevelHistogram(section)
+        self.histogram_widget.set_window(self.width_spinbox.value(), self.level_spinbox.value())
+        layout.addWidget(self.histogram_widget)
+        self._refresh_histogram()
+
+        buttons = QHBoxLayout()
+        volume_button = QPushButton(self.tr("自动（序列）"), section)
+        volume_button.clicked.connect(lambda: self._apply_auto_window(None))
+        slice_button = QPushButton(self.tr("自动（当前切片）"), section)
+        slice_button.clicked.connect(
+            lambda: self._apply_auto_window(self._image_model.current_slice_index))
+        buttons.addWidget(volume_button)
+        buttons.addWidget(slice_button)
+        layout.addLayout(buttons)
+
+        self.width_spinbox.valueChanged.connect(self._on_values_changed)
+        self.level_spinbox.valueChanged.connect(self._on_values_changed)
+        self._image_model.histogram_ready.connect(self._refresh_histogram)
+        self.finished.connect(self._disconnect_model)
+        return section
+
+    def _refresh_histogram(self) -> None:
+        """显示整体直方图，后台计算尚未完成时先显示当前切片直方图"""
+        histogram = self._image_model.get_histogram()
+        if histogram is None:
+            histogram = self._image_model.get_slice_histogram()
+        self.histogram_widget.set_histogram(histogram)
+
+    def _disconnect_model(self) -> None:
+        try:
+            self._image_model.histogram_ready.disconnect(self._refresh_histogram)
+        except (RuntimeError, TypeError):
+            pass
+
+    def _on_values_changed(self) -> None:
+        self.histogram_widget.set_window(self.width_spinbox.value(), self.level_spinbox.value())
+
+    def _apply_auto_window(self, slice_index: Optional[int]) -> None:
+        """按直方图百分位填入窗宽窗位"""
+        width, level = self._image_model.auto_window_level(slice_index)
+        self.width_spinbox.setValue(width)
+        self.level_spinbox.setValue(level)
+
     def get_values(self) -> Tuple[int, int]:
         """
         获取对话框中设置的窗宽和窗位值。
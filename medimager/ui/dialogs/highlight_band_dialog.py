@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HU 高亮区间对话框。
+"""
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QDoubleSpinBox, QSpinBox,
+    QComboBox, QCheckBox, QPushButton, QWidget
+)
+from PySide6.QtCore import QCoreApplication
+
+from medimager.core.display_lut import HighlightBand, HIGHLIGHT_PRESETS
+
+
+class HighlightBandDialog(QDialog):
+    """
+    设置在窗宽窗位图像上着色显示的 HU 区间（非模态）。
+
+    修改即时生效：区间只改变显示查找表，拖动上下限的开销与调整窗宽窗位相同。
+    """
+    def __init__(self, image_model, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle(self.tr("HU 高亮"))
+        self._image_model = image_model
+        band = image_model.highlight_band or HighlightBand(*HIGHLIGHT_PRESETS[0][1:])
+        self._color = band.color
+
+        self.enabled_checkbox = QCheckBox(self.tr("显示高亮"), self)
+        self.enabled_checkbox.setChecked(image_model.highlight_band is not None)
+
+        self.preset_combo = QComboBox(self)
+        self.preset_combo.addItem(self.tr("自定义"))
+        for name, lower, upper, _ in HIGHLIGHT_PRESETS:
+            self.preset_combo.addItem(f"{self.tr(name)} ({lower:.0f} ~ {upper:.0f})")
+
+        self.lower_spinbox = QDoubleSpinBox(self)
+        self.upper_spinbox = QDoubleSpinBox(self)
+        for spinbox, value in ((self.lower_spinbox, band.lower), (self.upper_spinbox, band.upper)):
+            spinbox.setRange(-10000, 10000)
+            spinbox.setDecimals(0)
+            spinbox.setValue(value)
+
+        self.opacity_spinbox = QSpinBox(self)
+        self.opacity_spinbox.setRange(0, 100)
+        self.opacity_spinbox.setSuffix(" %")
+        self.opacity_spinbox.setValue(round(band.opacity * 100))
+
+        close_button = QPushButton(self.tr("关闭"), self)
+        close_button.clicked.connect(self.close)
+
+        form_layout = QFormLayout()
+        form_layout.addRow(self.tr("预设:"), self.preset_combo)
+        form_layout.addRow(self.tr("下限 (HU):"), self.lower_spinbox)
+        form_layout.addRow(self.tr("上限 (HU):"), self.upper_spinbox)
+        form_layout.addRow(self.tr("不透明度:"), self.opacity_spinbox)
+        buttons = QHBoxLayout()
+        buttons.addStretch(1)
+        buttons.addWidget(close_button)
+        main_layout = QVBoxLayout(self)
+        main_layout.addWidget(self.enabled_checkbox)
+        main_layout.addLayout(form_layout)
+        main_layout.addLayout(buttons)
+
+        self.preset_combo.currentIndexChanged.connect(self._apply_preset)
+        self.enabled_checkbox.toggled.connect(self._apply)
+        self.lower_spinbox.valueChanged.connect(self._apply)
+        self.upper_spinbox.valueChanged.connect(self._apply)
+        self.opacity_spinbox.valueChanged.connect(self._apply)
+
+    def _apply_preset(self, index: int) -> None:
+        if index <= 0:
+            return
+        _, lower, upper, color = HIGHLIGHT_PRESETS[index - 1]
+        self._color = color
+        for spinbox, value in ((self.lower_spinbox, lower), (self.upper_spinbox, upper)):
+            spinbox.blockSignals(True)
+            spinbox.setValue(value)
+            spinbox.blockSignals(False)
+        self.enabled_checkbox.setChecked(True)
+        self._apply()
+
+    def get_band(self) -> Optional[HighlightBand]:
+        """对话框当前设置的高亮区间，未启用时为 None"""
+        if not self.enabled_checkbox.isChecked():
+            return None
+        lower, upper = sorted((self.lower_spinbox.value(), self.upper_spinbox.value()))
+        return HighlightBand(lower, upper, self._color, self.opacity_spinbox.value() / 100.0)
+
+    def _apply(self) -> None:
+        self._image_model.set_highlight_band(self.get_band())
+
+    def tr(self, text):
+        return QCoreApplication.translate("HighlightBandDialog", text)
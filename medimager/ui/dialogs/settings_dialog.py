@@ -20,6 +20,7 @@ from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QColor, QFont, QPixmap, QIcon
 from typing import Dict, Any, List, Tuple, Optional
 from medimager.utils.settings import SettingsManager
+from medimager.utils.theme_manager import invalidate_theme_cache
 from medimager.utils.i18n import get_translation_manager
 from medimager.utils.logger import get_logger
 
@@ -876,7 +877,8 @@ class SettingsDialog(QDialog):
             with open(theme_file, 'w', encoding='utf-8') as f:
                 toml.dump(theme_data, f)
             
-
+            # 文件 mtime 检查有间隔，立即丢弃该类别的缓存
+            invalidate_theme_cache(category)
             
             # 重新加载主题数据
             self.themes[category][theme_name] = theme_data
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间-强度曲线对话框。
+"""
+import csv
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog, QWidget
+)
+
+from medimager.ui.widgets.time_intensity_plot import TimeIntensityPlot
+from medimager.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TimeIntensityDialog(QDialog):
+    """
+    显示选中 ROI 在所有切片/时相上的平均值与最大值曲线（非模态）。
+
+    曲线跟随模型中当前选中的 ROI；ROI 被移动或调整大小时，
+    曲线由模型的 TimeIntensityCache 增量更新。
+    """
+    def __init__(self, image_model, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle(self.tr("时间-强度曲线"))
+        self._image_model = image_model
+        self._roi_id: Optional[str] = None
+        self._curve = None
+
+        self.plot = TimeIntensityPlot(self)
+        self.info_label = QLabel(self)
+        export_button = QPushButton(self.tr("导出 CSV"), self)
+        export_button.clicked.connect(lambda: self.export_csv())
+        close_button = QPushButton(self.tr("关闭"), self)
+        close_button.clicked.connect(self.close)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.info_label, 1)
+        buttons.addWidget(export_button)
+        buttons.addWidget(close_button)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.plot, 1)
+        layout.addLayout(buttons)
+
+        image_model.data_changed.connect(self.refresh)
+        image_model.slice_changed.connect(self.plot.set_current_index)
+        self.finished.connect(self._disconnect_model)
+        self.refresh()
+
+    def _current_roi(self):
+        """当前选中的 ROI；没有选中时沿用上一次显示的 ROI"""
+        model = self._image_model
+        roi = model.get_active_roi()
+        if roi is None and self._roi_id is not None:
+            roi = model.get_roi_by_id(self._roi_id)
+        return roi
+
+    def refresh(self) -> None:
+        """按当前 ROI 更新曲线（结果来自模型缓存）"""
+        model = self._image_model
+        roi = self._current_roi()
+        self._roi_id = roi.id if roi is not None else None
+        self._curve = model.time_intensity_curves.get(model, roi) if roi is not None else None
+        self.plot.set_curve(self._curve)
+        self.plot.set_current_index(model.current_slice_index)
+        if self._curve is None:
+            self.info_label.setText(self.tr("未选择ROI"))
+        else:
+            self.info_label.setText(self.tr("%1 个切片，每切片 %2 像素")
+                                    .replace("%1", str(len(self._curve["mean"])))
+                                    .replace("%2", str(self._curve["count"])))
+
+    def export_csv(self, path: Optional[str] = None) -> bool:
+        """将曲线导出为 CSV（未给出路径时弹出保存对话框）"""
+        if self._curve is None:
+            return False
+        if path is None:
+            path, _ = QFileDialog.getSaveFileName(self, self.tr("导出时间-强度曲线"), "time_intensity.csv",
+                                                  self.tr("CSV 文件 (*.csv)"))
+            if not path:
+                return False
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["index", "mean", "std", "min", "max"])
+                curve = self._curve
+                for i in range(len(curve["mean"])):
+                    writer.writerow([i] + [f"{float(curve[key][i]):.4f}" for key in ("mean", "std", "min", "max")])
+            logger.info(f"[TimeIntensityDialog.export_csv] 曲线已导出: {path}")
+            return True
+        except OSError as e:
+            logger.error(f"[TimeIntensityDialog.export_csv] 导出失败: {e}", exc_info=True)
+            return False
+
+    def _disconnect_model(self) -> None:
+        try:
+            self._image_model.data_changed.disconnect(self.refresh)
+            self._image_model.slice_changed.disconnect(self.plot.set_current_index)
+        except (RuntimeError, TypeError):
+            pass
@@ -5,21 +5,22 @@
 核心的 2D 图像显示控件，基于 QGraphicsView 实现
 """
 
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 from PySide6.QtWidgets import (
     QGraphicsView, QGraphicsScene, QGraphicsPixmapItem,
     QWidget, QFrame, QApplication
 )
-from PySide6.QtCore import Qt, Signal, QPointF, QRect, QRectF, QPoint, QSizeF
-from PySide6.QtGui import QPixmap, QImage, QPainter, QWheelEvent, QMouseEvent, QCursor, QColor, QPen, QFont, QFontMetrics
+from PySide6.QtCore import Qt, Signal, QPointF, QRect, QRectF, QPoint, QSizeF, QTimer
+from PySide6.QtGui import QPixmap, QImage, QPainter, QPainterPath, QWheelEvent, QMouseEvent, QCursor, QColor, QPen, QFont, QFontMetrics
 import math
 from medimager.utils.logger import get_logger
 from medimager.core.image_data_model import ImageDataModel
 from medimager.ui.tools.base_tool import BaseTool
 from medimager.ui.tools.roi_tool import EllipseROITool
 from medimager.core.roi import CircleROI, EllipseROI, RectangleROI
-from medimager.core.analysis import calculate_roi_statistics
 from medimager.ui.widgets.roi_stats_box import draw_stats_box
+from medimager.ui.widgets.tiled_image_layer import TiledImageLayer, WindowFunction
+from medimager.core.tile_pyramid import TilePyramid
 from ..utils.settings import get_settings_manager
 
 if TYPE_CHECKING:
@@ -27,9 +28,76 @@ if TYPE_CHECKING:
     from medimager.ui.tools.base_tool import BaseTool
 
 from medimager.ui.widgets.magnifier import MagnifierWidget
+from medimager.ui.widgets.line_profile_plot import LineProfilePlot
+from medimager.ui.widgets.contour_layer import (
+    ContourCache, ISO_COLORS, iso_contour_path, label_outline_paths
+)
 from medimager.ui.tools.default_tool import DefaultTool
 
 
+class _StatsBoxPositions(dict):
+    """ROI ID -> 统计信息框矩形；写入或删除时递增 version（标注图层缓存键的一部分）
+
+    矩形应整体替换（如 ``positions[id] = rect.translated(delta)``），原地修改不会被察觉。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.version = 0
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self.version += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+
+class _ImagePixmapItem(QGraphicsPixmapItem):
+    """图像图元：降采样显示时把绘制范围裁剪到真实图像尺寸
+
+    降采样帧按向上取整的尺寸生成，最后一行/列的预览像素放大后会超出图像边界，
+    裁剪矩形（图元坐标）之外的部分不绘制，也不计入包围盒。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._clip_rect: Optional[QRectF] = None
+
+    def set_clip_rect(self, rect: Optional[QRectF]) -> None:
+        if rect != self._clip_rect:
+            self.prepareGeometryChange()
+            self._clip_rect = rect
+
+    def boundingRect(self) -> QRectF:
+        rect = super().boundingRect()
+        if self._clip_rect is not None:
+            rect = rect.intersected(self._clip_rect)
+        return rect
+
+    def shape(self):
+        path = super().shape()
+        if self._clip_rect is not None:
+            clip = QPainterPath()
+            clip.addRect(self._clip_rect)
+            path = path.intersected(clip)
+        return path
+
+    def paint(self, painter: QPainter, option, widget=None) -> None:
+        if self._clip_rect is not None:
+            painter.save()
+            painter.setClipRect(self._clip_rect, Qt.IntersectClip)
+            super().paint(painter, option, widget)
+            painter.restore()
+        else:
+            super().paint(painter, option, widget)
+
+
 class ImageViewer(QGraphicsView):
     """图像查看器控件
     
@@ -64,6 +132,11 @@ class ImageViewer(QGraphicsView):
         # 缓存的QImage，避免每次鼠标移动都调用pixmap.toImage()
         self._cached_qimage: Optional[QImage] = None
 
+        # 当前图元相对全分辨率的缩小倍数（交互式预览时大于 1）
+        self._image_scale = 1
+        # 图像在场景中的全分辨率像素矩形（降采样显示时按真实尺寸裁剪）
+        self._image_rect = QRect()
+
         # 延迟自适应标志：布局切换后在下次 resizeEvent 中执行 fit_to_window
         self._fit_pending = False
         
@@ -72,6 +145,9 @@ class ImageViewer(QGraphicsView):
         
         # 放大镜
         self.magnifier = MagnifierWidget(self)
+
+        # 线剖面曲线（测量工具的剖面模式使用）
+        self.line_profile_plot = LineProfilePlot(self)
         
         # 设置视图属性
         self._setup_view()
@@ -85,7 +161,13 @@ class ImageViewer(QGraphicsView):
         # 状态：用于跟踪悬停的ROI和鼠标位置，以显示统计信息
         self.hovered_roi_index: Optional[int] = None
         self.last_mouse_scene_pos: QPointF = QPointF()
-        self.stats_box_positions: dict[str, QRect] = {} # ROI_id -> QRect for stats box
+        self.stats_box_positions: dict[str, QRect] = _StatsBoxPositions() # ROI_id -> QRect for stats box
+
+        # 绘制时只读取缓存的 ROI 统计；缓存过期时在绘制结束后统一重新计算
+        self._stats_refresh_timer = QTimer(self)
+        self._stats_refresh_timer.setSingleShot(True)
+        self._stats_refresh_timer.setInterval(0)
+        self._stats_refresh_timer.timeout.connect(self._refresh_roi_statistics)
         
         # 测量线状态：用于在工具切换后保持测量线显示
         self.measurement_start_point: Optional[QPointF] = None
@@ -111,6 +193,16 @@ class ImageViewer(QGraphicsView):
 
         # 缓存的测量线主题设置，避免每次绘制都从文件加载
         self._measurement_theme_cache = None
+
+        # 标注图层缓存（见 drawForeground）及正在拖动、需实时绘制的标注
+        self._overlay_pixmap: Optional[QPixmap] = None
+        self._overlay_key: Optional[tuple] = None
+        self._live_annotation_id: Optional[str] = None
+
+        # 轮廓线：标签掩码轮廓与等 HU 轮廓，路径按切片/等值缓存
+        self.show_label_outlines = False
+        self.iso_levels: list[float] = []
+        self._contour_cache = ContourCache()
         
         # 初始化设置管理器
         self._init_settings()
@@ -174,8 +266,9 @@ class ImageViewer(QGraphicsView):
                 if hasattr(self.magnifier, 'update_theme'):
                     self.magnifier.update_theme(theme_name)
 
-            # 使测量线主题缓存失效
+            # 使测量线主题缓存及标注图层失效
             self._measurement_theme_cache = None
+            self._overlay_key = None
             
             self.logger.info(f"[ImageViewer.update_theme] 主题更新完成: {theme_name}")
         except Exception as e:
@@ -215,8 +308,19 @@ class ImageViewer(QGraphicsView):
         """初始化场景"""
         self.scene = QGraphicsScene(self)
         self.setScene(self.scene)
-        self.image_item = QGraphicsPixmapItem()
+        self.image_item = _ImagePixmapItem()
         self.scene.addItem(self.image_item)
+        self._tile_layer: Optional[TiledImageLayer] = None
+        self._ensure_tile_layer()
+
+    def _ensure_tile_layer(self) -> TiledImageLayer:
+        """确保场景中存在分块图层（scene.clear() 会一并删除它）"""
+        if self._tile_layer is None or self._tile_layer.scene() is not self.scene:
+            self._tile_layer = TiledImageLayer()
+            self._tile_layer.setZValue(1)
+            self._tile_layer.setVisible(False)
+            self.scene.addItem(self._tile_layer)
+        return self._tile_layer
 
     def _init_viewer_settings(self) -> None:
         """初始化视图设置"""
@@ -251,6 +355,8 @@ class ImageViewer(QGraphicsView):
     def set_model(self, model: ImageDataModel) -> None:
         """设置数据模型并更新视图"""
         self.model = model
+        # 标注图层缓存键由模型内的版本号组成，换模型后必须重绘
+        self._overlay_key = None
 
     @property
     def view_id(self) -> Optional[str]:
@@ -270,7 +376,8 @@ class ImageViewer(QGraphicsView):
     def sync_manager(self, value) -> None:
         self._sync_manager = value
 
-    def display_qimage(self, q_image: Optional[QImage]) -> None:
+    def display_qimage(self, q_image: Optional[QImage], scale: int = 1,
+                       full_size: Optional[Tuple[int, int]] = None) -> None:
         """显示 QImage
 
         此方法是该控件的核心入口，由外部（如MainWindow）调用，
@@ -278,39 +385,109 @@ class ImageViewer(QGraphicsView):
 
         Args:
             q_image: 要显示的 QImage 对象，如果为 None，则清空视图。
+            scale: 图像相对全分辨率的缩小倍数。交互式预览时传入降采样图像，
+                   图元按该倍数放大，场景坐标始终保持为全分辨率像素坐标。
+            full_size: 变换前的全分辨率图像尺寸 (宽, 高)。降采样帧尺寸向上取整，
+                   放大后可能超出真实图像，给出时图元与场景矩形裁剪到该尺寸。
         """
         if q_image is None or q_image.isNull():
             if self.image_item:
                 self.scene.removeItem(self.image_item)
                 self.image_item = None
             self.scene.clear()
+            self._tile_layer = None
             self._cached_qimage = None
+            self._image_scale = 1
+            self._image_rect = QRect()
             return
 
+        # 分块数据源需由调用方在每次显示后重新设置（见 set_tile_source）
+        if self._tile_layer is not None and self._tile_layer.has_source():
+            self._tile_layer.set_source(None, None, None)
+
+        source_size = (q_image.width(), q_image.height())
         q_image = self._apply_view_transforms(q_image)
         pixmap = QPixmap.fromImage(q_image)
         if self.image_item is None:
-            self.image_item = self.scene.addPixmap(pixmap)
-        else:
-            self.image_item.setPixmap(pixmap)
+            self.image_item = _ImagePixmapItem()
+            self.scene.addItem(self.image_item)
+        self.image_item.setPixmap(pixmap)
+        if scale != self._image_scale:
+            self.image_item.setScale(scale)
+            self._image_scale = scale
+        self._update_image_clip(source_size, scale, full_size)
 
         self._cached_qimage = None  # 使缓存失效，下次鼠标移动时重建
-        self.scene.setSceneRect(pixmap.rect())
+        self.scene.setSceneRect(QRectF(self.get_image_rect()))
+
+    def _update_image_clip(self, source_size: Tuple[int, int], scale: int,
+                           full_size: Optional[Tuple[int, int]]) -> None:
+        """按真实图像尺寸计算图元的裁剪矩形与偏移
+
+        真实图像在变换前占据降采样帧左上角的 (宽/scale, 高/scale) 区域，经与图像相同的
+        翻转/旋转矩阵映射后即为变换后帧中的有效区域；图元偏移使该区域的左上角对齐
+        场景原点，与分块图层的全分辨率坐标一致。
+        """
+        width, height = source_size
+        if full_size is None or scale == 1 or \
+                (full_size[0] >= width * scale and full_size[1] >= height * scale):
+            self.image_item.setOffset(0, 0)
+            self.image_item.set_clip_rect(None)
+            rect = self.image_item.pixmap().rect()
+            self._image_rect = QRect(0, 0, rect.width() * scale, rect.height() * scale)
+            return
+
+        valid = QRectF(0, 0, full_size[0] / scale, full_size[1] / scale)
+        t = self._view_transform()
+        if t is not None:
+            valid = QImage.trueMatrix(t, width, height).mapRect(valid)
+        self.image_item.setOffset(-valid.topLeft())
+        self.image_item.set_clip_rect(QRectF(QPointF(0, 0), valid.size()))
+        self._image_rect = QRect(0, 0, round(valid.width() * scale), round(valid.height() * scale))
+
+    def set_tile_source(self, pyramid: Optional[TilePyramid], window_fn: Optional[WindowFunction],
+                        source_key) -> None:
+        """为当前显示的概览图设置全分辨率图块数据源
+
+        超大图像由 display_qimage 显示降采样概览，放大查看时由分块图层按视口
+        只对可见图块做窗宽窗位映射。必须在 display_qimage 之后调用。
+
+        Args:
+            pyramid: 当前切片的图块金字塔，None 表示关闭分块显示
+            window_fn: 原始像素到显示像素（uint8 灰度或 uint32 ARGB32）的映射函数
+            source_key: 数据源标识（切片、窗宽窗位等），用于图块缓存
+        """
+        layer = self._ensure_tile_layer()
+        layer.set_source(pyramid, window_fn, source_key, self._image_scale)
+        layer.set_view_transforms(self._view_transform(), self._inverted)
+
+    def get_image_rect(self) -> QRect:
+        """获取图像在场景中的全分辨率像素矩形（与预览缩放无关）"""
+        if not self.image_item or self.image_item.pixmap().isNull():
+            return QRect()
+        return QRect(self._image_rect)
+
+    def _view_transform(self):
+        """获取翻转/旋转对应的 QTransform，无变换时返回 None"""
+        from PySide6.QtGui import QTransform as QT
+        if not (self._flip_h or self._flip_v or self._rotation):
+            return None
+        t = QT()
+        if self._flip_h:
+            t.scale(-1, 1)
+        if self._flip_v:
+            t.scale(1, -1)
+        if self._rotation:
+            t.rotate(self._rotation)
+        return t
 
     def _apply_view_transforms(self, q_image: QImage) -> QImage:
         """对 QImage 应用视图变换（翻转/旋转/反色）"""
-        from PySide6.QtGui import QTransform as QT
         if self._inverted:
             q_image = q_image.copy()
             q_image.invertPixels()
-        if self._flip_h or self._flip_v or self._rotation:
-            t = QT()
-            if self._flip_h:
-                t.scale(-1, 1)
-            if self._flip_v:
-                t.scale(1, -1)
-            if self._rotation:
-                t.rotate(self._rotation)
+        t = self._view_transform()
+        if t is not None:
             q_image = q_image.transformed(t)
         return q_image
 
@@ -500,37 +677,41 @@ class ImageViewer(QGraphicsView):
             super().dropEvent(event)
 
     def drawForeground(self, painter: QPainter, rect: QRectF) -> None:
-        """在前景中绘制内容，如ROI、锚点、统计信息和临时形状。"""
+        """在前景中绘制内容，如ROI、锚点、统计信息和临时形状。
+
+        当前切片上静止的标注（ROI、统计信息框、测量线、角度）缓存在与视口等大的
+        标注图层中，只在标注编辑、缩放平移或主题变化后重新绘制；正在拖动的标注
+        不进入缓存而是每帧实时绘制。光标、交叉参考线等变化只需贴一次图层。
+        """
         super().drawForeground(painter, rect)
 
         if not self.model or not self.model.has_image():
             return
 
         painter.setRenderHint(QPainter.Antialiasing, True)
-        current_slice_index = self.model.current_slice_index
 
-        # Draw ROIs
-        if self.model:
-            for roi in self.model.rois:
-                if roi.slice_index != current_slice_index:
-                    continue
-
-                # 1. ROI自己绘制轮廓和锚点
-                roi.draw(painter, self.transform())
-                
-                # 2. 绘制统计信息框 (由Viewer管理位置)
-                if roi.id in self.stats_box_positions and roi.show_stats:
-                    stats = calculate_roi_statistics(self.model, roi)
-                    if stats:
-                        draw_stats_box(painter, stats, self.stats_box_positions[roi.id])
+        # 1. 静止标注：缓存的标注图层
+        live_id = self._live_annotation_id
+        key = self._overlay_cache_key(live_id)
+        if key != self._overlay_key:
+            self._render_overlay(key, live_id)
+        if self._overlay_pixmap is not None:
+            painter.save()
+            painter.resetTransform()
+            painter.drawPixmap(0, 0, self._overlay_pixmap)
+            painter.restore()
+
+        # 2. 缓存的轮廓线路径
+        if self.show_label_outlines or self.iso_levels:
+            self._draw_contours(painter)
+
+        # 3. 正在拖动的标注实时绘制
+        if live_id is not None:
+            self._draw_live_annotation(painter, live_id)
 
         # Draw measurement tool if it is active and has points
         if self.current_tool and hasattr(self.current_tool, 'draw_temporary_shape'):
             self.current_tool.draw_temporary_shape(painter)
-        
-        # --- 始终绘制所有测量线（独立于当前工具）---
-        self._draw_all_measurements(painter)
-        self._draw_all_angle_measurements(painter)
             
         # --- 绘制测量线 (独立于当前工具) ---
         if self.measurement_start_point and self.measurement_end_point:
@@ -542,7 +723,156 @@ class ImageViewer(QGraphicsView):
         # --- 绘制交叉参考线 ---
         if self._cross_reference_enabled and self._cross_reference_pos.x() >= 0 and self._cross_reference_pos.y() >= 0:
             self._draw_cross_reference_lines(painter)
-            
+
+    def set_label_outlines(self, enabled: bool) -> None:
+        """显示/隐藏标签掩码的轮廓线"""
+        self.show_label_outlines = enabled
+        self.viewport().update()
+
+    def set_iso_levels(self, levels) -> None:
+        """设置要显示的等 HU 轮廓线（空列表表示不显示）"""
+        self.iso_levels = [float(level) for level in levels]
+        self.viewport().update()
+
+    def _draw_contours(self, painter: QPainter) -> None:
+        """绘制当前切片的标签轮廓与等 HU 轮廓（路径来自缓存，只在切片或数据变化后重新提取）"""
+        model = self.model
+        slice_index = model.current_slice_index
+        paths = []
+        labels = model.label_volume
+        if self.show_label_outlines and labels is not None and labels.has_labels(slice_index):
+            key = ('labels', id(labels), slice_index, labels.slice_version(slice_index))
+            outlines = self._contour_cache.get(key, lambda: label_outline_paths(labels.get_slice(slice_index)))
+            paths += [(QColor(*labels.palette[label].tolist()), path) for label, path in outlines]
+        slice_data = None
+        for i, level in enumerate(self.iso_levels):
+            key = ('iso', id(model), model.data_version, slice_index, level)
+            if slice_data is None:
+                slice_data = model.get_slice_data(slice_index)
+            path = self._contour_cache.get(key, lambda: iso_contour_path(slice_data, level))
+            paths.append((ISO_COLORS[i % len(ISO_COLORS)], path))
+
+        painter.save()
+        painter.setBrush(Qt.NoBrush)
+        for color, path in paths:
+            pen = QPen(color, 1.5)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.drawPath(path)
+        painter.restore()
+
+    def set_live_annotation(self, annotation_id: Optional[str]) -> None:
+        """设置正在拖动编辑的标注（ROI 或测量线）
+
+        该标注从缓存的标注图层中移出并每帧实时绘制，拖动过程中图层无需重绘。
+        传入 None 表示拖动结束，标注回到图层中。
+        """
+        if annotation_id == self._live_annotation_id:
+            return
+        self._live_annotation_id = annotation_id
+        self.viewport().update()
+
+    def invalidate_overlay(self) -> None:
+        """强制在下一次绘制时重绘标注图层"""
+        self._overlay_key = None
+        self.viewport().update()
+
+    def _overlay_cache_key(self, live_id: Optional[str]) -> tuple:
+        """标注图层的缓存键：视图变换、主题及标注状态的版本号
+
+        标注增删、几何与选中状态变化由模型的标注版本号反映（不计正在拖动的标注），显示的统计数值
+        由统计缓存的 generation 反映，信息框位置由 stats_box_positions.version 反映，
+        计算缓存键与标注数量无关。
+        """
+        from medimager.utils.theme_manager import get_theme_resources
+
+        model = self.model
+        slice_index = model.current_slice_index
+        if not model.has_annotations_on_slice(slice_index):
+            return (id(model), slice_index)
+
+        t = self.viewportTransform()
+        viewport = self.viewport()
+        return (id(model), slice_index, live_id, self._editing_measurement_id(),
+                model.get_annotation_version(live_id), model.roi_statistics.generation_excluding(live_id),
+                self.stats_box_positions.version,
+                (t.m11(), t.m12(), t.m21(), t.m22(), t.dx(), t.dy()),
+                viewport.width(), viewport.height(), viewport.devicePixelRatioF(),
+                get_theme_resources('roi'), get_theme_resources('measurement'))
+
+    def _render_overlay(self, key: tuple, live_id: Optional[str]) -> None:
+        """将当前切片上除拖动标注外的所有标注绘制到标注图层"""
+        self._overlay_key = key
+        if len(key) == 2:
+            # 当前切片没有标注
+            self._overlay_pixmap = None
+            return
+
+        viewport = self.viewport()
+        ratio = viewport.devicePixelRatioF()
+        pixmap = self._overlay_pixmap
+        size = viewport.size() * ratio
+        if pixmap is None or pixmap.size() != size:
+            pixmap = QPixmap(size)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        try:
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            painter.setFont(self.font())
+            painter.setTransform(self.viewportTransform())
+
+            transform = self.transform()
+            slice_index = self.model.current_slice_index
+            for roi in self.model.get_rois_for_slice(slice_index):
+                if roi.id != live_id:
+                    self._draw_roi_annotation(painter, roi, transform)
+
+            self._draw_all_measurements(painter, exclude_id=live_id)
+            self._draw_all_angle_measurements(painter)
+        except Exception as e:
+            self.logger.error(f"[ImageViewer._render_overlay] 绘制标注图层失败: {e}", exc_info=True)
+        finally:
+            painter.end()
+        self._overlay_pixmap = pixmap
+
+    def _draw_live_annotation(self, painter: QPainter, annotation_id: str) -> None:
+        """实时绘制正在拖动的 ROI 或测量线"""
+        model = self.model
+        roi = model.get_roi_by_id(annotation_id)
+        if roi is not None:
+            if roi.slice_index == model.current_slice_index:
+                self._draw_roi_annotation(painter, roi, self.transform())
+            return
+        self._draw_all_measurements(painter, only_id=annotation_id)
+
+    def _draw_roi_annotation(self, painter: QPainter, roi, transform) -> None:
+        """绘制单个 ROI 的轮廓、锚点及统计信息框"""
+        # 1. ROI自己绘制轮廓和锚点
+        roi.draw(painter, transform)
+
+        # 2. 绘制统计信息框 (由Viewer管理位置)
+        if roi.id in self.stats_box_positions and roi.show_stats:
+            # 过期时先显示上一次的数值，重新计算推迟到绘制之外
+            stats, fresh = self.model.roi_statistics.peek(self.model, roi)
+            if not fresh:
+                self._stats_refresh_timer.start()
+            if stats:
+                draw_stats_box(painter, stats, self.stats_box_positions[roi.id])
+
+    def _refresh_roi_statistics(self) -> None:
+        """重新计算当前切片上统计已过期的 ROI，并在有更新时重绘"""
+        model = self.model
+        if not model or not model.has_image():
+            return
+        stale = [roi for roi in model.get_rois_for_slice(model.current_slice_index)
+                 if roi.id in self.stats_box_positions
+                 and not model.roi_statistics.peek(model, roi)[1]]
+        if stale:
+            model.roi_statistics.get_many(model, stale)
+            self.viewport().update()
+
     def _update_pixel_info(self, scene_pos: QPointF) -> None:
         """更新状态栏的像素信息和放大镜"""
         # 首先检查是否有图像
@@ -556,7 +886,7 @@ class ImageViewer(QGraphicsView):
             self.cursor_left_image.emit()
             self.magnifier.hide()
             return
-        image_rect = pixmap.rect()  # 这是实际的图像像素矩形
+        image_rect = self.get_image_rect()  # 这是实际的图像像素矩形（全分辨率）
         # 检查鼠标位置是否在实际图像像素范围内
         if not image_rect.contains(scene_pos.toPoint()):
             self.cursor_left_image.emit()
@@ -565,6 +895,12 @@ class ImageViewer(QGraphicsView):
         
         self.magnifier.show()
         
+        # 分块显示时概览图分辨率不足，放大镜直接取全分辨率区域
+        if self._tile_layer is not None and self._tile_layer.has_source():
+            self._update_tiled_magnifier(scene_pos)
+            self._emit_pixel_value(scene_pos)
+            return
+
         # 更新放大镜 - 使用缓存的QImage避免每次鼠标移动都转换
         if self._cached_qimage is None:
             self._cached_qimage = pixmap.toImage()
@@ -581,10 +917,30 @@ class ImageViewer(QGraphicsView):
         )
         # 确保源矩形在图像范围内
         source_rect = source_rect.intersected(image_rect)
+        if self._image_scale != 1:
+            # 预览图像分辨率较低，按比例映射到预览像素坐标（计入裁剪偏移）
+            s = self._image_scale
+            offset = self.image_item.offset()
+            source_rect = QRect(int(source_rect.x() / s - offset.x()), int(source_rect.y() / s - offset.y()),
+                                max(1, source_rect.width() // s), max(1, source_rect.height() // s))
         # 如果源区域有效则更新放大镜
         if not source_rect.isEmpty() and source_rect.width() > 0 and source_rect.height() > 0:
             self.magnifier.update_magnifier(source_qimage, source_rect)
         
+        self._emit_pixel_value(scene_pos)
+
+    def _update_tiled_magnifier(self, scene_pos: QPointF) -> None:
+        """分块显示模式下更新放大镜"""
+        magnifier_source_size = 8
+        half_size = magnifier_source_size // 2
+        scene_rect = QRectF(int(scene_pos.x() - half_size), int(scene_pos.y() - half_size),
+                            magnifier_source_size, magnifier_source_size)
+        image, source_rect = self._tile_layer.region_image(scene_rect)
+        if image is not None and not image.isNull():
+            self.magnifier.update_magnifier(image, source_rect.toRect())
+
+    def _emit_pixel_value(self, scene_pos: QPointF) -> None:
+        """发出光标处的原始像素值"""
         # 更新像素值
         x = int(scene_pos.x())
         y = int(scene_pos.y())
@@ -606,7 +962,7 @@ class ImageViewer(QGraphicsView):
     def clear_roi_dependent_state(self) -> None:
         """当ROI被清空或加载新图像时，重置与ROI相关的状态"""
         self.hovered_roi_index = None
-        self.stats_box_positions = {}
+        self.stats_box_positions.clear()
         self.viewport().update()
 
     def resizeEvent(self, event) -> None:
@@ -615,6 +971,8 @@ class ImageViewer(QGraphicsView):
         # 将放大镜放在右上角
         magnifier_size = self.magnifier.size()
         self.magnifier.move(self.width() - magnifier_size.width() - 5, 5)
+        # 线剖面曲线放在左下角
+        self.line_profile_plot.move(5, self.height() - self.line_profile_plot.height() - 5)
         # 布局切换后执行一次自适应
         if self._fit_pending:
             self._fit_pending = False
@@ -692,9 +1050,7 @@ class ImageViewer(QGraphicsView):
             self.hide_cross_reference()
 
     def _get_measurement_theme(self) -> dict:
-        """获取测量线主题设置（带缓存）"""
-        if self._measurement_theme_cache is not None:
-            return self._measurement_theme_cache
+        """获取测量线主题设置（进程级主题缓存，主题变化时自动更新）"""
         defaults = {
             'line_color': "#00FF00", 'anchor_color': "#00FF00",
             'text_color': "#FFFFFF", 'background_color': "#00000080",
@@ -703,30 +1059,36 @@ class ImageViewer(QGraphicsView):
         try:
             from medimager.utils.theme_manager import get_theme_settings
             theme_data = get_theme_settings('measurement')
+            if self._measurement_theme_cache is not None and self._measurement_theme_cache[0] is theme_data:
+                return self._measurement_theme_cache[1]
             for k, v in defaults.items():
                 defaults[k] = theme_data.get(k, v)
+            self._measurement_theme_cache = (theme_data, defaults)
         except Exception:
             pass
-        self._measurement_theme_cache = defaults
         return defaults
 
+    def _get_measurement_resources(self):
+        """获取测量线的缓存画笔/颜色/字体"""
+        from medimager.utils.theme_manager import get_theme_resources
+        return get_theme_resources('measurement')
+
     def _draw_measurement_line(self, painter):
         """绘制测量线（独立于工具）"""
         if not self.measurement_start_point or not self.measurement_end_point:
             return
 
         t = self._get_measurement_theme()
+        r = self._get_measurement_resources()
 
         painter.save()
 
         # 1. 绘制线
-        pen = QPen(QColor(t['line_color']), t['line_width'])
-        pen.setCosmetic(True)
-        painter.setPen(pen)
+        painter.setPen(r.pen('line_color', 'line_width', "#00FF00", 2, cosmetic=True))
         painter.drawLine(self.measurement_start_point, self.measurement_end_point)
 
         # 2. 绘制锚点
-        painter.setBrush(QColor(t['anchor_color']))
+        painter.setBrush(r.color('anchor_color', "#00FF00"))
         painter.setPen(Qt.NoPen)
         pixel_size = 1.0 / self.transform().m11()
         scaled_anchor_size = t['anchor_size'] * pixel_size
@@ -735,9 +1097,7 @@ class ImageViewer(QGraphicsView):
 
         # 3. 绘制距离文本
         if self.measurement_distance is not None:
-            font = QFont()
-            font.setPixelSize(t['font_size'])
-            painter.setFont(font)
+            painter.setFont(r.font('font_size', 14, pixel_size=True))
 
             text = f"{self.measurement_distance:.2f} {self.measurement_unit}"
             metrics = painter.fontMetrics()
@@ -746,11 +1106,11 @@ class ImageViewer(QGraphicsView):
             mid_point = (self.measurement_start_point + self.measurement_end_point) / 2
             text_rect.moveCenter(mid_point.toPoint())
 
-            painter.setBrush(QColor(t['background_color']))
+            painter.setBrush(r.color('background_color', "#00000080"))
             painter.setPen(Qt.NoPen)
             painter.drawRoundedRect(text_rect, 5, 5)
 
-            painter.setPen(QColor(t['text_color']))
+            painter.setPen(r.color('text_color', "#FFFFFF"))
             painter.drawText(text_rect, Qt.AlignCenter, text)
 
         painter.restore()
@@ -836,57 +1196,61 @@ class ImageViewer(QGraphicsView):
         if hasattr(self, '_measurement_drag_offset'):
             self._measurement_drag_offset = QPointF(0, 0)
 
-    def _draw_all_measurements(self, painter):
-        """绘制所有测量线，包括选中状态"""
+    def _editing_measurement_id(self) -> Optional[str]:
+        """测量工具正在编辑的测量 ID（只有当前工具是MeasurementTool时才考虑编辑状态）"""
+        if self.current_tool and self.current_tool.__class__.__name__ == 'MeasurementTool':
+            return getattr(self.current_tool, 'editing_measurement_id', None)
+        return None
+
+    def _draw_all_measurements(self, painter, exclude_id: Optional[str] = None,
+                               only_id: Optional[str] = None):
+        """绘制当前切片的测量线，包括选中状态
+
+        Args:
+            exclude_id: 跳过该测量（正在拖动，由实时绘制负责）
+            only_id: 只绘制该测量
+        """
         if not self.model:
             return
 
         t = self._get_measurement_theme()
+        r = self._get_measurement_resources()
+        editing_id = self._editing_measurement_id()
+        selected_indices = self.model.selected_measurement_indices
+        slice_index = self.model.current_slice_index
 
         painter.save()
         
         # 绘制当前切片的所有测量线
-        current_slice_measurements = self.model.get_measurements_for_slice(self.model.current_slice_index)
-        
-        for i, measurement in enumerate(current_slice_measurements):
-            # 找到对应的全局索引
-            global_idx = None
-            for idx, global_measurement in enumerate(self.model.measurements):
-                if global_measurement.id == measurement.id:
-                    global_idx = idx
-                    break
-            
+        for measurement in self.model.get_measurements_for_slice(slice_index):
+            if measurement.id == exclude_id:
+                continue
+            if only_id is not None and measurement.id != only_id:
+                continue
+
             # 确定是否选中 - 选中状态优先于编辑状态
-            is_selected = global_idx is not None and global_idx in self.model.selected_measurement_indices
+            is_selected = self.model.get_measurement_index(measurement.id) in selected_indices
             
-            # 检查是否正在被编辑（拖拽）- 只有当前工具是MeasurementTool时才考虑编辑状态
-            is_being_edited = False
-            is_measurement_tool = (self.current_tool and 
-                                 self.current_tool.__class__.__name__ == 'MeasurementTool')
-            if (is_measurement_tool and 
-                hasattr(self.current_tool, 'editing_measurement_id') and 
-                self.current_tool.editing_measurement_id):
-                is_being_edited = (measurement.id == self.current_tool.editing_measurement_id)
+            # 检查是否正在被编辑（拖拽）
+            is_being_edited = editing_id is not None and measurement.id == editing_id
             
             # 颜色优先级：选中状态(红色) > 编辑状态(黄色) > 默认状态(绿色)
             if is_selected:
-                current_line_color = "#FF0000"  # 红色 - 选中状态
-                current_anchor_color = "#FF0000"
+                line_pen = r.pen('selected_color', 'line_width', "#FF0000", 2, cosmetic=True)  # 红色 - 选中状态
+                anchor_color = r.color('selected_color', "#FF0000")
             elif is_being_edited:
-                current_line_color = "#FFFF00"  # 黄色 - 编辑状态
-                current_anchor_color = "#FFFF00"
+                line_pen = r.pen('editing_color', 'line_width', "#FFFF00", 2, cosmetic=True)  # 黄色 - 编辑状态
+                anchor_color = r.color('editing_color', "#FFFF00")
             else:
-                current_line_color = t['line_color']
-                current_anchor_color = t['anchor_color']
+                line_pen = r.pen('line_color', 'line_width', "#00FF00", 2, cosmetic=True)
+                anchor_color = r.color('anchor_color', "#00FF00")
 
             # 绘制线
-            pen = QPen(QColor(current_line_color), t['line_width'])
-            pen.setCosmetic(True)
-            painter.setPen(pen)
+            painter.setPen(line_pen)
             painter.drawLine(measurement.start_point, measurement.end_point)
 
             # 绘制锚点
-            painter.setBrush(QColor(current_anchor_color))
+            painter.setBrush(anchor_color)
             painter.setPen(Qt.NoPen)
             pixel_size = 1.0 / self.transform().m11()
             scaled_anchor_size = t['anchor_size'] * pixel_size
@@ -895,9 +1259,7 @@ class ImageViewer(QGraphicsView):
             painter.drawEllipse(measurement.end_point, scaled_anchor_size / 2, scaled_anchor_size / 2)
 
             # 绘制距离文本
-            font = QFont()
-            font.setPixelSize(t['font_size'])
-            painter.setFont(font)
+            painter.setFont(r.font('font_size', 14, pixel_size=True))
 
             text = f"{measurement.distance:.2f} {measurement.unit}"
             metrics = painter.fontMetrics()
@@ -906,11 +1268,11 @@ class ImageViewer(QGraphicsView):
             mid_point = (measurement.start_point + measurement.end_point) / 2
             text_rect.moveCenter(mid_point.toPoint())
 
-            painter.setBrush(QColor(t['background_color']))
+            painter.setBrush(r.color('background_color', "#00000080"))
             painter.setPen(Qt.NoPen)
             painter.drawRoundedRect(text_rect, 5, 5)
 
-            painter.setPen(QColor(t['text_color']))
+            painter.setPen(r.color('text_color', "#FFFFFF"))
             painter.drawText(text_rect, Qt.AlignCenter, text)
         
         painter.restore()
@@ -924,6 +1286,7 @@ class ImageViewer(QGraphicsView):
             return
 
         t = self._get_measurement_theme()
+        r = self._get_measurement_resources()
         painter.save()
 
         pixel_size = 1.0 / self.transform().m11()
@@ -931,14 +1294,12 @@ class ImageViewer(QGraphicsView):
 
         for am in angle_measurements:
             # 绘制两条线段
-            pen = QPen(QColor(t['line_color']), t['line_width'])
-            pen.setCosmetic(True)
-            painter.setPen(pen)
+            painter.setPen(r.pen('line_color', 'line_width', "#00FF00", 2, cosmetic=True))
             painter.drawLine(am.point1, am.vertex)
             painter.drawLine(am.vertex, am.point3)
 
             # 绘制锚点
-            painter.setBrush(QColor(t['anchor_color']))
+            painter.setBrush(r.color('anchor_color', "#00FF00"))
             painter.setPen(Qt.NoPen)
             for pt in (am.point1, am.vertex, am.point3):
                 painter.drawEllipse(pt, scaled_anchor / 2, scaled_anchor / 2)
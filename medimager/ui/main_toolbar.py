@@ -121,6 +121,15 @@ def create_main_toolbar(main_window) -> QToolBar:
     roi_menu.addAction(circle_action)
     roi_action_group.addAction(circle_action)
 
+    region_icon_path = get_icon_path("region_grow.svg")
+    region_icon = main_window.theme_manager.create_themed_icon(region_icon_path)
+    region_action = QAction(region_icon, main_window.tr("区域生长"), main_window)
+    region_action.setCheckable(True)
+    region_action.triggered.connect(lambda: _on_roi_tool_selected(main_window, roi_button, region_action, "region_grow"))
+    region_action._icon_path = region_icon_path
+    roi_menu.addAction(region_action)
+    roi_action_group.addAction(region_action)
+
     roi_button.setMenu(roi_menu)
     roi_button.clicked.connect(lambda: main_window._on_tool_selected("ellipse_roi"))
 
@@ -135,6 +144,7 @@ def create_main_toolbar(main_window) -> QToolBar:
     main_window.tool_actions["ellipse_roi"] = ellipse_action
     main_window.tool_actions["rectangle_roi"] = rect_action
     main_window.tool_actions["circle_roi"] = circle_action
+    main_window.tool_actions["region_grow"] = region_action
 
     toolbar.addSeparator()
 
@@ -274,6 +284,10 @@ def create_wl_preset_button(main_window) -> QToolButton:
         )
         wl_menu.addAction(action)
 
+    slice_auto_action = QAction(main_window.tr("自动（当前切片）"), main_window)
+    slice_auto_action.triggered.connect(main_window._auto_window_current_slice)
+    wl_menu.addAction(slice_auto_action)
+
     wl_menu.addSeparator()
     custom_action = QAction(main_window.tr("自定义..."), main_window)
     custom_action.triggered.connect(main_window._open_custom_wl_dialog)
@@ -24,6 +24,10 @@ from medimager.core.multi_series_manager import MultiSeriesManager, SeriesInfo
 from medimager.core.series_view_binding import SeriesViewBindingManager, BindingStrategy
 from medimager.core.image_data_model import ImageDataModel
 from medimager.core.dicom_parser import DicomParser
+from medimager.core.cine_engine import CineEngine
+from medimager.core.clahe import ClaheParams
+from medimager.core.colormaps import COLORMAP_NAMES, DICOM_PALETTE
+from medimager.core.display_filters import DisplayFilter, FILTER_KINDS
 from medimager.ui.multi_viewer_grid import MultiViewerGrid
 from medimager.ui.panels.series_panel import SeriesPanel
 from medimager.ui.panels.dicom_tag_panel import DicomTagPanel
@@ -76,6 +80,7 @@ class MainWindow(QMainWindow):
 
     # 线程安全信号：从工作线程通知主线程序列加载完成
     _series_load_done = Signal(str, object)  # (series_id, future)
+    _phantom_qa_done = Signal(object, object)  # (image_model, future)
 
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         """初始化主窗口"""
@@ -84,6 +89,7 @@ class MainWindow(QMainWindow):
 
         # 连接线程安全的序列加载完成信号
         self._series_load_done.connect(self._on_series_loading_finished)
+        self._phantom_qa_done.connect(self._on_water_phantom_qa_finished)
 
         # 布局切换守卫标志（必须在信号连接之前初始化）
         self._setting_layout = False
@@ -118,11 +124,14 @@ class MainWindow(QMainWindow):
         # 序列加载状态（future 对象由线程池管理）
         self._loading_futures: Dict[str, object] = {}
 
-        # Cine 播放状态
-        self._cine_timer = QTimer(self)
-        self._cine_timer.timeout.connect(self._cine_advance)
+        # Cine 播放引擎（预渲染帧环形缓冲 + 时间校正播放）
+        self._cine_engine = CineEngine(parent=self)
+        self._cine_engine.frame_ready.connect(self._cine_present_frame)
+        self._cine_engine.stats_updated.connect(self._cine_report_stats)
         self._cine_playing = False
         self._cine_fps = 10
+        self._cine_engine.set_fps(self._cine_fps)
+        self._cine_view_ids: List[str] = []
 
         logger.info("[MainWindow.__init__] 主窗口初始化完成")
     
@@ -388,6 +397,54 @@ class MainWindow(QMainWindow):
         self.toggle_info_panel_action.setChecked(False)
         self.toggle_info_panel_action.toggled.connect(self._toggle_info_panel)
         view_menu.addAction(self.toggle_info_panel_action)
+
+        view_menu.addSeparator()
+        self.toggle_label_outlines_action = QAction(self.tr("显示标签轮廓(&O)"), self)
+        self.toggle_label_outlines_action.setCheckable(True)
+        self.toggle_label_outlines_action.setStatusTip(self.tr("以轮廓线显示分割标签的边界"))
+        self.toggle_label_outlines_action.toggled.connect(self._toggle_label_outlines)
+        view_menu.addAction(self.toggle_label_outlines_action)
+
+        iso_contour_action = QAction(self.tr("等HU轮廓线(&C)..."), self)
+        iso_contour_action.setStatusTip(self.tr("在图像上显示指定CT值的等值线"))
+        iso_contour_action.triggered.connect(self._set_iso_contour_levels)
+        view_menu.addAction(iso_contour_action)
+
+        # 伪彩色
+        self.colormap_menu = view_menu.addMenu(self.tr("伪彩色(&P)"))
+        self._colormap_group = QActionGroup(self)
+        colormap_entries = [(None, self.tr("灰度"))] + COLORMAP_NAMES + [(DICOM_PALETTE, self.tr("DICOM 调色板"))]
+        for name, label in colormap_entries:
+            if name == DICOM_PALETTE:
+                self.colormap_menu.addSeparator()
+            action = QAction(label, self)
+            action.setCheckable(True)
+            action.setChecked(name is None)
+            action.setData(name)
+            action.triggered.connect(lambda checked=False, n=name: self._set_colormap(n))
+            self._colormap_group.addAction(action)
+            self.colormap_menu.addAction(action)
+        self.colormap_menu.aboutToShow.connect(self._update_colormap_menu)
+
+        # 显示滤波
+        self.display_filter_menu = view_menu.addMenu(self.tr("显示滤波(&L)"))
+        self._display_filter_group = QActionGroup(self)
+        for kind, label in [(None, "无")] + FILTER_KINDS:
+            action = QAction(self.tr(label), self)
+            action.setCheckable(True)
+            action.setChecked(kind is None)
+            action.setData(kind)
+            action.triggered.connect(lambda checked=False, k=kind: self._set_display_filter(k))
+            self._display_filter_group.addAction(action)
+            self.display_filter_menu.addAction(action)
+        self.display_filter_menu.aboutToShow.connect(self._update_display_filter_menu)
+
+        self.clahe_action = QAction(self.tr("自适应直方图均衡(&E)"), self)
+        self.clahe_action.setCheckable(True)
+        self.clahe_action.setStatusTip(self.tr("对窗宽窗位后的图像做 CLAHE 局部对比度增强（适用于X线平片）"))
+        self.clahe_action.triggered.connect(self._toggle_clahe)
+        view_menu.addAction(self.clahe_action)
+        view_menu.aboutToShow.connect(self._update_clahe_action)
         
         # 序列菜单
         series_menu = menubar.addMenu(self.tr("序列(&S)"))
@@ -445,6 +502,11 @@ class MainWindow(QMainWindow):
                 lambda checked=False, w=width, l=level: self._set_window_level_preset(w, l)
             )
             wl_menu.addAction(action)
+
+        slice_auto_action = QAction(self.tr("自动（当前切片）"), self)
+        slice_auto_action.setStatusTip(self.tr("按当前切片的灰度直方图设置窗宽窗位"))
+        slice_auto_action.triggered.connect(self._auto_window_current_slice)
+        wl_menu.addAction(slice_auto_action)
         
         wl_menu.addSeparator()
         
@@ -452,6 +514,11 @@ class MainWindow(QMainWindow):
         custom_wl_action.setStatusTip(self.tr("手动设置窗宽和窗位"))
         custom_wl_action.triggered.connect(self._open_custom_wl_dialog)
         wl_menu.addAction(custom_wl_action)
+
+        highlight_action = QAction(self.tr("HU 高亮(&H)..."), self)
+        highlight_action.setStatusTip(self.tr("以颜色标出指定 HU 区间内的像素"))
+        highlight_action.triggered.connect(self._open_highlight_band_dialog)
+        wl_menu.addAction(highlight_action)
         
 
         
@@ -464,6 +531,18 @@ class MainWindow(QMainWindow):
         settings_action.setStatusTip(self.tr("打开设置对话框"))
         settings_action.triggered.connect(self._open_settings_dialog)
         tools_menu.addAction(settings_action)
+
+        # 水模质控
+        phantom_qa_action = QAction(self.tr("水模质控(&Q)"), self)
+        phantom_qa_action.setStatusTip(self.tr("自动定位水模并计算水CT值、均匀性、噪声和噪声功率谱"))
+        phantom_qa_action.triggered.connect(self._run_water_phantom_qa)
+        tools_menu.addAction(phantom_qa_action)
+
+        # 时间-强度曲线
+        time_intensity_action = QAction(self.tr("时间-强度曲线(&I)"), self)
+        time_intensity_action.setStatusTip(self.tr("显示选中ROI在所有切片/时相上的平均值与最大值曲线"))
+        time_intensity_action.triggered.connect(self._open_time_intensity_dialog)
+        tools_menu.addAction(time_intensity_action)
         
         # 帮助菜单
         help_menu = menubar.addMenu(self.tr("帮助(&H)"))
@@ -545,6 +624,7 @@ class MainWindow(QMainWindow):
         from medimager.ui.tools.roi_tool import EllipseROITool, RectangleROITool, CircleROITool
         from medimager.ui.tools.measurement_tool import MeasurementTool
         from medimager.ui.tools.angle_tool import AngleTool
+        from medimager.ui.tools.region_grow_tool import RegionGrowTool
 
         tool_map = {
             'default': DefaultTool,
@@ -553,6 +633,7 @@ class MainWindow(QMainWindow):
             'circle_roi': CircleROITool,
             'measurement': MeasurementTool,
             'angle': AngleTool,
+            'region_grow': RegionGrowTool,
         }
         
         tool_class = tool_map.get(tool_name, DefaultTool)
@@ -921,7 +1002,7 @@ class MainWindow(QMainWindow):
             
             # 使用DicomParser解析文件获取序列信息
             temp_parser = DicomParser()
-            series_groups = temp_parser._group_files_by_series(dicom_files)
+            series_groups = temp_parser.group_files_by_series(dicom_files)
             
             # 为每个序列创建SeriesInfo并添加到管理器
             for series_uid, files in series_groups.items():
@@ -1129,6 +1210,15 @@ class MainWindow(QMainWindow):
             
             logger.info(f"[MainWindow._set_window_level_preset] 窗宽窗位设置完成: W:{width} L:{level}")
     
+    def _auto_window_current_slice(self) -> None:
+        """按活动视图当前切片的直方图设置窗宽窗位"""
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            return
+        width, level = image_model.auto_window_level(image_model.current_slice_index)
+        image_model.set_window(width, level)
+        logger.info(f"[MainWindow._auto_window_current_slice] 切片自动窗宽窗位: W:{width} L:{level}")
+
     def _open_custom_wl_dialog(self) -> None:
         """打开自定义窗宽窗位对话框"""
         logger.debug("[MainWindow._open_custom_wl_dialog] 打开自定义窗宽窗位对话框")
@@ -1145,12 +1235,25 @@ class MainWindow(QMainWindow):
                     current_width = image_model.window_width
                     current_level = image_model.window_level
         
-        dialog = CustomWLDialog(current_width, current_level, self)
+        dialog = CustomWLDialog(current_width, current_level, self,
+                                image_model=self._get_active_image_model())
         
         if dialog.exec_() == QDialog.Accepted:
             new_width, new_level = dialog.get_values()
             self._set_window_level_preset(new_width, new_level)
 
+    def _open_highlight_band_dialog(self) -> None:
+        """为活动视图的序列打开 HU 高亮对话框"""
+        from medimager.ui.dialogs.highlight_band_dialog import HighlightBandDialog
+
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            QMessageBox.warning(self, self.tr("警告"), self.tr("当前视图没有图像"))
+            return
+        dialog = HighlightBandDialog(image_model, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
     def _apply_viewer_transform(self, transform_type: str) -> None:
         """对活动视图应用图像变换"""
         active_frame = self.multi_viewer_grid.get_active_view_frame()
@@ -1219,12 +1322,23 @@ class MainWindow(QMainWindow):
             self._cine_start()
 
     def _cine_start(self):
-        """开始 Cine 播放"""
+        """开始 Cine 播放
+
+        播放活动视图；启用切片同步时，同步组内的其他视图一起播放。
+        """
         model = self._get_active_image_model()
         if not model or model.get_slice_count() <= 1:
             return
+        tracks = self._collect_cine_tracks()
+        self._cine_engine.set_tracks(tracks)
+        if not self._cine_engine.start():
+            return
         self._cine_playing = True
-        self._cine_timer.start(int(1000 / self._cine_fps))
+        self._cine_view_ids = self._cine_engine.get_track_ids()
+        for view_id in self._cine_view_ids:
+            view_frame = self.multi_viewer_grid.get_view_frame(view_id)
+            if view_frame:
+                view_frame.set_cine_active(True)
         if hasattr(self, '_cine_play_btn'):
             self._cine_play_btn.blockSignals(True)
             self._cine_play_btn.setChecked(True)
@@ -1238,7 +1352,12 @@ class MainWindow(QMainWindow):
     def _cine_stop(self):
         """停止 Cine 播放"""
         self._cine_playing = False
-        self._cine_timer.stop()
+        self._cine_engine.stop()
+        for view_id in self._cine_view_ids:
+            view_frame = self.multi_viewer_grid.get_view_frame(view_id)
+            if view_frame:
+                view_frame.set_cine_active(False)
+        self._cine_view_ids = []
         if hasattr(self, '_cine_play_btn'):
             self._cine_play_btn.blockSignals(True)
             self._cine_play_btn.setChecked(False)
@@ -1249,20 +1368,47 @@ class MainWindow(QMainWindow):
             self._cine_play_btn.setIcon(self.theme_manager.create_themed_icon(play_icon_path))
             self._cine_play_btn._icon_path = play_icon_path
 
-    def _cine_advance(self):
-        """Cine 播放前进一帧"""
-        model = self._get_active_image_model()
-        if not model:
+    def _collect_cine_tracks(self) -> List[Tuple[str, ImageDataModel]]:
+        """收集参与 Cine 播放的 (view_id, model)，活动视图在前"""
+        from medimager.core.sync_manager import SyncMode
+        active_view_id = self.series_manager.get_active_view_id()
+        view_ids = [active_view_id]
+        if self.sync_manager.is_sync_enabled(SyncMode.SLICE):
+            view_ids.extend(sorted(self.sync_manager.get_sync_targets_for_view(active_view_id)))
+
+        tracks = []
+        for view_id in view_ids:
+            binding = self.series_manager.get_view_binding(view_id)
+            if not binding or not binding.series_id:
+                continue
+            model = self.series_manager.get_series_model(binding.series_id)
+            if model is None:
+                continue
+            tracks.append((view_id, model))
+        return tracks
+
+    def _cine_present_frame(self, view_id: str, slice_index: int, frame) -> None:
+        """显示 CineEngine 提供的预渲染帧"""
+        view_frame = self.multi_viewer_grid.get_view_frame(view_id)
+        if view_frame is None or not view_frame.has_bound_model():
             self._cine_stop()
             return
-        next_idx = (model.current_slice_index + 1) % model.get_slice_count()
-        model.set_current_slice(next_idx)
+        view_frame.present_cine_frame(slice_index, frame)
+
+    def _cine_report_stats(self, stats) -> None:
+        """在状态栏显示 Cine 实际帧率与丢帧数"""
+        self.status_bar.showMessage(
+            self.tr("Cine: %1 / %2 fps, 丢帧 %3")
+            .replace("%1", f"{stats.achieved_fps:.1f}")
+            .replace("%2", f"{stats.target_fps:.0f}")
+            .replace("%3", str(stats.dropped_frames)),
+            2000
+        )
 
     def _cine_set_fps(self, fps: int):
         """设置 Cine 播放帧率"""
         self._cine_fps = max(1, min(60, fps))
-        if self._cine_playing:
-            self._cine_timer.setInterval(int(1000 / self._cine_fps))
+        self._cine_engine.set_fps(self._cine_fps)
 
     def _get_active_image_model(self) -> Optional[ImageDataModel]:
         """获取当前活动视图的图像模型"""
@@ -1274,6 +1420,146 @@ class MainWindow(QMainWindow):
             return None
         return self.series_manager.get_series_model(binding.series_id)
 
+    def _toggle_label_outlines(self, enabled: bool) -> None:
+        """在所有视图中显示/隐藏标签轮廓"""
+        for view_frame in self.multi_viewer_grid.get_all_view_frames().values():
+            if view_frame and view_frame.image_viewer:
+                view_frame.image_viewer.set_label_outlines(enabled)
+
+    def _set_colormap(self, name: Optional[str]) -> None:
+        """为活动视图的序列设置伪彩色调色板"""
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            return
+        if name == DICOM_PALETTE and image_model.get_dicom_palette() is None:
+            QMessageBox.information(self, self.tr("信息"), self.tr("当前序列没有调色板颜色查找表"))
+            self._update_colormap_menu()
+            return
+        image_model.set_colormap(name)
+        logger.info(f"[MainWindow._set_colormap] 伪彩色: {name}")
+
+    def _update_colormap_menu(self) -> None:
+        """按活动视图的序列勾选当前调色板"""
+        image_model = self._get_active_image_model()
+        current = image_model.colormap if image_model else None
+        for action in self._colormap_group.actions():
+            action.setChecked(action.data() == current)
+
+    def _set_display_filter(self, kind: Optional[str]) -> None:
+        """为活动视图的序列设置显示滤波（None 关闭）"""
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            return
+        image_model.set_display_filter(DisplayFilter(kind) if kind else None)
+        logger.info(f"[MainWindow._set_display_filter] 显示滤波: {kind}")
+
+    def _update_display_filter_menu(self) -> None:
+        """按活动视图的序列勾选当前显示滤波"""
+        image_model = self._get_active_image_model()
+        current = image_model.display_filter.kind if image_model and image_model.display_filter else None
+        for action in self._display_filter_group.actions():
+            action.setChecked(action.data() == current)
+
+    def _toggle_clahe(self, enabled: bool) -> None:
+        """为活动视图的序列开启/关闭 CLAHE 显示模式"""
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            self.clahe_action.setChecked(False)
+            return
+        image_model.set_clahe(ClaheParams() if enabled else None)
+        logger.info(f"[MainWindow._toggle_clahe] CLAHE: {enabled}")
+
+    def _update_clahe_action(self) -> None:
+        """按活动视图的序列更新 CLAHE 勾选状态"""
+        image_model = self._get_active_image_model()
+        self.clahe_action.setChecked(bool(image_model and image_model.clahe is not None))
+
+    def _set_iso_contour_levels(self) -> None:
+        """输入等 HU 轮廓线的 CT 值（逗号分隔，留空关闭）并应用到所有视图"""
+        from PySide6.QtWidgets import QInputDialog
+
+        frames = [f for f in self.multi_viewer_grid.get_all_view_frames().values() if f and f.image_viewer]
+        current = ", ".join(f"{level:g}" for level in frames[0].image_viewer.iso_levels) if frames else ""
+        text, ok = QInputDialog.getText(self, self.tr("等HU轮廓线"),
+                                        self.tr("CT值（HU，逗号分隔，留空关闭）:"), text=current)
+        if not ok:
+            return
+        try:
+            levels = [float(part) for part in text.replace("，", ",").split(",") if part.strip()]
+        except ValueError:
+            QMessageBox.warning(self, self.tr("警告"), self.tr("请输入以逗号分隔的数值"))
+            return
+        for view_frame in frames:
+            view_frame.image_viewer.set_iso_levels(levels)
+        logger.info(f"[MainWindow._set_iso_contour_levels] 等HU轮廓线: {levels}")
+
+    def _open_time_intensity_dialog(self) -> None:
+        """为活动视图的序列打开时间-强度曲线对话框"""
+        from medimager.ui.dialogs.time_intensity_dialog import TimeIntensityDialog
+
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            QMessageBox.warning(self, self.tr("警告"), self.tr("当前视图没有图像"))
+            return
+        if image_model.get_active_roi() is None:
+            QMessageBox.information(self, self.tr("信息"), self.tr("请先选择一个ROI"))
+            return
+        dialog = TimeIntensityDialog(image_model, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    def _run_water_phantom_qa(self) -> None:
+        """在线程池中对活动视图的序列运行水模质控"""
+        from medimager.core.water_phantom_qa import analyze_water_phantom
+
+        image_model = self._get_active_image_model()
+        if not image_model or not image_model.has_image():
+            QMessageBox.warning(self, self.tr("警告"), self.tr("当前视图没有图像"))
+            return
+        future = get_performance_manager().get_thread_pool().submit(analyze_water_phantom, image_model)
+        future.add_done_callback(lambda fut: self._phantom_qa_done.emit(image_model, fut))
+        self.status_bar.showMessage(self.tr("正在进行水模质控..."))
+
+    def _on_water_phantom_qa_finished(self, image_model: ImageDataModel, future) -> None:
+        """在当前切片上放置质控ROI并显示结果（在主线程中执行）"""
+        from medimager.core.roi import CircleROI
+        from medimager.core.water_phantom_qa import UNIFORMITY_TOLERANCE_HU, WATER_TOLERANCE_HU
+
+        self.status_bar.clearMessage()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"[MainWindow._on_water_phantom_qa_finished] 水模质控失败: {e}", exc_info=True)
+            QMessageBox.critical(self, self.tr("错误"), self.tr("水模质控失败: %1").replace("%1", str(e)))
+            return
+        summary = result.summary() if result is not None else {"slices": 0}
+        if not summary["slices"]:
+            QMessageBox.warning(self, self.tr("警告"), self.tr("未找到水模"))
+            return
+
+        current = image_model.current_slice_index
+        position = np.flatnonzero(result.slices == current)
+        if position.size and result.found[position[0]]:
+            i = position[0]
+            radius = int(result.roi_radius_px[i])
+            for center in np.rint(result.roi_centers[i]).astype(int):
+                image_model.add_roi(CircleROI((int(center[0]), int(center[1])), radius, current))
+
+        lines = [
+            self.tr("切片数: %1").replace("%1", str(summary["slices"])),
+            self.tr("水模半径: %1 mm").replace("%1", f"{summary['radius_mm']:.1f}"),
+            self.tr("水CT值: %1 HU（容差 ±%2）").replace("%1", f"{summary['mean_hu']:.2f}")
+            .replace("%2", f"{WATER_TOLERANCE_HU:g}"),
+            self.tr("均匀性: %1 HU（容差 %2）").replace("%1", f"{summary['uniformity']:.2f}")
+            .replace("%2", f"{UNIFORMITY_TOLERANCE_HU:g}"),
+            self.tr("噪声: %1 HU").replace("%1", f"{summary['noise']:.2f}"),
+            self.tr("NPS 峰值/平均频率: %1 / %2 mm⁻¹").replace("%1", f"{summary['nps_peak_frequency']:.3f}")
+            .replace("%2", f"{summary['nps_mean_frequency']:.3f}"),
+            self.tr("结论: %1").replace("%1", self.tr("通过") if summary["passed"] else self.tr("未通过")),
+        ]
+        logger.info(f"[MainWindow._on_water_phantom_qa_finished] 水模质控完成: {summary}")
+        QMessageBox.information(self, self.tr("水模质控"), "\n".join(lines))
+
     def _open_settings_dialog(self) -> None:
         """打开设置对话框"""
         logger.debug("[MainWindow._open_settings_dialog] 打开设置对话框")
@@ -1506,6 +1792,9 @@ class MainWindow(QMainWindow):
         logger.debug("[MainWindow.closeEvent] 处理窗口关闭事件")
         
         try:
+            # 停止 Cine 播放
+            self._cine_stop()
+
             # 取消所有正在进行的加载任务
             for future in self._loading_futures.values():
                 future.cancel()
@@ -5,21 +5,45 @@
 每个视图可以独立显示不同的DICOM序列。
 """
 
+from contextlib import contextmanager
+from functools import partial
 from typing import Dict, List, Optional, Tuple, Set, Union
+
+import numpy as np
 from PySide6.QtWidgets import (QWidget, QGridLayout, QFrame, QVBoxLayout, 
                               QHBoxLayout, QLabel, QPushButton, QSplitter,
                               QSizePolicy, QProgressBar, QApplication)
 from PySide6.QtCore import Qt, Signal, QPropertyAnimation, QEasingCurve, QRect, QTimer, QSize
-from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QFont, QPixmap
+from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QFont, QPixmap, QImage
 
 from medimager.ui.image_viewer import ImageViewer
 from medimager.core.multi_series_manager import MultiSeriesManager, ViewPosition, ViewBinding
 from medimager.core.image_data_model import ImageDataModel
 from medimager.utils.logger import get_logger
+from medimager.utils.settings import get_performance_manager
 
 logger = get_logger(__name__)
 
 
+def _gray_array_to_qimage(display_slice: np.ndarray) -> QImage:
+    """将 uint8 灰度数组转换为 QImage（数据被复制，QImage 自持有内存）"""
+    display_slice = np.ascontiguousarray(display_slice)
+    height, width = display_slice.shape
+    q_image = QImage(display_slice.data, width, height, width, QImage.Format_Grayscale8)
+    # 必须复制，防止 numpy 数组被回收导致悬空指针
+    return q_image.copy()
+
+
+def _display_array_to_qimage(display_frame: np.ndarray) -> QImage:
+    """将显示帧转换为 QImage：uint8 为灰度帧，uint32 为叠加了标签的 ARGB32 帧"""
+    if display_frame.dtype != np.uint32:
+        return _gray_array_to_qimage(display_frame)
+    display_frame = np.ascontiguousarray(display_frame)
+    height, width = display_frame.shape
+    q_image = QImage(display_frame.data, width, height, width * 4, QImage.Format_RGB32)
+    return q_image.copy()
+
+
 class ViewFrame(QFrame):
     """单个视图框架
     
@@ -51,6 +75,13 @@ class ViewFrame(QFrame):
         self._is_active = False
         self._series_id: Optional[str] = None
         self._image_model: Optional[ImageDataModel] = None
+
+        # Cine 播放状态：为 True 时图像由 CineEngine 提供
+        self._cine_active = False
+
+        # 批量渲染状态：延迟期间只记录待渲染标志，由 MultiViewerGrid 统一并行渲染
+        self._render_deferred_depth = 0
+        self._render_pending = False
         
         # 启用拖拽接收
         self.setAcceptDrops(True)
@@ -381,34 +412,104 @@ class ViewFrame(QFrame):
     
     def _update_image_display(self) -> None:
         """更新图像显示（使用带缓存的 get_display_slice）"""
+        # Cine 播放期间由 CineEngine 直接提供预渲染帧
+        if self._cine_active:
+            return
+        if self._render_deferred_depth > 0:
+            self._render_pending = True
+            return
         try:
             if self._image_model:
-                model = self._image_model
+                self.apply_display_frame(*self.compute_display_frame())
+        except Exception as e:
+            logger.error(f"[ViewFrame._update_image_display] 更新图像显示失败: {e}", exc_info=True)
 
-                # 使用 get_display_slice（内部带 PerformanceManager 缓存）
-                display_slice = model.get_display_slice()
+    def compute_display_frame(self) -> Tuple[Optional[np.ndarray], int]:
+        """计算当前切片的显示帧（只涉及 numpy，可在工作线程中调用）
 
-                if display_slice is not None:
-                    # 转换为QImage
-                    from PySide6.QtGui import QImage
-                    height, width = display_slice.shape
-                    bytes_per_line = width
+        Returns:
+            (display_array, scale)，未绑定模型时 display_array 为 None
+        """
+        if not self._image_model:
+            return None, 1
+        # 全分辨率时走 PerformanceManager 缓存；交互预览时返回降采样帧及放大倍数
+        model = self._image_model
+        display_slice, scale = model.get_display_slice_for_view()
+        # 有标签的切片经调色板查找表叠加为 ARGB32 帧
+        if display_slice is not None and model.label_volume is not None:
+            display_slice = model.label_volume.blend(display_slice, model.current_slice_index, scale)
+        return display_slice, scale
+
+    def apply_display_frame(self, display_slice: Optional[np.ndarray], scale: int = 1) -> None:
+        """上传显示帧到 ImageViewer（必须在 UI 线程调用）"""
+        if display_slice is not None:
+            model = self._image_model
+            full_size = None
+            if model is not None and scale > 1:
+                shape = model.get_image_shape()
+                if shape is not None:
+                    full_size = (shape[2], shape[1])
+            self._image_viewer.display_qimage(_display_array_to_qimage(display_slice), scale, full_size)
+            if model is not None and scale > 1 and model.use_tiled_display() \
+                    and not model.interactive_preview:
+                # 超大图像：概览之上按视口绘制全分辨率图块
+                # 图块与概览图一样叠加标签
+                self._image_viewer.set_tile_source(model.get_tile_pyramid(),
+                                                   partial(model.apply_display_lut,
+                                                           slice_index=model.current_slice_index),
+                                                   self.render_cache_key())
+            logger.debug(f"[ViewFrame.apply_display_frame] 图像显示更新完成: {self._view_id}")
+        else:
+            # 清空显示
+            self._image_viewer.display_qimage(None)
 
-                    # 创建QImage - 必须保持numpy数组引用，防止GC回收导致悬空指针
-                    image_data = display_slice.copy()
-                    q_image = QImage(image_data.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
+    def begin_deferred_render(self) -> None:
+        """开始延迟渲染：期间的重绘请求只被记录"""
+        self._render_deferred_depth += 1
 
-                    # 显示图像
-                    self._image_viewer.display_qimage(q_image)
+    def end_deferred_render(self) -> bool:
+        """结束延迟渲染
 
-                    logger.debug(f"[ViewFrame._update_image_display] 图像显示更新完成: {self._view_id}")
-                else:
-                    # 清空显示
-                    self._image_viewer.display_qimage(None)
+        Returns:
+            最外层结束且期间有重绘请求时返回 True，调用方负责完成渲染
+        """
+        self._render_deferred_depth = max(0, self._render_deferred_depth - 1)
+        if self._render_deferred_depth == 0 and self._render_pending:
+            self._render_pending = False
+            return not self._cine_active and self._image_model is not None
+        return False
+
+    def render_cache_key(self) -> Optional[tuple]:
+        """显示帧的标识：相同标识的视图可以共享一次渲染结果"""
+        model = self._image_model
+        if model is None:
+            return None
+        labels = model.label_volume
+        return (id(model), model.data_version, model.current_slice_index, model.window_width,
+                model.window_level, model.interactive_preview,
+                model.highlight_band, model.colormap, model.display_filter, model.clahe,
+                labels.render_key(model.current_slice_index) if labels is not None else None)
+    
+    def set_cine_active(self, active: bool) -> None:
+        """进入/退出 Cine 播放模式
+
+        播放期间忽略模型的重绘信号，由 present_cine_frame 显示预渲染帧；
+        退出时按当前切片重新渲染一次。
+        """
+        if self._cine_active == active:
+            return
+        self._cine_active = active
+        if not active:
+            self._update_image_display()
+
+    def present_cine_frame(self, slice_index: int, frame: np.ndarray) -> None:
+        """显示 CineEngine 预渲染的帧并同步模型的当前切片"""
+        if not self._image_model:
+            return
+        self._image_viewer.display_qimage(_display_array_to_qimage(frame))
+        # 更新切片索引以刷新状态栏、ROI 等叠加内容（图像重绘已被跳过）
+        self._image_model.set_current_slice(slice_index)
 
-        except Exception as e:
-            logger.error(f"[ViewFrame._update_image_display] 更新图像显示失败: {e}", exc_info=True)
-    
     def _update_pixel_info(self, x: int, y: int, value: float) -> None:
         """更新像素信息显示"""
         try:
@@ -671,6 +772,59 @@ class MultiViewerGrid(QWidget):
         
         logger.info("[MultiViewerGrid.__init__] 多视图网格初始化完成")
     
+    @contextmanager
+    def batch_render(self, view_ids):
+        """批量渲染上下文
+
+        上下文内对这些视图的重绘请求被合并；退出时各视图的窗宽窗位计算
+        在渲染线程池中并发执行，随后在 UI 线程一次性上传所有 pixmap。
+
+        Args:
+            view_ids: 参与批量渲染的视图ID集合
+        """
+        frames = [self._view_frames[v] for v in view_ids if v in self._view_frames]
+        for frame in frames:
+            frame.begin_deferred_render()
+        try:
+            yield
+        finally:
+            pending = [frame for frame in frames if frame.end_deferred_render()]
+            if pending:
+                self._render_frames_parallel(pending)
+
+    def _render_frames_parallel(self, frames: List[ViewFrame]) -> None:
+        """并发计算多个视图的显示帧，并在 UI 线程中统一上传"""
+        if len(frames) == 1:
+            frames[0]._update_image_display()
+            return
+
+        # 同一模型/切片/窗宽窗位的视图只计算一次
+        groups: Dict[tuple, List[ViewFrame]] = {}
+        for frame in frames:
+            groups.setdefault(frame.render_cache_key(), []).append(frame)
+
+        # 不同组可能共享同一模型，模型的显示缓存由其内部锁保护，各组可安全并发
+        pool = get_performance_manager().get_render_pool()
+        futures = {key: pool.submit(members[0].compute_display_frame)
+                   for key, members in groups.items()}
+
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.error(f"[MultiViewerGrid._render_frames_parallel] 渲染失败: {e}", exc_info=True)
+
+        for key, members in groups.items():
+            for frame in members:
+                if key in results:
+                    frame.apply_display_frame(*results[key])
+                else:
+                    frame._update_image_display()
+
+        logger.debug(f"[MultiViewerGrid._render_frames_parallel] 批量渲染完成: "
+                     f"{len(frames)} 个视图, {len(groups)} 次计算")
+
     def set_sync_manager(self, sync_manager) -> None:
         """设置同步管理器
         
@@ -83,8 +83,7 @@ class AngleTool(BaseTool):
         elif event.key() == Qt.Key_Delete:
             model = self.viewer.model
             if model and model.angle_measurements:
-                model.angle_measurements.pop()
-                model.data_changed.emit()
+                model.remove_angle_measurement(model.angle_measurements[-1].id)
                 self.viewer.viewport().update()
                 event.accept()
 
@@ -38,20 +38,17 @@ def check_measurement_hit(viewer: 'QGraphicsView', pos: QPointF) -> Optional[int
     if not model:
         return None
 
-    current_slice_measurements = model.get_measurements_for_slice(model.current_slice_index)
-    if not current_slice_measurements:
-        return None
-
     transform = viewer.transform()
     scale_factor = transform.m11()
     scene_detection_radius = 10.0 / scale_factor  # 10 屏幕像素
 
-    for measurement in current_slice_measurements:
+    # 只检查包围盒在检测半径内的测量，按添加顺序取第一个命中的
+    candidates = model.find_measurements_at(model.current_slice_index, pos.y(), pos.x(),
+                                            scene_detection_radius)
+    for measurement in reversed(candidates):
         line_distance = point_to_line_distance(pos, measurement.start_point, measurement.end_point)
         if line_distance <= scene_detection_radius:
-            for global_idx, gm in enumerate(model.measurements):
-                if gm.id == measurement.id:
-                    return global_idx
+            return model.get_measurement_index(measurement.id)
 
     return None
 
@@ -92,7 +89,7 @@ class BaseTool(ABC):
         scene_pos = self.viewer.mapToScene(event.pos())
         self._press_is_outside = True
         if self.viewer.image_item and not self.viewer.image_item.pixmap().isNull():
-            image_rect = self.viewer.image_item.pixmap().rect()
+            image_rect = self.viewer.get_image_rect()
             # 修复：将QPointF转换为QPoint以进行正确的包含检查
             if image_rect.contains(scene_pos.toPoint()):
                 self._press_is_outside = False
@@ -120,7 +117,7 @@ class BaseTool(ABC):
         scene_pos = self.viewer.mapToScene(event.pos())
         clamped_pos = scene_pos
         if self.viewer.image_item and not self.viewer.image_item.pixmap().isNull():
-            image_rect = self.viewer.image_item.pixmap().rect()
+            image_rect = self.viewer.get_image_rect()
             clamped_x = max(image_rect.left(), min(scene_pos.x(), image_rect.right()))
             clamped_y = max(image_rect.top(), min(scene_pos.y(), image_rect.bottom()))
             clamped_pos = QPointF(clamped_x, clamped_y)
@@ -136,15 +133,11 @@ class BaseTool(ABC):
         if event.buttons() == Qt.NoButton and model:
             x, y = int(clamped_pos.x()), int(clamped_pos.y())
             currently_hovered = None
-            # 反向遍历，优先检测顶层的ROI
-            for idx in range(len(model.rois) - 1, -1, -1):
-                roi = model.rois[idx]
-                if roi.slice_index != model.current_slice_index:
-                    continue
-                
+            # 候选按从顶层到底层排列，优先检测顶层的ROI
+            for roi in model.find_rois_at(model.current_slice_index, y, x, tolerance=10):
                 # 如果鼠标在ROI内部，则标记为悬停
                 if roi.hit_test((y, x), tol=10) != 'none':
-                    currently_hovered = idx
+                    currently_hovered = model.get_roi_index(roi.id)
                     break 
             
             # 仅在悬停状态改变时才重绘，避免不必要的刷新
@@ -157,7 +150,7 @@ class BaseTool(ABC):
         scene_pos = self.viewer.mapToScene(event.pos())
         clamped_pos = scene_pos
         if self.viewer.image_item and not self.viewer.image_item.pixmap().isNull():
-            image_rect = self.viewer.image_item.pixmap().rect()
+            image_rect = self.viewer.get_image_rect()
             clamped_x = max(image_rect.left(), min(scene_pos.x(), image_rect.right()))
             clamped_y = max(image_rect.top(), min(scene_pos.y(), image_rect.bottom()))
             clamped_pos = QPointF(clamped_x, clamped_y)
@@ -2,7 +2,7 @@ from medimager.ui.tools.base_tool import BaseTool, point_distance, check_measure
 from medimager.utils.logger import get_logger
 from PySide6.QtWidgets import QGraphicsView
 from PySide6.QtGui import QMouseEvent, QWheelEvent, QCursor, QKeyEvent
-from PySide6.QtCore import Qt, QPointF, QPoint
+from PySide6.QtCore import Qt, QPointF, QPoint, QTimer
 from medimager.core.roi import BaseROI
 from enum import Enum, auto
 import math
@@ -32,6 +32,9 @@ class DefaultTool(BaseTool):
     - ROI交互: 支持拖拽ROI锚点、移动ROI、移动信息板
     """
 
+    # 拖动窗宽窗位时指针静止多久（毫秒）后渲染全分辨率帧
+    WL_IDLE_MS = 150
+
     def __init__(self, viewer: QGraphicsView):
         super().__init__(viewer)
         self.logger = get_logger(__name__)
@@ -40,12 +43,22 @@ class DefaultTool(BaseTool):
         self._target_roi_id: str | None = None
         self._target_anchor_idx: int | None = None
 
+        # 拖动窗宽窗位时使用降分辨率预览；指针静止超过该时间后渲染全分辨率
+        self._wl_idle_timer = QTimer()
+        self._wl_idle_timer.setSingleShot(True)
+        self._wl_idle_timer.setInterval(self.WL_IDLE_MS)
+        self._wl_idle_timer.timeout.connect(self._on_window_drag_idle)
+
     def activate(self):
         """激活工具，设置光标样式。"""
         self.viewer.setCursor(Qt.ArrowCursor)
 
     def deactivate(self):
         """停用工具，恢复默认光标。"""
+        if self._drag_mode == DragMode.ADJUST_WINDOW:
+            self._wl_idle_timer.stop()
+            self._set_window_preview(False)
+            self._drag_mode = DragMode.NONE
         self.viewer.setCursor(Qt.ArrowCursor)
 
     def mouse_press_event(self, event: QMouseEvent):
@@ -83,6 +96,7 @@ class DefaultTool(BaseTool):
         # 中键：调整窗口（亮度/对比度）
         if event.button() == Qt.MiddleButton:
             self._drag_mode = DragMode.ADJUST_WINDOW
+            self._set_window_preview(True)
             event.accept()
             return
 
@@ -126,9 +140,9 @@ class DefaultTool(BaseTool):
         model = self.viewer.model
         view = self.viewer
         
-        # 1. 检查是否击中某个已选中ROI的锚点
-        rois_on_slice = [roi for roi in reversed(model.rois) if roi.slice_index == model.current_slice_index]
-        for roi in rois_on_slice:
+        # 1. 检查是否击中某个已选中ROI的锚点（锚点位于包围盒角上，按容差查找候选）
+        slice_index = model.current_slice_index
+        for roi in model.find_rois_at(slice_index, scene_pos.y(), scene_pos.x(), tolerance=10):
             if roi.selected:
                 for i, (ay, ax) in enumerate(roi.get_anchor_points()):
                     # 将锚点坐标转换为场景坐标 QPointF
@@ -141,10 +155,11 @@ class DefaultTool(BaseTool):
                         self._target_roi_id = roi.id
                         self._target_anchor_idx = i
                         roi.start_resize(i) # 通知ROI开始缩放
+                        self._set_live_annotation(roi.id)
                         return True
 
         # 2. 检查是否击中某个信息板
-        for roi in rois_on_slice:
+        for roi in reversed(model.get_rois_for_slice(slice_index)):
             if roi.id in view.stats_box_positions:
                 info_box_rect = view.stats_box_positions[roi.id]
                 if info_box_rect.contains(scene_pos.toPoint()):
@@ -152,15 +167,17 @@ class DefaultTool(BaseTool):
                     self._target_roi_id = roi.id
                     # 选中这个ROI以提供视觉反馈
                     model.select_roi(roi.id, multi=modifiers & Qt.ControlModifier)
+                    self._set_live_annotation(roi.id)
                     return True
 
         # 3. 检查是否击中某个ROI的内部
-        for roi in rois_on_slice:
+        for roi in model.find_rois_at(slice_index, scene_pos.y(), scene_pos.x()):
             hit_type = roi.hit_test((scene_pos.y(), scene_pos.x()))
             if hit_type == 'inside':
                 self._drag_mode = DragMode.ROI_MOVE
                 self._target_roi_id = roi.id
                 model.select_roi(roi.id, multi=modifiers & Qt.ControlModifier)
+                self._set_live_annotation(roi.id)
                 return True
 
         # 4. 如果什么都没点中，则清除选择（除非按住Ctrl）
@@ -199,11 +216,14 @@ class DefaultTool(BaseTool):
         elif self._drag_mode == DragMode.ADJUST_WINDOW:
             # 调整窗口（亮度/对比度）
             if model:
+                # 先恢复预览模式（可能已因指针静止而切回全分辨率）
+                self._set_window_preview(True)
                 ww, wl = model.window_width, model.window_level
                 new_ww = max(1, ww + delta.x())
                 new_wl = wl + delta.y()
                 model.set_window(new_ww, new_wl)
                 self._sync_window_level(model.window_width, model.window_level)
+                self._wl_idle_timer.start()
 
         elif self._drag_mode == DragMode.ZOOM:
             # 放大/缩小图像
@@ -232,12 +252,14 @@ class DefaultTool(BaseTool):
                 roi.move(scene_delta.y(), scene_delta.x())
                  # 如果信息板也关联，一起移动
                 if roi.id in view.stats_box_positions:
-                    view.stats_box_positions[roi.id].translate(scene_delta.toPoint())
+                    box = view.stats_box_positions[roi.id]
+                    view.stats_box_positions[roi.id] = box.translated(scene_delta.toPoint())
                 view.scene.update()
         
         elif self._drag_mode == DragMode.INFO_BOX_MOVE and self._target_roi_id:
             if self._target_roi_id in view.stats_box_positions:
-                view.stats_box_positions[self._target_roi_id].translate(scene_delta.toPoint())
+                box = view.stats_box_positions[self._target_roi_id]
+                view.stats_box_positions[self._target_roi_id] = box.translated(scene_delta.toPoint())
                 view.scene.update()
 
         event.accept()
@@ -249,10 +271,14 @@ class DefaultTool(BaseTool):
             roi = model.get_roi_by_id(self._target_roi_id)
             if roi:
                 roi.end_resize()
+        elif self._drag_mode == DragMode.ADJUST_WINDOW:
+            self._wl_idle_timer.stop()
+            self._set_window_preview(False)
 
         self._drag_mode = DragMode.NONE
         self._target_roi_id = None
         self._target_anchor_idx = None
+        self._set_live_annotation(None)
         self.viewer.setCursor(Qt.ArrowCursor)
         self.viewer.scene.update()
         event.accept()
@@ -320,6 +346,11 @@ class DefaultTool(BaseTool):
             else:
                 self.logger.debug("[DefaultTool.key_press_event] Del键按下，但模型为空")
 
+    def _set_live_annotation(self, annotation_id: str | None) -> None:
+        """拖动期间被编辑的 ROI 实时绘制，不触发标注图层重绘"""
+        if hasattr(self.viewer, 'set_live_annotation'):
+            self.viewer.set_live_annotation(annotation_id)
+
     # ---- 同步辅助方法 ----
 
     def _get_sync_context(self):
@@ -340,6 +371,26 @@ class DefaultTool(BaseTool):
             except Exception as e:
                 self.logger.debug(f"[DefaultTool._sync_window_level] 同步失败: {e}")
 
+    def _set_window_preview(self, enabled: bool) -> None:
+        """切换本视图及窗宽窗位同步视图的降分辨率预览"""
+        model = self.viewer.model
+        if not model:
+            return
+        if model.interactive_preview == enabled:
+            return
+        model.set_interactive_preview(enabled)
+        view_id, sync_manager = self._get_sync_context()
+        if view_id and sync_manager:
+            try:
+                sync_manager.sync_interactive_preview(view_id, enabled)
+            except Exception as e:
+                self.logger.debug(f"[DefaultTool._set_window_preview] 同步失败: {e}")
+
+    def _on_window_drag_idle(self) -> None:
+        """指针静止：按住中键期间也渲染一次全分辨率"""
+        if self._drag_mode == DragMode.ADJUST_WINDOW:
+            self._set_window_preview(False)
+
     def _sync_slice(self, slice_index: int) -> None:
         """同步切片位置到其他视图"""
         view_id, sync_manager = self._get_sync_context()
@@ -1,8 +1,9 @@
 # 测量工具
 from medimager.ui.tools.base_tool import BaseTool, point_distance, check_measurement_hit
+from medimager.core.analysis import LineProfile, calculate_line_profile
 from medimager.core.image_data_model import MeasurementData
 from medimager.utils.logger import get_logger
-from PySide6.QtWidgets import QGraphicsView
+from PySide6.QtWidgets import QGraphicsView, QFileDialog
 from PySide6.QtGui import QMouseEvent, QCursor, QKeyEvent
 from PySide6.QtCore import Qt, QPointF, QRectF
 from typing import Optional
@@ -13,6 +14,9 @@ import uuid
 class MeasurementTool(BaseTool):
     """
     测量工具，用于测量两个像素点之间的实际距离。
+
+    剖面模式（P 键切换）下，创建或拖动测量线时实时显示线上的像素值剖面；
+    [ / ] 键调整平均带宽度（粗剖面），Ctrl+Shift+E 将当前剖面导出为 CSV。
     """
 
     def __init__(self, viewer: QGraphicsView):
@@ -29,6 +33,11 @@ class MeasurementTool(BaseTool):
         # 当前编辑的测量ID（用于拖拽编辑已有测量）
         self.editing_measurement_id: Optional[str] = None
 
+        # 剖面模式：平均带宽度单位与剖面相同（有像素间距时为 mm，否则为像素）
+        self.profile_mode = False
+        self.profile_width = 0.0
+        self.profile: Optional[LineProfile] = None
+
     def _get_style_from_settings(self):
         """从设置中获取测量工具的样式"""
         try:
@@ -67,6 +76,7 @@ class MeasurementTool(BaseTool):
         self.viewer.setCursor(Qt.ArrowCursor)
         if self.dragging:
             self._stop_dragging()
+        self._show_profile(None)
 
     def _reset_measurement(self):
         """重置测量状态"""
@@ -78,6 +88,8 @@ class MeasurementTool(BaseTool):
         self.drag_offset = QPointF(0, 0)
         self.measurement_completed = False
         self.editing_measurement_id = None  # 清除编辑状态
+        if hasattr(self.viewer, 'set_live_annotation'):
+            self.viewer.set_live_annotation(None)
         
         if hasattr(self, '_preview_point'):
             self._preview_point = None
@@ -133,6 +145,8 @@ class MeasurementTool(BaseTool):
                     model.deselect_measurement(clicked_measurement_index)
                 else:
                     model.select_measurement(clicked_measurement_index)
+                    measurement = model.measurements[clicked_measurement_index]
+                    self._update_profile(measurement.start_point, measurement.end_point)
                 
                 event.accept()
                 return
@@ -167,6 +181,7 @@ class MeasurementTool(BaseTool):
         
         if self.measuring and self.start_point and not self.end_point:
             self._preview_point = self.viewer.last_mouse_scene_pos
+            self._update_profile(self.start_point, self._preview_point)
             self.viewer.viewport().update()
             event.accept()
         elif self.dragging and self.dragging_anchor and self.measurement_completed:
@@ -219,6 +234,70 @@ class MeasurementTool(BaseTool):
                 self.viewer.viewport().update()
                 event.accept()
 
+        elif event.key() == Qt.Key_P and not event.modifiers():
+            self.profile_mode = not self.profile_mode
+            self.logger.info(f"[MeasurementTool.key_press_event] 剖面模式: {self.profile_mode}")
+            if self.profile_mode and self.profile is None and self.start_point:
+                self._update_profile(self.start_point, self.end_point or getattr(self, '_preview_point', None))
+            elif not self.profile_mode:
+                self._show_profile(None)
+            self.viewer.viewport().update()
+            event.accept()
+
+        elif event.key() in (Qt.Key_BracketLeft, Qt.Key_BracketRight) and self.profile_mode:
+            delta = 1.0 if event.key() == Qt.Key_BracketRight else -1.0
+            self.profile_width = max(0.0, self.profile_width + delta)
+            if self.profile is not None:
+                self._update_profile_points(self.profile.start, self.profile.end)
+            self.viewer.viewport().update()
+            event.accept()
+
+        elif (event.key() == Qt.Key_E and event.modifiers() == (Qt.ControlModifier | Qt.ShiftModifier)
+              and self.profile is not None):
+            self.export_profile()
+            event.accept()
+
+    def _update_profile(self, start: Optional[QPointF], end: Optional[QPointF]):
+        """剖面模式下按测量线（场景坐标）重新采样剖面并更新曲线"""
+        if not self.profile_mode or start is None or end is None:
+            return
+        # 像素 (r, c) 覆盖场景 [c, c+1) × [r, r+1)，中心在 (c+0.5, r+0.5)
+        self._update_profile_points((start.y() - 0.5, start.x() - 0.5), (end.y() - 0.5, end.x() - 0.5))
+
+    def _update_profile_points(self, start: tuple, end: tuple):
+        model = self.viewer.model
+        if not model or not model.has_image():
+            return
+        try:
+            profile = calculate_line_profile(model, model.current_slice_index, start, end, self.profile_width)
+        except Exception as e:
+            self.logger.error(f"[MeasurementTool._update_profile_points] 剖面采样失败: {e}", exc_info=True)
+            return
+        self._show_profile(profile)
+
+    def _show_profile(self, profile: Optional[LineProfile]):
+        self.profile = profile
+        plot = getattr(self.viewer, 'line_profile_plot', None)
+        if plot is not None:
+            plot.set_profile(profile)
+
+    def export_profile(self, path: Optional[str] = None) -> bool:
+        """将当前剖面导出为 CSV（未给出路径时弹出保存对话框）"""
+        if self.profile is None:
+            return False
+        if path is None:
+            path, _ = QFileDialog.getSaveFileName(self.viewer, self.tr("导出剖面"), "profile.csv",
+                                                  self.tr("CSV 文件 (*.csv)"))
+            if not path:
+                return False
+        try:
+            self.profile.to_csv(path)
+            self.logger.info(f"[MeasurementTool.export_profile] 剖面已导出: {path}")
+            return True
+        except OSError as e:
+            self.logger.error(f"[MeasurementTool.export_profile] 导出剖面失败: {e}", exc_info=True)
+            return False
+
     def _check_anchor_hit(self, pos: QPointF) -> Optional[str]:
         """检查点击位置是否在锚点上"""
         if not self.end_point or not self.start_point:
@@ -257,6 +336,10 @@ class MeasurementTool(BaseTool):
         self.drag_offset = QPointF(0, 0)
         self.viewer.setCursor(Qt.ClosedHandCursor)
 
+        # 被拖动的已有测量实时绘制，不进入标注图层缓存
+        if self.editing_measurement_id and hasattr(self.viewer, 'set_live_annotation'):
+            self.viewer.set_live_annotation(self.editing_measurement_id)
+
     def _update_dragging(self, event: QMouseEvent):
         """更新拖拽状态"""
         if not self.dragging or not self.dragging_anchor or not self.measurement_completed:
@@ -289,7 +372,8 @@ class MeasurementTool(BaseTool):
         if hasattr(self.viewer, 'set_measurement_line'):
             real_distance, unit = self._calculate_real_distance(self.start_point, self.end_point)
             self.viewer.set_measurement_line(self.start_point, self.end_point, real_distance, unit)
-        
+
+        self._update_profile(self.start_point, self.end_point)
         self.viewer.viewport().update()
 
     def _stop_dragging(self):
@@ -302,6 +386,8 @@ class MeasurementTool(BaseTool):
         self.drag_offset = QPointF(0, 0)
         self.editing_measurement_id = None  # 完成编辑
         self.viewer.setCursor(Qt.CrossCursor)
+        if hasattr(self.viewer, 'set_live_annotation'):
+            self.viewer.set_live_annotation(None)
 
     def _update_cursor_for_hover(self):
         """根据鼠标悬停位置更新光标样式"""
@@ -326,6 +412,7 @@ class MeasurementTool(BaseTool):
             return
             
         real_distance, unit = self._calculate_real_distance(self.start_point, self.end_point)
+        self._update_profile(self.start_point, self.end_point)
         
         if self.editing_measurement_id:
             # 更新现有测量
@@ -374,19 +461,9 @@ class MeasurementTool(BaseTool):
         dx = point2.x() - point1.x()
         dy = point2.y() - point1.y()
 
-        dicom_header = model.dicom_header
-        if not dicom_header:
-            # 无DICOM头信息，返回像素距离
-            pixel_distance = math.sqrt(dx * dx + dy * dy)
-            return pixel_distance, "px"
-
-        pixel_spacing = dicom_header.get('Pixel Spacing', None)
-        if not pixel_spacing or len(pixel_spacing) < 2:
-            pixel_spacing = dicom_header.get('Imager Pixel Spacing', None)
-
-        if pixel_spacing and len(pixel_spacing) >= 2:
-            row_spacing = float(pixel_spacing[0])  # dy方向
-            col_spacing = float(pixel_spacing[1])  # dx方向
+        pixel_spacing = model.get_pixel_spacing()
+        if pixel_spacing is not None:
+            row_spacing, col_spacing = pixel_spacing  # dy / dx 方向
             real_distance = math.sqrt((dx * col_spacing) ** 2 + (dy * row_spacing) ** 2)
             return real_distance, "mm"
 
@@ -400,23 +477,20 @@ class MeasurementTool(BaseTool):
         if not model:
             return None, None
             
-        current_slice_measurements = model.get_measurements_for_slice(model.current_slice_index)
-        
         transform = self.viewer.transform()
         scale_factor = transform.m11()
         screen_detection_radius = 15  # 屏幕像素
         scene_detection_radius = screen_detection_radius / scale_factor
         
-        for i, measurement in enumerate(current_slice_measurements):
+        candidates = model.find_measurements_at(model.current_slice_index, pos.y(), pos.x(),
+                                                scene_detection_radius)
+        for measurement in reversed(candidates):
             start_distance = point_distance(pos, measurement.start_point)
             end_distance = point_distance(pos, measurement.end_point)
             
             if start_distance <= scene_detection_radius or end_distance <= scene_detection_radius:
-                # 找到对应的全局索引
-                for global_idx, global_measurement in enumerate(model.measurements):
-                    if global_measurement.id == measurement.id:
-                        anchor_type = 'start' if start_distance < end_distance else 'end'
-                        return global_idx, anchor_type
+                anchor_type = 'start' if start_distance < end_distance else 'end'
+                return model.get_measurement_index(measurement.id), anchor_type
         
         return None, None
 
@@ -446,6 +520,7 @@ class MeasurementTool(BaseTool):
                 pen.setCosmetic(True)
                 painter.setPen(pen)
                 painter.drawLine(self.start_point, draw_end_point)
+                self._draw_profile_band(painter, self.start_point, draw_end_point, line_color)
                 
                 # 绘制锚点
                 painter.setBrush(QColor(anchor_color))
@@ -480,4 +555,25 @@ class MeasurementTool(BaseTool):
                 painter.setPen(QColor(text_color))
                 painter.drawText(text_rect, Qt.AlignCenter, text)
 
-        painter.restore()
\ No newline at end of file
+        painter.restore()
+
+    def _draw_profile_band(self, painter, start: QPointF, end: QPointF, color: str):
+        """剖面模式下用虚线标出平均带的两条边界"""
+        if not self.profile_mode or self.profile is None or self.profile.width <= 0:
+            return
+        from PySide6.QtGui import QPen, QColor
+
+        row_spacing, col_spacing = self.profile.spacing
+        # 物理坐标下的单位法向量，换算为场景偏移
+        d_row = (end.y() - start.y()) * row_spacing
+        d_col = (end.x() - start.x()) * col_spacing
+        length = math.hypot(d_row, d_col)
+        if length == 0:
+            return
+        half = self.profile.width / 2
+        offset = QPointF(d_row / length * half / col_spacing, -d_col / length * half / row_spacing)
+        pen = QPen(QColor(color), 1, Qt.DashLine)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawLine(start + offset, end + offset)
+        painter.drawLine(start - offset, end - offset)
@@ -0,0 +1,147 @@
+# 区域生长分割工具
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from PySide6.QtWidgets import QGraphicsView, QToolTip, QApplication
+from PySide6.QtGui import QMouseEvent, QKeyEvent, QCursor
+from PySide6.QtCore import Qt, QObject, Signal
+
+from medimager.ui.tools.base_tool import BaseTool
+from medimager.core.region_growing import grow_region
+from medimager.utils.logger import get_logger
+from medimager.utils.settings import get_performance_manager
+
+# 依次分配给新掩码的颜色
+MASK_COLORS = [(255, 64, 64), (64, 160, 255), (255, 200, 0), (0, 220, 120), (200, 90, 255), (255, 128, 0)]
+
+
+class _GrowRelay(QObject):
+    """把线程池中完成的生长任务转发到主线程"""
+    finished = Signal(object)  # future
+
+
+class RegionGrowTool(BaseTool):
+    """区域生长工具：单击种子点，在种子值 ± 容差的灰度区间内生长出标签掩码。
+
+    生长在线程池中进行，期间显示忙碌光标，同一时间只进行一次生长。
+    按键：[ / ] 调整容差，D 切换二维/三维生长，Delete 删除最近生成的掩码，Esc 取消进行中的生长。
+    容差与生长模式是类属性，在所有视图的工具副本之间共享。
+    """
+
+    tolerance: float = 100.0
+    three_d: bool = True
+    TOLERANCE_STEP = 10.0
+
+    def __init__(self, viewer: QGraphicsView):
+        super().__init__(viewer)
+        self.logger = get_logger(__name__)
+        self._relay = _GrowRelay()
+        self._relay.finished.connect(self._on_grow_finished)
+        self._pending: Optional[Future] = None
+        self._pending_context = None
+        self._cancel = threading.Event()
+
+    def activate(self):
+        self.viewer.setCursor(Qt.CrossCursor)
+
+    def deactivate(self):
+        self.viewer.setCursor(Qt.ArrowCursor)
+
+    def mouse_press_event(self, event: QMouseEvent):
+        super().mouse_press_event(event)
+        if self._press_is_outside or event.button() != Qt.LeftButton:
+            return
+        model = self.viewer.model
+        if not model or not model.has_image():
+            return
+        pos = self.viewer.last_mouse_scene_pos
+        self.grow_at(model.current_slice_index, int(pos.y()), int(pos.x()))
+        event.accept()
+
+    def grow_at(self, slice_index: int, row: int, col: int) -> Optional[Future]:
+        """
+        以 (切片, 行, 列) 为种子在后台生长，完成后在主线程把结果加入模型
+
+        Returns:
+            生长任务的 Future（结果为 LabelMask 或 None）；种子不在图像内或已有生长进行中时返回 None
+        """
+        model = self.viewer.model
+        shape = model.get_image_shape() if model is not None else None
+        if shape is None or not (0 <= slice_index < shape[0] and 0 <= row < shape[1] and 0 <= col < shape[2]):
+            self.logger.debug(f"[RegionGrowTool.grow_at] 种子点不在图像内: ({slice_index}, {row}, {col})")
+            return None
+        if self._pending is not None:
+            self.logger.debug("[RegionGrowTool.grow_at] 上一次生长尚未完成，忽略")
+            return None
+        value = model.pixel_array[slice_index, row, col]
+        lower, upper = float(value) - self.tolerance, float(value) + self.tolerance
+        name = self.tr("区域 %1").replace("%1", str(len(model.label_masks) + 1))
+        self._cancel.clear()
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+        future = get_performance_manager().get_thread_pool().submit(
+            grow_region, model.pixel_array, (slice_index, row, col), lower, upper,
+            three_d=self.three_d, name=name, is_cancelled=self._cancel.is_set)
+        # 记录提交时的模型与数据版本，完成时数据已变化则丢弃结果
+        self._pending_context = (model, model.data_version, lower, upper)
+        self._pending = future
+        future.add_done_callback(self._relay.finished.emit)
+        return future
+
+    def cancel(self) -> None:
+        """取消进行中的生长"""
+        if self._pending is not None:
+            self._cancel.set()
+
+    def _on_grow_finished(self, future: Future) -> None:
+        """生长完成（在主线程中执行）"""
+        if future is not self._pending:
+            return
+        self._pending = None
+        QApplication.restoreOverrideCursor()
+        model, data_version, lower, upper = self._pending_context
+        try:
+            mask = future.result()
+        except Exception as e:
+            self.logger.error(f"[RegionGrowTool._on_grow_finished] 区域生长失败: {e}", exc_info=True)
+            return
+        if mask is None:
+            if self._cancel.is_set():
+                self._show_message(self.tr("已取消区域生长"))
+            return
+        if model is not self.viewer.model or model.data_version != data_version:
+            self.logger.debug("[RegionGrowTool._on_grow_finished] 图像数据已变化，丢弃生长结果")
+            return
+
+        mask.color = MASK_COLORS[len(model.label_masks) % len(MASK_COLORS)]
+        model.add_label_mask(mask)
+        volume = model.get_label_mask_volume_ml(mask)
+        self.logger.info(f"[RegionGrowTool._on_grow_finished] {mask.name}: 区间 [{lower:.0f}, {upper:.0f}], "
+                         f"{mask.voxel_count} 体素, {volume:.2f} mL")
+        self._show_message(self.tr("%1: %2 mL（%3 体素）").replace("%1", mask.name)
+                           .replace("%2", f"{volume:.2f}").replace("%3", str(mask.voxel_count)))
+
+    def key_press_event(self, event: QKeyEvent):
+        key = event.key()
+        if key in (Qt.Key_BracketLeft, Qt.Key_BracketRight):
+            step = self.TOLERANCE_STEP if key == Qt.Key_BracketRight else -self.TOLERANCE_STEP
+            RegionGrowTool.tolerance = max(0.0, self.tolerance + step)
+            self._show_message(self.tr("容差: ±%1").replace("%1", f"{self.tolerance:.0f}"))
+            event.accept()
+        elif key == Qt.Key_D:
+            RegionGrowTool.three_d = not self.three_d
+            self._show_message(self.tr("三维生长") if self.three_d else self.tr("二维生长"))
+            event.accept()
+        elif key == Qt.Key_Escape and self._pending is not None:
+            self.cancel()
+            event.accept()
+        elif key in (Qt.Key_Delete, Qt.Key_Backspace):
+            model = self.viewer.model
+            if model and model.label_masks:
+                model.remove_label_mask(model.label_masks[-1].id)
+                event.accept()
+        else:
+            super().key_press_event(event)
+
+    def _show_message(self, text: str) -> None:
+        QToolTip.showText(QCursor.pos(), text, self.viewer)
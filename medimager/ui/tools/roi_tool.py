@@ -7,7 +7,6 @@ from PySide6.QtGui import QMouseEvent, QWheelEvent, QPen, QColor
 from PySide6.QtCore import Qt, QPointF, QRectF, QRect
 
 from medimager.core.roi import EllipseROI, CircleROI, RectangleROI, BaseROI
-from medimager.core.analysis import calculate_roi_statistics
 from medimager.ui.widgets.roi_stats_box import get_stats_text, calculate_stats_box_size_rect, _get_stats_box_settings
 
 
@@ -108,7 +107,7 @@ class BaseROITool(BaseTool):
         if not viewer.model:
             return
 
-        stats = calculate_roi_statistics(viewer.model, roi)
+        stats = viewer.model.roi_statistics.get(viewer.model, roi)
         if not stats:
             return
 
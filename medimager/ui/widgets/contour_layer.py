@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轮廓线图层
+
+把 medimager.core.contours 提取的轮廓转换为 QPainterPath 并按键缓存：
+标签掩码轮廓按 (标签图层, 切片, 切片版本) 缓存，等 HU 轮廓按 (数据版本, 切片, 等值) 缓存。
+重绘时只绘制缓存的矢量路径，不需要重新处理掩码或像素数据。
+"""
+
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Tuple
+
+import numpy as np
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath, QPolygonF, QColor
+
+from medimager.core.contours import find_contours, simplify_contours
+
+# 等 HU 轮廓依次使用的颜色
+ISO_COLORS = [QColor(255, 255, 0), QColor(0, 255, 255), QColor(255, 0, 255), QColor(255, 128, 0)]
+
+
+def contours_to_path(contours: List[np.ndarray]) -> QPainterPath:
+    """把闭合轮廓（像素索引坐标）转换为场景坐标的 QPainterPath（像素中心在 +0.5 处）"""
+    path = QPainterPath()
+    for contour in contours:
+        points = (contour + 0.5).tolist()
+        path.addPolygon(QPolygonF([QPointF(x, y) for x, y in points]))
+        path.closeSubpath()
+    return path
+
+
+class ContourCache:
+    """按键缓存轮廓路径的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get(self, key: Hashable, compute: Callable[[], object]):
+        """返回键对应的缓存值，不存在时调用 compute 计算并缓存"""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            return value
+        value = compute()
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def label_outline_paths(labels: np.ndarray, tolerance: float = 0.3) -> List[Tuple[int, QPainterPath]]:
+    """标签切片中每个标签的轮廓路径 [(标签, 路径)]"""
+    present = np.unique(labels)
+    paths = []
+    for label in present[present != 0].tolist():
+        contours = simplify_contours(find_contours(labels == label, 0.5), tolerance)
+        paths.append((label, contours_to_path(contours)))
+    return paths
+
+
+def iso_contour_path(slice_data: np.ndarray, level: float, tolerance: float = 0.3) -> QPainterPath:
+    """切片在 level 处的等值线路径"""
+    return contours_to_path(simplify_contours(find_contours(slice_data, level), tolerance))
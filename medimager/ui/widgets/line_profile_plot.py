@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+线剖面曲线控件
+
+悬浮在图像视图左下角（位置由 ImageViewer 维护），显示测量线上的像素值剖面。
+剖面采样点多于控件宽度时，按列取每列的最小/最大值绘制包络，
+绘制开销只与控件宽度有关，与线的长度无关。
+"""
+
+from typing import Optional
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QPointF, QLineF
+from PySide6.QtGui import QPainter, QColor, QPen, QPolygonF
+
+from medimager.core.analysis import LineProfile
+
+
+class LineProfilePlot(QWidget):
+    """显示线剖面的悬浮控件"""
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setFixedSize(320, 140)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self._profile: Optional[LineProfile] = None
+        self.hide()
+
+    @property
+    def profile(self) -> Optional[LineProfile]:
+        return self._profile
+
+    def set_profile(self, profile: Optional[LineProfile]) -> None:
+        """设置要显示的剖面（None 时隐藏控件）"""
+        self._profile = profile
+        if profile is None or not len(profile.values):
+            self.hide()
+            return
+        self.show()
+        self.raise_()
+        self.update()
+
+    def _envelope(self, columns: int) -> tuple:
+        """按列合并采样点，返回每列的 (最小值, 最大值)"""
+        values = self._profile.values
+        if len(values) <= columns:
+            return values, values
+        edges = np.linspace(0, len(values), columns + 1).astype(np.int64)
+        filled_low = np.where(np.isnan(values), np.inf, values)
+        filled_high = np.where(np.isnan(values), -np.inf, values)
+        low = np.minimum.reduceat(filled_low, edges[:-1])
+        high = np.maximum.reduceat(filled_high, edges[:-1])
+        low[np.isinf(low)] = np.nan
+        high[np.isinf(high)] = np.nan
+        return low, high
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        painter.fillRect(rect, QColor(0, 0, 0, 180))
+        profile = self._profile
+        if profile is None or np.isnan(profile.values).all():
+            return
+
+        text_height = painter.fontMetrics().height()
+        plot = rect.adjusted(4, text_height + 2, -4, -text_height - 2)
+        low, high = self._envelope(max(1, int(plot.width())))
+        lower, upper = float(np.nanmin(low)), float(np.nanmax(high))
+        span = upper - lower if upper > lower else 1.0
+        step = plot.width() / max(len(low) - 1, 1)
+
+        def y_of(value):
+            return plot.bottom() - (value - lower) / span * plot.height()
+
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(QPen(QColor(0, 255, 0), 1))
+        if low is high:
+            # 逐点折线，遇到图像外的采样点断开
+            polygon = QPolygonF()
+            for i, value in enumerate(low):
+                if value != value:
+                    if polygon.size() > 1:
+                        painter.drawPolyline(polygon)
+                    polygon = QPolygonF()
+                    continue
+                polygon.append(QPointF(plot.left() + i * step, y_of(value)))
+            if polygon.size() > 1:
+                painter.drawPolyline(polygon)
+        else:
+            # 每列一条竖线（最小值到最大值），一次绘制
+            columns = np.flatnonzero(~np.isnan(low))
+            xs = (plot.left() + columns * step).tolist()
+            tops = y_of(high[columns]).tolist()
+            bottoms = (y_of(low[columns]) + 0.5).tolist()
+            painter.drawLines([QLineF(x, top, x, bottom) for x, top, bottom in zip(xs, tops, bottoms)])
+
+        painter.setPen(QColor(220, 220, 220))
+        painter.drawText(QRectF(rect.left() + 4, rect.top(), rect.width() - 8, text_height),
+                         Qt.AlignLeft | Qt.AlignVCenter, f"{upper:.1f}")
+        width_text = f"  ⟂ {profile.width:.1f} {profile.unit}" if profile.width > 0 else ""
+        painter.drawText(QRectF(rect.left() + 4, rect.top(), rect.width() - 8, text_height),
+                         Qt.AlignRight | Qt.AlignVCenter, f"{profile.length:.1f} {profile.unit}{width_text}")
+        painter.drawText(QRectF(rect.left() + 4, rect.bottom() - text_height, rect.width() - 8, text_height),
+                         Qt.AlignLeft | Qt.AlignVCenter, f"{lower:.1f}")
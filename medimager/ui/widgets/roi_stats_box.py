@@ -39,6 +39,11 @@ def _get_stats_box_settings():
             'precision': 1
         }
 
+def _get_stats_box_resources():
+    """获取信息板的缓存绘制资源"""
+    from medimager.utils.theme_manager import get_theme_resources
+    return get_theme_resources('roi')
+
 def get_stats_text(stats: Dict[str, float]) -> str:
     """将统计数据格式化为显示字符串。"""
     settings = _get_stats_box_settings()
@@ -82,8 +87,9 @@ def draw_stats_box(painter: QPainter, stats: Dict[str, float], box_rect: QRect)
     """
     painter.save()
 
-    # 获取配置的设置
+    # 获取配置的设置及缓存的颜色/画笔（主题变化时自动更新）
     settings = _get_stats_box_settings()
+    resources = _get_stats_box_resources()
     
     # 设置字体
     font = painter.font()
@@ -94,16 +100,12 @@ def draw_stats_box(painter: QPainter, stats: Dict[str, float], box_rect: QRect)
     stats_text = get_stats_text(stats)
     
     # 绘制背景
-    bg_color = QColor(settings['bg_color'])
-    border_color = QColor(settings['border_color'])
-    
-    painter.setBrush(bg_color)
-    painter.setPen(QPen(border_color, 1))
+    painter.setBrush(resources.color('info_bg_color', '#00000096'))
+    painter.setPen(resources.pen('info_border_color', default_color='#FFFFFF'))
     painter.drawRoundedRect(box_rect, settings['border_radius'], settings['border_radius'])
     
     # 绘制文本
-    text_color = QColor(settings['text_color'])
-    painter.setPen(text_color)
+    painter.setPen(resources.color('info_text_color', '#FFFFFF'))
     
     text_draw_rect = box_rect.adjusted(settings['padding'], settings['padding'], 
                                      -settings['padding'], -settings['padding'])
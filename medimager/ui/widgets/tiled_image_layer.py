@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块图像图层
+
+在 ImageViewer 的降采样概览图之上，按当前缩放级别绘制可见区域的金字塔图块。
+只有与视口相交的图块才会做窗宽窗位映射并上传为 QPixmap，
+每个图块独立缓存，因此平移和缩放的开销与视口大小成正比，而与图像大小无关。
+"""
+
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QImage, QPainter, QPixmap, QTransform
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem, QWidget
+
+from medimager.core.tile_pyramid import TilePyramid
+from medimager.utils.logger import get_logger
+from medimager.utils.settings import get_performance_manager
+
+logger = get_logger(__name__)
+
+# 窗宽窗位映射函数：(原始像素, 层级, 全分辨率 x, 全分辨率 y) -> uint8 灰度或 uint32 ARGB32 显示像素，
+# 层级与起点用于叠加与图块位置对应的标签等内容
+WindowFunction = Callable[[np.ndarray, int, int, int], np.ndarray]
+
+
+def _array_to_qimage(data: np.ndarray) -> QImage:
+    """显示数组转换为独立持有内存的 QImage：uint8 为 Grayscale8，uint32 为 RGB32"""
+    data = np.ascontiguousarray(data)
+    height, width = data.shape
+    image_format = QImage.Format_RGB32 if data.dtype == np.uint32 else QImage.Format_Grayscale8
+    return QImage(data.data, width, height, data.strides[0], image_format).copy()
+
+
+class TiledImageLayer(QGraphicsItem):
+    """金字塔图块图层
+
+    图元坐标为全分辨率像素坐标；翻转/旋转通过图元变换实现，
+    反色在图块上传时处理，与 ImageViewer 对整幅图像的变换保持一致。
+    """
+
+    # 缓存的图块数量上限（512x512 图块约 1 MB/个）
+    CACHE_TILES = 96
+
+    def __init__(self, parent: Optional[QGraphicsItem] = None) -> None:
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self._pyramid: Optional[TilePyramid] = None
+        self._window_fn: Optional[WindowFunction] = None
+        self._source_key: Hashable = None
+        self._overview_scale = 1
+        self._inverted = False
+        self._view_transform: Optional[QTransform] = None
+        self._tile_cache: "OrderedDict[tuple, QPixmap]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # 数据源
+    # ------------------------------------------------------------------
+    def set_source(self, pyramid: Optional[TilePyramid], window_fn: Optional[WindowFunction],
+                   source_key: Hashable, overview_scale: int = 1) -> None:
+        """设置图块数据源
+
+        Args:
+            pyramid: 当前切片的图块金字塔，None 表示不绘制图块
+            window_fn: 窗宽窗位映射函数（可在工作线程中调用）
+            source_key: 数据源标识（模型、切片、窗宽窗位等），作为图块缓存键的一部分
+            overview_scale: 底层概览图的缩小倍数，分辨率不高于概览图的层级不再绘制图块
+        """
+        if pyramid is not None and (self._pyramid is None or
+                                    (pyramid.width, pyramid.height) !=
+                                    (self._pyramid.width, self._pyramid.height)):
+            self.prepareGeometryChange()
+        self._pyramid = pyramid
+        self._window_fn = window_fn
+        self._source_key = source_key
+        self._overview_scale = max(1, overview_scale)
+        self.setVisible(pyramid is not None)
+        self.update()
+
+    def has_source(self) -> bool:
+        return self._pyramid is not None
+
+    def set_view_transforms(self, transform: Optional[QTransform], inverted: bool) -> None:
+        """设置与概览图一致的视图变换（翻转/旋转矩阵及反色）"""
+        self._inverted = inverted
+        self._view_transform = transform
+        if self._pyramid is not None and transform is not None:
+            self.setTransform(QImage.trueMatrix(transform, self._pyramid.width, self._pyramid.height))
+        else:
+            self.setTransform(QTransform())
+
+    def clear_cache(self) -> None:
+        self._tile_cache.clear()
+
+    # ------------------------------------------------------------------
+    # QGraphicsItem
+    # ------------------------------------------------------------------
+    def boundingRect(self) -> QRectF:
+        if self._pyramid is None:
+            return QRectF()
+        return QRectF(0, 0, self._pyramid.width, self._pyramid.height)
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem,
+              widget: Optional[QWidget] = None) -> None:
+        pyramid = self._pyramid
+        if pyramid is None or self._window_fn is None:
+            return
+
+        screen_scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = pyramid.level_for_scale(screen_scale)
+        if (1 << level) >= self._overview_scale:
+            # 概览图的分辨率已足够
+            return
+
+        exposed = option.exposedRect
+        tiles = list(pyramid.tiles_in_rect(level, exposed.left(), exposed.top(),
+                                           exposed.right(), exposed.bottom()))
+        if not tiles:
+            return
+
+        pixmaps = self._get_tile_pixmaps(level, tiles)
+        for (tx, ty), pixmap in zip(tiles, pixmaps):
+            if pixmap is None:
+                continue
+            x, y, w, h = pyramid.tile_rect(level, tx, ty)
+            painter.drawPixmap(QRectF(x, y, w, h), pixmap, QRectF(pixmap.rect()))
+
+    # ------------------------------------------------------------------
+    # 图块渲染与缓存
+    # ------------------------------------------------------------------
+    def _cache_key(self, level: int, tx: int, ty: int) -> tuple:
+        return (self._source_key, self._inverted, level, tx, ty)
+
+    def _get_tile_pixmaps(self, level: int, tiles: list) -> list:
+        """获取可见图块的 QPixmap，缺失的图块在渲染线程池中并发窗宽窗位映射"""
+        results = []
+        missing = []
+        for index, (tx, ty) in enumerate(tiles):
+            key = self._cache_key(level, tx, ty)
+            pixmap = self._tile_cache.get(key)
+            if pixmap is not None:
+                self._tile_cache.move_to_end(key)
+            else:
+                missing.append(index)
+            results.append(pixmap)
+
+        if missing:
+            pyramid = self._pyramid
+            window_fn = self._window_fn
+            try:
+                pool = get_performance_manager().get_render_pool()
+                futures = [pool.submit(window_fn, pyramid.tile_data(level, *tiles[i]), level,
+                                       *pyramid.tile_rect(level, *tiles[i])[:2])
+                           for i in missing]
+                for index, future in zip(missing, futures):
+                    image = _array_to_qimage(future.result())
+                    if self._inverted:
+                        image.invertPixels()
+                    pixmap = QPixmap.fromImage(image)
+                    self._tile_cache[self._cache_key(level, *tiles[index])] = pixmap
+                    results[index] = pixmap
+            except Exception as e:
+                logger.error(f"[TiledImageLayer._get_tile_pixmaps] 图块渲染失败: {e}", exc_info=True)
+
+            while len(self._tile_cache) > self.CACHE_TILES:
+                self._tile_cache.popitem(last=False)
+            logger.debug(f"[TiledImageLayer._get_tile_pixmaps] 层级 {level}: "
+                         f"可见 {len(tiles)} 块, 新渲染 {len(missing)} 块")
+        return results
+
+    def region_image(self, scene_rect: QRectF) -> Tuple[Optional[QImage], QRectF]:
+        """获取场景矩形对应的全分辨率显示图像（供放大镜使用）
+
+        Returns:
+            (image, source_rect)：image 已应用窗宽窗位和视图变换，
+            source_rect 为 scene_rect 在 image 中的位置
+        """
+        if self._pyramid is None or self._window_fn is None:
+            return None, QRectF()
+        item_rect = self.mapRectFromScene(scene_rect).toAlignedRect()
+        raw = self._pyramid.region_data(item_rect.x(), item_rect.y(),
+                                        item_rect.width(), item_rect.height())
+        if raw.size == 0:
+            return None, QRectF()
+        image = _array_to_qimage(self._window_fn(raw, 0, max(0, item_rect.x()), max(0, item_rect.y())))
+        if self._view_transform is not None:
+            image = image.transformed(self._view_transform)
+        if self._inverted:
+            image.invertPixels()
+        return image, QRectF(image.rect())
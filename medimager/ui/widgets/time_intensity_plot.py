@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间-强度曲线控件
+
+显示 ROI 在各切片/时相上的平均值与最大值曲线，并用竖线标出当前切片。
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QPointF
+from PySide6.QtGui import QPainter, QColor, QPen, QPolygonF
+
+
+class TimeIntensityPlot(QWidget):
+    """显示时间-强度曲线的控件"""
+
+    MEAN_COLOR = QColor(0, 255, 0)
+    MAX_COLOR = QColor(255, 170, 0)
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setMinimumSize(360, 180)
+        self._curve: Optional[Dict[str, np.ndarray]] = None
+        self._current_index: Optional[int] = None
+
+    def set_curve(self, curve: Optional[Dict[str, np.ndarray]]) -> None:
+        """设置要显示的曲线（calculate_time_intensity_curve 的结果）"""
+        self._curve = curve
+        self.update()
+
+    def set_current_index(self, index: Optional[int]) -> None:
+        """设置当前切片/时相（以竖线标出）"""
+        self._current_index = index
+        self.update()
+
+    def _polyline(self, values: np.ndarray, plot: QRectF, lower: float, span: float) -> QPolygonF:
+        count = len(values)
+        xs = plot.left() + np.arange(count) * (plot.width() / max(count - 1, 1))
+        ys = plot.bottom() - (values - lower) / span * plot.height()
+        return QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        painter.fillRect(rect, QColor(0, 0, 0, 200))
+        curve = self._curve
+        if curve is None or not len(curve["mean"]):
+            painter.setPen(QColor(160, 160, 160))
+            painter.drawText(rect, Qt.AlignCenter, self.tr("请选择一个ROI"))
+            return
+
+        text_height = painter.fontMetrics().height()
+        plot = rect.adjusted(6, text_height + 4, -6, -text_height - 4)
+        mean, maximum = curve["mean"], curve["max"]
+        lower, upper = float(mean.min()), float(maximum.max())
+        span = upper - lower if upper > lower else 1.0
+        count = len(mean)
+
+        if self._current_index is not None and 0 <= self._current_index < count:
+            x = plot.left() + self._current_index * (plot.width() / max(count - 1, 1))
+            painter.setPen(QPen(QColor(255, 255, 255, 90), 1, Qt.DashLine))
+            painter.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(QPen(self.MAX_COLOR, 1))
+        painter.drawPolyline(self._polyline(maximum, plot, lower, span))
+        painter.setPen(QPen(self.MEAN_COLOR, 1.5))
+        painter.drawPolyline(self._polyline(mean, plot, lower, span))
+
+        painter.setPen(QColor(220, 220, 220))
+        top_row = QRectF(rect.left() + 6, rect.top() + 2, rect.width() - 12, text_height)
+        bottom_row = QRectF(rect.left() + 6, rect.bottom() - text_height - 2, rect.width() - 12, text_height)
+        painter.drawText(top_row, Qt.AlignLeft | Qt.AlignVCenter, f"{upper:.1f}")
+        painter.drawText(bottom_row, Qt.AlignLeft | Qt.AlignVCenter, f"{lower:.1f}")
+        painter.drawText(bottom_row, Qt.AlignRight | Qt.AlignVCenter, f"1 … {count}")
+        painter.setPen(self.MEAN_COLOR)
+        painter.drawText(top_row, Qt.AlignRight | Qt.AlignVCenter, self.tr("平均值"))
+        mean_width = painter.fontMetrics().horizontalAdvance(self.tr("平均值")) + 10
+        painter.setPen(self.MAX_COLOR)
+        painter.drawText(top_row.adjusted(0, 0, -mean_width, 0), Qt.AlignRight | Qt.AlignVCenter,
+                         self.tr("最大值"))
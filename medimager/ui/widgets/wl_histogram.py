@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+窗宽窗位直方图控件
+
+以对数刻度显示灰度直方图，并用半透明区域标出当前窗宽窗位覆盖的范围。
+直方图数据来自 ImageDataModel 缓存的整体/逐切片直方图，绘制时只对分箱做重采样。
+"""
+
+from typing import Optional
+
+import numpy as np
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QRectF, QPointF
+from PySide6.QtGui import QPainter, QColor, QPen, QPolygonF
+
+from medimager.core.histogram import IntensityHistogram
+
+
+class WindowLevelHistogram(QWidget):
+    """显示直方图及当前窗口范围的控件"""
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setMinimumSize(240, 90)
+        self._histogram: Optional[IntensityHistogram] = None
+        self._counts: Optional[np.ndarray] = None
+        self._window_width = 400
+        self._window_level = 40
+
+    def set_histogram(self, histogram: Optional[IntensityHistogram],
+                      slice_index: Optional[int] = None) -> None:
+        """设置要显示的直方图（slice_index 为 None 时显示整体直方图）"""
+        self._histogram = histogram
+        self._counts = None
+        if histogram is not None:
+            try:
+                self._counts = histogram.get_counts(slice_index)
+            except IndexError:
+                self._counts = histogram.counts
+        self.update()
+
+    def set_window(self, width: int, level: int) -> None:
+        """设置当前窗宽窗位"""
+        self._window_width = width
+        self._window_level = level
+        self.update()
+
+    def _value_to_x(self, value: float, rect: QRectF) -> float:
+        histogram = self._histogram
+        span = histogram.upper - histogram.lower
+        return rect.left() + (value - histogram.lower) / span * rect.width()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        painter.fillRect(rect, QColor(0, 0, 0, 180))
+
+        if self._histogram is None or self._counts is None or not self._counts.any():
+            painter.setPen(QColor(160, 160, 160))
+            painter.drawText(rect, Qt.AlignCenter, self.tr("直方图计算中..."))
+            return
+
+        # 按控件宽度合并分箱，取对数以同时显示空气/软组织/骨等峰
+        columns = max(1, int(rect.width()))
+        counts = self._counts.astype(np.float64)
+        if len(counts) > columns:
+            edges = np.linspace(0, len(counts), columns + 1).astype(np.int64)
+            merged = np.add.reduceat(counts, edges[:-1])
+        else:
+            merged = counts[np.arange(columns) * len(counts) // columns]
+        heights = np.log1p(merged)
+        peak = heights.max()
+        if peak > 0:
+            heights = heights / peak
+
+        polygon = QPolygonF()
+        polygon.append(QPointF(rect.left(), rect.bottom()))
+        step = rect.width() / columns
+        for i, h in enumerate(heights):
+            polygon.append(QPointF(rect.left() + i * step, rect.bottom() - h * rect.height()))
+        polygon.append(QPointF(rect.right(), rect.bottom()))
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(170, 170, 170))
+        painter.drawPolygon(polygon)
+
+        # 窗口范围
+        low = self._window_level - self._window_width / 2
+        high = self._window_level + self._window_width / 2
+        x0 = max(rect.left(), self._value_to_x(low, rect))
+        x1 = min(rect.right(), self._value_to_x(high, rect))
+        if x1 > x0:
+            painter.fillRect(QRectF(x0, rect.top(), x1 - x0, rect.height()), QColor(255, 200, 0, 60))
+        painter.setPen(QPen(QColor(255, 200, 0), 1))
+        level_x = self._value_to_x(self._window_level, rect)
+        if rect.left() <= level_x <= rect.right():
+            painter.drawLine(QPointF(level_x, rect.top()), QPointF(level_x, rect.bottom()))
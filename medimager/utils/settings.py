@@ -24,6 +24,7 @@ class PerformanceManager:
     
     def __init__(self):
         self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._render_pool: Optional[ThreadPoolExecutor] = None
         self._cache_size_mb: int = 256
         self._thread_count: int = 4
         self._cache_data: Dict[str, Any] = {}
@@ -48,6 +49,11 @@ class PerformanceManager:
             self._thread_pool.shutdown(wait=True)
             
         self._thread_pool = ThreadPoolExecutor(max_workers=self._thread_count)
+
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=True)
+            self._render_pool = None
+
         self.logger.debug(f"线程数量已设置为: {self._thread_count}")
         
     def get_thread_count(self) -> int:
@@ -67,6 +73,20 @@ class PerformanceManager:
         if self._thread_pool is None:
             self._thread_pool = ThreadPoolExecutor(max_workers=self._thread_count)
         return self._thread_pool
+
+    def get_render_pool(self) -> ThreadPoolExecutor:
+        """获取渲染线程池
+
+        与通用线程池分离，UI 线程等待渲染结果时不会被排队中的
+        序列加载等耗时任务阻塞。
+
+        Returns:
+            ThreadPoolExecutor: 渲染线程池实例
+        """
+        if self._render_pool is None:
+            self._render_pool = ThreadPoolExecutor(max_workers=self._thread_count,
+                                                   thread_name_prefix="render")
+        return self._render_pool
         
     def set_cache_size(self, size_mb: int) -> None:
         """设置缓存大小
@@ -157,6 +177,8 @@ class PerformanceManager:
         """关闭性能管理器"""
         if self._thread_pool is not None:
             self._thread_pool.shutdown(wait=True)
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=True)
         self.clear_cache()
 
 
@@ -6,14 +6,15 @@
 负责应用程序界面主题的加载和应用
 """
 
+import time
 import toml
 import weakref
 from pathlib import Path
 from PySide6.QtWidgets import QApplication, QWidget
 from PySide6.QtCore import QObject, Signal, QByteArray, Qt
-from PySide6.QtGui import QIcon, QPixmap, QPainter
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QPen, QFont
 from PySide6.QtSvg import QSvgRenderer
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from medimager.utils.settings import SettingsManager, get_settings_manager
 from medimager.utils.logger import get_logger
 
@@ -103,9 +104,126 @@ class ThemeAwareMixin:
         return int(0.2126 * r + 0.7152 * g + 0.0722 * b)
 
 
+class ThemeResources:
+    """某一类别主题的绘制资源
+
+    QColor/QPen/QFont 在首次使用时创建并缓存，主题失效后随缓存条目一起丢弃。
+    返回的对象为共享实例，调用方不应修改。
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._colors: Dict[Tuple[str, str], QColor] = {}
+        self._pens: Dict[tuple, QPen] = {}
+        self._fonts: Dict[tuple, QFont] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def color(self, key: str, default: str = "#FFFFFF") -> QColor:
+        cache_key = (key, default)
+        color = self._colors.get(cache_key)
+        if color is None:
+            color = QColor(self.data.get(key, default))
+            self._colors[cache_key] = color
+        return color
+
+    def pen(self, color_key: str, width_key: Optional[str] = None, default_color: str = "#FFFFFF",
+            default_width: int = 1, cosmetic: bool = False) -> QPen:
+        """主题颜色的画笔；width_key 为 None 时线宽固定为 default_width"""
+        cache_key = (color_key, width_key, default_color, default_width, cosmetic)
+        pen = self._pens.get(cache_key)
+        if pen is None:
+            width = default_width if width_key is None else self.data.get(width_key, default_width)
+            pen = QPen(self.color(color_key, default_color), width)
+            pen.setCosmetic(cosmetic)
+            self._pens[cache_key] = pen
+        return pen
+
+    def font(self, size_key: str, default_size: int, pixel_size: bool = False) -> QFont:
+        cache_key = (size_key, default_size, pixel_size)
+        font = self._fonts.get(cache_key)
+        if font is None:
+            font = QFont()
+            size = int(self.data.get(size_key, default_size))
+            if pixel_size:
+                font.setPixelSize(size)
+            else:
+                font.setPointSize(size)
+            self._fonts[cache_key] = font
+        return font
+
+
+# 进程级主题缓存：(类别, 主题名) -> [文件路径, mtime, 上次检查时间, 设置字典, 绘制资源]
+_theme_cache: Dict[Tuple[str, str], list] = {}
+# 文件 mtime 检查间隔（秒），避免每次绘制都访问文件系统
+_THEME_MTIME_CHECK_INTERVAL = 1.0
+
+
+def invalidate_theme_cache(category: Optional[str] = None) -> None:
+    """使主题缓存失效
+
+    Args:
+        category: 只清除该类别，None 表示全部清除
+    """
+    for key in [k for k in _theme_cache if category is None or k[0] == category]:
+        del _theme_cache[key]
+
+
+def _resolve_theme_file(category: str, theme_name: str) -> Optional[Path]:
+    themes_dir = Path(__file__).parent.parent / "themes" / category
+    theme_file = themes_dir / f"{theme_name}.toml"
+    if theme_file.exists():
+        return theme_file
+    # 如果主题文件不存在，尝试加载默认主题
+    default_theme_file = themes_dir / "default.toml"
+    if default_theme_file.exists():
+        return default_theme_file
+    return None
+
+
+def _get_theme_entry(category: str, theme_name: Optional[str]) -> list:
+    """获取（必要时加载）主题缓存条目"""
+    # 如果没有指定主题名称，从设置中获取当前主题
+    if theme_name is None:
+        settings_manager = get_settings_manager()
+        theme_name = settings_manager.get_setting(f'{category}_theme', 'default')
+
+    key = (category, theme_name)
+    entry = _theme_cache.get(key)
+    now = time.monotonic()
+    if entry is not None:
+        if now - entry[2] < _THEME_MTIME_CHECK_INTERVAL:
+            return entry
+        entry[2] = now
+        try:
+            if entry[0] is not None and entry[0].stat().st_mtime == entry[1]:
+                return entry
+        except OSError:
+            pass
+
+    data: Dict[str, Any] = {}
+    theme_file = None
+    mtime = None
+    try:
+        theme_file = _resolve_theme_file(category, theme_name)
+        if theme_file is not None:
+            mtime = theme_file.stat().st_mtime
+            data = toml.load(theme_file)
+    except Exception as e:
+        print(f"加载{category}主题文件失败: {e}")
+
+    entry = [theme_file, mtime, now, data, ThemeResources(data)]
+    _theme_cache[key] = entry
+    return entry
+
+
 def get_theme_settings(category: str, theme_name: str = None) -> Dict[str, Any]:
     """
     统一的主题设置读取函数
+
+    结果缓存在进程内，主题变更或主题文件修改后自动重新加载。
+    返回的字典为共享实例，调用方不应修改。
     
     Args:
         category: 主题类别 ('roi', 'measurement', 'ui')
@@ -115,30 +233,23 @@ def get_theme_settings(category: str, theme_name: str = None) -> Dict[str, Any]:
         包含主题设置的字典
     """
     try:
-        # 如果没有指定主题名称，从设置中获取当前主题
-        if theme_name is None:
-            settings_manager = get_settings_manager()
-            theme_name = settings_manager.get_setting(f'{category}_theme', 'default')
-        
-        # 加载主题文件
-        themes_dir = Path(__file__).parent.parent / "themes" / category
-        theme_file = themes_dir / f"{theme_name}.toml"
-        
-        if theme_file.exists():
-            return toml.load(theme_file)
-        else:
-            # 如果主题文件不存在，尝试加载默认主题
-            default_theme_file = themes_dir / "default.toml"
-            if default_theme_file.exists():
-                return toml.load(default_theme_file)
-            
+        return _get_theme_entry(category, theme_name)[3]
     except Exception as e:
         print(f"加载{category}主题文件失败: {e}")
-    
+
     # 返回空字典作为备用
     return {}
 
 
+def get_theme_resources(category: str, theme_name: str = None) -> ThemeResources:
+    """获取某一类别主题的绘制资源（QColor/QPen/QFont 缓存）"""
+    try:
+        return _get_theme_entry(category, theme_name)[4]
+    except Exception as e:
+        print(f"加载{category}主题文件失败: {e}")
+    return ThemeResources({})
+
+
 class ThemeManager(QObject):
     """主题管理器"""
     
@@ -154,6 +265,9 @@ class ThemeManager(QObject):
         # 当Qt组件被销毁时，弱引用自动失效，不会保留悬空引用
         self._registered_components = weakref.WeakSet()
 
+        # 主题切换时丢弃进程级主题缓存
+        self.theme_changed.connect(lambda _name: invalidate_theme_cache())
+
     def register_component(self, component) -> None:
         """注册需要主题管理的组件
 
@@ -250,6 +364,8 @@ class ThemeManager(QObject):
         
         self.current_theme = theme_name
         self.settings_manager.set_setting('ui_theme', theme_name)
+        # 组件在收到 theme_changed 之前就会重新读取主题，这里先清空缓存
+        invalidate_theme_cache()
         logger.info(f"[ThemeManager.set_theme] 应用全局主题样式")
         self.apply_current_theme()
         
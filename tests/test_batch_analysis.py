@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面批量 ROI 分析测试模块
+"""
+
+import csv
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.batch_analysis import ROITemplate, analyze_series, discover_series, run_batch
+from medimager.core.image_data_model import ImageDataModel
+
+PHANTOM_DIR = project_root / "medimager" / "tests" / "dcm"
+
+TEMPLATE = {
+    "name": "water",
+    "units": "mm",
+    "rois": [
+        {"name": "center", "shape": "circle", "center": [0, 0], "radius": 10},
+        {"name": "band", "shape": "rectangle", "top_left": [-5, -40], "bottom_right": [5, 40],
+         "slice": "middle"},
+    ],
+}
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """批量模板分析测试"""
+
+    def setUp(self):
+        self.series = discover_series([PHANTOM_DIR])
+        self.template = ROITemplate.from_dict(TEMPLATE)
+
+    def test_template_in_physical_units(self):
+        """mm 模板按像素间距换算，统计与直接掩码一致"""
+        files = self.series[0]
+        rows = analyze_series(files, self.template)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_dicom_series(files)
+        slice_count, height, width = model.pixel_array.shape
+        _, row_spacing, col_spacing = model.get_voxel_spacing()
+        self.assertEqual(len(rows), slice_count + 1)
+
+        y, x = np.ogrid[:height, :width]
+        cy, cx = round((height - 1) / 2), round((width - 1) / 2)
+        radius = round(10 / row_spacing)
+        mask = (y - cy) ** 2 + (x - cx) ** 2 <= radius ** 2
+        center = rows[0]
+        self.assertEqual(center["roi"], "center")
+        self.assertEqual(center["count"], int(mask.sum()))
+        self.assertAlmostEqual(center["mean"], float(model.pixel_array[0][mask].mean()), places=4)
+        self.assertAlmostEqual(center["area_mm2"], mask.sum() * row_spacing * col_spacing)
+        self.assertEqual(rows[-1]["slice"], slice_count // 2)
+
+    def test_streamed_outputs(self):
+        """结果流式写入 CSV 与 JSON，并统计吞吐量"""
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "out.csv"
+            summary = run_batch(self.series, self.template, csv_path, workers=0)
+            self.assertEqual(summary.series, len(self.series))
+            self.assertEqual(summary.failed, 0)
+            self.assertGreater(summary.series_per_minute, 0)
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                csv_rows = list(csv.DictReader(f))
+            self.assertEqual(len(csv_rows), summary.rows)
+
+            json_path = Path(tmp) / "out.json"
+            run_batch(self.series, self.template, json_path, workers=0)
+            with open(json_path, encoding="utf-8") as f:
+                json_rows = json.load(f)
+            self.assertEqual([r["roi"] for r in json_rows], [r["roi"] for r in csv_rows])
+
+    def test_invalid_template(self):
+        """模板缺少必要字段时报错"""
+        with self.assertRaises(ValueError):
+            ROITemplate([{"name": "bad", "shape": "circle", "center": [0, 0]}])
+
+
+if __name__ == '__main__':
+    unittest.main()
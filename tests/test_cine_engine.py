@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cine 播放引擎测试模块
+"""
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QApplication
+
+from medimager.core.cine_engine import CineEngine, CineFrameBuffer, cine_frame_key, render_cine_frame
+from medimager.core.image_data_model import ImageDataModel
+
+
+class TestCineFrameBuffer(unittest.TestCase):
+    """帧环形缓冲区测试"""
+
+    def test_capacity_bound(self):
+        """超出容量时淘汰最旧的帧"""
+        buffer = CineFrameBuffer(capacity=3)
+        for i in range(5):
+            buffer.put(i, np.zeros((2, 2), dtype=np.uint8))
+        self.assertEqual(len(buffer), 3)
+        self.assertIsNone(buffer.get(0))
+        self.assertIsNotNone(buffer.get(4))
+
+    def test_frame_key(self):
+        """显示标识不同的缓冲帧视为不存在"""
+        buffer = CineFrameBuffer(capacity=2)
+        frame = np.zeros((2, 2), dtype=np.uint8)
+        buffer.put(0, frame, ("a",))
+        self.assertIs(buffer.get(0, ("a",)), frame)
+        self.assertIsNone(buffer.get(0, ("b",)))
+
+    def test_render_matches_display_pipeline(self):
+        """预渲染帧与静止显示一致（含伪彩色与标签叠加），显示选项或标签变化后标识随之变化"""
+        from medimager.core.region_growing import grow_region
+
+        data = np.linspace(-1000, 1000, 2 * 64, dtype=np.float32).reshape(2, 8, 8)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(data)
+        model.set_window(400, 40)
+        frame = render_cine_frame(model, 1)
+        np.testing.assert_array_equal(frame, model.get_display_slice(1))
+
+        key = cine_frame_key(model, 1)
+        model.set_colormap("hot")
+        self.assertNotEqual(cine_frame_key(model, 1), key)
+        key = cine_frame_key(model, 1)
+        mask = grow_region(data, (1, 0, 0), 0, 100)
+        model.add_label_mask(mask)
+        self.assertNotEqual(cine_frame_key(model, 1), key)
+        frame = render_cine_frame(model, 1)
+        self.assertEqual(frame.dtype, np.uint32)
+        np.testing.assert_array_equal(frame, model.label_volume.blend(model.get_display_slice(1), 1))
+        self.assertFalse(np.array_equal(frame, model.get_display_slice(1)))
+
+
+class TestCineEngine(unittest.TestCase):
+    """Cine 播放测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def _play(self, engine: CineEngine, seconds: float) -> None:
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def test_synchronized_playback(self):
+        """多个视图同步播放，帧按顺序推进"""
+        model_a = ImageDataModel()
+        model_a.load_single_image(np.random.rand(20, 64, 64).astype(np.float32))
+        model_b = ImageDataModel()
+        model_b.load_single_image(np.random.rand(10, 64, 64).astype(np.float32))
+
+        frames = {"a": [], "b": []}
+        engine = CineEngine(buffer_size=8)
+        engine.set_fps(30)
+        engine.frame_ready.connect(lambda view_id, index, frame: frames[view_id].append(index))
+        engine.set_tracks([("a", model_a), ("b", model_b)])
+        self.assertTrue(engine.start())
+        self._play(engine, 0.5)
+        engine.stop()
+
+        self.assertGreater(len(frames["a"]), 5)
+        self.assertEqual(len(frames["a"]), len(frames["b"]))
+        self.assertEqual(frames["a"][:3], [0, 1, 2])
+        stats = engine.get_stats()
+        self.assertEqual(stats.presented_frames, len(frames["a"]))
+        self.assertGreater(stats.achieved_fps, 0)
+
+    def test_no_drops_before_first_frame(self):
+        """首帧渲染完成前的等待不计为丢帧"""
+        model = ImageDataModel()
+        model.load_single_image(np.random.rand(10, 32, 32).astype(np.float32))
+        engine = CineEngine(buffer_size=4)
+        engine.set_fps(30)
+        engine.set_tracks([("a", model)])
+
+        # 阻塞预取任务，让播放时钟空转若干个帧间隔
+        gate = threading.Event()
+        render_task = engine._render_task
+
+        def gated_render(*args):
+            gate.wait(5)
+            render_task(*args)
+
+        engine._render_task = gated_render
+        self.assertTrue(engine.start())
+        self._play(engine, 0.2)
+        self.assertEqual(engine.get_stats().presented_frames, 0)
+        gate.set()
+        end = time.perf_counter() + 5
+        while engine.get_stats().presented_frames == 0 and time.perf_counter() < end:
+            self._play(engine, 0.01)
+        stats = engine.get_stats()
+        engine.stop()
+
+        self.assertGreaterEqual(stats.presented_frames, 1)
+        self.assertEqual(stats.dropped_frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
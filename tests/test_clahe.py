@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应直方图均衡（CLAHE）显示模式测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.clahe import ClaheParams, apply_clahe, clahe_mappings, compute_tile_histograms
+from medimager.core.display_lut import HighlightBand, apply_lut, quantize_slice, window_lut
+from medimager.core.image_data_model import ImageDataModel
+
+
+class TestClahe(unittest.TestCase):
+    """CLAHE 测试"""
+
+    def test_equalization(self):
+        """单图块不限幅时等于全局直方图均衡；图块直方图与逐图块统计一致；插值在图块中心取该图块映射"""
+        rng = np.random.default_rng(0)
+        data = rng.normal(100, 40, (96, 128)).astype(np.int16)
+        quantized = quantize_slice(data)
+        window = window_lut(quantized, 300, 100)
+        gray = apply_lut(quantized, window)
+
+        single = compute_tile_histograms(quantized, (1, 1))
+        equalized = apply_clahe(gray, single, clahe_mappings(single, window, 0))
+        cdf = np.cumsum(np.bincount(gray.ravel(), minlength=256)) / gray.size * 255
+        np.testing.assert_array_equal(equalized, np.rint(cdf[gray]).astype(np.uint8))
+
+        histograms = compute_tile_histograms(quantized, (4, 4))
+        self.assertEqual(histograms.tile_shape, (24, 32))
+        tile = quantized.index[24:48, 64:96]
+        np.testing.assert_array_equal(histograms.counts[1 * 4 + 2],
+                                      np.bincount(tile.ravel(), minlength=histograms.counts.shape[1]))
+
+        mappings = clahe_mappings(histograms, window, 2.0)
+        result = apply_clahe(gray, histograms, mappings)
+        # 图块 (1, 2) 中心附近的像素基本取该图块的映射
+        row, col = 35, 79
+        self.assertLessEqual(abs(int(result[row, col]) - round(mappings[6, gray[row, col]])), 1)
+
+    def test_model_reuses_histograms_across_window_level(self):
+        """窗宽窗位变化时复用图块直方图；CLAHE 帧可与 HU 高亮组合；关闭后恢复普通显示"""
+        rng = np.random.default_rng(1)
+        volume = rng.integers(0, 1000, (2, 64, 64)).astype(np.int16)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(volume)
+        plain = model.get_display_slice(0)
+        width, level = model.window_width, model.window_level
+
+        model.set_clahe(ClaheParams(clip_limit=3.0, grid=(4, 4)))
+        model.set_window(800, 500)
+        first = model.get_display_slice(0)
+        histograms = model.get_tile_histograms(0)
+        model.set_window(600, 400)
+        second = model.get_display_slice(0)
+        self.assertIs(model.get_tile_histograms(0), histograms)
+        self.assertEqual(first.dtype, np.uint8)
+        self.assertFalse(np.array_equal(first, second))
+
+        model.set_highlight_band(HighlightBand(900, 1000, (255, 0, 0), 1.0))
+        tinted = model.get_display_slice(0)
+        self.assertEqual(tinted.dtype, np.uint32)
+        inside = volume[0] >= 900
+        np.testing.assert_array_equal(tinted[inside], np.uint32(0xFFFF0000))
+        np.testing.assert_array_equal(tinted[~inside] & 0xFF, second[~inside])
+
+        model.set_highlight_band(None)
+        model.set_clahe(None)
+        model.set_window(width, level)
+        np.testing.assert_array_equal(model.get_display_slice(0), plain)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+等值线提取测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.analysis import sample_bilinear
+from medimager.core.contours import find_contours, simplify_contours
+
+
+def signed_area(contour):
+    x, y = contour[:, 0], contour[:, 1]
+    return 0.5 * float((x * np.roll(y, -1) - np.roll(x, -1) * y).sum())
+
+
+class TestContours(unittest.TestCase):
+    """marching squares 轮廓测试"""
+
+    def test_mask_outlines_closed_and_oriented(self):
+        """掩码轮廓闭合、面积与像素数一致，孔洞方向相反，贴边区域的边界在像素边缘"""
+        mask = np.zeros((40, 40), dtype=bool)
+        mask[0:30, 5:35] = True
+        mask[10:20, 15:25] = False
+        contours = find_contours(mask, 0.5)
+        self.assertEqual(len(contours), 2)
+        for contour in contours:
+            steps = np.hypot(*np.diff(np.vstack([contour, contour[:1]]), axis=0).T)
+            self.assertTrue((steps <= 1.0 + 1e-6).all())
+        areas = sorted(signed_area(c) for c in contours)
+        self.assertLess(areas[0] * areas[1], 0)
+        # 四个角各被切去 1/8 像素
+        self.assertAlmostEqual(abs(areas[0]), 30 * 30 - 0.5, places=4)
+        self.assertAlmostEqual(abs(areas[1]), 10 * 10 - 0.5, places=4)
+        self.assertAlmostEqual(float(np.vstack(contours)[:, 1].min()), -0.5, places=5)
+
+    def test_iso_level_points_on_level(self):
+        """平滑场的等值线顶点处插值结果等于等值"""
+        y, x = np.mgrid[:64, :64]
+        field = (np.hypot(y - 30.3, x - 33.7) * -10.0).astype(np.float32)
+        contours = find_contours(field, -150.0)
+        self.assertEqual(len(contours), 1)
+        points = contours[0]
+        values = sample_bilinear(field, points[:, 1], points[:, 0])
+        np.testing.assert_allclose(values, -150.0, atol=1e-3)
+        self.assertAlmostEqual(abs(signed_area(points)), np.pi * 15 ** 2, delta=2.0)
+
+    def test_simplify(self):
+        """简化去掉共线顶点，容差内删除的顶点不明显改变形状"""
+        mask = np.zeros((50, 50), dtype=bool)
+        mask[10:40, 10:40] = True
+        contour = find_contours(mask, 0.5)
+        simplified = simplify_contours(contour, tolerance=0.0)
+        self.assertEqual(len(simplified[0]), 8)
+        y, x = np.ogrid[:120, :120]
+        disk = find_contours((y - 60) ** 2 + (x - 60) ** 2 <= 45 ** 2, 0.5)
+        reduced = simplify_contours(disk, tolerance=0.3)
+        self.assertLess(len(reduced[0]), len(disk[0]) / 2)
+        self.assertAlmostEqual(signed_area(reduced[0]), signed_area(disk[0]), delta=15.0)
+        self.assertEqual(find_contours(np.zeros((5, 5)), 0.5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+显示滤波（可分离高斯、反锐化掩模、可分离中值）测试模块
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.display_filters import (
+    DisplayFilter, apply_display_filter, gaussian_kernel, gaussian_smooth, scaled_display_filter, separable_median
+)
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.tile_pyramid import TilePyramid
+from medimager.utils.settings import get_performance_manager
+
+
+class TestDisplayFilters(unittest.TestCase):
+    """显示滤波测试"""
+
+    def test_filters(self):
+        """可分离高斯等于二维卷积；反锐化掩模在边缘处过冲；可分离中值去除孤立噪点"""
+        rng = np.random.default_rng(0)
+        data = rng.normal(0, 100, (20, 24)).astype(np.float32)
+        kernel = gaussian_kernel(1.2)
+        radius = len(kernel) // 2
+        padded = np.pad(data, radius, mode='reflect')
+        expected = np.zeros_like(data)
+        for dy, wy in enumerate(kernel):
+            for dx, wx in enumerate(kernel):
+                expected += wy * wx * padded[dy:dy + data.shape[0], dx:dx + data.shape[1]]
+        np.testing.assert_allclose(gaussian_smooth(data, 1.2), expected, atol=1e-3)
+
+        step = np.zeros((16, 16), dtype=np.int16)
+        step[:, 8:] = 100
+        sharpened = apply_display_filter(step, DisplayFilter("unsharp", sigma=1.0, amount=1.0))
+        self.assertEqual(sharpened.dtype, np.int16)
+        self.assertGreater(sharpened.max(), 100)
+        self.assertLess(sharpened.min(), 0)
+        np.testing.assert_array_equal(sharpened[:, :4], 0)
+
+        noisy = np.full((10, 10), 50, dtype=np.int16)
+        noisy[3, 4] = 3000
+        noisy[7, 1] = -1000
+        np.testing.assert_array_equal(separable_median(noisy, 3), 50)
+
+    def test_model_filtered_display_and_prefetch(self):
+        """滤波在窗宽窗位之前进行并按 (切片, 参数) 缓存；相邻切片在后台预取"""
+        rng = np.random.default_rng(1)
+        volume = rng.integers(-200, 300, (8, 32, 32)).astype(np.int16)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(volume)
+        plain = model.get_display_slice(4)
+
+        smooth = DisplayFilter("gaussian", sigma=1.5)
+        model.set_display_filter(smooth)
+        expected = model.apply_window_level(apply_display_filter(volume[4], smooth))
+        np.testing.assert_array_equal(model.get_display_slice(4), expected)
+
+        perf = get_performance_manager()
+        keys = [model._filtered_cache_key(z, smooth) for z in (2, 3, 5, 6)]
+        deadline = time.time() + 10
+        while time.time() < deadline and any(perf.get_from_cache(k) is None for k in keys):
+            time.sleep(0.01)
+        for z, key in zip((2, 3, 5, 6), keys):
+            np.testing.assert_array_equal(perf.get_from_cache(key), apply_display_filter(volume[z], smooth))
+
+        model.set_display_filter(DisplayFilter("median"))
+        self.assertFalse(np.array_equal(model.get_display_slice(4), expected))
+        model.set_display_filter(None)
+        np.testing.assert_array_equal(model.get_display_slice(4), plain)
+
+    def test_pyramid_tiles_without_seams(self):
+        """图块带周边像素滤波，拼接结果与整幅滤波一致；粗层级按全分辨率像素换算参数"""
+        rng = np.random.default_rng(2)
+        volume = rng.integers(-200, 300, (1, 80, 96)).astype(np.int16)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(volume)
+        pyramid = TilePyramid(volume[0], tile_size=16)
+        self.assertEqual(scaled_display_filter(DisplayFilter("gaussian", sigma=2.0), 2).sigma, 1.0)
+        self.assertEqual(scaled_display_filter(DisplayFilter("median", size=7), 2).size, 3)
+
+        for display_filter in (DisplayFilter("unsharp", sigma=1.5), DisplayFilter("median", size=5)):
+            model.set_display_filter(display_filter)
+            for level in (0, 1):
+                data = pyramid.level_data(level)
+                expected = model.apply_window_level(
+                    apply_display_filter(data, scaled_display_filter(display_filter, 1 << level)))
+                mosaic = np.zeros_like(expected)
+                for ty in range(-(-data.shape[0] // 16)):
+                    for tx in range(-(-data.shape[1] // 16)):
+                        x, y = pyramid.tile_rect(level, tx, ty)[:2]
+                        mosaic[ty * 16:(ty + 1) * 16, tx * 16:(tx + 1) * 16] = model.apply_display_lut(
+                            pyramid.tile_data(level, tx, ty), level, x, y, slice_index=0)
+                np.testing.assert_array_equal(mosaic, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+显示查找表（窗宽窗位、HU 高亮与伪彩色）测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pydicom
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.colormaps import COLORMAP_NAMES, DICOM_PALETTE, get_colormap
+from medimager.core.display_lut import HighlightBand, quantize_slice, display_lut, apply_lut
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.label_mask import LabelMask
+
+
+class TestDisplayLUT(unittest.TestCase):
+    """显示查找表测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.volume = rng.integers(-1024, 2000, (3, 64, 80)).astype(np.int16)
+        self.model = ImageDataModel(auto_histogram=False)
+        self.model.load_single_image(self.volume)
+
+    def test_lut_matches_window_level(self):
+        """整数数据查表结果与逐像素窗宽窗位完全一致；非整数数据误差不超过 1 个灰度级"""
+        for width, level in ((400, 40), (1500, -600), (1, 0), (2000, 600)):
+            self.model.set_window(width, level)
+            expected = self.model.apply_window_level(self.volume[1])
+            np.testing.assert_array_equal(self.model.get_display_slice(1), expected)
+
+        data = np.random.default_rng(1).normal(0, 300, (50, 50)).astype(np.float32)
+        quantized = quantize_slice(data)
+        self.assertEqual(quantized.index.dtype, np.uint16)
+        self.model.set_window(400, 40)
+        diff = apply_lut(quantized, display_lut(quantized, 400, 40)).astype(int) \
+            - self.model.apply_window_level(data).astype(int)
+        self.assertLessEqual(np.abs(diff).max(), 1)
+
+    def test_highlight_band_tints_only_band(self):
+        """高亮区间内的像素按不透明度与高亮色混合，区间外保持灰度；量化切片在窗宽窗位变化间复用"""
+        model = self.model
+        model.set_window(400, 40)
+        quantized = model.get_quantized_slice(0)
+        gray = model.get_display_slice(0)
+
+        band = HighlightBand(300, 3000, (255, 0, 0), 0.5)
+        model.set_highlight_band(band)
+        frame = model.get_display_slice(0)
+        self.assertEqual(frame.dtype, np.uint32)
+        red, green = (frame >> 16) & 0xFF, (frame >> 8) & 0xFF
+        inside = (self.volume[0] >= 300) & (self.volume[0] <= 3000)
+        np.testing.assert_array_equal(green[~inside], gray[~inside])
+        np.testing.assert_array_equal(red[~inside], gray[~inside])
+        expected_red = np.rint(gray[inside] * 0.5 + 127.5).astype(int)
+        np.testing.assert_array_equal(red[inside], expected_red)
+        np.testing.assert_array_equal(green[inside], np.rint(gray[inside] * 0.5).astype(int))
+
+        model.set_window(2000, 600)
+        model.get_display_slice(0)
+        self.assertIs(model.get_quantized_slice(0), quantized)
+
+        model.set_highlight_band(None)
+        self.assertEqual(model.get_display_slice(0).dtype, np.uint8)
+
+    def test_labels_blend_on_tinted_frame(self):
+        """标签叠加到高亮后的 ARGB32 帧上，只改变有标签的像素"""
+        model = self.model
+        mask = LabelMask(self.volume.shape, [0] * 10, np.arange(10), [5] * 10, [15] * 10, color=(0, 0, 255))
+        model.add_label_mask(mask)
+        model.set_highlight_band(HighlightBand(300, 3000, (255, 0, 0), 0.5))
+        frame = model.get_display_slice(0)
+        blended = model.label_volume.blend(frame, 0)
+        labeled = model.label_volume.get_slice(0) != 0
+        np.testing.assert_array_equal(blended[~labeled], frame[~labeled])
+        blue = blended[labeled] & 0xFF
+        self.assertTrue(((blue >= (frame[labeled] & 0xFF))).all())
+        self.assertTrue((blended[labeled] != frame[labeled]).any())
+
+    def test_colormap_palette(self):
+        """伪彩色帧等于灰度帧经调色板映射；文件自带调色板颜色查找表重采样为 256 项"""
+        model = self.model
+        gray = model.get_display_slice(2)
+        for name, _ in COLORMAP_NAMES:
+            palette = get_colormap(name)
+            self.assertEqual(palette.shape, (256, 3))
+            model.set_colormap(name)
+            frame = model.get_display_slice(2)
+            rgb = np.stack([(frame >> 16) & 0xFF, (frame >> 8) & 0xFF, frame & 0xFF], axis=-1)
+            np.testing.assert_array_equal(rgb, palette[gray])
+
+        ds = pydicom.Dataset()
+        for channel, values in (("Red", np.arange(512) // 2), ("Green", 511 - np.arange(512)),
+                                ("Blue", np.zeros(512))):
+            setattr(ds, f"{channel}PaletteColorLookupTableDescriptor", [512, 0, 16])
+            setattr(ds, f"{channel}PaletteColorLookupTableData",
+                    (values.astype('<u2') * 128).tobytes())
+        model.dicom_files = [ds]
+        palette = model.get_dicom_palette()
+        self.assertEqual(palette.shape, (256, 3))
+        self.assertEqual(palette[0].tolist(), [0, 255, 0])
+        self.assertEqual(palette[-1].tolist(), [127, 0, 0])
+        model.set_colormap(DICOM_PALETTE)
+        self.assertEqual(model.get_display_slice(2).dtype, np.uint32)
+        lut = model.get_display_lut(model.get_quantized_slice(2))
+        model.set_colormap(None)
+        np.testing.assert_array_equal(model.get_display_slice(2), gray)
+
+        # 换入量化范围相同、调色板不同的序列数据时不复用旧的调色板查找表
+        model.pixel_array = self.volume.copy()
+        reversed_ds = pydicom.Dataset()
+        for channel in ("Red", "Green", "Blue"):
+            for suffix in ("Descriptor", "Data"):
+                name = f"{channel}PaletteColorLookupTable{suffix}"
+                setattr(reversed_ds, name, getattr(ds, name))
+        reversed_ds.RedPaletteColorLookupTableData = ds.GreenPaletteColorLookupTableData
+        reversed_ds.GreenPaletteColorLookupTableData = ds.RedPaletteColorLookupTableData
+        model.dicom_files = [reversed_ds]
+        model.set_colormap(DICOM_PALETTE)
+        reloaded = model.get_display_lut(model.get_quantized_slice(2))
+        self.assertFalse(np.array_equal(reloaded, lut))
+
+
+if __name__ == '__main__':
+    unittest.main()
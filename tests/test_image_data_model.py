@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图像数据模型测试模块
+"""
+
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.tile_pyramid import TilePyramid
+from medimager.core.histogram import compute_volume_histogram
+
+
+class TestInteractivePreview(unittest.TestCase):
+    """交互式降分辨率预览测试"""
+
+    def test_small_image_not_downsampled(self):
+        """小图像不使用预览"""
+        model = ImageDataModel()
+        model.load_single_image(np.zeros((512, 512), dtype=np.float32))
+        model.set_interactive_preview(True)
+        display, scale = model.get_display_slice_for_view()
+        self.assertEqual(scale, 1)
+        self.assertEqual(display.shape, (512, 512))
+
+    def test_large_image_preview(self):
+        """大图像拖动时窗宽窗位作用于降采样副本"""
+        model = ImageDataModel()
+        model.load_single_image(np.random.rand(3072, 3072).astype(np.float32))
+        self.assertEqual(model.get_preview_factor(), 4)
+
+        model.set_interactive_preview(True)
+        display, scale = model.get_display_slice_for_view()
+        self.assertEqual(scale, 4)
+        self.assertEqual(display.shape, (768, 768))
+
+        model.set_interactive_preview(False)
+        display, scale = model.get_display_slice_for_view()
+        self.assertEqual(scale, 1)
+        self.assertEqual(display.shape, (3072, 3072))
+
+
+class TestTiledDisplay(unittest.TestCase):
+    """超大图像分块显示测试"""
+
+    def test_pyramid_tiles(self):
+        """图块覆盖范围与层级选择"""
+        data = np.arange(1000 * 1300, dtype=np.float32).reshape(1000, 1300)
+        pyramid = TilePyramid(data, tile_size=256)
+        self.assertEqual(pyramid.level_count, 4)
+        self.assertEqual(pyramid.level_for_scale(2.0), 0)
+        self.assertEqual(pyramid.level_for_scale(0.3), 1)
+        self.assertEqual(pyramid.level_for_scale(0.01), 3)
+
+        # 视口只覆盖左上角时只枚举对应图块
+        self.assertEqual(list(pyramid.tiles_in_rect(0, 0, 0, 300, 200)), [(0, 0), (1, 0)])
+        self.assertEqual(pyramid.tile_rect(1, 2, 1), (1024, 512, 276, 488))
+
+        tile = pyramid.tile_data(1, 1, 0)
+        self.assertEqual(tile.shape, (256, 256))
+        self.assertEqual(tile[0, 0], data[0, 512])
+        self.assertEqual(tile[1, 1], data[2, 514])
+
+    def test_large_image_uses_overview(self):
+        """超大图像只窗宽窗位映射降采样概览"""
+        model = ImageDataModel()
+        model.load_single_image(np.zeros((4096, 4096), dtype=np.float32))
+        self.assertTrue(model.use_tiled_display())
+        display, scale = model.get_display_slice_for_view()
+        self.assertEqual(scale, model.get_preview_factor())
+        self.assertEqual(display.shape, (683, 683))
+        self.assertEqual(model.get_tile_pyramid().width, 4096)
+
+    def test_tiles_blend_labels(self):
+        """全分辨率与粗层级图块叠加与位置对应的标签，颜色与概览图一致"""
+        from medimager.core.label_mask import LabelMask
+
+        model = ImageDataModel()
+        model.load_single_image(np.zeros((4096, 4096), dtype=np.float32))
+        rows = np.arange(1000, 1100)
+        model.add_label_mask(LabelMask((1, 4096, 4096), np.zeros_like(rows), rows,
+                                       np.full_like(rows, 1500), np.full_like(rows, 1700)))
+        overview, factor = model.get_display_slice_for_view()
+        overview = model.label_volume.blend(overview, 0, factor)
+        tinted = overview[1002 // factor, 1602 // factor]
+        self.assertNotEqual((tinted >> 16) & 0xFF, (tinted >> 8) & 0xFF)
+
+        pyramid = model.get_tile_pyramid()
+        x, y = pyramid.tile_rect(0, 2, 1)[:2]
+        plain = model.apply_display_lut(pyramid.tile_data(0, 2, 1), 0, x, y)
+        tile = model.apply_display_lut(pyramid.tile_data(0, 2, 1), 0, x, y, slice_index=0)
+        labeled = model.label_volume.get_slice(0)[y:y + 512, x:x + 512] != 0
+        self.assertTrue(labeled.any())
+        self.assertTrue((tile[labeled] == tinted).all())
+        np.testing.assert_array_equal(tile[~labeled] & 0xFF, plain[~labeled])
+
+        x, y = pyramid.tile_rect(1, 1, 0)[:2]
+        tile = model.apply_display_lut(pyramid.tile_data(1, 1, 0), 1, x, y, slice_index=0)
+        self.assertEqual(tile[(1002 - y) // 2, (1602 - x) // 2], tinted)
+        self.assertEqual(tile[(900 - y) // 2, (1602 - x) // 2] & 0xFF, plain[0, 0])
+
+
+
+class TestHistogramWindowLevel(unittest.TestCase):
+    """基于直方图的自动窗宽窗位测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.volume = rng.normal(0, 300, (6, 128, 128)).astype(np.int16)
+
+    def test_percentile_lookup(self):
+        """整数数据按单位分箱，百分位与 np.percentile 一致"""
+        histogram = compute_volume_histogram(self.volume)
+        self.assertEqual(histogram.bin_width, 1.0)
+        self.assertEqual(histogram.slice_total, 6)
+        self.assertEqual(int(histogram.counts.sum()), self.volume.size)
+        for q in (2, 50, 98):
+            self.assertAlmostEqual(histogram.percentile(q), np.percentile(self.volume, q), delta=1.0)
+            self.assertAlmostEqual(histogram.percentile(q, slice_index=3),
+                                   np.percentile(self.volume[3], q), delta=1.0)
+
+    def test_model_auto_window(self):
+        """模型在后台计算直方图，并据此计算整体与单切片窗宽窗位"""
+        model = ImageDataModel()
+        model.load_single_image(self.volume)
+        self.assertIsNotNone(model.get_histogram(wait=True))
+
+        p2, p98 = np.percentile(self.volume, [2, 98])
+        width, level = model.auto_window_level()
+        self.assertAlmostEqual(width, p98 - p2, delta=2)
+        self.assertAlmostEqual(model.window_width, p98 - p2, delta=2)
+
+        p2, p98 = np.percentile(self.volume[2].astype(np.float32) * 3, [2, 98])
+        model.load_single_image(self.volume.astype(np.float32) * 3)
+        width, level = model.auto_window_level(slice_index=2)
+        self.assertAlmostEqual(width, p98 - p2, delta=(p98 - p2) * 0.01)
+
+
+class TestConcurrentDisplay(unittest.TestCase):
+    """多线程渲染测试"""
+
+    def test_parallel_render_shares_caches(self):
+        """多个线程同时渲染同一模型的切片，缓存淘汰频繁时结果仍与串行渲染一致"""
+        rng = np.random.default_rng(2)
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(rng.integers(-1000, 1000, (12, 48, 48)).astype(np.int16))
+        model.QUANTIZED_CACHE_SLICES = 2
+        expected = [model.apply_window_level(model.get_slice_data(i)) for i in range(12)]
+
+        indices = [i % 12 for i in range(240)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            frames = list(pool.map(model.get_display_slice, indices))
+        for index, frame in zip(indices, frames):
+            np.testing.assert_array_equal(frame, expected[index])
+        self.assertLessEqual(len(model._quantized_cache), 2)
+
+
+
+class TestDisplayCache(unittest.TestCase):
+    """显示缓存失效测试"""
+
+    def test_reload_invalidates_display_cache(self):
+        """同一模型重新载入不同数据后，窗宽窗位不变也不复用旧的显示帧"""
+        model = ImageDataModel(auto_histogram=False)
+        model.load_single_image(np.zeros((2, 8, 8), dtype=np.int16))
+        model.set_window(400, 40)
+        first = model.get_display_slice(0)
+        model.load_single_image(np.full((2, 8, 8), 1000, dtype=np.int16))
+        model.set_window(400, 40)
+        self.assertFalse(np.array_equal(model.get_display_slice(0), first))
+        np.testing.assert_array_equal(model.get_display_slice(0), model.render_display_frame(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
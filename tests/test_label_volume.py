@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签体数据（游程编码标签图层）测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.label_volume import LabelVolume, decode_slice, encode_slice
+from medimager.core.region_growing import grow_region
+
+
+class TestLabelVolume(unittest.TestCase):
+    """标签体数据测试"""
+
+    def test_encode_decode_roundtrip(self):
+        """任意标签切片编码后解码不变，空切片不占存储"""
+        rng = np.random.default_rng(0)
+        labels = (rng.random((37, 53)) < 0.3) * rng.integers(1, 256, (37, 53))
+        labels = labels.astype(np.uint8)
+        np.testing.assert_array_equal(decode_slice(encode_slice(labels), labels.shape), labels)
+        self.assertIsNone(encode_slice(np.zeros((8, 8), dtype=np.uint8)))
+
+    def test_sparse_memory_and_dirty_tracking(self):
+        """大体数据上的稀疏掩码内存很小；编辑只标记脏切片，换出缓存时才重新编码"""
+        volume = LabelVolume((500, 512, 512), cache_slices=2)
+        mask = np.ones((40, 40), dtype=bool)
+        for slice_index in (10, 11, 12, 13):
+            volume.paint_mask(slice_index, mask, 3, offset=(100, 200))
+        self.assertEqual(volume.take_dirty_slices(), {10, 11, 12, 13})
+        self.assertEqual(volume.take_dirty_slices(), set())
+        volume.flush()
+        self.assertEqual(volume.labeled_slices(), [10, 11, 12, 13])
+        # 只有两个解码缓存切片，其余按游程存储
+        self.assertLess(volume.memory_bytes(), 2 * 512 * 512 + 4 * 40 * 9 + 1024)
+        self.assertEqual(int((volume.get_slice(10) == 3).sum()), 1600)
+        self.assertFalse(volume.has_labels(9))
+
+        version = volume.slice_version(12)
+        volume.erase_label(3, [12])
+        self.assertGreater(volume.slice_version(12), version)
+        self.assertFalse(volume.has_labels(12))
+
+    def test_palette_blend(self):
+        """调色板查找表一次索引得到叠加后的 ARGB32 帧，无标签的切片原样返回灰度帧"""
+        volume = LabelVolume((2, 4, 4))
+        volume.set_label_color(1, (255, 0, 0), opacity=0.5)
+        volume.paint_mask(0, np.eye(4, dtype=bool), 1)
+        gray = np.full((4, 4), 100, dtype=np.uint8)
+        frame = volume.blend(gray, 0)
+        self.assertEqual(frame.dtype, np.uint32)
+        self.assertEqual(int(frame[0, 0]), 0xFF000000 | (178 << 16) | (50 << 8) | 50)
+        self.assertEqual(int(frame[0, 1]), 0xFF646464)
+        self.assertIs(volume.blend(gray, 1), gray)
+        # 降采样帧按步长取标签
+        self.assertEqual(volume.blend(gray[::2, ::2], 0, scale=2).shape, (2, 2))
+
+    def test_label_masks_share_layer(self):
+        """区域生长掩码写入模型的标签图层，删除后恢复被覆盖的掩码"""
+        model = ImageDataModel(auto_histogram=False)
+        image = np.zeros((3, 32, 32), dtype=np.float32)
+        image[:, 4:20, 4:20] = 100
+        model.load_single_image(image)
+        big = grow_region(model.pixel_array, (1, 10, 10), 50, 150)
+        small = grow_region(model.pixel_array, (1, 10, 10), 50, 150, three_d=False)
+        model.add_label_mask(big)
+        model.add_label_mask(small)
+        labels = model.label_volume
+        self.assertEqual(int((labels.get_slice(1) == small.label).sum()), 256)
+        self.assertEqual(int((labels.get_slice(0) == big.label).sum()), 256)
+        model.remove_label_mask(small.id)
+        self.assertEqual(int((labels.get_slice(1) == big.label).sum()), 256)
+        model.remove_label_mask(big.id)
+        self.assertEqual(labels.labeled_slices(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
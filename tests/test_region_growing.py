@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+区域生长与标签掩码测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.region_growing import CHUNK_SLICES, MAX_FRONTIER_ROUNDS, grow_region
+
+
+def reference_region(volume, seed, lower, upper):
+    """逐轮膨胀得到的 6 邻域连通区域（用于校验）"""
+    band = (volume >= lower) & (volume <= upper)
+    region = np.zeros_like(band)
+    region[seed] = True
+    while True:
+        grown = region.copy()
+        for axis in range(3):
+            grown |= np.roll(region, 1, axis) & (np.arange(volume.shape[axis]) > 0).reshape(
+                [-1 if a == axis else 1 for a in range(3)])
+            grown |= np.roll(region, -1, axis) & (np.arange(volume.shape[axis]) < volume.shape[axis] - 1).reshape(
+                [-1 if a == axis else 1 for a in range(3)])
+        grown &= band
+        if (grown == region).all():
+            return region
+        region = grown
+
+
+class TestRegionGrowing(unittest.TestCase):
+    """区域生长测试"""
+
+    def test_matches_reference_flood_fill(self):
+        """随机体数据上与逐体素膨胀结果一致"""
+        rng = np.random.default_rng(7)
+        volume = rng.random((6, 20, 24))
+        seed = tuple(int(v) for v in np.argwhere(volume < 0.6)[17])
+        mask = grow_region(volume, seed, 0.0, 0.6)
+        expected = reference_region(volume, seed, 0.0, 0.6)
+        decoded = np.stack([mask.get_slice_mask(z) for z in range(volume.shape[0])])
+        np.testing.assert_array_equal(decoded, expected)
+        self.assertEqual(mask.voxel_count, int(expected.sum()))
+
+    def test_2d_and_3d_growth_across_chunks(self):
+        """三维生长跨越多个切片块且不越过区间外的体素，二维生长只在种子切片"""
+        depth = CHUNK_SLICES * 3 + 5
+        volume = np.full((depth, 32, 32), -1000.0, dtype=np.float32)
+        volume[2:depth - 2, 8:24, 8:24] = 40.0
+        volume[:, 0:4, 0:4] = 40.0  # 不连通的区域
+        mask = grow_region(volume, (depth - 5, 10, 10), 0, 100)
+        self.assertEqual(mask.voxel_count, (depth - 4) * 16 * 16)
+        self.assertEqual(mask.slice_range(), (2, depth - 3))
+        self.assertEqual(mask.bounds(), (2, depth - 3, 8, 23, 8, 23))
+        self.assertFalse(mask.contains(10, 1, 1))
+
+        flat = grow_region(volume, (10, 10, 10), 0, 100, three_d=False)
+        self.assertEqual(flat.voxel_count, 16 * 16)
+        self.assertEqual(flat.slice_range(), (10, 10))
+        self.assertIsNone(grow_region(volume, (0, 10, 10), 0, 100))
+
+    def test_fragmented_region_bounded_rounds(self):
+        """蛇形走廊超过前沿轮数上限后改用连通分量标号，结果不变；三维生长跨切片块时同样适用；可取消"""
+        def serpentine(height, width):
+            # 每列是一条纵向走廊，相邻走廊交替在顶部/底部连通
+            image = np.zeros((height, width), dtype=np.float32)
+            image[:, 0::2] = 100
+            for col in range(1, width, 2):
+                image[0 if (col // 2) % 2 else height - 1, col] = 100
+            return image
+
+        volume = serpentine(MAX_FRONTIER_ROUNDS + 32, 96)[None]
+        mask = grow_region(volume, (0, 0, 0), 50, 150, three_d=False)
+        self.assertEqual(mask.voxel_count, int((volume > 50).sum()))
+
+        stack = np.repeat(serpentine(MAX_FRONTIER_ROUNDS + 8, 9)[None], CHUNK_SLICES * 2 + 3, axis=0)
+        stack[:, 1, 1] = 100  # 不连通的体素
+        seed = (len(stack) - 1, 0, 0)
+        np.testing.assert_array_equal(
+            np.stack([grow_region(stack, seed, 50, 150).get_slice_mask(z) for z in range(len(stack))]),
+            reference_region(stack, seed, 50, 150))
+
+        self.assertIsNone(grow_region(volume, (0, 0, 0), 50, 150, three_d=False, is_cancelled=lambda: True))
+
+    def test_label_mask_in_model(self):
+        """标签掩码作为模型标注保存，体积按像素间距与层间距换算为 mL"""
+        model = ImageDataModel(auto_histogram=False)
+        volume = np.zeros((10, 40, 40), dtype=np.float32)
+        volume[:, 5:15, 5:15] = 300.0
+        model.load_single_image(volume, {'Pixel Spacing': [0.5, 0.5], 'Slice Thickness': 2.0})
+        added = []
+        model.label_mask_added.connect(added.append)
+        mask = grow_region(model.pixel_array, (3, 10, 10), 200, 400)
+        model.add_label_mask(mask)
+        self.assertEqual(added, [mask])
+        self.assertAlmostEqual(model.get_label_mask_volume_ml(mask), 1000 * 0.5 * 0.5 * 2.0 / 1000)
+        self.assertEqual(model.get_label_masks_for_slice(9), [mask])
+        self.assertTrue(model.remove_label_mask(mask.id))
+        self.assertEqual(model.label_masks, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,626 @@
-# ROI 模块的单元测试 
\ No newline at end of file
+# ROI 模块的单元测试
+"""
+ROI 统计相关测试
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.roi import CircleROI, EllipseROI, RectangleROI
+from medimager.core.volume_roi import CylinderROI, EllipsoidROI
+from medimager.core.roi_table import ROITable
+from medimager.core.analysis import (
+    calculate_roi_statistics, calculate_batch_roi_statistics, calculate_volume_roi_statistics,
+    calculate_table_statistics, calculate_line_profile, calculate_time_intensity_curve
+)
+
+
+class TestROIStatisticsCache(unittest.TestCase):
+    """ROI 统计缓存测试"""
+
+    def setUp(self):
+        self.model = ImageDataModel()
+        self.model.load_single_image(np.arange(64 * 64, dtype=np.float32).reshape(1, 64, 64))
+        self.roi = RectangleROI((10, 10), (20, 20), 0)
+        self.model.add_roi(self.roi)
+
+    def test_geometry_change_invalidates(self):
+        """几何变化后统计过期，重新计算后与直接计算一致"""
+        cache = self.model.roi_statistics
+        self.assertEqual(cache.peek(self.model, self.roi), (None, False))
+
+        stats = cache.get(self.model, self.roi)
+        self.assertEqual(stats, calculate_roi_statistics(self.model, self.roi))
+        self.assertIs(cache.peek(self.model, self.roi)[0], stats)
+        self.assertTrue(cache.peek(self.model, self.roi)[1])
+
+        self.roi.move(5, 0)
+        stale, fresh = cache.peek(self.model, self.roi)
+        self.assertIs(stale, stats)
+        self.assertFalse(fresh)
+        self.assertEqual(cache.get(self.model, self.roi)['mean'], stats['mean'] + 5 * 64)
+
+    def test_data_change_invalidates(self):
+        """像素数据替换后统计过期"""
+        circle = CircleROI((32, 32), 5, 0)
+        cache = self.model.roi_statistics
+        cache.get(self.model, circle)
+        self.model.pixel_array = self.model.pixel_array * 2
+        self.assertFalse(cache.peek(self.model, circle)[1])
+        self.assertEqual(cache.get(self.model, circle), calculate_roi_statistics(self.model, circle))
+
+    def test_live_statistics_table(self):
+        """编辑中的 ROI 经行前缀和表计算，与直接计算一致"""
+        rng = np.random.default_rng(0)
+        self.model.load_single_image(rng.normal(40, 300, (1, 300, 280)).astype(np.int16))
+        self.assertIsNotNone(self.model.roi_statistics.get_table(self.model, 0, wait=True))
+        for roi in (CircleROI((150, 140), 90, 0), EllipseROI((20, 270), 60, 25, 0),
+                    RectangleROI((0, 3), (299, 100), 0), CircleROI((5, 5), 0, 0)):
+            cache = self.model.roi_statistics
+            cache.get(self.model, roi)
+            roi.move(3, -2)
+            stats = cache.get(self.model, roi)
+            expected = calculate_roi_statistics(self.model, roi)
+            self.assertEqual(stats['count'], expected['count'])
+            self.assertEqual((stats['min'], stats['max']), (expected['min'], expected['max']))
+            self.assertAlmostEqual(stats['mean'], expected['mean'], places=6)
+            self.assertAlmostEqual(stats['std'], expected['std'], places=4)
+        self.assertEqual(len(cache._tables), 1)
+
+    def test_live_statistics_before_table_ready(self):
+        """统计表在后台构建完成前按像素精确计算；统计表总像素数受限"""
+        from concurrent.futures import Future
+        from medimager.core.analysis import SliceStatisticsTable
+
+        rng = np.random.default_rng(2)
+        self.model.load_single_image(rng.normal(40, 300, (2, 120, 100)).astype(np.int16))
+        cache = self.model.roi_statistics
+        pending = Future()
+        cache._submit_table_build = lambda data: pending
+        roi = CircleROI((60, 50), 30, 0)
+        cache.get(self.model, roi)
+        roi.move(2, 2)
+        self.assertEqual(cache.get(self.model, roi), calculate_roi_statistics(self.model, roi))
+        self.assertEqual(len(cache._tables), 0)
+
+        pending.set_result(SliceStatisticsTable(self.model.get_slice_data(0)))
+        roi.move(2, 2)
+        stats = cache.get(self.model, roi)
+        self.assertEqual(len(cache._tables), 1)
+        self.assertAlmostEqual(stats['mean'], calculate_roi_statistics(self.model, roi)['mean'], places=6)
+
+        del cache._submit_table_build
+        cache.MAX_TABLE_PIXELS = 120 * 100
+        cache.get_table(self.model, 1, wait=True)
+        self.assertEqual([key[1] for key in cache._tables], [1])
+
+    def test_batch_statistics(self):
+        """批量统计（含重叠与越界 ROI）与逐个计算一致"""
+        rng = np.random.default_rng(1)
+        self.model.load_single_image(rng.normal(0, 100, (2, 64, 64)).astype(np.float32))
+        rois = [CircleROI((20, 20), 8, 0), CircleROI((24, 22), 8, 0), EllipseROI((60, 5), 9, 4, 1),
+                RectangleROI((30, 30), (40, 63), 1), CircleROI((-20, -20), 3, 0)]
+        batch = calculate_batch_roi_statistics(self.model, rois)
+        for roi in rois:
+            expected = calculate_roi_statistics(self.model, roi)
+            if expected is None:
+                self.assertIsNone(batch[roi.id])
+                continue
+            for key in ('count', 'min', 'max'):
+                self.assertEqual(batch[roi.id][key], expected[key])
+            self.assertAlmostEqual(batch[roi.id]['mean'], expected['mean'], places=4)
+            self.assertAlmostEqual(batch[roi.id]['std'], expected['std'], places=4)
+
+
+class TestLocalMask(unittest.TestCase):
+    """包围盒局部掩码测试"""
+
+    def test_matches_full_image_predicate(self):
+        """局部掩码放回整幅图像后与逐像素判定一致（含越界裁剪）"""
+        height, width = 40, 50
+        y, x = np.ogrid[:height, :width]
+        for cy, cx, r in [(20, 25, 7), (2, 48, 9), (-3, 10, 5), (20, 25, 0)]:
+            expected = (x - cx) ** 2 + (y - cy) ** 2 <= r ** 2
+            np.testing.assert_array_equal(CircleROI((cy, cx), r, 0).get_mask(height, width), expected)
+        for cy, cx, ry, rx in [(20, 25, 6, 13), (38, 1, 11, 4)]:
+            expected = ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1
+            np.testing.assert_array_equal(EllipseROI((cy, cx), rx, ry, 0).get_mask(height, width), expected)
+
+    def test_bbox_is_local(self):
+        """小 ROI 的掩码只覆盖其包围盒"""
+        bbox, mask = CircleROI((1000, 1000), 5, 0).get_local_mask(2048, 2048)
+        self.assertEqual(bbox, (slice(995, 1006), slice(995, 1006)))
+        self.assertEqual(mask.shape, (11, 11))
+        self.assertIsNone(CircleROI((-50, -50), 5, 0).get_local_mask(2048, 2048))
+
+
+class TestAnnotationIndex(unittest.TestCase):
+    """标注空间索引测试"""
+
+    def setUp(self):
+        self.model = ImageDataModel()
+        rng = np.random.default_rng(3)
+        for i in range(200):
+            cy, cx = rng.integers(0, 512, 2)
+            if i % 3 == 0:
+                roi = RectangleROI((cy, cx), (cy + rng.integers(1, 90), cx + rng.integers(1, 90)), i % 4)
+            elif i % 3 == 1:
+                roi = CircleROI((cy, cx), int(rng.integers(1, 40)), i % 4)
+            else:
+                roi = EllipseROI((cy, cx), int(rng.integers(1, 40)), int(rng.integers(1, 40)), i % 4)
+            self.model.add_roi(roi)
+
+    def _brute_force(self, slice_index, y, x, tol):
+        return [roi for roi in reversed(self.model.rois)
+                if roi.slice_index == slice_index and roi.hit_test((y, x), tol=tol) != 'none']
+
+    def test_point_query_matches_scan(self):
+        """网格候选加精确命中测试与线性扫描结果一致（含顺序）"""
+        rng = np.random.default_rng(4)
+        for y, x in rng.integers(-20, 560, (200, 2)):
+            hits = [roi for roi in self.model.find_rois_at(1, y, x, tolerance=10)
+                    if roi.hit_test((y, x), tol=10) != 'none']
+            self.assertEqual(hits, self._brute_force(1, y, x, 10))
+
+    def test_edits_reindexed(self):
+        """移动、换切片和删除后索引与列表保持一致"""
+        roi = CircleROI((1000, 1000), 5, 2)
+        self.model.add_roi(roi)
+        self.assertEqual(self.model.find_rois_at(2, 1000, 1000), [roi])
+        roi.move(300, 0)
+        self.assertEqual(self.model.find_rois_at(2, 1000, 1000), [])
+        self.assertEqual(self.model.find_rois_at(2, 1300, 1000), [roi])
+        roi.slice_index = 3
+        self.assertIs(self.model.get_rois_for_slice(3)[-1], roi)
+        self.assertNotIn(roi, self.model.get_rois_for_slice(2))
+
+        self.model.select_roi(self.model.rois[10].id)
+        self.model.select_roi(self.model.rois[20].id, multi=True)
+        removed = self.model.delete_selected_rois()
+        self.assertIsNone(self.model.get_roi_by_id(removed[0]))
+        for i in (0, 10, 100, len(self.model.rois) - 1):
+            self.assertEqual(self.model.get_roi_index(self.model.rois[i].id), i)
+        self.assertEqual(self.model.get_rois_for_slice(0),
+                         [r for r in self.model.rois if r.slice_index == 0])
+
+    def test_measurement_hit(self):
+        """测量线移动端点后按新位置命中"""
+        from PySide6.QtCore import QPointF
+        from medimager.core.image_data_model import MeasurementData
+        m = MeasurementData("m1", 0, QPointF(10, 10), QPointF(50, 10), 40.0)
+        self.model.add_measurement(m)
+        self.assertEqual(self.model.find_measurements_at(0, 10, 30, 2), [m])
+        m.end_point = QPointF(10, 80)
+        self.assertEqual(self.model.find_measurements_at(0, 10, 30, 2), [])
+        self.assertEqual(self.model.find_measurements_at(0, 50, 10, 2), [m])
+        self.assertTrue(self.model.remove_measurement("m1"))
+        self.assertEqual(self.model.get_measurements_for_slice(0), [])
+
+
+class TestROITable(unittest.TestCase):
+    """列式 ROI 存储测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.model = ImageDataModel()
+        self.model.load_single_image(rng.normal(0, 100, (3, 80, 70)).astype(np.float32))
+        self.table = ROITable(capacity=4)
+        n = 60
+        self.table.add_circles(rng.integers(-10, 90, (n, 2)), rng.integers(0, 12, n), rng.integers(0, 3, n))
+        self.table.add_ellipses(rng.integers(-10, 90, (n, 2)), rng.integers(-2, 12, n),
+                                rng.integers(-2, 12, n), rng.integers(0, 3, n))
+        self.table.add_rectangles(rng.integers(-10, 90, (n, 2)), rng.integers(-10, 90, (n, 2)),
+                                  rng.integers(0, 3, n))
+
+    def test_column_statistics_match_objects(self):
+        """整列向量化统计与逐个 ROI 对象计算一致（含分批与越界）"""
+        stats = calculate_table_statistics(self.model, self.table, max_pixels=500)
+        for row, view in enumerate(self.table):
+            expected = calculate_roi_statistics(self.model, view.to_roi())
+            if expected is None:
+                self.assertEqual(stats['count'][row], 0)
+                continue
+            self.assertEqual(stats['count'][row], expected['count'])
+            self.assertEqual((stats['min'][row], stats['max'][row]), (expected['min'], expected['max']))
+            self.assertAlmostEqual(stats['mean'][row], expected['mean'], places=4)
+            self.assertAlmostEqual(stats['std'][row], expected['std'], places=4)
+
+    def test_views_follow_roi_api(self):
+        """视图可放入模型，编辑写回列并使索引与统计缓存失效"""
+        view = self.table.view(0)
+        self.assertIs(self.table.view(0), view)
+        self.model.add_roi(view)
+        cache = self.model.roi_statistics
+        self.assertIsNotNone(cache.get(self.model, view))
+
+        view.center = (40, 35)
+        self.assertEqual(tuple(self.table.geometry[0, :2]), (40, 35))
+        self.assertEqual(self.model.find_rois_at(view.slice_index, 40, 35), [view])
+        self.assertFalse(cache.peek(self.model, view)[1])
+        self.assertAlmostEqual(cache.get(self.model, view)['mean'],
+                               calculate_roi_statistics(self.model, view.to_roi())['mean'], places=5)
+
+        # 整表批量移动只通知变化行中已创建的视图
+        self.table.move(np.arange(0, len(self.table), 2), 5, -5)
+        self.assertEqual(self.model.find_rois_at(view.slice_index, 45, 30), [view])
+
+        rect = self.table.view(len(self.table) - 1)
+        rect.start_resize(3)
+        rect.resize(3, (rect.bottom_right[0] + 5, rect.bottom_right[1] + 5))
+        rect.end_resize()
+        self.assertEqual(rect.bottom_right, tuple(self.table.geometry[-1, 2:]))
+
+        self.table.remove(np.arange(1, 50))
+        self.assertEqual(self.table.view(0).id, view.id)
+        self.assertEqual(len(self.table), 131)
+
+
+class TestVolumeROI(unittest.TestCase):
+    """三维 ROI 流式统计测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.volume = rng.normal(40, 200, (12, 48, 40)).astype(np.int16)
+        self.model = ImageDataModel()
+        self.model.load_single_image(self.volume, {'Pixel Spacing': [0.5, 0.8], 'Slice Thickness': 2.5})
+        z, y, x = np.ogrid[:12, :48, :40]
+        self.grid = (z * 2.5, y * 0.5, x * 0.8)
+
+    def _check(self, roi, expected_mask):
+        stats = self.model.volume_roi_statistics.get(self.model, roi)
+        values = self.volume[expected_mask]
+        self.assertEqual(stats['count'], values.size)
+        self.assertEqual((stats['min'], stats['max']), (values.min(), values.max()))
+        self.assertAlmostEqual(stats['mean'], values.mean(), places=6)
+        self.assertAlmostEqual(stats['std'], values.std(), places=6)
+        self.assertAlmostEqual(stats['volume_ml'], values.size * 2.5 * 0.5 * 0.8 / 1000)
+        self.assertAlmostEqual(stats['histogram'].percentile(50), np.percentile(values, 50), delta=1.0)
+        return stats
+
+    def test_matches_voxel_mask(self):
+        """逐切片流式统计与整体体素掩码一致（含越界裁剪）"""
+        self.assertEqual(self.model.get_voxel_spacing(), (2.5, 0.5, 0.8))
+        z, y, x = self.grid
+        cylinder = CylinderROI((5, 20, 18.5), radius_mm=6, height_mm=11)
+        mask = (np.abs(z - 5 * 2.5) <= 5.5) & ((y - 10) ** 2 + (x - 18.5 * 0.8) ** 2 <= 36)
+        self._check(cylinder, mask)
+
+        ellipsoid = EllipsoidROI((1.5, 44, 3), radii_mm=(9, 5, 7))
+        mask = ((z - 1.5 * 2.5) / 9) ** 2 + ((y - 22) / 5) ** 2 + ((x - 2.4) / 7) ** 2 <= 1
+        self._check(ellipsoid, mask)
+
+    def test_cached_until_moved(self):
+        """结果缓存到 ROI 变化为止"""
+        roi = CylinderROI((6, 24, 20), radius_mm=5, height_mm=10)
+        self.model.add_volume_roi(roi)
+        stats = self.model.volume_roi_statistics.get(self.model, roi)
+        self.assertIs(self.model.volume_roi_statistics.get(self.model, roi), stats)
+
+        roi.move(1, 0, 0)
+        self.assertFalse(self.model.volume_roi_statistics.peek(self.model, roi)[1])
+        moved = self.model.volume_roi_statistics.get(self.model, roi)
+        self.assertEqual(moved['mean'], calculate_volume_roi_statistics(self.model, roi)['mean'])
+        self.assertNotEqual(moved['mean'], stats['mean'])
+        progress = []
+        calculate_volume_roi_statistics(self.model, roi, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress, [(1, 5), (2, 5), (3, 5), (4, 5), (5, 5)])
+        self.assertIsNone(calculate_volume_roi_statistics(self.model, roi, is_cancelled=lambda: True))
+
+    def test_discard_during_computation(self):
+        """计算期间移除 ROI 时不写回结果；完成的计算不再留在等待表中"""
+        from unittest import mock
+        import threading
+        from medimager.core import analysis
+
+        cache = self.model.volume_roi_statistics
+        roi = CylinderROI((6, 24, 20), radius_mm=5, height_mm=10)
+        gate = threading.Event()
+
+        def gated(*args, **kwargs):
+            gate.wait(5)
+            return calculate_volume_roi_statistics(*args, **kwargs)
+
+        with mock.patch.object(analysis, 'calculate_volume_roi_statistics', gated):
+            future = cache.request(self.model, roi)
+            cache.discard(roi.id)
+            gate.set()
+            self.assertIsNone(future.result(timeout=10))
+        self.assertEqual(cache.peek(self.model, roi), (None, False))
+
+        stats = cache.request(self.model, roi).result(timeout=10)
+        self.assertIsNotNone(stats)
+        deadline = time.monotonic() + 5
+        while cache._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cache._pending, {})
+        self.assertEqual(cache.peek(self.model, roi), (stats, True))
+
+    def test_dicom_series_spacing(self):
+        """DicomParser 载入的序列（关键字头信息）按像素间距与层间距换算；无有效像素间距时按像素计"""
+        phantom_dir = project_root / "medimager" / "tests" / "dcm" / "water_phantom"
+        model = ImageDataModel()
+        self.assertTrue(model.load_dicom_series(sorted(str(p) for p in phantom_dir.glob("*.dcm"))))
+        self.assertEqual(model.get_voxel_spacing(), (2.0, 0.5, 0.5))
+        self.assertEqual(model.get_pixel_spacing(), (0.5, 0.5))
+        self.assertEqual(calculate_line_profile(model, 0, (10, 10), (10, 20)).unit, "mm")
+
+        model.dicom_header = {'Pixel Spacing': [0, 0]}
+        self.assertIsNone(model.get_pixel_spacing())
+        self.assertEqual(model.get_voxel_spacing()[1:], (1.0, 1.0))
+        self.assertEqual(calculate_line_profile(model, 0, (10, 10), (10, 20)).unit, "px")
+
+
+class TestLineProfile(unittest.TestCase):
+    """线剖面采样测试"""
+
+    def setUp(self):
+        self.model = ImageDataModel()
+        rows, cols = np.mgrid[:80, :120]
+        self.model.load_single_image((2.0 * cols + 3.0 * rows).astype(np.float32)[np.newaxis])
+        self.model.dicom_header = {'PixelSpacing': [0.5, 0.25]}
+
+    def test_bilinear_samples_at_pixel_spacing(self):
+        """采样间距等于最小像素间距，斜线上的插值与线性图像解析值一致"""
+        profile = calculate_line_profile(self.model, 0, (10.3, 5.7), (60.9, 100.2))
+        self.assertEqual(profile.unit, "mm")
+        np.testing.assert_allclose(np.diff(profile.positions), 0.25)
+        fraction = profile.positions / np.hypot(50.6 * 0.5, 94.5 * 0.25)
+        rows = 10.3 + fraction * 50.6
+        cols = 5.7 + fraction * 94.5
+        np.testing.assert_allclose(profile.values, 2 * cols + 3 * rows, atol=1e-3)
+
+    def test_thick_profile_and_export(self):
+        """粗剖面在线性图像上等于中心线，出图部分为 NaN，可导出 CSV"""
+        import csv
+        import tempfile
+
+        thin = calculate_line_profile(self.model, 0, (40, 10), (40, 110))
+        thick = calculate_line_profile(self.model, 0, (40, 10), (40, 110), width=4.0)
+        self.assertEqual(thick.width, 4.0)
+        np.testing.assert_allclose(thick.values, thin.values, atol=1e-3)
+
+        outside = calculate_line_profile(self.model, 0, (40, 100), (40, 140))
+        self.assertTrue(np.isnan(outside.values[-1]))
+        self.assertFalse(np.isnan(outside.values[0]))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "profile.csv")
+            thick.to_csv(path)
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["distance_mm", "value"])
+        self.assertEqual(len(rows) - 1, len(thick.values))
+
+
+class TestTimeIntensityCurve(unittest.TestCase):
+    """时间-强度曲线测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.volume = rng.normal(100, 20, (12, 64, 64)).astype(np.float32)
+        self.model = ImageDataModel()
+        self.model.load_single_image(self.volume)
+
+    def test_matches_per_slice_statistics(self):
+        """曲线与逐切片 ROI 统计一致，内存映射的体数据同样可用"""
+        import tempfile
+
+        roi = EllipseROI((30, 25), 9, 6, 0)
+        curve = calculate_time_intensity_curve(self.model, roi)
+        for i in range(len(self.volume)):
+            roi.slice_index = i
+            stats = calculate_roi_statistics(self.model, roi)
+            self.assertAlmostEqual(curve["mean"][i], stats["mean"], places=3)
+            self.assertAlmostEqual(curve["std"][i], stats["std"], places=3)
+            self.assertEqual(curve["max"][i], stats["max"])
+            self.assertEqual(curve["count"], stats["count"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mapped = np.memmap(Path(tmp) / "volume.raw", dtype=np.float32, mode="w+", shape=self.volume.shape)
+            mapped[:] = self.volume
+            self.model.pixel_array = mapped
+            lazy = calculate_time_intensity_curve(self.model, roi, max_pixels=1000)
+            np.testing.assert_allclose(lazy["mean"], curve["mean"], rtol=1e-6)
+            del lazy, mapped
+            self.model.pixel_array = None
+
+    def test_incremental_after_move(self):
+        """移动 ROI 后增量更新的曲线与重新计算一致（含离开 ROI 的极值）"""
+        roi = CircleROI((32, 32), 10, 0)
+        self.model.add_roi(roi)
+        cache = self.model.time_intensity_curves
+        first = cache.get(self.model, roi)
+        self.assertIs(cache.get(self.model, roi), first)
+
+        self.volume[5, 32, 23] = 5000.0  # 移动后离开 ROI 的最大值
+        self.volume[7, 32, 43] = -5000.0  # 移动后进入 ROI 的最小值
+        self.model.pixel_array = self.volume
+        cache.get(self.model, roi)
+        for _ in range(3):
+            roi.move(0, 1)
+            curve = cache.get(self.model, roi)
+            expected = calculate_time_intensity_curve(self.model, roi)
+            for key in ("mean", "std", "min", "max"):
+                np.testing.assert_allclose(curve[key], expected[key], rtol=1e-6, atol=1e-6)
+        self.assertLess(curve["max"][5], 5000.0)
+        self.assertEqual(curve["min"][7], -5000.0)
+
+        self.model.clear_all_rois()
+        self.assertEqual(cache._states, {})
+
+
+class TestAnnotationOverlay(unittest.TestCase):
+    """标注图层缓存测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        from PySide6.QtWidgets import QApplication
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        from PySide6.QtCore import QPointF
+        from medimager.ui.image_viewer import ImageViewer
+        from medimager.ui.multi_viewer_grid import _gray_array_to_qimage
+
+        self.model = ImageDataModel()
+        self.model.load_single_image(np.zeros((1, 64, 64), dtype=np.float32))
+        self.viewer = ImageViewer()
+        self.viewer.set_model(self.model)
+        self.viewer.resize(200, 200)
+        self.viewer.display_qimage(_gray_array_to_qimage(self.model.get_display_slice()))
+        self.roi = RectangleROI((10, 10), (20, 20), 0)
+        self.model.add_roi(self.roi)
+        self.cross_point = QPointF(5, 5)
+
+    def _paint(self):
+        self.viewer.viewport().grab()
+        return self.viewer._overlay_key
+
+    def test_overlay_reused_until_edit(self):
+        """交叉参考线变化只贴图，ROI 编辑、选中及信息框移动后重绘图层"""
+        from PySide6.QtCore import QRect
+
+        key = self._paint()
+        pixmap = self.viewer._overlay_pixmap
+        self.assertIsNotNone(pixmap)
+
+        self.viewer.show_cross_reference(self.cross_point)
+        self.assertEqual(self._paint(), key)
+        self.assertIs(self.viewer._overlay_pixmap, pixmap)
+
+        self.roi.move(2, 0)
+        self.assertNotEqual(self._paint(), key)
+
+        # 选中状态与信息框位置变化也会重绘
+        key = self._paint()
+        self.model.select_roi(self.roi.id)
+        self.assertNotEqual(self._paint(), key)
+        key = self._paint()
+        self.viewer.stats_box_positions[self.roi.id] = QRect(40, 10, 20, 10)
+        self.assertNotEqual(self._paint(), key)
+
+    def test_live_annotation_excluded(self):
+        """拖动中的 ROI 不进入图层，移动及其统计刷新时图层不变"""
+        from PySide6.QtCore import QRect
+
+        self.viewer.stats_box_positions[self.roi.id] = QRect(40, 10, 20, 10)
+        self.viewer.set_live_annotation(self.roi.id)
+        key = self._paint()
+        self.roi.move(3, 3)
+        self.viewer._refresh_roi_statistics()
+        self.assertEqual(self._paint(), key)
+
+        self.viewer.set_live_annotation(None)
+        self.assertNotEqual(self._paint(), key)
+
+    def test_measurement_profile_mode(self):
+        """剖面模式下预览测量线时实时更新剖面曲线"""
+        from PySide6.QtCore import QPointF
+        from medimager.ui.tools.measurement_tool import MeasurementTool
+
+        tool = MeasurementTool(self.viewer)
+        tool.profile_mode = True
+        tool.profile_width = 2.0
+        tool._update_profile(QPointF(5.5, 30.5), QPointF(60.5, 30.5))
+        profile = self.viewer.line_profile_plot.profile
+        self.assertIs(profile, tool.profile)
+        self.assertEqual(profile.start, (30.0, 5.0))
+        self.assertEqual(len(profile.values), 56)
+        self.viewer.viewport().grab()
+
+        tool.deactivate()
+        self.assertIsNone(self.viewer.line_profile_plot.profile)
+
+    def test_region_grow_tool(self):
+        """区域生长工具生成的掩码写入标签图层，视图帧经调色板叠加为 ARGB32"""
+        from medimager.core.multi_series_manager import ViewPosition
+        from medimager.ui.multi_viewer_grid import ViewFrame
+        from medimager.ui.tools.region_grow_tool import RegionGrowTool
+
+        frame = ViewFrame("view", ViewPosition.TOP_LEFT)
+        frame.bind_series("series", self.model, "")
+        key = frame.render_cache_key()
+        tool = RegionGrowTool(self.viewer)
+        future = tool.grow_at(0, 40, 40)
+        self.assertIsNone(tool.grow_at(0, 10, 10))  # 上一次生长尚未完成
+        future.result(timeout=10)
+        deadline = time.monotonic() + 10
+        while tool._pending is not None and time.monotonic() < deadline:
+            self.app.processEvents()
+        mask = self.model.label_masks[-1]
+        self.assertIs(mask, future.result())
+        self.assertEqual(mask.voxel_count, 64 * 64)
+        self.assertIsNone(tool._pending)
+        self.assertNotEqual(frame.render_cache_key(), key)
+        display, _ = frame.compute_display_frame()
+        self.assertEqual(display.dtype, np.uint32)
+        self.model.remove_label_mask(mask.id)
+        display, _ = frame.compute_display_frame()
+        self.assertEqual(display.dtype, np.uint8)
+        self.assertIsNone(tool.grow_at(0, 64, 10))
+        self.assertIsNone(tool.grow_at(0, -1, 10))
+
+    def test_downsampled_frame_clipped_to_image(self):
+        """降采样帧尺寸向上取整时，图元与场景矩形裁剪到真实图像尺寸，翻转后对齐场景原点"""
+        from medimager.ui.multi_viewer_grid import _gray_array_to_qimage
+
+        # 10 x 9 的图像按 4 倍降采样为 3 x 3 帧，放大后为 12 x 12
+        frame = _gray_array_to_qimage(np.zeros((3, 3), dtype=np.uint8))
+        self.viewer.display_qimage(frame, 4, (10, 9))
+        self.assertEqual(self.viewer.get_image_rect().size().toTuple(), (10, 9))
+        self.assertEqual(self.viewer.scene.sceneRect().size().toTuple(), (10, 9))
+        self.assertEqual(self.viewer.image_item.sceneBoundingRect().size().toTuple(), (10, 9))
+
+        self.viewer.flip_horizontal()
+        self.viewer.display_qimage(frame, 4, (10, 9))
+        self.assertEqual(self.viewer.image_item.sceneBoundingRect().toRect().getRect(), (0, 0, 10, 9))
+        self.assertEqual(self.viewer.image_item.offset().toTuple(), (-0.5, 0.0))
+
+        self.viewer.display_qimage(frame, 4)
+        self.assertEqual(self.viewer.get_image_rect().size().toTuple(), (12, 12))
+
+    def test_contour_paths_cached(self):
+        """标签轮廓与等 HU 轮廓按切片缓存路径，标签编辑后重新提取"""
+        image = np.zeros((1, 64, 64), dtype=np.float32)
+        image[0, 20:40, 20:40] = 100.0
+        self.model.pixel_array = image
+        labels = self.model.get_label_volume()
+        labels.set_label_color(1, (0, 255, 0))
+        labels.paint_mask(0, image[0] > 50, 1)
+        self.viewer.set_label_outlines(True)
+        self.viewer.set_iso_levels([50])
+        self._paint()
+        self._paint()
+        self.assertEqual(len(self.viewer._contour_cache), 2)
+        labels.paint_mask(0, np.ones((4, 4), dtype=bool), 1)
+        self._paint()
+        self.assertEqual(len(self.viewer._contour_cache), 3)
+
+    def test_time_intensity_dialog(self):
+        """对话框跟随选中的 ROI，移动后刷新并可导出"""
+        import tempfile
+        from medimager.ui.dialogs.time_intensity_dialog import TimeIntensityDialog
+
+        self.model.select_roi(self.roi.id)
+        dialog = TimeIntensityDialog(self.model)
+        self.assertEqual(dialog._curve["count"], 121)
+        self.roi.move(1, 1)
+        self.model.data_changed.emit()
+        self.assertEqual(dialog._roi_id, self.roi.id)
+        dialog.plot.grab()
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertTrue(dialog.export_csv(str(Path(tmp) / "tic.csv")))
+        dialog.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -163,6 +163,43 @@ class TestUISyncFunctionality(unittest.TestCase):
         self.assertEqual(len(view_frames), 4)
         logger.info("✓ 布局设置和视图创建成功")
 
+    def test_batched_window_level_sync(self):
+        """测试窗宽窗位同步时目标视图批量渲染"""
+        import numpy as np
+        from medimager.core.image_data_model import ImageDataModel
+
+        self.main_window = MainWindow()
+        self.main_window._set_layout((2, 2))
+        series_manager = self.main_window.series_manager
+        grid = self.main_window.multi_viewer_grid
+        sync_manager = self.main_window.sync_manager
+        sync_manager.set_sync_mode(SyncMode.WINDOW_LEVEL)
+
+        view_ids = series_manager.get_all_view_ids()
+        for i, view_id in enumerate(view_ids):
+            series_id = series_manager.add_series(SeriesInfo(series_id=f"batch_{i}", slice_count=2))
+            model = ImageDataModel()
+            model.load_single_image(np.random.rand(2, 64, 64).astype(np.float32) * 1000)
+            series_manager.load_series_data(series_id, model)
+            series_manager.bind_series_to_view(view_id, series_id)
+
+        # 统计每个视图的显示帧上传次数
+        uploads = []
+        for frame in grid.get_all_view_frames().values():
+            original = frame.apply_display_frame
+            frame.apply_display_frame = (lambda *args, _f=frame, _o=original:
+                                         (uploads.append(_f.view_id), _o(*args)))
+
+        sync_manager.sync_window_level(view_ids[0], 300, 50)
+
+        targets = sync_manager.get_sync_targets_for_view(view_ids[0])
+        self.assertEqual(len(targets), len(view_ids) - 1)
+        self.assertEqual(sorted(uploads), sorted(targets))
+        for view_id in targets:
+            model = grid.get_view_frame(view_id)._image_model
+            self.assertEqual((model.window_width, model.window_level), (300, 50))
+        logger.info("✓ 同步视图批量渲染成功")
+
 
 def run_core_sync_tests():
     """运行核心同步功能测试"""
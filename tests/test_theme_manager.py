@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主题设置缓存测试模块
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QApplication
+
+from medimager.utils.theme_manager import (
+    get_theme_settings, get_theme_resources, invalidate_theme_cache
+)
+
+
+class TestThemeCache(unittest.TestCase):
+    """主题设置与绘制资源缓存测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def tearDown(self):
+        invalidate_theme_cache()
+
+    def test_settings_cached(self):
+        """重复读取返回同一份设置，失效后重新加载"""
+        first = get_theme_settings('roi', 'default')
+        self.assertTrue(first)
+        self.assertIs(get_theme_settings('roi', 'default'), first)
+
+        invalidate_theme_cache('roi')
+        reloaded = get_theme_settings('roi', 'default')
+        self.assertIsNot(reloaded, first)
+        self.assertEqual(reloaded, first)
+
+    def test_resources_reused(self):
+        """绘制资源按键缓存，缺省键使用默认值"""
+        resources = get_theme_resources('roi', 'default')
+        pen = resources.pen('border_color', 'line_width', '#FFFF00', 2, cosmetic=True)
+        self.assertIs(resources.pen('border_color', 'line_width', '#FFFF00', 2, cosmetic=True), pen)
+        self.assertTrue(pen.isCosmetic())
+        self.assertEqual(resources.color('missing_key', '#123456').name(), '#123456')
+        self.assertEqual(resources.pen('border_color', default_width=3).width(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
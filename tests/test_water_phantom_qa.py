@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+水模自动质控测试模块
+"""
+
+import csv
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from medimager.core.batch_analysis import discover_series
+from medimager.core.image_data_model import ImageDataModel
+from medimager.core.water_phantom_qa import (
+    QA_FIELDS, analyze_water_phantom, find_phantom, main, noise_power_spectrum
+)
+
+PHANTOM_DIR = project_root / "medimager" / "tests" / "dcm" / "water_phantom"
+
+
+def make_phantom(center, radius, size=256, water=0.0, noise=5.0, seed=0):
+    """生成一个带 PMMA 外壁的圆形水模切片"""
+    rng = np.random.default_rng(seed)
+    y, x = np.ogrid[:size, :size]
+    distances = np.hypot(y - center[0], x - center[1])
+    image = np.full((size, size), -1000.0, dtype=np.float32)
+    image[distances <= radius] = 120.0
+    image[distances <= radius - 4] = water
+    return image + rng.normal(0, noise, image.shape).astype(np.float32)
+
+
+class TestWaterPhantomQA(unittest.TestCase):
+    """水模定位、标准 ROI 与 NPS 测试"""
+
+    def test_find_off_center_phantom(self):
+        """径向剖面拟合得到偏心水模的圆心与半径"""
+        volume = np.stack([make_phantom((120.3, 140.6), 90), make_phantom((100, 100), 70),
+                           np.full((256, 256), -1000.0, dtype=np.float32)])
+        centers, radii = find_phantom(volume)
+        np.testing.assert_allclose(centers[0], (120.3, 140.6), atol=0.3)
+        np.testing.assert_allclose(centers[1], (100, 100), atol=0.3)
+        np.testing.assert_allclose(radii[:2], (90, 70), atol=1.0)
+        self.assertTrue(np.isnan(radii[2]))
+
+    def test_reference_phantom_series(self):
+        """生成脚本的参考水模通过质控，外周 ROI 落在水中"""
+        model = ImageDataModel(auto_histogram=False)
+        model.load_dicom_series(discover_series([PHANTOM_DIR])[0])
+        result = analyze_water_phantom(model)
+        summary = result.summary()
+        self.assertEqual(summary["slices"], model.get_slice_count())
+        self.assertAlmostEqual(summary["radius_mm"], 236.5 * 0.5, delta=0.5)
+        self.assertLess(abs(summary["mean_hu"]), 1.0)
+        self.assertLess(summary["uniformity"], 2.0)
+        self.assertTrue(4.0 < summary["noise"] < 6.0)
+        self.assertTrue(summary["passed"])
+        # 外周 ROI 完全在水模内壁以内
+        reach = np.hypot(*(result.roi_centers[:, 1:] - result.centers[:, None, :]).transpose(2, 0, 1))
+        self.assertTrue((reach + result.roi_radius_px[:, None] < 236 - 8).all())
+
+    def test_offset_water_fails(self):
+        """水 CT 值偏离容差时判定为不通过，未找到水模的切片无指标"""
+        model = ImageDataModel(auto_histogram=False)
+        model.pixel_array = np.stack([make_phantom((128, 128), 110, water=12.0),
+                                      np.full((256, 256), -1000.0, dtype=np.float32)])
+        result = analyze_water_phantom(model)
+        self.assertAlmostEqual(result.mean_hu[0], 12.0, delta=1.0)
+        self.assertFalse(result.passed())
+        rows = result.rows()
+        self.assertIsNone(rows[1]["mean_hu"])
+        self.assertEqual(rows[-1]["slice"], "all")
+
+    def test_nps_integrates_to_variance(self):
+        """二维 NPS 在频域上的积分等于像素方差，白噪声的径向 NPS 近似平坦"""
+        rng = np.random.default_rng(1)
+        patches = rng.normal(0, 10, (200, 32, 32))
+        spacing = (0.5, 0.8)
+        frequencies, nps, nps_2d = noise_power_spectrum(patches, spacing)
+        integral = nps_2d.sum() / (32 * 0.5 * 32 * 0.8)
+        self.assertAlmostEqual(integral, patches.var(axis=(1, 2), ddof=0).mean(), delta=0.5)
+        self.assertLessEqual(frequencies[-1], 0.5 / 0.8 + 1e-9)
+        expected = 100 * 0.5 * 0.8
+        np.testing.assert_allclose(nps[1:], expected, rtol=0.2)
+
+    def test_command_line(self):
+        """命令行对序列目录输出逐切片与汇总行"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "qa.csv"
+            self.assertEqual(main([str(PHANTOM_DIR), "-o", str(output), "-j", "0"]), 0)
+            with open(output, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                self.assertEqual(reader.fieldnames, QA_FIELDS)
+                rows = list(reader)
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[-1]["slice"], "all")
+        self.assertEqual(rows[-1]["passed"], "True")
+
+
+if __name__ == '__main__':
+    unittest.main()